@@ -34,6 +34,7 @@ from pds_ultimate.bot.conversation import (
 )
 from pds_ultimate.config import config, logger
 from pds_ultimate.core.agent import agent
+from pds_ultimate.core.aggregates import ledger_totals, order_item_counts
 from pds_ultimate.core.database import (
     AgentThought,
     ArchivedOrderItem,
@@ -41,6 +42,7 @@ from pds_ultimate.core.database import (
     ContactType,
     ConversationHistory,
     ItemStatus,
+    LedgerBalance,
     Order,
     OrderItem,
     OrderStatus,
@@ -49,6 +51,7 @@ from pds_ultimate.core.database import (
 )
 from pds_ultimate.core.llm_engine import llm_engine
 from pds_ultimate.core.user_manager import user_manager
+from pds_ultimate.modules.finance.rate_snapshot import rate_book
 
 router = Router(name="universal")
 
@@ -749,8 +752,10 @@ async def _state_awaiting_expense(
     ))
 
     # Считаем остаток
-    income_usd = _convert_to_usd(order.income, order.income_currency)
-    expense_usd = _convert_to_usd(amount, currency)
+    income_usd, expense_usd = _convert_many_to_usd([
+        (order.income or 0, order.income_currency or "USD"),
+        (amount, currency),
+    ], db_session)
     remainder = income_usd - expense_usd
 
     # Переводим заказ в фазу трекинга
@@ -1012,14 +1017,11 @@ async def _finalize_order(
     Временный файл → удаляется
     """
     # Расчёт
-    income_usd = _convert_to_usd(
-        order.income or 0, order.income_currency or "USD")
-    expense_goods_usd = _convert_to_usd(
-        order.expense_goods or 0, order.expense_goods_currency or "USD"
-    )
-    delivery_usd = _convert_to_usd(
-        order.delivery_cost or 0, order.delivery_currency or "USD"
-    )
+    income_usd, expense_goods_usd, delivery_usd = _convert_many_to_usd([
+        (order.income or 0, order.income_currency or "USD"),
+        (order.expense_goods or 0, order.expense_goods_currency or "USD"),
+        (order.delivery_cost or 0, order.delivery_currency or "USD"),
+    ], db_session)
 
     remainder = income_usd - expense_goods_usd
     net_profit = remainder - delivery_usd
@@ -1154,16 +1156,13 @@ async def _get_order_status(
     if not active:
         return "Нет активных заказов."
 
+    counts = order_item_counts(db_session, [o.id for o in active])
     lines = ["📋 Активные заказы:\n"]
     for o in active:
-        item_count = db_session.query(
-            OrderItem).filter_by(order_id=o.id).count()
-        pending = db_session.query(OrderItem).filter_by(
-            order_id=o.id, status=ItemStatus.PENDING
-        ).count()
+        c = counts[o.id]
         lines.append(
             f"• {o.order_number} | {o.status.value} | "
-            f"Позиций: {item_count} (ждём: {pending})"
+            f"Позиций: {c.total} (ждём: {c.pending})"
         )
 
     return "\n".join(lines)
@@ -1175,28 +1174,13 @@ async def _finance_query(
     db_session: Session,
 ) -> str:
     """Финансовый запрос — LLM строит ответ из данных БД."""
-    # Собираем сводку
-    from sqlalchemy import func
-
-    total_income = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.INCOME).scalar() or 0
-
-    total_goods = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.EXPENSE_GOODS).scalar() or 0
-
-    total_delivery = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.EXPENSE_DELIVERY).scalar() or 0
-
-    total_savings = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.PROFIT_SAVINGS).scalar() or 0
-
-    total_profit_exp = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.PROFIT_EXPENSES).scalar() or 0
+    # Собираем сводку (один GROUP BY по типам)
+    totals = ledger_totals(db_session)
+    total_income = totals.income
+    total_goods = totals.expense_goods
+    total_delivery = totals.expense_delivery
+    total_savings = totals.to_savings
+    total_profit_exp = totals.to_expenses
 
     completed_orders = db_session.query(Order).filter(
         Order.status.in_([OrderStatus.COMPLETED, OrderStatus.ARCHIVED])
@@ -1340,8 +1324,6 @@ async def _handle_contact_note(ctx, text, entities, db_session):
 
 async def _morning_brief(db_session: Session) -> str:
     """Утренний брифинг."""
-    from sqlalchemy import func
-
     # Активные заказы
     active_orders = db_session.query(Order).filter(
         Order.status.notin_([OrderStatus.ARCHIVED, OrderStatus.COMPLETED])
@@ -1353,20 +1335,10 @@ async def _morning_brief(db_session: Session) -> str:
     ).count()
 
     # Финансы
-    total_income = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.INCOME).scalar() or 0
-
-    total_expenses = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter(Transaction.transaction_type.in_([
-        TransactionType.EXPENSE_GOODS,
-        TransactionType.EXPENSE_DELIVERY,
-    ])).scalar() or 0
-
-    total_savings = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.PROFIT_SAVINGS).scalar() or 0
+    totals = ledger_totals(db_session)
+    total_income = totals.income
+    total_expenses = totals.expense_goods + totals.expense_delivery
+    total_savings = totals.to_savings
 
     balance = total_income - total_expenses
 
@@ -1384,18 +1356,26 @@ async def _morning_brief(db_session: Session) -> str:
 
 async def _security_emergency(db_session: Session) -> str:
     """Экстренное удаление финансовых данных."""
-    from pds_ultimate.config import ALL_ORDERS_ARCHIVE_PATH, MASTER_FINANCE_PATH
+    from pds_ultimate.config import (
+        ALL_ORDERS_ARCHIVE_LOG_PATH,
+        ALL_ORDERS_ARCHIVE_PATH,
+        MASTER_FINANCE_PATH,
+    )
+    from pds_ultimate.modules.logistics.archive_sink import archive_sink
 
     # Удаляем файлы
-    for fp in [MASTER_FINANCE_PATH, ALL_ORDERS_ARCHIVE_PATH]:
+    for fp in [MASTER_FINANCE_PATH, ALL_ORDERS_ARCHIVE_PATH,
+               ALL_ORDERS_ARCHIVE_LOG_PATH]:
         if fp.exists():
             try:
                 os.remove(fp)
             except OSError:
                 pass
+    archive_sink.forget_state()
 
     # Очищаем финансовые таблицы
     db_session.query(Transaction).delete()
+    db_session.query(LedgerBalance).delete()
     db_session.commit()
 
     logger.critical("🚨 SECURITY MODE ACTIVATED — финансовые данные удалены")
@@ -1468,14 +1448,17 @@ def _parse_amount(text: str) -> tuple[float | None, str]:
 
 
 def _convert_to_usd(amount: float, currency: str) -> float:
-    """Конвертировать в USD по фиксированным курсам."""
-    if currency == "USD":
-        return amount
-    rates = config.currency.fixed_rates
-    if currency in rates:
-        return round(amount / rates[currency], 2)
-    # Для других валют — TODO: динамический курс
-    return amount
+    """Конвертировать в USD по текущему снапшоту курсов."""
+    return round(rate_book.current.to_usd(amount, currency), 2)
+
+
+def _convert_many_to_usd(
+    pairs: list[tuple[float, str]],
+    db_session: Session | None = None,
+) -> list[float]:
+    """Пакет (сумма, валюта) → USD одним снапшотом курсов."""
+    snap = rate_book.snapshot(db_session)
+    return [round(v, 2) for v in snap.to_usd_many(pairs)]
 
 
 def _format_items_list(items) -> str:
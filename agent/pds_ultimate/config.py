@@ -89,6 +89,8 @@ CREDENTIALS_DIR.mkdir(parents=True, exist_ok=True)
 DATABASE_PATH = DATA_DIR / "pds_ultimate.db"
 MASTER_FINANCE_PATH = DATA_DIR / "Master_Finance.xlsx"
 ALL_ORDERS_ARCHIVE_PATH = DATA_DIR / "All_Orders_Archive.xlsx"
+# Append-only журнал архива (источник для All_Orders_Archive.xlsx)
+ALL_ORDERS_ARCHIVE_LOG_PATH = DATA_DIR / "All_Orders_Archive.jsonl"
 
 # Логи
 LOGS_DIR = BASE_DIR / "logs"
@@ -184,6 +186,17 @@ class DeepSeekConfig:
     max_retries: int = _env_int("DEEPSEEK_MAX_RETRIES", 3)
     # HTTP-прокси (наследуется от TG_PROXY если не задано явно)
     proxy: str = _env("DEEPSEEK_PROXY", _env("TG_PROXY", ""))
+    # Пул соединений (core/llm_transport.py)
+    pool_max_connections: int = _env_int("DEEPSEEK_POOL_MAX", 20)
+    pool_max_keepalive: int = _env_int("DEEPSEEK_POOL_KEEPALIVE", 10)
+    # HTTP/2 (нужен пакет h2: pip install 'httpx[http2]')
+    http2: bool = _env_bool("DEEPSEEK_HTTP2", True)
+    # Одновременных запросов на модель
+    max_concurrency: int = _env_int("DEEPSEEK_MAX_CONCURRENCY", 8)
+    # Бюджет запросов в минуту на модель (0 — только заголовки лимитов)
+    rpm: float = _env_float("DEEPSEEK_RPM", 0)
+    # Агент читает ответ потоком и действует по первому JSON-объекту
+    agent_stream: bool = _env_bool("DEEPSEEK_AGENT_STREAM", True)
 
     def validate(self) -> None:
         if not self.api_key:
@@ -250,6 +263,8 @@ class CurrencyConfig:
     base_currency: str = _env("BASE_CURRENCY", "USD")
     # Кэш курсов (время жизни в секундах, 6 часов)
     cache_ttl: int = _env_int("CURRENCY_CACHE_TTL", 21600)
+    # Интервал пакетного обновления снапшота курсов (мин, 0 — выключено)
+    refresh_minutes: int = _env_int("CURRENCY_REFRESH_MINUTES", 360)
 
 
 # ─── Финансы ─────────────────────────────────────────────────────────────────
@@ -302,6 +317,8 @@ class LogisticsConfig:
     reminder_hours: int = _env_int("LOGISTICS_REMINDER_HOURS", 2)
     # Вечернее напоминание (час)
     evening_reminder_hour: int = _env_int("LOGISTICS_EVENING_HOUR", 20)
+    # Фоновая пересборка All_Orders_Archive.xlsx из журнала (минуты, 0 = выкл)
+    archive_export_minutes: int = _env_int("ARCHIVE_EXPORT_MINUTES", 10)
 
 
 # ─── Планировщик ─────────────────────────────────────────────────────────────
@@ -361,6 +378,46 @@ class OCRConfig:
         default_factory=lambda: ["ru", "en", "ch_sim"])
     # Уверенность распознавания (0.0 - 1.0)
     confidence_threshold: float = _env_float("OCR_CONFIDENCE", 0.5)
+    # Пул процессов OCR (modules/files/ocr_service.py); 0 = поток, без пула
+    workers: int = _env_int("OCR_WORKERS", 2)
+    # Максимум изображений в очереди (ожидающих + распознаваемых)
+    max_queue: int = _env_int("OCR_MAX_QUEUE", 16)
+    # Загрузить модель EasyOCR в воркерах при старте бота
+    warmup: bool = _env_bool("OCR_WARMUP", True)
+
+
+# ─── File Converter ─────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class ConverterConfig:
+    """Конфигурация конвертера файлов (modules/files/converter.py)."""
+    # Пул процессов конвертации; 0 = поток, без пула
+    workers: int = _env_int("CONVERTER_WORKERS", 2)
+    # Максимум файлов в очереди (ожидающих + конвертируемых)
+    max_queue: int = _env_int("CONVERTER_MAX_QUEUE", 32)
+    # Не конвертировать повторно файл с тем же содержимым (sha256)
+    cache_enabled: bool = _env_bool("CONVERTER_CACHE", True)
+    cache_path: Path = Path(
+        _env("CONVERTER_CACHE_PATH", str(DATA_DIR / "convert_cache.json")))
+
+
+# ─── Translator ─────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class TranslatorConfig:
+    """Конфигурация переводчика (modules/executive/translator.py)."""
+    # Постоянная память переводов (modules/executive/translation_memory.py)
+    memory_enabled: bool = _env_bool("TRANSLATOR_MEMORY", True)
+    memory_path: Path = Path(_env(
+        "TRANSLATOR_MEMORY_PATH", str(DATA_DIR / "translation_memory.sqlite")))
+    # Порог похожести для fuzzy-совпадения (1.0 = только точные/шаблон)
+    fuzzy_threshold: float = _env_float("TRANSLATOR_FUZZY_THRESHOLD", 0.92)
+    # Бюджет токенов исходного текста на один LLM-запрос пакета
+    batch_token_budget: int = _env_int("TRANSLATOR_BATCH_TOKENS", 1500)
+    # Максимум сообщений в одном LLM-запросе пакета
+    batch_max_items: int = _env_int("TRANSLATOR_BATCH_ITEMS", 20)
+    # Одновременных LLM-запросов при пакетном переводе
+    concurrency: int = _env_int("TRANSLATOR_CONCURRENCY", 4)
 
 
 # ─── Browser Engine ─────────────────────────────────────────────────────────
@@ -413,6 +470,116 @@ class BrowserConfig:
     timezone: str = _env("BROWSER_TIMEZONE", "Asia/Ashgabat")
 
 
+# ─── Research Fetch ─────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class ResearchConfig:
+    """Конфигурация загрузки страниц для research (core/research_fetcher.py)."""
+    # Максимум одновременных загрузок страниц (все домены)
+    max_concurrency: int = _env_int("RESEARCH_MAX_CONCURRENCY", 6)
+    # Максимум одновременных загрузок с одного домена
+    per_domain: int = _env_int("RESEARCH_PER_DOMAIN", 2)
+    # Минимальный интервал между запросами к одному домену (мс)
+    domain_delay_ms: int = _env_int("RESEARCH_DOMAIN_DELAY_MS", 300)
+    # Пул вкладок браузера для параллельного extract_data
+    browser_pages: int = _env_int("RESEARCH_BROWSER_PAGES", 4)
+    # Быстрый путь: статические страницы через HTTP без браузера
+    http_fast_path: bool = _env_bool("RESEARCH_HTTP_FAST_PATH", False)
+    # Таймаут HTTP-запроса быстрого пути (секунды)
+    http_timeout: float = _env_float("RESEARCH_HTTP_TIMEOUT", 10.0)
+    # Меньше текста в HTML — страница рендерится JS, идём в браузер
+    http_min_text: int = _env_int("RESEARCH_HTTP_MIN_TEXT", 500)
+    # Кэш страниц на диске (core/page_cache.py): текст, ссылки, meta,
+    # ETag/Last-Modified для условной перепроверки
+    cache_enabled: bool = _env_bool("RESEARCH_CACHE_ENABLED", True)
+    cache_path: Path = Path(
+        _env("RESEARCH_CACHE_PATH", str(DATA_DIR / "page_cache.sqlite"))
+    )
+    cache_max_mb: int = _env_int("RESEARCH_CACHE_MAX_MB", 128)
+    # Старше — запись удаляется, а не перепроверяется (дни)
+    cache_max_age_days: int = _env_int("RESEARCH_CACHE_MAX_AGE_DAYS", 30)
+    # TTL результатов поиска (секунды, 0 — не кэшировать)
+    search_cache_ttl: int = _env_int("RESEARCH_SEARCH_CACHE_TTL", 3600)
+
+
+# ─── Smart Triggers ─────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class TriggersConfig:
+    """Конфигурация событийной проверки триггеров (core/smart_triggers.py)."""
+    # Окно склейки событий: изменения за это время — один цикл проверки (мс)
+    coalesce_ms: int = _env_int("TRIGGERS_COALESCE_MS", 250)
+    # Подписка на обновления курсов (RateBook) и вставки транзакций
+    event_sources: bool = _env_bool("TRIGGERS_EVENT_SOURCES", True)
+
+
+# ─── Plugins ────────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class PluginsConfig:
+    """Конфигурация HTTP-вызовов плагинов (core/plugin_system.py)."""
+    # Пул соединений на базовый URL плагина (keep-alive между вызовами)
+    pool_max_connections: int = _env_int("PLUGIN_POOL_MAX", 10)
+    pool_max_keepalive: int = _env_int("PLUGIN_POOL_KEEPALIVE", 5)
+    keepalive_expiry: float = _env_float("PLUGIN_KEEPALIVE_EXPIRY", 30.0)
+    # HTTP/2 (нужен пакет h2: pip install 'httpx[http2]')
+    http2: bool = _env_bool("PLUGIN_HTTP2", True)
+    # Сколько вызов ждёт в очереди rate limit, прежде чем получить отказ (сек)
+    rate_max_wait: float = _env_float("PLUGIN_RATE_MAX_WAIT", 30.0)
+    # TTL кэша GET-ответов (сек, 0 — только эндпоинты с cache_ttl)
+    get_cache_ttl: int = _env_int("PLUGIN_GET_CACHE_TTL", 0)
+    cache_max_entries: int = _env_int("PLUGIN_CACHE_MAX_ENTRIES", 500)
+
+
+# ─── Semantic Search ────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class SemanticConfig:
+    """Конфигурация семантического поиска (core/semantic_engine.py)."""
+    # Backend индекса: dict (чистый Python) | sparse (CSR, нужны numpy + scipy)
+    backend: str = _env("SEMANTIC_BACKEND", "dict")
+    # Incremental IDF: df обновляется на add/remove, без rebuild_index
+    incremental_idf: bool = _env_bool("SEMANTIC_INCREMENTAL_IDF", False)
+    # Снапшоты индексов на диск (core/semantic_store.py), нужен numpy
+    persist: bool = _env_bool("SEMANTIC_PERSIST", True)
+    snapshot_dir: Path = Path(
+        _env("SEMANTIC_SNAPSHOT_DIR", str(DATA_DIR / "semantic"))
+    )
+
+
+# ─── Result Cache ───────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class CacheConfig:
+    """Конфигурация кэша результатов (core/performance_engine.py)."""
+    # L2-уровень cached_call в SQLite-файле (core/cache_store.py):
+    # переживает перезапуск, общий для процессов на хосте
+    l2_enabled: bool = _env_bool("CACHE_L2_ENABLED", True)
+    l2_path: Path = Path(_env("CACHE_L2_PATH", str(DATA_DIR / "cache.sqlite")))
+    # Максимальный объём L2 (МБ)
+    l2_max_mb: int = _env_int("CACHE_L2_MAX_MB", 256)
+    # Интервал фоновой очистки L2 (секунды)
+    l2_evict_interval: int = _env_int("CACHE_L2_EVICT_INTERVAL", 60)
+    # Кэш ответов LLM (LLMEngine.complete → cached_call, L1 + L2):
+    # только запросы с temperature не выше порога — parse_order,
+    # extract_intent, translate. Ходы агента (0.3+) не кэшируются
+    llm_enabled: bool = _env_bool("CACHE_LLM_ENABLED", True)
+    llm_max_temperature: float = _env_float("CACHE_LLM_MAX_TEMPERATURE", 0.2)
+
+
+# ─── Доступ к БД ────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class DatabaseConfig:
+    """Конфигурация исполнителя запросов к БД (core/db_executor.py)."""
+    # Потоков для синхронных SQLAlchemy-запросов (SQLite WAL: 1 писатель)
+    workers: int = _env_int("DB_WORKERS", 4)
+    # Максимум запросов в очереди (ожидающих + выполняемых)
+    max_queue: int = _env_int("DB_MAX_QUEUE", 256)
+    # Запросы дольше порога (мс) пишутся в лог как медленные
+    slow_query_ms: int = _env_int("DB_SLOW_QUERY_MS", 500)
+
+
 # ─── Сводная конфигурация ────────────────────────────────────────────────────
 
 @dataclass
@@ -439,7 +606,15 @@ class AppConfig:
     style: StyleConfig = field(default_factory=StyleConfig)
     security: SecurityConfig = field(default_factory=SecurityConfig)
     ocr: OCRConfig = field(default_factory=OCRConfig)
+    converter: ConverterConfig = field(default_factory=ConverterConfig)
+    translator: TranslatorConfig = field(default_factory=TranslatorConfig)
     browser: BrowserConfig = field(default_factory=BrowserConfig)
+    research: ResearchConfig = field(default_factory=ResearchConfig)
+    triggers: TriggersConfig = field(default_factory=TriggersConfig)
+    plugins: PluginsConfig = field(default_factory=PluginsConfig)
+    semantic: SemanticConfig = field(default_factory=SemanticConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    database: DatabaseConfig = field(default_factory=DatabaseConfig)
 
     @classmethod
     def load(cls) -> "AppConfig":
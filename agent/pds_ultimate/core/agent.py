@@ -28,10 +28,15 @@ PDS-Ultimate AI Agent (ReAct Architecture)
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 import time
 import traceback
+from contextlib import aclosing
+from contextvars import ContextVar
 from dataclasses import dataclass, field
+from typing import Callable
 
 from pds_ultimate.config import config, logger
 from pds_ultimate.core.advanced_memory import AdvancedWorkingMemory
@@ -43,8 +48,11 @@ from pds_ultimate.core.cognitive_engine import (
     CognitiveEngine,
     cognitive_engine,
 )
+from pds_ultimate.core.llm_engine import reset_usage_sink, set_usage_sink
+from pds_ultimate.core.llm_transport import JsonObjectCollector
 from pds_ultimate.core.memory import MemoryManager, WorkingMemory, memory_manager
 from pds_ultimate.core.tools import ToolRegistry, tool_registry
+from pds_ultimate.utils.tokens import estimate_tokens
 
 # ─── Agent Action ────────────────────────────────────────────────────────────
 
@@ -52,9 +60,10 @@ from pds_ultimate.core.tools import ToolRegistry, tool_registry
 @dataclass
 class AgentAction:
     """Действие, которое агент решил выполнить."""
-    action_type: str  # "tool_call", "final_answer", "think", "plan", "ask_user"
+    action_type: str  # "tool_call", "tool_batch", "final_answer", "think", "plan", "ask_user"
     tool_name: str | None = None
     tool_params: dict | None = None
+    tool_calls: list[dict] | None = None  # tool_batch: [{tool, params}, ...]
     thought: str = ""
     answer: str = ""
     confidence: float = 0.0
@@ -82,6 +91,91 @@ class AgentResponse:
     total_time_ms: int = 0
     memory_entries_created: int = 0
     plan_used: bool = False
+    prompt_usage: PromptUsage | None = None
+
+
+# ─── Учёт токенов промпта ───────────────────────────────────────────────────
+
+@dataclass
+class PromptUsage:
+    """Токены промпта за ход агента (все вызовы LLM внутри process)."""
+    llm_calls: int = 0
+    prompt_tokens: int = 0  # Отправлено всего
+    saved_tokens: int = 0  # Из них — префикс, уже бывший в кэше провайдера
+    static_tokens: int = 0  # Стабильный префикс (правила + инструменты)
+    provider_calls: int = 0  # Вызовов с usage от DeepSeek (остальное — оценка)
+
+    @property
+    def saved_ratio(self) -> float:
+        return self.saved_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def add(self, other: PromptUsage) -> None:
+        self.llm_calls += other.llm_calls
+        self.prompt_tokens += other.prompt_tokens
+        self.saved_tokens += other.saved_tokens
+        self.provider_calls += other.provider_calls
+
+    def to_dict(self) -> dict:
+        return {
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "saved_tokens": self.saved_tokens,
+            "saved_ratio": f"{self.saved_ratio:.1%}",
+            "static_tokens": self.static_tokens,
+            "provider_calls": self.provider_calls,
+        }
+
+
+class PromptLedger:
+    """
+    Счётчик токенов одного хода.
+
+    messages внутри хода только дописываются, поэтому токены считаются
+    инкрементально — только по новым сообщениям. Переиспользованный
+    префикс вызова = все сообщения предыдущего вызова (первый вызов —
+    статический system prompt, если он уже уходил провайдеру).
+    Если DeepSeek вернул usage (prompt_cache_hit_tokens) — оценка
+    вызова заменяется фактическими числами.
+    """
+
+    def __init__(self, static_tokens: int = 0, prefix_warm: bool = False):
+        self.usage = PromptUsage(static_tokens=static_tokens)
+        self._prefix_warm = prefix_warm
+        self._counts: list[int] = []
+        self._sent = 0
+        self._pending: tuple[int, int] | None = None
+
+    def record_call(self, messages: list[dict[str, str]]) -> None:
+        """Учесть вызов LLM с этим списком сообщений (оценка)."""
+        for msg in messages[len(self._counts):]:
+            self._counts.append(estimate_tokens(msg.get("content") or ""))
+        total = sum(self._counts[:len(messages)])
+        if self._sent:
+            reused = sum(self._counts[:min(self._sent, len(messages))])
+        else:
+            reused = self.usage.static_tokens if self._prefix_warm else 0
+        self._sent = len(messages)
+        self._pending = (total, reused)
+        self.usage.llm_calls += 1
+        self.usage.prompt_tokens += total
+        self.usage.saved_tokens += reused
+
+    def record_provider(self, usage: dict) -> None:
+        """Заменить оценку последнего вызова на usage от DeepSeek."""
+        if self._pending is None or "prompt_tokens" not in usage:
+            return
+        total, reused = self._pending
+        self._pending = None
+        hit = usage.get("prompt_cache_hit_tokens", 0) or 0
+        self.usage.prompt_tokens += int(usage["prompt_tokens"]) - total
+        self.usage.saved_tokens += int(hit) - reused
+        self.usage.provider_calls += 1
+
+
+# Счётчик текущего хода (ContextVar — параллельные чаты не смешиваются)
+_current_ledger: ContextVar[PromptLedger | None] = ContextVar(
+    "agent_prompt_ledger", default=None,
+)
 
 
 # ─── System Prompt ──────────────────────────────────────────────────────────
@@ -105,9 +199,10 @@ AGENT_SYSTEM_PROMPT = """Ты — PDS-Ultimate Agent, продвинутый AI-
 {{
   "thought": "Мои рассуждения о задаче...",
   "action": {{
-    "type": "tool_call | final_answer | ask_user | plan",
+    "type": "tool_call | tool_batch | final_answer | ask_user | plan",
     "tool": "имя_инструмента",
     "params": {{"param1": "value1"}},
+    "calls": [{{"tool": "имя_инструмента", "params": {{}}}}],
     "answer": "ответ пользователю (для final_answer и ask_user)"
   }},
   "confidence": 0.0-1.0,
@@ -116,13 +211,20 @@ AGENT_SYSTEM_PROMPT = """Ты — PDS-Ultimate Agent, продвинутый AI-
 
 ТИПЫ ДЕЙСТВИЙ:
 - tool_call: Вызвать инструмент. Обязательно: tool + params
+- tool_batch: Вызвать сразу несколько НЕЗАВИСИМЫХ инструментов (выполняются
+  параллельно, результаты придут одним сообщением). Обязательно: calls.
+  Используй, когда нужно несколько фактов сразу (баланс + заказы + календарь)
 - final_answer: Дать финальный ответ. Обязательно: answer
 - ask_user: Задать уточняющий вопрос. Обязательно: answer
 - plan: Создать план из нескольких шагов. В answer — описание плана
 
 ДОСТУПНЫЕ ИНСТРУМЕНТЫ:
 {tools_description}
+"""
 
+# Динамическая часть идёт ПОСЛЕ стабильного префикса (правила + tools):
+# префикс не меняется между ходами, и prompt caching DeepSeek его переиспользует.
+AGENT_DYNAMIC_PROMPT = """
 {memory_context}
 
 {working_context}
@@ -130,6 +232,9 @@ AGENT_SYSTEM_PROMPT = """Ты — PDS-Ultimate Agent, продвинутый AI-
 {style_context}
 """
 
+AGENT_STATIC_PROMPT = AGENT_SYSTEM_PROMPT
+AGENT_SYSTEM_PROMPT = AGENT_STATIC_PROMPT + AGENT_DYNAMIC_PROMPT
+
 
 # ─── ReAct Agent ─────────────────────────────────────────────────────────────
 
@@ -143,6 +248,7 @@ class Agent:
     3. Формирует system prompt с tools
     4. LLM думает → выбирает action
     5. Если action = tool_call → выполняет tool → добавляет observation
+       (tool_batch → независимые tools параллельно, observations разом)
     6. Если action = final_answer → возвращает ответ
     7. Self-reflection: оценивает качество (опционально)
     8. Memory extraction: извлекает факты для запоминания
@@ -150,6 +256,8 @@ class Agent:
 
     MAX_ITERATIONS = 10  # Защита от бесконечных циклов
     REFLECTION_THRESHOLD = 3  # После скольких итераций включать рефлексию
+    MAX_BATCH_TOOLS = 6  # Максимум инструментов в одном tool_batch
+    TOOL_TIMEOUT = 90  # Таймаут одного инструмента в tool_batch (секунды)
 
     def __init__(
         self,
@@ -164,6 +272,12 @@ class Agent:
         self._cognitive = cog_engine or cognitive_engine
         self._llm = None  # Lazy init
 
+        # Статический префикс system prompt: (версия реестра, текст, токены)
+        self._static_prompt: tuple[int, str, int] | None = None
+        self._prefix_sent_version: int | None = None
+        self._usage_hooks: list[Callable[[int, PromptUsage], None]] = []
+        self._usage_totals = PromptUsage()
+
     @property
     def llm(self):
         if self._llm is None:
@@ -193,7 +307,37 @@ class Agent:
 
         Returns:
             AgentResponse с ответом и метаданными
+            (prompt_usage — токены промпта и сэкономленные кэшем префикса)
         """
+        version = self._tools.version
+        _, _, static_tokens = self._get_static_prompt()
+        ledger = PromptLedger(
+            static_tokens=static_tokens,
+            prefix_warm=self._prefix_sent_version == version,
+        )
+        token = _current_ledger.set(ledger)
+        try:
+            response = await self._react_loop(
+                message, chat_id, history, db_session, style_guide,
+            )
+        finally:
+            _current_ledger.reset(token)
+            if ledger.usage.llm_calls:
+                self._prefix_sent_version = version
+            self._report_usage(chat_id, ledger.usage)
+
+        response.prompt_usage = ledger.usage
+        return response
+
+    async def _react_loop(
+        self,
+        message: str,
+        chat_id: int,
+        history: list[dict[str, str]] | None,
+        db_session,
+        style_guide: str | None,
+    ) -> AgentResponse:
+        """ReAct loop одного хода (см. process)."""
         start_time = time.time()
         steps: list[AgentStep] = []
         tools_used: list[str] = []
@@ -358,6 +502,39 @@ class Agent:
                         ),
                     })
 
+                elif action.action_type == "tool_batch":
+                    # Независимые инструменты — параллельно, один round-trip
+                    calls = action.tool_calls or []
+                    results = await self._execute_batch(calls, db_session)
+
+                    observations = []
+                    for i, (call, result) in enumerate(
+                            zip(calls, results), start=1):
+                        tool_name = call["tool"]
+                        tools_used.append(tool_name)
+                        working.add_tool_result(
+                            tool_name, str(result), result.success
+                        )
+                        observations.append(
+                            f"[{i}] '{tool_name}' — "
+                            f"{'Успешно' if result.success else 'Ошибка'}: "
+                            f"{result}"
+                        )
+                    step.observation = "\n".join(observations)
+
+                    messages.append({
+                        "role": "assistant",
+                        "content": raw_response,
+                    })
+                    messages.append({
+                        "role": "user",
+                        "content": (
+                            f"Observations (результаты {len(calls)} "
+                            f"инструментов):\n{step.observation}\n\n"
+                            f"Продолжай рассуждение. Ответь в том же JSON формате."
+                        ),
+                    })
+
                 elif action.action_type == "plan":
                     # Агент хочет разбить задачу на шаги
                     step.observation = "План создан"
@@ -438,6 +615,39 @@ class Agent:
             memory_entries_created=memory_entries,
         )
 
+    # ─── Token Accounting ───────────────────────────────────────────────
+
+    def add_usage_hook(self, hook: Callable[[int, PromptUsage], None]) -> None:
+        """
+        Подписаться на учёт токенов: hook(chat_id, PromptUsage)
+        вызывается в конце каждого хода.
+        """
+        self._usage_hooks.append(hook)
+
+    def remove_usage_hook(self, hook: Callable[[int, PromptUsage], None]) -> None:
+        if hook in self._usage_hooks:
+            self._usage_hooks.remove(hook)
+
+    def get_usage_stats(self) -> dict:
+        """Суммарные токены промпта по всем ходам."""
+        return self._usage_totals.to_dict()
+
+    def _report_usage(self, chat_id: int, usage: PromptUsage) -> None:
+        if not usage.llm_calls:
+            return
+        self._usage_totals.add(usage)
+        self._usage_totals.static_tokens = usage.static_tokens
+        logger.debug(
+            f"Agent tokens chat={chat_id}: prompt={usage.prompt_tokens}, "
+            f"saved={usage.saved_tokens} ({usage.saved_ratio:.0%}), "
+            f"calls={usage.llm_calls}"
+        )
+        for hook in list(self._usage_hooks):
+            try:
+                hook(chat_id, usage)
+            except Exception as e:
+                logger.warning(f"Agent usage hook error: {e}")
+
     # ─── Smart Routing ──────────────────────────────────────────────────
 
     async def should_use_tools(self, message: str) -> bool:
@@ -529,8 +739,11 @@ class Agent:
         style_guide: str | None,
         extra_context: str = "",
     ) -> str:
-        """Построить system prompt с инструментами и контекстом."""
-        tools_desc = self._tools.get_tools_prompt()
+        """
+        Построить system prompt: стабильный префикс (кэшируется до смены
+        версии реестра инструментов) + динамический контекст хода.
+        """
+        _, static_prompt, _ = self._get_static_prompt()
 
         # Используем advanced memory для контекста (если доступна)
         memory_ctx = self._adv_memory.get_context_for_prompt(message)
@@ -547,13 +760,23 @@ class Agent:
         if extra_context:
             memory_ctx = f"{memory_ctx}\n\n{extra_context}" if memory_ctx else extra_context
 
-        return AGENT_SYSTEM_PROMPT.format(
-            tools_description=tools_desc or "[Нет зарегистрированных инструментов]",
+        return static_prompt + AGENT_DYNAMIC_PROMPT.format(
             memory_context=memory_ctx,
             working_context=working_ctx,
             style_context=style_ctx,
         )
 
+    def _get_static_prompt(self) -> tuple[int, str, int]:
+        """Статический префикс: (версия реестра, текст, оценка токенов)."""
+        version = self._tools.version
+        if self._static_prompt is None or self._static_prompt[0] != version:
+            tools_desc = self._tools.get_tools_prompt()
+            text = AGENT_STATIC_PROMPT.format(
+                tools_description=tools_desc or "[Нет зарегистрированных инструментов]",
+            )
+            self._static_prompt = (version, text, estimate_tokens(text))
+        return self._static_prompt
+
     def _build_messages(
         self,
         message: str,
@@ -571,32 +794,67 @@ class Agent:
         return messages
 
     async def _call_llm(self, messages: list[dict[str, str]]) -> str:
-        """Вызвать LLM с messages."""
-        if not self.llm._client:
-            await self.llm.start()
+        """
+        Вызвать LLM с messages.
 
+        Streaming-first: ответ читается потоком, и как только первый
+        JSON-объект закрыт — поток обрывается, агент сразу действует,
+        не дожидаясь хвоста генерации. Если поток не дал ни одного
+        токена — обычный запрос.
+        """
         payload = {
             "model": config.deepseek.fast_model,  # Используем быструю модель для агента
             "messages": messages,
             "temperature": 0.3,
             "max_tokens": 2048,
-            "stream": False,
             "response_format": {"type": "json_object"},
         }
 
+        ledger = _current_ledger.get()
+        if ledger is not None:
+            ledger.record_call(messages)
+
+        if config.deepseek.agent_stream:
+            parts: list[str] = []
+            collector = JsonObjectCollector()
+            try:
+                async with aclosing(self.llm.stream(payload)) as chunks:
+                    async for chunk in chunks:
+                        parts.append(chunk)
+                        obj = collector.feed(chunk)
+                        if obj is not None:
+                            return obj
+                text = "".join(parts).strip()
+                if text:
+                    return text
+                logger.warning("Agent LLM stream пуст, обычный запрос")
+            except Exception as e:
+                if parts:
+                    logger.error(f"Agent LLM stream error: {e}")
+                    raise
+                logger.warning(
+                    f"Agent LLM stream недоступен ({e}), обычный запрос")
+
         try:
-            response = await self.llm._client.post(
-                "/v1/chat/completions",
-                json=payload,
-            )
-            response.raise_for_status()
-            data = response.json()
-            content = data["choices"][0]["message"]["content"]
-            return content.strip()
+            return await self._complete_tracked(payload, ledger)
         except Exception as e:
             logger.error(f"Agent LLM call error: {e}")
             raise
 
+    async def _complete_tracked(
+        self,
+        payload: dict,
+        ledger: PromptLedger | None,
+    ) -> str:
+        """llm.complete с передачей usage DeepSeek в счётчик хода."""
+        if ledger is None:
+            return await self.llm.complete(payload)
+        token = set_usage_sink(ledger.record_provider)
+        try:
+            return await self.llm.complete(payload)
+        finally:
+            reset_usage_sink(token)
+
     def _parse_response(self, raw: str) -> AgentAction:
         """Распарсить JSON ответ LLM в AgentAction."""
         try:
@@ -627,11 +885,28 @@ class Agent:
             )
 
         action_type = action_data.get("type", "final_answer")
+        tool_name = action_data.get("tool")
+        tool_params = action_data.get("params", {})
+
+        tool_calls = self._parse_tool_calls(action_data.get("calls"))
+        if action_type == "tool_batch" or (
+                action_type == "tool_call" and tool_calls and not tool_name):
+            if len(tool_calls) == 1:
+                # Пакет из одного вызова — обычный tool_call
+                action_type = "tool_call"
+                tool_name = tool_calls[0]["tool"]
+                tool_params = tool_calls[0]["params"]
+                tool_calls = []
+            elif tool_calls:
+                action_type = "tool_batch"
+            else:
+                action_type = "think"
 
         action = AgentAction(
             action_type=action_type,
-            tool_name=action_data.get("tool"),
-            tool_params=action_data.get("params", {}),
+            tool_name=tool_name,
+            tool_params=tool_params,
+            tool_calls=tool_calls or None,
             thought=thought,
             answer=action_data.get("answer", ""),
             confidence=confidence,
@@ -646,6 +921,90 @@ class Agent:
 
         return action
 
+    def _parse_tool_calls(self, raw_calls) -> list[dict]:
+        """Нормализовать calls из tool_batch: [{tool, params}, ...]."""
+        if not isinstance(raw_calls, list):
+            return []
+        calls = []
+        for call in raw_calls[:self.MAX_BATCH_TOOLS]:
+            if not isinstance(call, dict) or not call.get("tool"):
+                continue
+            params = call.get("params")
+            calls.append({
+                "tool": str(call["tool"]),
+                "params": params if isinstance(params, dict) else {},
+            })
+        return calls
+
+    async def _execute_batch(
+        self,
+        calls: list[dict],
+        db_session=None,
+    ) -> list:
+        """
+        Выполнить пакет независимых инструментов параллельно.
+
+        Лимиты — ConcurrencyManager (parallel_engine), таймаут на
+        инструмент — TOOL_TIMEOUT. Инструменты с db_session идут по
+        очереди: одна сессия SQLAlchemy не выдерживает конкурентных
+        транзакций. Их таймаут считается после захвата очереди, а по
+        таймауту очередь держится, пока поток БД не отпустит сессию.
+        """
+        from pds_ultimate.core.parallel_engine import parallel_engine
+        from pds_ultimate.core.tools import ToolResult
+
+        db_lock = asyncio.Lock()
+        tasks = {}
+        categories = {}
+        timeouts = {}
+
+        async def run_db(call: dict):
+            async with db_lock:
+                work = asyncio.ensure_future(self._tools.execute(
+                    call["tool"], dict(call["params"]), db_session))
+                try:
+                    return await asyncio.wait_for(
+                        asyncio.shield(work), self.TOOL_TIMEOUT)
+                except asyncio.TimeoutError:
+                    return ToolResult(
+                        call["tool"], False, "",
+                        error=f"Таймаут {self.TOOL_TIMEOUT:g}с")
+                finally:
+                    # Запрос в потоке db_executor не прервать — следующий
+                    # инструмент получит сессию только после него
+                    if not work.done():
+                        await asyncio.wait([work])
+                        if not work.cancelled():
+                            work.exception()  # поздний результат не нужен
+
+        for i, call in enumerate(calls):
+            task_id = f"{i}:{call['tool']}"
+            tool = self._tools.get(call["tool"])
+            if tool and tool.category == "browser":
+                categories[task_id] = "browser"
+
+            if tool and tool.needs_db and db_session:
+                timeouts[task_id] = None
+                tasks[task_id] = functools.partial(run_db, call)
+            else:
+                tasks[task_id] = functools.partial(
+                    self._tools.execute, call["tool"], dict(call["params"]))
+
+        outcomes = await parallel_engine.run_parallel(
+            tasks, timeout=self.TOOL_TIMEOUT, categories=categories,
+            timeouts=timeouts,
+        )
+
+        results = []
+        for task_id, call in zip(tasks, calls):
+            outcome = outcomes[task_id]
+            if outcome.success:
+                results.append(outcome.result)
+            else:
+                results.append(ToolResult(
+                    call["tool"], False, "", error=outcome.error))
+        return results
+
     def _extract_json(self, text: str) -> dict | None:
         """Извлечь JSON из текста."""
         import re
@@ -732,26 +1091,18 @@ class Agent:
             ),
         })
 
+        ledger = _current_ledger.get()
+        if ledger is not None:
+            ledger.record_call(messages)
+
         try:
             # Без JSON mode
-            if not self.llm._client:
-                await self.llm.start()
-
-            payload = {
+            return await self._complete_tracked({
                 "model": config.deepseek.fast_model,
                 "messages": messages,
                 "temperature": 0.5,
                 "max_tokens": 2048,
-                "stream": False,
-            }
-
-            response = await self.llm._client.post(
-                "/v1/chat/completions",
-                json=payload,
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["message"]["content"].strip()
+            }, ledger)
 
         except Exception as e:
             logger.error(f"Force final answer error: {e}")
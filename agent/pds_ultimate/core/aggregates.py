@@ -0,0 +1,337 @@
+"""
+PDS-Ultimate Aggregate Queries
+================================
+Сводные запросы к БД — один round trip вместо запроса на каждую
+строку / тип (N+1):
+
+- order_item_counts   — позиции заказов: GROUP BY order_id, status
+- transaction_totals  — суммы в USD: GROUP BY transaction_type
+- order_status_counts — заказы: GROUP BY status
+- ledger_totals       — те же суммы из материализованного леджера
+                        (LedgerBalance): не зависит от объёма истории
+- verify_ledger       — сверка леджера с transactions и перестройка
+
+Функции синхронные и принимают Session — вызываются внутри
+db_executor.run / run_session (или там, где сессия уже есть).
+
+Использование:
+    counts = order_item_counts(session, [o.id for o in active])
+    counts[order.id].total, counts[order.id].pending
+
+    totals = ledger_totals(session)
+    totals.income, totals.net_profit, totals.available
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import extract, func
+from sqlalchemy.orm import Session
+
+from pds_ultimate.config import logger
+from pds_ultimate.core.database import (
+    LEDGER_ALL_TIME,
+    ItemStatus,
+    LedgerBalance,
+    Order,
+    OrderItem,
+    OrderStatus,
+    Transaction,
+    TransactionType,
+)
+
+CLOSED_ORDER_STATUSES = (OrderStatus.COMPLETED, OrderStatus.ARCHIVED)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ПОЗИЦИИ ЗАКАЗОВ
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+@dataclass
+class ItemCounts:
+    """Количество позиций одного заказа по статусам."""
+    by_status: dict[ItemStatus, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return sum(self.by_status.values())
+
+    @property
+    def pending(self) -> int:
+        return self.by_status.get(ItemStatus.PENDING, 0)
+
+    @property
+    def arrived(self) -> int:
+        return self.by_status.get(ItemStatus.ARRIVED, 0)
+
+    def get(self, status: ItemStatus) -> int:
+        return self.by_status.get(status, 0)
+
+
+def order_item_counts(
+    session: Session,
+    order_ids: Optional[Iterable[int]] = None,
+) -> dict[int, ItemCounts]:
+    """
+    Позиции по заказам и статусам одним запросом.
+
+    Args:
+        order_ids: Ограничить заказами (None — все)
+
+    Returns:
+        {order_id: ItemCounts}; заказы без позиций — пустой ItemCounts
+    """
+    query = session.query(
+        OrderItem.order_id, OrderItem.status, func.count(OrderItem.id),
+    )
+    result: dict[int, ItemCounts] = {}
+    if order_ids is not None:
+        ids = list(order_ids)
+        if not ids:
+            return result
+        query = query.filter(OrderItem.order_id.in_(ids))
+        result = {order_id: ItemCounts() for order_id in ids}
+
+    for order_id, status, count in query.group_by(
+        OrderItem.order_id, OrderItem.status,
+    ):
+        result.setdefault(order_id, ItemCounts()).by_status[status] = count
+    return result
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ТРАНЗАКЦИИ
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+@dataclass
+class TransactionTotals:
+    """Суммы транзакций (USD) по типам."""
+    by_type: dict[TransactionType, float] = field(default_factory=dict)
+
+    def get(self, tx_type: TransactionType) -> float:
+        return self.by_type.get(tx_type, 0.0)
+
+    @property
+    def income(self) -> float:
+        return self.get(TransactionType.INCOME)
+
+    @property
+    def expense_goods(self) -> float:
+        return self.get(TransactionType.EXPENSE_GOODS)
+
+    @property
+    def expense_delivery(self) -> float:
+        return self.get(TransactionType.EXPENSE_DELIVERY)
+
+    @property
+    def expense_personal(self) -> float:
+        return self.get(TransactionType.EXPENSE_PERSONAL)
+
+    @property
+    def to_expenses(self) -> float:
+        return self.get(TransactionType.PROFIT_EXPENSES)
+
+    @property
+    def to_savings(self) -> float:
+        return self.get(TransactionType.PROFIT_SAVINGS)
+
+    @property
+    def net_profit(self) -> float:
+        """Доход − товар − доставка."""
+        return self.income - self.expense_goods - self.expense_delivery
+
+    @property
+    def available(self) -> float:
+        """Выделено на расходы − личные расходы."""
+        return self.to_expenses - self.expense_personal
+
+
+def transaction_totals(
+    session: Session,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> TransactionTotals:
+    """
+    Суммы amount_usd по всем типам транзакций одним запросом.
+
+    Args:
+        date_from: Включительно (по transaction_date)
+        date_to: Включительно
+    """
+    query = session.query(
+        Transaction.transaction_type, func.sum(Transaction.amount_usd),
+    )
+    if date_from is not None:
+        query = query.filter(Transaction.transaction_date >= date_from)
+    if date_to is not None:
+        query = query.filter(Transaction.transaction_date <= date_to)
+
+    totals = TransactionTotals()
+    for tx_type, amount in query.group_by(Transaction.transaction_type):
+        totals.by_type[tx_type] = amount or 0.0
+    return totals
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ЗАКАЗЫ
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def order_status_counts(session: Session) -> dict[OrderStatus, int]:
+    """Количество заказов по статусам одним запросом."""
+    return {
+        status: count
+        for status, count in session.query(
+            Order.status, func.count(Order.id),
+        ).group_by(Order.status)
+    }
+
+
+def split_active_closed(counts: dict[OrderStatus, int]) -> tuple[int, int]:
+    """(активные, закрытые) из order_status_counts."""
+    closed = sum(counts.get(s, 0) for s in CLOSED_ORDER_STATUSES)
+    return sum(counts.values()) - closed, closed
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ЛЕДЖЕР
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def ledger_totals(
+    session: Session,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+) -> TransactionTotals:
+    """
+    Суммы по типам из LedgerBalance (поддерживается при записи транзакций).
+
+    Без аргументов — за всё время; year + month — за месяц.
+    Читается не более одной строки на тип транзакции.
+    """
+    if (year is None) != (month is None):
+        raise ValueError("ledger_totals: year и month задаются вместе")
+    if year is None:
+        year = month = LEDGER_ALL_TIME
+
+    totals = TransactionTotals()
+    for tx_type, total in session.query(
+        LedgerBalance.transaction_type, LedgerBalance.total_usd,
+    ).filter(
+        LedgerBalance.period_year == year,
+        LedgerBalance.period_month == month,
+    ):
+        totals.by_type[tx_type] = total or 0.0
+    return totals
+
+
+@dataclass
+class LedgerDrift:
+    """Расхождение строки леджера с transactions."""
+    transaction_type: TransactionType
+    period_year: int
+    period_month: int
+    ledger_usd: float
+    actual_usd: float
+    ledger_count: int
+    actual_count: int
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.transaction_type.value,
+            "period": f"{self.period_year}-{self.period_month:02d}",
+            "ledger_usd": round(self.ledger_usd, 2),
+            "actual_usd": round(self.actual_usd, 2),
+            "ledger_count": self.ledger_count,
+            "actual_count": self.actual_count,
+        }
+
+
+def _actual_ledger(session: Session) -> dict[tuple, tuple[float, int]]:
+    """Эталон леджера: GROUP BY тип, год, месяц по transactions."""
+    year = extract("year", Transaction.transaction_date)
+    month = extract("month", Transaction.transaction_date)
+    actual: dict[tuple, tuple[float, int]] = {}
+    for tx_type, y, m, total, count in session.query(
+        Transaction.transaction_type, year, month,
+        func.coalesce(func.sum(Transaction.amount_usd), 0.0),
+        func.count(Transaction.id),
+    ).group_by(Transaction.transaction_type, year, month):
+        actual[(tx_type, int(y), int(m))] = (total, count)
+        all_key = (tx_type, LEDGER_ALL_TIME, LEDGER_ALL_TIME)
+        prev_total, prev_count = actual.get(all_key, (0.0, 0))
+        actual[all_key] = (prev_total + total, prev_count + count)
+    return actual
+
+
+def verify_ledger(
+    session: Session,
+    repair: bool = True,
+    tolerance: float = 0.005,
+) -> list[LedgerDrift]:
+    """
+    Сверить LedgerBalance с полным пересчётом по transactions.
+
+    Args:
+        repair: Перестроить леджер, если найдены расхождения (с commit)
+        tolerance: Допустимая погрешность суммы (USD, накопление float)
+
+    Returns:
+        Список расхождений (пустой — леджер корректен)
+    """
+    actual = _actual_ledger(session)
+    stored = {
+        (row.transaction_type, row.period_year, row.period_month):
+            (row.total_usd or 0.0, row.tx_count or 0)
+        for row in session.query(LedgerBalance)
+    }
+
+    drift = []
+    for key in sorted(set(actual) | set(stored), key=lambda k: (
+            k[0].value, k[1], k[2])):
+        ledger_usd, ledger_count = stored.get(key, (0.0, 0))
+        actual_usd, actual_count = actual.get(key, (0.0, 0))
+        if ledger_count == actual_count and math.isclose(
+                ledger_usd, actual_usd, abs_tol=tolerance):
+            continue
+        drift.append(LedgerDrift(
+            key[0], key[1], key[2],
+            ledger_usd, actual_usd, ledger_count, actual_count,
+        ))
+
+    if drift:
+        logger.warning(
+            f"Леджер: {len(drift)} расхождений с transactions"
+            + (" — перестраиваю" if repair else "")
+        )
+        if repair:
+            rebuild_ledger(session, actual)
+    return drift
+
+
+def rebuild_ledger(
+    session: Session,
+    actual: Optional[dict[tuple, tuple[float, int]]] = None,
+) -> int:
+    """Перестроить LedgerBalance целиком (с commit). Возвращает число строк."""
+    if actual is None:
+        actual = _actual_ledger(session)
+    session.query(LedgerBalance).delete()
+    session.add_all(
+        LedgerBalance(
+            transaction_type=tx_type,
+            period_year=year,
+            period_month=month,
+            total_usd=total,
+            tx_count=count,
+        )
+        for (tx_type, year, month), (total, count) in actual.items()
+    )
+    session.commit()
+    return len(actual)
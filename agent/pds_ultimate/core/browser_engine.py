@@ -33,10 +33,11 @@ import json
 import random
 import re
 import time
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator
 from urllib.parse import quote_plus
 
 from pds_ultimate.config import config, logger
@@ -168,6 +169,9 @@ class PageInfo:
     load_time_ms: int = 0
     content_type: str = ""
     text_length: int = 0
+    # Валидаторы HTTP-кэша (для условной перепроверки)
+    etag: str = ""
+    last_modified: str = ""
 
 
 @dataclass
@@ -182,6 +186,9 @@ class ExtractedData:
     meta: dict[str, str] = field(default_factory=dict)
     headings: list[dict[str, str]] = field(default_factory=list)
     forms: list[dict] = field(default_factory=list)
+    # Валидаторы HTTP-кэша из ответа сервера
+    etag: str = ""
+    last_modified: str = ""
 
     def summary(self, max_text: int = 2000) -> str:
         """Краткое описание извлечённых данных."""
@@ -395,6 +402,10 @@ class BrowserEngine:
         self._context = None
         self._page = None
         self._pages: dict[str, Any] = {}  # id → page
+        # Пул вкладок для параллельного extract_data(isolated=True)
+        self._pool_size = max(1, config.research.browser_pages)
+        self._pool_idle: list[Any] = []
+        self._pool_sem: asyncio.Semaphore | None = None
         self._stats = BrowserStats()
         self._started = False
         self._user_agent = (
@@ -504,7 +515,7 @@ class BrowserEngine:
 
         try:
             # Закрываем все страницы
-            for page in list(self._pages.values()):
+            for page in list(self._pages.values()) + self._pool_idle:
                 try:
                     await page.close()
                 except Exception:
@@ -531,6 +542,8 @@ class BrowserEngine:
             self._context = None
             self._page = None
             self._pages.clear()
+            self._pool_idle.clear()
+            self._pool_sem = None
             logger.info("Browser Engine остановлен")
 
     async def restart(self) -> None:
@@ -557,21 +570,31 @@ class BrowserEngine:
         if not self._started:
             await self.start()
 
+        page_info = await self._load(self._page, url, wait_until)
+        if page_info.status == PageStatus.READY:
+            self._last_title = page_info.title
+        return page_info
+
+    async def _load(self, page: Any, url: str,
+                    wait_until: str = "domcontentloaded") -> PageInfo:
+        """Загрузить URL в указанной вкладке (со статистикой)."""
         start_time = time.time()
         page_info = PageInfo(url=url)
 
         try:
-            response = await self._page.goto(url, wait_until=wait_until)
+            response = await page.goto(url, wait_until=wait_until)
 
             load_ms = int((time.time() - start_time) * 1000)
             page_info.load_time_ms = load_ms
-            page_info.title = await self._page.title()
-            self._last_title = page_info.title
+            page_info.title = await page.title()
 
             if response:
                 page_info.status_code = response.status
                 page_info.content_type = response.headers.get(
                     "content-type", "")
+                page_info.etag = response.headers.get("etag", "")
+                page_info.last_modified = response.headers.get(
+                    "last-modified", "")
 
             page_info.status = PageStatus.READY
             self._stats.pages_loaded += 1
@@ -627,30 +650,44 @@ class BrowserEngine:
 
     # ─── Data Extraction ─────────────────────────────────────────────────
 
-    async def extract_data(self, url: str | None = None) -> ExtractedData:
+    async def extract_data(self, url: str | None = None, *,
+                           isolated: bool = False) -> ExtractedData:
         """
         Извлечь все данные со страницы.
 
         Args:
             url: URL (если не задан — текущая страница)
+            isolated: Загрузить url во вкладке из пула, не трогая текущую.
+                      Такие вызовы можно выполнять параллельно.
 
         Returns:
             ExtractedData со всеми данными
         """
-        if url:
-            await self.goto(url)
-
-        if not self._page:
-            return ExtractedData(url="")
+        if isolated and url:
+            async with self.pooled_page() as page:
+                info = await self._load(page, url)
+                data = await self._extract_page(page)
+        else:
+            info = await self.goto(url) if url else None
+            if not self._page:
+                return ExtractedData(url="")
+            data = await self._extract_page(self._page)
+
+        if info is not None:
+            data.etag = info.etag
+            data.last_modified = info.last_modified
+        return data
 
-        current_url = self._page.url
-        title = await self._page.title()
+    async def _extract_page(self, page: Any) -> ExtractedData:
+        """Извлечь данные из загруженной вкладки."""
+        current_url = page.url
+        title = await page.title()
 
         data = ExtractedData(url=current_url, title=title)
 
         # Текст страницы
         try:
-            data.text = await self._page.evaluate("""
+            data.text = await page.evaluate("""
                 () => {
                     const body = document.body;
                     if (!body) return '';
@@ -672,7 +709,7 @@ class BrowserEngine:
 
         # Ссылки
         try:
-            data.links = await self._page.evaluate("""
+            data.links = await page.evaluate("""
                 () => {
                     const links = [];
                     document.querySelectorAll('a[href]').forEach(a => {
@@ -690,7 +727,7 @@ class BrowserEngine:
 
         # Заголовки
         try:
-            data.headings = await self._page.evaluate("""
+            data.headings = await page.evaluate("""
                 () => {
                     const headings = [];
                     document.querySelectorAll('h1, h2, h3, h4, h5, h6').forEach(h => {
@@ -707,7 +744,7 @@ class BrowserEngine:
 
         # Изображения
         try:
-            data.images = await self._page.evaluate("""
+            data.images = await page.evaluate("""
                 () => {
                     const images = [];
                     document.querySelectorAll('img[src]').forEach(img => {
@@ -725,7 +762,7 @@ class BrowserEngine:
 
         # Таблицы
         try:
-            data.tables = await self._page.evaluate("""
+            data.tables = await page.evaluate("""
                 () => {
                     const tables = [];
                     document.querySelectorAll('table').forEach(table => {
@@ -747,7 +784,7 @@ class BrowserEngine:
 
         # Meta tags
         try:
-            data.meta = await self._page.evaluate("""
+            data.meta = await page.evaluate("""
                 () => {
                     const meta = {};
                     document.querySelectorAll('meta[name], meta[property]').forEach(m => {
@@ -962,7 +999,8 @@ class BrowserEngine:
 
     # ─── Web Search ──────────────────────────────────────────────────────
 
-    async def web_search(self, query: str, max_results: int = 10) -> list[SearchResult]:
+    async def web_search(self, query: str, max_results: int = 10, *,
+                         isolated: bool = False) -> list[SearchResult]:
         """
         Поиск в интернете через DuckDuckGo HTML.
 
@@ -971,6 +1009,7 @@ class BrowserEngine:
         Args:
             query: Поисковый запрос
             max_results: Максимум результатов
+            isolated: Искать во вкладке из пула (можно параллельно)
 
         Returns:
             Список SearchResult
@@ -978,15 +1017,26 @@ class BrowserEngine:
         if not self._started:
             await self.start()
 
+        if isolated:
+            async with self.pooled_page() as page:
+                return await self._search_on(page, query, max_results)
+        return await self._search_on(self._page, query, max_results)
+
+    async def _search_on(self, page: Any, query: str,
+                         max_results: int) -> list[SearchResult]:
+        """Выполнить поиск DDG в указанной вкладке."""
         results: list[SearchResult] = []
         search_url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
 
         try:
-            await self.goto(search_url)
+            if page is self._page:
+                await self.goto(search_url)
+            else:
+                await self._load(page, search_url)
             await self._human.random_delay(500, 1500)
 
             # Извлекаем результаты DuckDuckGo HTML
-            raw_results = await self._page.evaluate("""
+            raw_results = await page.evaluate("""
                 () => {
                     const results = [];
                     document.querySelectorAll('.result').forEach(r => {
@@ -1192,6 +1242,39 @@ class BrowserEngine:
                 pass
             del self._pages[page_id]
 
+    @asynccontextmanager
+    async def pooled_page(self) -> AsyncIterator[Any]:
+        """
+        Взять вкладку из пула (не более research.browser_pages одновременно).
+
+        Вкладки живут в общем контексте (cookies, stealth) и переиспользуются;
+        вкладка, на которой случилась ошибка, закрывается.
+        """
+        if not self._started:
+            await self.start()
+        if self._pool_sem is None:
+            self._pool_sem = asyncio.Semaphore(self._pool_size)
+
+        async with self._pool_sem:
+            if self._pool_idle:
+                page = self._pool_idle.pop()
+            else:
+                page = await self._context.new_page()
+                page.set_default_timeout(self._cfg.default_timeout)
+                page.set_default_navigation_timeout(
+                    self._cfg.navigation_timeout)
+            try:
+                yield page
+            except BaseException:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+                raise
+            else:
+                if self._started:
+                    self._pool_idle.append(page)
+
     # ─── Convenience ─────────────────────────────────────────────────────
 
     async def get_page_info(self) -> PageInfo:
@@ -17,11 +17,69 @@ PDS-Ultimate Business Tools
 from __future__ import annotations
 
 import asyncio
+import functools
 from datetime import date, timedelta
 
 from pds_ultimate.config import config, logger
+from pds_ultimate.core.db_executor import db_executor
+from pds_ultimate.core.performance_engine import performance_engine
 from pds_ultimate.core.tools import Tool, ToolParameter, ToolResult, tool_registry
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# КЭШ READ-ONLY ИНСТРУМЕНТОВ
+# ═══════════════════════════════════════════════════════════════════════════════
+# Агент в одном диалоге часто повторяет одни и те же чтения.
+# memoize: single-flight + TTL; неудачи кэшируются на NEGATIVE_TTL.
+# Чтения из БД (категория "db") сбрасываются любым commit в процессе.
+
+
+def _tool_failed(result: ToolResult) -> bool:
+    return not result.success
+
+
+def _memoize_db(ttl: float):
+    """Кэш чтения из БД: db_session вне ключа."""
+    return performance_engine.memoize(
+        ttl=ttl, category="db",
+        ignore=("db_session",), is_negative=_tool_failed,
+    )
+
+
+def _invalidate_db_reads(session) -> None:
+    performance_engine.cache.invalidate_category("db")
+
+
+def _install_db_invalidation() -> None:
+    """Сбрасывать кэш "db" после каждого commit SQLAlchemy-сессии."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    if not event.contains(Session, "after_commit", _invalidate_db_reads):
+        event.listen(Session, "after_commit", _invalidate_db_reads)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ДОСТУП К БД
+# ═══════════════════════════════════════════════════════════════════════════════
+# Синхронные SQLAlchemy-запросы не выполняются на event loop:
+# обработчик с db_session уходит в поток DBExecutor (метрики — "tool:<имя>").
+
+
+def _db_tool(fn):
+    """Синхронный обработчик с db_session → async, выполняется в DBExecutor."""
+    name = "tool:" + fn.__name__.removeprefix("tool_")
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        # partial: параметры tool (name, ...) не пересекаются с run()
+        return await db_executor.run(
+            functools.partial(fn, *args, **kwargs),
+            name=name, bind=kwargs.get("db_session"),
+        )
+
+    return wrapper
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # ЛОГИСТИКА / ЗАКАЗЫ
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -29,12 +87,6 @@ from pds_ultimate.core.tools import Tool, ToolParameter, ToolResult, tool_regist
 
 async def tool_create_order(items_text: str, db_session=None) -> ToolResult:
     """Создать новый заказ из текстового описания позиций."""
-    from pds_ultimate.core.database import (
-        ItemStatus,
-        Order,
-        OrderItem,
-        OrderStatus,
-    )
     from pds_ultimate.utils.parsers import parser
 
     if not db_session:
@@ -52,6 +104,21 @@ async def tool_create_order(items_text: str, db_session=None) -> ToolResult:
     else:
         items_data = [item.to_dict() for item in result.items]
 
+    return await db_executor.run(
+        _insert_order, items_data, db_session,
+        name="tool:create_order", bind=db_session,
+    )
+
+
+def _insert_order(items_data: list[dict], db_session) -> ToolResult:
+    """Записать заказ и позиции (в потоке БД)."""
+    from pds_ultimate.core.database import (
+        ItemStatus,
+        Order,
+        OrderItem,
+        OrderStatus,
+    )
+
     order_count = db_session.query(Order).count()
     order_number = f"ORD-{order_count + 1:04d}"
 
@@ -96,8 +163,11 @@ async def tool_create_order(items_text: str, db_session=None) -> ToolResult:
     )
 
 
-async def tool_get_orders_status(order_number: str = None, db_session=None) -> ToolResult:
+@_memoize_db(ttl=30)
+@_db_tool
+def tool_get_orders_status(order_number: str = None, db_session=None) -> ToolResult:
     """Получить статус заказов."""
+    from pds_ultimate.core.aggregates import order_item_counts
     from pds_ultimate.core.database import (
         ItemStatus,
         Order,
@@ -145,21 +215,20 @@ async def tool_get_orders_status(order_number: str = None, db_session=None) -> T
     if not active:
         return ToolResult("get_orders_status", True, "Нет активных заказов.")
 
+    counts = order_item_counts(db_session, [o.id for o in active])
     lines = ["📋 Активные заказы:\n"]
     for o in active:
-        item_count = db_session.query(
-            OrderItem).filter_by(order_id=o.id).count()
-        pending = db_session.query(OrderItem).filter_by(
-            order_id=o.id, status=ItemStatus.PENDING).count()
+        c = counts[o.id]
         lines.append(
-            f"• {o.order_number} | {o.status.value} | Позиций: {item_count} (ждём: {pending})")
+            f"• {o.order_number} | {o.status.value} | Позиций: {c.total} (ждём: {c.pending})")
 
     return ToolResult("get_orders_status", True, "\n".join(lines),
                       data={"active_count": len(active)})
 
 
-async def tool_set_income(order_number: str, amount: float,
-                          currency: str = "USD", db_session=None) -> ToolResult:
+@_db_tool
+def tool_set_income(order_number: str, amount: float,
+                    currency: str = "USD", db_session=None) -> ToolResult:
     """Установить доход за заказ."""
     from pds_ultimate.core.database import Order, Transaction, TransactionType
 
@@ -175,7 +244,7 @@ async def tool_set_income(order_number: str, amount: float,
     order.income = amount
     order.income_currency = currency
 
-    amount_usd = _convert_to_usd(amount, currency)
+    amount_usd = _convert_to_usd(amount, currency, db_session)
     db_session.add(Transaction(
         order_id=order.id,
         transaction_type=TransactionType.INCOME,
@@ -192,8 +261,9 @@ async def tool_set_income(order_number: str, amount: float,
                       data={"order": order_number, "amount_usd": amount_usd})
 
 
-async def tool_set_expense(order_number: str, amount: float,
-                           currency: str = "USD", db_session=None) -> ToolResult:
+@_db_tool
+def tool_set_expense(order_number: str, amount: float,
+                     currency: str = "USD", db_session=None) -> ToolResult:
     """Установить расход на товар."""
     from pds_ultimate.core.database import (
         Order,
@@ -214,7 +284,11 @@ async def tool_set_expense(order_number: str, amount: float,
     order.expense_goods = amount
     order.expense_goods_currency = currency
 
-    amount_usd = _convert_to_usd(amount, currency)
+    amount_usd, income_usd = _convert_many_to_usd(
+        [(amount, currency),
+         (order.income or 0, order.income_currency or "USD")],
+        db_session,
+    )
     db_session.add(Transaction(
         order_id=order.id,
         transaction_type=TransactionType.EXPENSE_GOODS,
@@ -225,8 +299,6 @@ async def tool_set_expense(order_number: str, amount: float,
         transaction_date=date.today(),
     ))
 
-    income_usd = _convert_to_usd(
-        order.income or 0, order.income_currency or "USD")
     remainder = income_usd - amount_usd
 
     order.status = OrderStatus.TRACKING
@@ -241,47 +313,27 @@ async def tool_set_expense(order_number: str, amount: float,
 # ФИНАНСЫ
 # ═══════════════════════════════════════════════════════════════════════════════
 
-async def tool_get_financial_summary(db_session=None) -> ToolResult:
+@_memoize_db(ttl=30)
+@_db_tool
+def tool_get_financial_summary(db_session=None) -> ToolResult:
     """Получить финансовую сводку."""
-    from sqlalchemy import func
-
-    from pds_ultimate.core.database import (
-        Order,
-        OrderStatus,
-        Transaction,
-        TransactionType,
+    from pds_ultimate.core.aggregates import (
+        ledger_totals,
+        order_status_counts,
+        split_active_closed,
     )
 
     if not db_session:
         return ToolResult("get_financial_summary", False, "", error="Нет сессии БД")
 
-    total_income = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.INCOME).scalar() or 0
-
-    total_goods = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.EXPENSE_GOODS).scalar() or 0
+    totals = ledger_totals(db_session)
+    total_income = totals.income
+    total_goods = totals.expense_goods
+    total_delivery = totals.expense_delivery
+    total_savings = totals.to_savings
+    total_profit_exp = totals.to_expenses
 
-    total_delivery = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.EXPENSE_DELIVERY).scalar() or 0
-
-    total_savings = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.PROFIT_SAVINGS).scalar() or 0
-
-    total_profit_exp = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.PROFIT_EXPENSES).scalar() or 0
-
-    completed = db_session.query(Order).filter(
-        Order.status.in_([OrderStatus.COMPLETED, OrderStatus.ARCHIVED])
-    ).count()
-
-    active = db_session.query(Order).filter(
-        Order.status.notin_([OrderStatus.ARCHIVED, OrderStatus.COMPLETED])
-    ).count()
+    active, completed = split_active_closed(order_status_counts(db_session))
 
     net = total_income - total_goods - total_delivery
 
@@ -337,8 +389,9 @@ async def tool_convert_currency(amount: float, from_currency: str,
 # КОНТАКТЫ
 # ═══════════════════════════════════════════════════════════════════════════════
 
-async def tool_save_contact_note(name: str, note: str, is_warning: bool = False,
-                                 db_session=None) -> ToolResult:
+@_db_tool
+def tool_save_contact_note(name: str, note: str, is_warning: bool = False,
+                           db_session=None) -> ToolResult:
     """Сохранить заметку о контакте."""
     from pds_ultimate.core.database import Contact, ContactType
 
@@ -369,16 +422,22 @@ async def tool_save_contact_note(name: str, note: str, is_warning: bool = False,
                       f"{emoji} Записал о «{contact.name}»: {note}")
 
 
-async def tool_find_contact(query: str, db_session=None) -> ToolResult:
-    """Найти контакт по имени."""
+@_memoize_db(ttl=60)
+@_db_tool
+def tool_find_contact(query: str, db_session=None) -> ToolResult:
+    """Найти контакт по имени (FTS: имя, компания, телефон, заметки)."""
     from pds_ultimate.core.database import Contact
+    from pds_ultimate.core.search_index import search_ids
 
     if not db_session:
         return ToolResult("find_contact", False, "", error="Нет сессии БД")
 
-    contacts = db_session.query(Contact).filter(
-        Contact.name.ilike(f"%{query}%")
-    ).limit(10).all()
+    ids = search_ids(db_session, "contacts", query, limit=10)
+    by_id = {
+        c.id: c
+        for c in db_session.query(Contact).filter(Contact.id.in_(ids)).all()
+    } if ids else {}
+    contacts = [by_id[i] for i in ids if i in by_id]
 
     if not contacts:
         return ToolResult("find_contact", True, f"Контакт «{query}» не найден.")
@@ -403,8 +462,9 @@ async def tool_find_contact(query: str, db_session=None) -> ToolResult:
 # КАЛЕНДАРЬ & НАПОМИНАНИЯ
 # ═══════════════════════════════════════════════════════════════════════════════
 
-async def tool_create_reminder(message: str, scheduled_at: str,
-                               db_session=None) -> ToolResult:
+@_db_tool
+def tool_create_reminder(message: str, scheduled_at: str,
+                         db_session=None) -> ToolResult:
     """Создать напоминание."""
     from datetime import datetime
 
@@ -444,9 +504,10 @@ async def tool_create_reminder(message: str, scheduled_at: str,
         return ToolResult("create_reminder", False, "", error=str(e))
 
 
-async def tool_create_calendar_event(title: str, event_date: str,
-                                     description: str = "",
-                                     db_session=None) -> ToolResult:
+@_db_tool
+def tool_create_calendar_event(title: str, event_date: str,
+                               description: str = "",
+                               db_session=None) -> ToolResult:
     """Создать событие в календаре."""
     from datetime import datetime
 
@@ -489,17 +550,16 @@ async def tool_create_calendar_event(title: str, event_date: str,
 # УТРЕННИЙ БРИФИНГ & ОТЧЁТЫ
 # ═══════════════════════════════════════════════════════════════════════════════
 
-async def tool_morning_brief(db_session=None) -> ToolResult:
+@_memoize_db(ttl=60)
+@_db_tool
+def tool_morning_brief(db_session=None) -> ToolResult:
     """Сформировать утренний брифинг."""
-    from sqlalchemy import func
-
+    from pds_ultimate.core.aggregates import ledger_totals
     from pds_ultimate.core.database import (
         ItemStatus,
         Order,
         OrderItem,
         OrderStatus,
-        Transaction,
-        TransactionType,
     )
 
     if not db_session:
@@ -513,20 +573,10 @@ async def tool_morning_brief(db_session=None) -> ToolResult:
         status=ItemStatus.PENDING
     ).count()
 
-    total_income = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.INCOME).scalar() or 0
-
-    total_expenses = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter(Transaction.transaction_type.in_([
-        TransactionType.EXPENSE_GOODS,
-        TransactionType.EXPENSE_DELIVERY,
-    ])).scalar() or 0
-
-    total_savings = db_session.query(
-        func.sum(Transaction.amount_usd)
-    ).filter_by(transaction_type=TransactionType.PROFIT_SAVINGS).scalar() or 0
+    totals = ledger_totals(db_session)
+    total_income = totals.income
+    total_expenses = totals.expense_goods + totals.expense_delivery
+    total_savings = totals.to_savings
 
     balance = total_income - total_expenses
     today = date.today().strftime("%d.%m.%Y")
@@ -572,24 +622,33 @@ async def tool_summarize(text: str, **kwargs) -> ToolResult:
 # БЕЗОПАСНОСТЬ
 # ═══════════════════════════════════════════════════════════════════════════════
 
-async def tool_security_emergency(db_session=None) -> ToolResult:
+@_db_tool
+def tool_security_emergency(db_session=None) -> ToolResult:
     """Активировать экстренный режим безопасности."""
     import os
 
-    from pds_ultimate.config import ALL_ORDERS_ARCHIVE_PATH, MASTER_FINANCE_PATH
-    from pds_ultimate.core.database import Transaction
+    from pds_ultimate.config import (
+        ALL_ORDERS_ARCHIVE_LOG_PATH,
+        ALL_ORDERS_ARCHIVE_PATH,
+        MASTER_FINANCE_PATH,
+    )
+    from pds_ultimate.core.database import LedgerBalance, Transaction
+    from pds_ultimate.modules.logistics.archive_sink import archive_sink
 
     if not db_session:
         return ToolResult("security_emergency", False, "", error="Нет сессии БД")
 
-    for fp in [MASTER_FINANCE_PATH, ALL_ORDERS_ARCHIVE_PATH]:
+    for fp in [MASTER_FINANCE_PATH, ALL_ORDERS_ARCHIVE_PATH,
+               ALL_ORDERS_ARCHIVE_LOG_PATH]:
         if fp.exists():
             try:
                 os.remove(fp)
             except OSError:
                 pass
+    archive_sink.forget_state()
 
     db_session.query(Transaction).delete()
+    db_session.query(LedgerBalance).delete()
     db_session.commit()
 
     logger.critical("🚨 SECURITY MODE ACTIVATED")
@@ -636,14 +695,20 @@ async def tool_recall(query: str, **kwargs) -> ToolResult:
 # УТИЛИТЫ
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def _convert_to_usd(amount: float, currency: str) -> float:
-    """Конвертировать в USD."""
-    if currency == "USD":
-        return amount
-    rates = config.currency.fixed_rates
-    if currency in rates:
-        return round(amount / rates[currency], 2)
-    return amount
+def _convert_to_usd(amount: float, currency: str, db_session=None) -> float:
+    """Конвертировать в USD по снапшоту курсов."""
+    return _convert_many_to_usd([(amount, currency)], db_session)[0]
+
+
+def _convert_many_to_usd(
+    pairs: list[tuple[float, str]],
+    db_session=None,
+) -> list[float]:
+    """Пакет (сумма, валюта) → USD одним снапшотом курсов."""
+    from pds_ultimate.modules.finance.rate_snapshot import rate_book
+
+    snap = rate_book.snapshot(db_session)
+    return [round(v, 2) for v in snap.to_usd_many(pairs)]
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -651,6 +716,9 @@ def _convert_to_usd(amount: float, currency: str) -> float:
 # ═══════════════════════════════════════════════════════════════════════════════
 
 
+@performance_engine.memoize(
+    ttl=300, category="tool", stale_ttl=3600, is_negative=_tool_failed,
+)
 async def tool_exchange_rates(
     from_currency: str = "USD",
     to_currency: str = "",
@@ -1974,6 +2042,7 @@ def register_all_tools() -> int:
 
     for tool in tools:
         tool_registry.register(tool)
+    _install_db_invalidation()
 
     logger.info(f"Зарегистрировано {len(tools)} бизнес-инструментов агента")
     return len(tools)
@@ -2733,6 +2802,10 @@ async def tool_create_template(
 # BROWSER TOOLS (handlers)
 # ═══════════════════════════════════════════════════════════════════════════════
 
+@performance_engine.memoize(
+    category="search", stale_ttl=1800, is_negative=_tool_failed,
+    persist=True,
+)
 async def tool_web_search(query: str, max_results: int = 10, **kwargs) -> ToolResult:
     """Поиск в интернете через Browser Engine."""
     from pds_ultimate.core.browser_engine import browser_engine
@@ -2950,6 +3023,9 @@ async def tool_deep_research(
         )
 
 
+@performance_engine.memoize(
+    category="search", is_negative=_tool_failed, persist=True,
+)
 async def tool_quick_search(
     query: str,
     **kwargs,
@@ -0,0 +1,346 @@
+"""
+PDS-Ultimate Persistent Cache (L2)
+====================================
+Второй уровень кэша PerformanceEngine (cached_call, memoize(persist=True))
+— файл SQLite.
+
+- Переживает перезапуск бота
+- Общий для всех процессов на хосте (бот, Streamlit-приложения):
+  journal_mode=WAL + busy_timeout, читатели не блокируют писателя
+- Значения — JSON (UTF-8), крупные сжимаются zlib. Файл общий для
+  процессов, поэтому не pickle: чтение записи не исполняет код.
+  dataclass-значения допускаются только зарегистрированные
+  (register_type) — тег типа + поля; кортежи читаются как списки
+- TTL хранится в expires_at (из CATEGORY_TTL или явного ttl)
+- Очистка протухших и ужатие до max_bytes — фоновой задачей
+  (evict_loop), не на пути запроса
+
+Только stdlib (sqlite3, json, zlib).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any
+
+from pds_ultimate.config import logger
+
+_COMPRESS_THRESHOLD = 4096  # Сжимать значения крупнее (байт)
+_FLAG_RAW = 0
+_FLAG_ZLIB = 1
+_TYPE_TAG = "__l2_type__"
+
+# Разрешённые к хранению dataclass: "module.QualName" → класс
+_TYPES: dict[str, type] = {}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key         TEXT PRIMARY KEY,
+    category    TEXT NOT NULL,
+    value       BLOB NOT NULL,
+    flags       INTEGER NOT NULL DEFAULT 0,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    expires_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache(expires_at);
+CREATE INDEX IF NOT EXISTS idx_cache_category ON cache(category);
+"""
+
+
+def register_type(cls: type) -> type:
+    """
+    Разрешить хранение dataclass в L2 (декоратор).
+    При чтении восстанавливаются только зарегистрированные классы.
+    """
+    _TYPES[f"{cls.__module__}.{cls.__qualname__}"] = cls
+    return cls
+
+
+def _json_default(value: Any) -> dict:
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        name = f"{type(value).__module__}.{type(value).__qualname__}"
+        if name in _TYPES:
+            return {
+                _TYPE_TAG: name,
+                "fields": {
+                    f.name: getattr(value, f.name)
+                    for f in dataclasses.fields(value)
+                },
+            }
+    raise TypeError(f"{type(value).__name__} не сериализуется в L2")
+
+
+def _json_object(obj: dict) -> Any:
+    name = obj.get(_TYPE_TAG)
+    if name is None:
+        return obj
+    cls = _TYPES.get(name)
+    if cls is None:
+        raise ValueError(f"L2: тип {name} не зарегистрирован")
+    return cls(**obj["fields"])
+
+
+@dataclasses.dataclass
+class L2Entry:
+    """Запись, прочитанная из L2."""
+    key: str
+    value: Any
+    category: str
+    created_at: float
+    expires_at: float
+
+    @property
+    def ttl_left(self) -> float:
+        return self.expires_at - time.time()
+
+
+class PersistentCache:
+    """
+    L2-кэш в SQLite-файле.
+
+    Использование:
+        l2 = PersistentCache(DATA_DIR / "cache.sqlite", max_bytes=256 * 2**20)
+        l2.put("llm:abc", answer, ttl=300, category="llm")
+        entry = l2.get("llm:abc")       # L2Entry | None
+        await l2.evict_loop(interval=60)  # фоновая очистка
+
+    Соединение открывается лениво при первом обращении.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self._path = Path(path)
+        self._max_bytes = max_bytes
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+        self._errors = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    # ─── Connection ──────────────────────────────────────────────────────
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self._path), timeout=5.0, check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ─── Core API ────────────────────────────────────────────────────────
+
+    def get(self, key: str) -> L2Entry | None:
+        """Прочитать живую запись (протухшие не возвращаются)."""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT value, flags, category, created_at, expires_at "
+                    "FROM cache WHERE key = ? AND expires_at > ?",
+                    (key, time.time()),
+                ).fetchone()
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.debug(f"L2 cache: ошибка чтения '{key}': {e}")
+            return None
+
+        if row is None:
+            self._misses += 1
+            return None
+        blob, flags, category, created_at, expires_at = row
+        try:
+            value = self._decode(blob, flags)
+        except Exception as e:
+            self._errors += 1
+            logger.debug(f"L2 cache: битая запись '{key}': {e}")
+            return None
+
+        self._hits += 1
+        return L2Entry(
+            key=key,
+            value=value,
+            category=category,
+            created_at=created_at,
+            expires_at=expires_at,
+        )
+
+    def put(
+        self,
+        key: str,
+        value: Any,
+        ttl: float,
+        category: str = "general",
+    ) -> bool:
+        """
+        Записать значение. False — значение не сериализуется
+        (или ошибка SQLite); L1 при этом работает как обычно.
+        """
+        try:
+            blob, flags = self._encode(value)
+        except Exception as e:
+            logger.debug(f"L2 cache: '{key}' не сериализуется: {e}")
+            return False
+
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache "
+                    "(key, category, value, flags, size, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, category, blob, flags, len(blob), now, now + ttl),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.debug(f"L2 cache: ошибка записи '{key}': {e}")
+            return False
+
+        self._writes += 1
+        return True
+
+    def invalidate(self, key: str) -> bool:
+        return self._delete("DELETE FROM cache WHERE key = ?", (key,)) > 0
+
+    def invalidate_category(self, category: str) -> int:
+        return self._delete(
+            "DELETE FROM cache WHERE category = ?", (category,))
+
+    def invalidate_pattern(self, pattern: str) -> int:
+        """Удалить ключи с префиксом pattern."""
+        escaped = (
+            pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        return self._delete(
+            "DELETE FROM cache WHERE key LIKE ? ESCAPE '\\'", (escaped + "%",))
+
+    def clear(self) -> None:
+        self._delete("DELETE FROM cache", ())
+
+    # ─── Eviction ────────────────────────────────────────────────────────
+
+    def evict(self) -> int:
+        """
+        Удалить протухшие записи и ужать файл до max_bytes
+        (первыми уходят записи, которые протухнут раньше всех).
+        """
+        removed = self._delete(
+            "DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        try:
+            with self._lock:
+                conn = self._connect()
+                total = conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+                excess = total - self._max_bytes
+                if self._max_bytes and excess > 0:
+                    victims: list[tuple[str]] = []
+                    freed = 0
+                    for key, size in conn.execute(
+                        "SELECT key, size FROM cache ORDER BY expires_at"
+                    ):
+                        victims.append((key,))
+                        freed += size
+                        if freed >= excess:
+                            break
+                    conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+                    conn.commit()
+                    removed += len(victims)
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.warning(f"L2 cache: ошибка вытеснения: {e}")
+
+        self._evictions += removed
+        return removed
+
+    async def evict_loop(self, interval: float = 60.0) -> None:
+        """Фоновая очистка (запускается PerformanceEngine.start)."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                removed = await asyncio.to_thread(self.evict)
+                if removed:
+                    logger.debug(f"L2 cache: вытеснено {removed} записей")
+            except Exception as e:
+                logger.warning(f"L2 cache: ошибка фоновой очистки: {e}")
+
+    # ─── Statistics ──────────────────────────────────────────────────────
+
+    def get_stats(self) -> dict:
+        entries = size = 0
+        try:
+            with self._lock:
+                entries, size = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+                ).fetchone()
+        except sqlite3.Error:
+            pass
+        total = self._hits + self._misses
+        return {
+            "path": str(self._path),
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self._max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": f"{self._hits / total:.1%}" if total else "0%",
+            "writes": self._writes,
+            "evictions": self._evictions,
+            "errors": self._errors,
+        }
+
+    # ─── Internal ────────────────────────────────────────────────────────
+
+    def _delete(self, sql: str, params: tuple) -> int:
+        try:
+            with self._lock:
+                conn = self._connect()
+                count = conn.execute(sql, params).rowcount
+                conn.commit()
+                return count
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.warning(f"L2 cache: ошибка удаления: {e}")
+            return 0
+
+    @staticmethod
+    def _encode(value: Any) -> tuple[bytes, int]:
+        blob = json.dumps(
+            value, default=_json_default,
+            ensure_ascii=False, separators=(",", ":"),
+        ).encode()
+        if len(blob) > _COMPRESS_THRESHOLD:
+            return zlib.compress(blob, 1), _FLAG_ZLIB
+        return blob, _FLAG_RAW
+
+    @staticmethod
+    def _decode(blob: bytes, flags: int) -> Any:
+        if flags & _FLAG_ZLIB:
+            blob = zlib.decompress(blob)
+        return json.loads(blob, object_hook=_json_object)
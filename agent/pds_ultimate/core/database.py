@@ -583,6 +583,149 @@ class FinanceSummary(TimestampMixin, Base):
         )
 
 
+# ─── МОДЕЛИ: ЛЕДЖЕР (НАКОПИТЕЛЬНЫЕ БАЛАНСЫ) ────────────────────────────────
+
+LEDGER_ALL_TIME = 0  # period_year = period_month = 0 — итог за всё время
+
+
+class LedgerBalance(TimestampMixin, Base):
+    """
+    Материализованные суммы транзакций: тип × месяц (+ строка «за всё время»).
+
+    Поддерживается инкрементально хуками маппера Transaction — в той же
+    транзакции БД, что и сама запись. Чтение баланса — несколько строк
+    вместо SUM по всей истории. Сверка/перестройка: aggregates.verify_ledger.
+    """
+    __tablename__ = "ledger_balances"
+
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=True)
+    transaction_type: Mapped[TransactionType] = mapped_column(
+        SAEnum(TransactionType), nullable=False
+    )
+    period_year: Mapped[int] = mapped_column(Integer, nullable=False)
+    period_month: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    total_usd: Mapped[float] = mapped_column(Float, default=0.0)
+    tx_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("transaction_type", "period_year", "period_month",
+                         name="uq_ledger_type_period"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<LedgerBalance({self.transaction_type.value} "
+            f"{self.period_year}-{self.period_month:02d}, "
+            f"total={self.total_usd})>"
+        )
+
+
+def _ledger_insert_construct(dialect_name: str):
+    """insert() с on_conflict_do_update для диалекта (None — не поддерживается)."""
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    return None
+
+
+def _ledger_apply(
+    connection,
+    tx_type: TransactionType,
+    tx_date: date | None,
+    amount_usd: float | None,
+    count: int,
+) -> None:
+    """Прибавить (count=1) или вычесть (count=-1) транзакцию из леджера."""
+    table = LedgerBalance.__table__
+    insert = _ledger_insert_construct(connection.dialect.name)
+    tx_date = tx_date or date.today()
+    delta = (amount_usd or 0.0) * count
+    now = datetime.utcnow()
+    increment = {
+        "total_usd": table.c.total_usd + delta,
+        "tx_count": table.c.tx_count + count,
+        "updated_at": now,
+    }
+
+    for year, month in (
+        (tx_date.year, tx_date.month),
+        (LEDGER_ALL_TIME, LEDGER_ALL_TIME),
+    ):
+        row = {
+            "transaction_type": tx_type,
+            "period_year": year,
+            "period_month": month,
+        }
+        if insert is not None:
+            stmt = insert(table).values(
+                **row,
+                total_usd=delta,
+                tx_count=count,
+                created_at=now,
+                updated_at=now,
+            )
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=[
+                    table.c.transaction_type,
+                    table.c.period_year,
+                    table.c.period_month,
+                ],
+                set_=increment,
+            ))
+            continue
+
+        # Прочие диалекты: UPDATE, а если строки периода ещё нет — INSERT
+        result = connection.execute(
+            table.update()
+            .where(*(table.c[name] == value for name, value in row.items()))
+            .values(**increment)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(
+                **row,
+                total_usd=delta,
+                tx_count=count,
+                created_at=now,
+                updated_at=now,
+            ))
+
+
+@event.listens_for(Transaction, "after_insert")
+def _ledger_on_insert(mapper, connection, target: Transaction) -> None:
+    _ledger_apply(connection, target.transaction_type,
+                  target.transaction_date, target.amount_usd, 1)
+
+
+@event.listens_for(Transaction, "after_delete")
+def _ledger_on_delete(mapper, connection, target: Transaction) -> None:
+    _ledger_apply(connection, target.transaction_type,
+                  target.transaction_date, target.amount_usd, -1)
+
+
+@event.listens_for(Transaction, "after_update")
+def _ledger_on_update(mapper, connection, target: Transaction) -> None:
+    from sqlalchemy import inspect
+
+    state = inspect(target)
+    old = {}
+    for attr in ("transaction_type", "transaction_date", "amount_usd"):
+        history = state.attrs[attr].history
+        old[attr] = history.deleted[0] if history.deleted else getattr(
+            target, attr)
+
+    if all(old[attr] == getattr(target, attr) for attr in old):
+        return
+    _ledger_apply(connection, old["transaction_type"],
+                  old["transaction_date"], old["amount_usd"], -1)
+    _ledger_apply(connection, target.transaction_type,
+                  target.transaction_date, target.amount_usd, 1)
+
+
 # ─── МОДЕЛИ: КЭШ КУРСОВ ВАЛЮТ ───────────────────────────────────────────────
 
 class CurrencyRate(TimestampMixin, Base):
@@ -1072,6 +1215,16 @@ class AgentThought(TimestampMixin, Base):
         return f"<AgentThought(id={self.id}, iters={self.iterations}, tools={self.tools_used})>"
 
 
+# ─── Полнотекстовый поиск (FTS5) ────────────────────────────────────────────
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_search_index(target, connection, **kw) -> None:
+    """FTS-таблицы и триггеры после create_all (см. core/search_index.py)."""
+    from pds_ultimate.core.search_index import install_search_index
+
+    install_search_index(connection)
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # DATABASE ENGINE & SESSION
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1128,10 +1281,26 @@ def init_database(db_path: str | None = None) -> tuple:
     # Инициализация фиксированных курсов валют
     _init_fixed_currency_rates(SessionFactory)
 
+    # Леджер для БД, созданной до появления ledger_balances
+    _init_ledger(SessionFactory)
+
     logger.info(f"База данных инициализирована: {db_path or DATABASE_PATH}")
     return engine, SessionFactory
 
 
+def _init_ledger(SessionFactory: sessionmaker) -> None:
+    """Построить леджер по истории, если он пуст, а транзакции есть."""
+    from pds_ultimate.core.aggregates import rebuild_ledger
+
+    with SessionFactory() as session:
+        if session.query(LedgerBalance.id).first() is not None:
+            return
+        if session.query(Transaction.id).first() is None:
+            return
+        rows = rebuild_ledger(session)
+        logger.info(f"Леджер построен по истории транзакций: {rows} строк")
+
+
 def _init_fixed_currency_rates(SessionFactory: sessionmaker) -> None:
     """
     Инициализация фиксированных курсов валют.
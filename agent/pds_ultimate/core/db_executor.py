@@ -0,0 +1,288 @@
+"""
+PDS-Ultimate DB Executor
+==========================
+Асинхронный доступ к синхронному SQLAlchemy без блокировки event loop.
+
+SQLAlchemy asyncio + aiosqlite потребовали бы переписать все модели
+и запросы; вместо этого синхронные запросы уходят в выделенный пул
+потоков с ограниченной очередью:
+- Один медленный запрос архива/финансов не останавливает остальные чаты
+- Очередь ограничена (DB_MAX_QUEUE) — при перегрузке вызывающие ждут
+- Латентность по каждому имени запроса: count, avg, p50/p95, max,
+  время ожидания в очереди; медленные запросы — в лог
+
+In-memory SQLite (SingletonThreadPool: соединение привязано к потоку)
+выполняется inline — метрики собираются так же.
+
+Использование:
+    rows = await db_executor.run(fn, session, name="orders.active", bind=session)
+    data = await db_executor.run_session(
+        session_factory, lambda s: ..., name="finance.get_balance",
+    )
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, TypeVar
+
+from pds_ultimate.config import config, logger
+
+T = TypeVar("T")
+
+_SAMPLES = 512  # Последних замеров на запрос (для перцентилей)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# METRICS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+@dataclass
+class QueryStats:
+    """Латентность одного именованного запроса."""
+    count: int = 0
+    errors: int = 0
+    inline: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    wait_ms: float = 0.0
+    samples: deque = field(default_factory=lambda: deque(maxlen=_SAMPLES))
+
+    def record(self, run_ms: float, wait_ms: float, ok: bool, inline: bool) -> None:
+        self.count += 1
+        self.total_ms += run_ms
+        self.wait_ms += wait_ms
+        self.max_ms = max(self.max_ms, run_ms)
+        self.samples.append(run_ms)
+        if not ok:
+            self.errors += 1
+        if inline:
+            self.inline += 1
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "inline": self.inline,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5), 2),
+            "p95_ms": round(self.percentile(0.95), 2),
+            "max_ms": round(self.max_ms, 2),
+            "avg_wait_ms": round(self.wait_ms / self.count, 2) if self.count else 0.0,
+        }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# EXECUTOR
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def _resolve_engine(bind: Any):
+    """Engine из Session / sessionmaker / Engine / Connection (или None)."""
+    if bind is None:
+        return None
+    if hasattr(bind, "get_bind"):  # Session
+        try:
+            return bind.get_bind()
+        except Exception:
+            return None
+    if hasattr(bind, "kw"):  # sessionmaker
+        return bind.kw.get("bind")
+    if hasattr(bind, "engine"):  # Connection / Engine
+        return bind.engine
+    return None
+
+
+def is_thread_bound(bind: Any) -> bool:
+    """
+    True — соединения нельзя передавать в другой поток
+    (in-memory SQLite: своя БД у каждого потока).
+    """
+    from sqlalchemy.pool import SingletonThreadPool
+
+    engine = _resolve_engine(bind)
+    if engine is None:
+        return False
+    if isinstance(engine.pool, SingletonThreadPool):
+        return True
+    return engine.url.get_backend_name() == "sqlite" and \
+        engine.url.database in (None, "", ":memory:")
+
+
+class DBExecutor:
+    """
+    Пул потоков для синхронных запросов к БД.
+
+    Одна Session в каждый момент используется одним потоком:
+    вызывающий await-ит результат, прежде чем трогать сессию снова.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue: int = 256,
+        slow_query_ms: float = 500,
+    ):
+        self._workers = max(1, workers)
+        self._max_queue = max(1, max_queue)
+        self._slow_query_ms = slow_query_ms
+        self._pool: ThreadPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+        self._pending = 0
+        self._peak_pending = 0
+        self._stats: dict[str, QueryStats] = {}
+        self._stats_lock = threading.Lock()
+
+    # ─── Public API ──────────────────────────────────────────────────────
+
+    async def run(
+        self,
+        fn: Callable[..., T],
+        *args,
+        name: str | None = None,
+        bind: Any = None,
+        **kwargs,
+    ) -> T:
+        """
+        Выполнить синхронную fn(*args, **kwargs) в потоке БД.
+
+        Args:
+            name: Имя запроса для метрик (по умолчанию — имя функции)
+            bind: Session / sessionmaker / Engine — для проверки,
+                  можно ли уводить соединение в другой поток
+        """
+        name = name or getattr(fn, "__qualname__", "query")
+        if is_thread_bound(bind):
+            return self._call(fn, args, kwargs, name, 0.0, inline=True)
+
+        slots = self._get_slots()
+        queued_at = time.perf_counter()
+        async with slots:
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    self._get_pool(),
+                    lambda: self._call(fn, args, kwargs, name, queued_at),
+                )
+            finally:
+                self._pending -= 1
+
+    async def run_session(
+        self,
+        session_factory: Callable,
+        fn: Callable[[Any], T],
+        name: str | None = None,
+    ) -> T:
+        """
+        Открыть сессию из фабрики в потоке БД и выполнить fn(session).
+        Коммитит fn сама (как в обычном `with session_factory() as s`).
+        """
+        def call():
+            with session_factory() as session:
+                return fn(session)
+
+        return await self.run(
+            call, name=name or getattr(fn, "__qualname__", "session"),
+            bind=session_factory,
+        )
+
+    # ─── Statistics ──────────────────────────────────────────────────────
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            queries = {
+                name: stats.to_dict()
+                for name, stats in sorted(self._stats.items())
+            }
+        return {
+            "workers": self._workers,
+            "max_queue": self._max_queue,
+            "pending": self._pending,
+            "peak_pending": self._peak_pending,
+            "queries": queries,
+        }
+
+    def get_query_stats(self, name: str) -> dict | None:
+        with self._stats_lock:
+            stats = self._stats.get(name)
+            return stats.to_dict() if stats else None
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._stats.clear()
+        self._peak_pending = self._pending
+
+    # ─── Lifecycle ───────────────────────────────────────────────────────
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    # ─── Internal ────────────────────────────────────────────────────────
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self._workers, thread_name_prefix="pds-db",
+            )
+        return self._pool
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Семафор привязывается к event loop — пересоздаём при смене loop
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self._max_queue)
+            self._slots_loop = loop
+        return self._slots
+
+    def _call(
+        self,
+        fn: Callable[..., T],
+        args: tuple,
+        kwargs: dict,
+        name: str,
+        queued_at: float,
+        inline: bool = False,
+    ) -> T:
+        start = time.perf_counter()
+        wait_ms = (start - queued_at) * 1000 if queued_at else 0.0
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            run_ms = (time.perf_counter() - start) * 1000
+            with self._stats_lock:
+                stats = self._stats.setdefault(name, QueryStats())
+                stats.record(run_ms, wait_ms, ok, inline)
+            if run_ms >= self._slow_query_ms:
+                logger.warning(
+                    f"DB: медленный запрос '{name}' {run_ms:.0f}мс "
+                    f"(ожидание {wait_ms:.0f}мс)"
+                )
+
+
+# ─── Глобальный экземпляр ────────────────────────────────────────────────────
+
+db_executor = DBExecutor(
+    workers=config.database.workers,
+    max_queue=config.database.max_queue,
+    slow_query_ms=config.database.slow_query_ms,
+)
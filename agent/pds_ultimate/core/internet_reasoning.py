@@ -18,14 +18,20 @@ PDS-Ultimate Internet Reasoning Layer
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import re
+from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from urllib.parse import urlparse
 
 from pds_ultimate.config import logger
+from pds_ultimate.core.research_fetcher import (
+    ResearchFetcher,
+    research_fetcher,
+)
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # CONSTANTS
@@ -205,6 +211,7 @@ class ResearchStats:
     """Статистика исследования."""
     queries_performed: int = 0
     pages_analyzed: int = 0
+    pages_from_cache: int = 0
     facts_extracted: int = 0
     contradictions_found: int = 0
     total_time_ms: int = 0
@@ -213,6 +220,7 @@ class ResearchStats:
         return {
             "queries": self.queries_performed,
             "pages": self.pages_analyzed,
+            "cached_pages": self.pages_from_cache,
             "facts": self.facts_extracted,
             "contradictions": self.contradictions_found,
             "time_ms": self.total_time_ms,
@@ -689,7 +697,87 @@ class FactExtractor:
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# 4. CONTRADICTION DETECTOR — Обнаружение противоречий
+# 4. KEYWORD INDEX — Кандидатные пары вместо перебора O(n²)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def jaccard(shared: int, len_a: int, len_b: int) -> float:
+    """Jaccard по размеру пересечения и размерам множеств."""
+    union = len_a + len_b - shared
+    return shared / union if union > 0 else 0.0
+
+
+class KeywordIndex:
+    """
+    Инвертированный индекс: слово → id элементов, где оно встречается.
+
+    overlaps() находит только элементы, у которых есть общие слова
+    с запросом, вместе с размером пересечения. Пары без общих слов
+    (Jaccard = 0) не рассматриваются вовсе.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, set[int]] = defaultdict(set)
+        self._sets: dict[int, frozenset[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._sets)
+
+    def add(self, item_id: int, tokens: frozenset[str]) -> None:
+        self._sets[item_id] = tokens
+        for token in tokens:
+            self._postings[token].add(item_id)
+
+    def remove(self, item_id: int) -> None:
+        for token in self._sets.pop(item_id, ()):
+            posting = self._postings[token]
+            posting.discard(item_id)
+            if not posting:
+                del self._postings[token]
+
+    def tokens(self, item_id: int) -> frozenset[str]:
+        return self._sets[item_id]
+
+    def overlaps(self, tokens: frozenset[str]) -> dict[int, int]:
+        """id → число общих слов (только для id с пересечением > 0)."""
+        counts: dict[int, int] = defaultdict(int)
+        for token in tokens:
+            for item_id in self._postings.get(token, ()):
+                counts[item_id] += 1
+        return counts
+
+
+def candidate_pairs(
+    token_sets: list[frozenset[str]],
+    min_similarity: float,
+) -> list[tuple[int, int, int]]:
+    """
+    Пары (i, j, shared), i < j, с Jaccard(token_sets[i], token_sets[j])
+    >= min_similarity, в порядке полного перебора.
+
+    При min_similarity <= 0 подходит любая пара (в том числе без общих
+    слов) — тогда возвращается полный перебор.
+    """
+    n = len(token_sets)
+    if min_similarity <= 0:
+        return [
+            (i, j, len(token_sets[i] & token_sets[j]))
+            for i in range(n) for j in range(i + 1, n)
+        ]
+
+    index = KeywordIndex()
+    pairs: list[tuple[int, int, int]] = []
+    for j, tokens in enumerate(token_sets):
+        for i, shared in index.overlaps(tokens).items():
+            if jaccard(shared, len(token_sets[i]), len(tokens)) >= min_similarity:
+                pairs.append((i, j, shared))
+        index.add(j, tokens)
+    pairs.sort()
+    return pairs
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 5. CONTRADICTION DETECTOR — Обнаружение противоречий
 # ═══════════════════════════════════════════════════════════════════════════════
 
 
@@ -749,30 +837,25 @@ class ContradictionDetector:
         """
         contradictions: list[Contradiction] = []
 
-        # Сравниваем каждую пару фактов
-        for i in range(len(facts)):
-            for j in range(i + 1, len(facts)):
-                fa, fb = facts[i], facts[j]
-
-                # Пропускаем факты из одного источника
-                if fa.source.url == fb.source.url:
-                    continue
+        # Только пары с достаточным числом общих keywords
+        keyword_sets = [frozenset(f.keywords) for f in facts]
+        for i, j, shared in candidate_pairs(keyword_sets, similarity_threshold):
+            fa, fb = facts[i], facts[j]
 
-                # Проверяем тематическое сходство
-                similarity = self._topic_similarity(fa, fb)
-                if similarity < similarity_threshold:
-                    continue
+            # Пропускаем факты из одного источника
+            if fa.source.url == fb.source.url:
+                continue
 
-                # Проверяем числовые противоречия
-                num_contradiction = self._check_numeric(fa, fb)
-                if num_contradiction:
-                    contradictions.append(num_contradiction)
-                    continue
+            # Проверяем числовые противоречия
+            num_contradiction = self._check_numeric(fa, fb)
+            if num_contradiction:
+                contradictions.append(num_contradiction)
+                continue
 
-                # Проверяем текстовые противоречия
-                text_contradiction = self._check_textual(fa, fb)
-                if text_contradiction:
-                    contradictions.append(text_contradiction)
+            # Проверяем текстовые противоречия
+            text_contradiction = self._check_textual(fa, fb, shared=shared)
+            if text_contradiction:
+                contradictions.append(text_contradiction)
 
         return contradictions
 
@@ -842,8 +925,13 @@ class ContradictionDetector:
         self,
         fa: ExtractedFact,
         fb: ExtractedFact,
+        shared: int | None = None,
     ) -> Contradiction | None:
-        """Проверить текстовые противоречия."""
+        """
+        Проверить текстовые противоречия.
+
+        shared — число общих keywords, если уже посчитано (detect).
+        """
         text_a = fa.text.lower()
         text_b = fb.text.lower()
 
@@ -870,8 +958,9 @@ class ContradictionDetector:
 
         if negation_a != negation_b:
             # Одно утверждает, другое отрицает
-            overlap = set(fa.keywords) & set(fb.keywords)
-            if len(overlap) >= 2:
+            if shared is None:
+                shared = len(set(fa.keywords) & set(fb.keywords))
+            if shared >= 2:
                 return Contradiction(
                     fact_a=fa,
                     fact_b=fb,
@@ -883,7 +972,7 @@ class ContradictionDetector:
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# 5. FACT SYNTHESIZER — Синтез ответа
+# 6. FACT SYNTHESIZER — Синтез ответа
 # ═══════════════════════════════════════════════════════════════════════════════
 
 
@@ -960,23 +1049,37 @@ class FactSynthesizer:
         facts: list[ExtractedFact],
         threshold: float = 0.7,
     ) -> list[ExtractedFact]:
-        """Удалить дубликаты (по текстовому сходству)."""
-        unique: list[ExtractedFact] = []
-
-        for fact in facts:
-            is_dup = False
-            for existing in unique:
-                if self._text_similarity(fact.text, existing.text) > threshold:
-                    # Оставляем факт с большей уверенностью
-                    if fact.confidence > existing.confidence:
-                        unique.remove(existing)
-                        unique.append(fact)
-                    is_dup = True
+        """
+        Удалить дубликаты (по текстовому сходству).
+
+        Факт сравнивается только с уже принятыми фактами, у которых есть
+        общие слова (KeywordIndex); среди них, как и при переборе,
+        берётся первый по порядку в списке уникальных.
+        """
+        # seq → факт; порядок ключей = порядок в списке уникальных
+        unique: dict[int, ExtractedFact] = {}
+        index = KeywordIndex()
+
+        for seq, fact in enumerate(facts):
+            words = frozenset(fact.text.lower().split())
+            dup_of = None
+            for other, shared in sorted(index.overlaps(words).items()):
+                sim = jaccard(shared, len(index.tokens(other)), len(words))
+                if sim > threshold:
+                    dup_of = other
                     break
-            if not is_dup:
-                unique.append(fact)
 
-        return unique
+            if dup_of is None:
+                unique[seq] = fact
+                index.add(seq, words)
+            elif fact.confidence > unique[dup_of].confidence:
+                # Оставляем факт с большей уверенностью (в конце списка)
+                del unique[dup_of]
+                index.remove(dup_of)
+                unique[seq] = fact
+                index.add(seq, words)
+
+        return list(unique.values())
 
     def _text_similarity(self, a: str, b: str) -> float:
         """Jaccard similarity по словам."""
@@ -1048,7 +1151,7 @@ class FactSynthesizer:
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# 6. INTERNET REASONING ENGINE — Главный класс
+# 7. INTERNET REASONING ENGINE — Главный класс
 # ═══════════════════════════════════════════════════════════════════════════════
 
 
@@ -1059,10 +1162,14 @@ class InternetReasoningEngine:
     Оркестрирует весь pipeline:
     Query → Expand → Search → Extract → Score → Detect → Synthesize
 
-    Использует Browser Engine для фактического доступа к интернету.
+    Использует Browser Engine для фактического доступа к интернету:
+    поисковые запросы и загрузка страниц идут параллельно через
+    ResearchFetcher (общий и доменный лимиты), факты извлекаются
+    из каждой страницы сразу по её готовности.
     """
 
-    def __init__(self):
+    def __init__(self, fetcher: ResearchFetcher | None = None):
+        self._fetcher = fetcher or research_fetcher
         self._trust_scorer = TrustScorer()
         self._query_expander = QueryExpander()
         self._fact_extractor = FactExtractor()
@@ -1090,6 +1197,10 @@ class InternetReasoningEngine:
     def fact_synthesizer(self) -> FactSynthesizer:
         return self._fact_synthesizer
 
+    @property
+    def fetcher(self) -> ResearchFetcher:
+        return self._fetcher
+
     @property
     def stats(self) -> ResearchStats:
         return self._stats
@@ -1124,39 +1235,46 @@ class InternetReasoningEngine:
         import time
         start = time.monotonic()
 
-        from pds_ultimate.core.browser_engine import browser_engine
-
         # 1. Расширяем запросы
         if expand_queries:
             queries = self._query_expander.expand(query, max_queries=3)
         else:
             queries = [query]
 
-        # 2. Ищем
+        # 2. Ищем (запросы параллельно, порядок результатов — как у queries)
+        outcomes = await asyncio.gather(
+            *(self._fetcher.search(q, max_results=max_sources)
+              for q in queries),
+            return_exceptions=True,
+        )
+
         all_search_results = []
         seen_urls: set[str] = set()
 
-        for q in queries:
-            try:
-                results = await browser_engine.web_search(
-                    q, max_results=max_sources
-                )
-                for r in results:
-                    if r.url not in seen_urls:
-                        all_search_results.append(r)
-                        seen_urls.add(r.url)
-                self._stats.queries_performed += 1
-            except Exception as e:
-                logger.warning(f"Search error for '{q}': {e}")
-
-        # 3. Извлекаем данные со страниц
-        sources: list[SourceInfo] = []
-        all_facts: list[ExtractedFact] = []
-
-        for result in all_search_results[:max_sources]:
+        for q, results in zip(queries, outcomes):
+            if isinstance(results, BaseException):
+                logger.warning(f"Search error for '{q}': {results}")
+                continue
+            for r in results:
+                if r.url not in seen_urls:
+                    all_search_results.append(r)
+                    seen_urls.add(r.url)
+            self._stats.queries_performed += 1
+
+        # 3. Загружаем страницы параллельно, обрабатываем по мере готовности
+        targets = all_search_results[:max_sources]
+        processed: list[tuple[int, SourceInfo, list[ExtractedFact]]] = []
+
+        async for page in self._fetcher.stream([r.url for r in targets]):
+            result = targets[page.index]
+            if not page.ok:
+                logger.warning(f"Extract error for {result.url}: {page.error}")
+                continue
             try:
-                extracted = await browser_engine.extract_data(result.url)
+                extracted = page.data
                 self._stats.pages_analyzed += 1
+                if page.from_cache:
+                    self._stats.pages_from_cache += 1
 
                 # Оцениваем источник
                 source_info = self._trust_scorer.score_source(
@@ -1164,7 +1282,6 @@ class InternetReasoningEngine:
                     title=extracted.title or result.title,
                     content=extracted.text,
                 )
-                sources.append(source_info)
 
                 # Извлекаем факты
                 facts = self._fact_extractor.extract_facts(
@@ -1173,12 +1290,19 @@ class InternetReasoningEngine:
                     query=query,
                     max_facts=max_facts_per_source,
                 )
-                all_facts.extend(facts)
+                processed.append((page.index, source_info, facts))
                 self._stats.facts_extracted += len(facts)
 
             except Exception as e:
                 logger.warning(f"Extract error for {result.url}: {e}")
 
+        # Порядок источников — как в выдаче, а не как пришли страницы
+        processed.sort(key=lambda item: item[0])
+        sources: list[SourceInfo] = [src for _, src, _ in processed]
+        all_facts: list[ExtractedFact] = [
+            fact for _, _, facts in processed for fact in facts
+        ]
+
         # 4. Обнаруживаем противоречия
         contradictions = self._contradiction_detector.detect(all_facts)
         self._stats.contradictions_found += len(contradictions)
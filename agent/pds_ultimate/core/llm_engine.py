@@ -6,7 +6,8 @@ PDS-Ultimate LLM Engine
 Возможности:
 - Две модели: deepseek-reasoner (мощная) и deepseek-chat (быстрая)
 - Автоматический выбор модели по типу задачи
-- Retry с экспоненциальным backoff
+- Пул соединений, HTTP/2, бюджет запросов на модель (core/llm_transport.py)
+- Retry с backoff + jitter и учётом Retry-After
 - Потоковая генерация (streaming)
 - Управление контекстом (conversation history)
 - Стиль общения (мимикрия) через system prompt
@@ -16,13 +17,48 @@ PDS-Ultimate LLM Engine
 
 from __future__ import annotations
 
-import asyncio
+import hashlib
 import json
-from typing import Any, AsyncGenerator, Optional
-
-import httpx
+from contextvars import ContextVar, Token
+from typing import Any, AsyncGenerator, Callable, Optional
 
 from pds_ultimate.config import config, logger
+from pds_ultimate.core.llm_transport import LLMTransport
+from pds_ultimate.core.performance_engine import performance_engine
+
+# ─── Учёт токенов ───────────────────────────────────────────────────────────
+# Приёмник usage ответов DeepSeek (prompt_tokens, prompt_cache_hit_tokens,
+# prompt_cache_miss_tokens, ...). ContextVar — у каждого хода агента свой
+# приёмник, параллельные чаты не смешиваются.
+
+_usage_sink: ContextVar[Optional[Callable[[dict], None]]] = ContextVar(
+    "llm_usage_sink", default=None,
+)
+
+
+def set_usage_sink(sink: Optional[Callable[[dict], None]]) -> Token:
+    """Установить приёмник usage для текущего контекста (reset по токену)."""
+    return _usage_sink.set(sink)
+
+
+def reset_usage_sink(token: Token) -> None:
+    _usage_sink.reset(token)
+
+
+# ─── Кэш ответов ────────────────────────────────────────────────────────────
+# Детерминированные запросы (низкая temperature) с тем же payload дают
+# тот же ответ — повтор берётся из cached_call (L1 + L2), без API.
+
+def _cacheable(payload: dict[str, Any]) -> bool:
+    return (
+        config.cache.llm_enabled
+        and payload.get("temperature", 1.0) <= config.cache.llm_max_temperature
+    )
+
+
+def _cache_key(payload: dict[str, Any]) -> str:
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return "llm:" + hashlib.sha256(raw.encode()).hexdigest()
 
 # ─── Системные промпты ──────────────────────────────────────────────────────
 
@@ -124,21 +160,17 @@ class LLMEngine:
     """
 
     def __init__(self):
-        self._api_key = config.deepseek.api_key
-        self._base_url = config.deepseek.base_url.rstrip("/")
         self._model = config.deepseek.model
         self._fast_model = config.deepseek.fast_model
         self._max_tokens = config.deepseek.max_tokens
         self._temperature = config.deepseek.temperature
-        self._timeout = config.deepseek.timeout
-        self._max_retries = config.deepseek.max_retries
 
         # Стиль общения (загружается из БД при старте)
         self._style_guide: Optional[str] = None
         self._system_prompt: str = SYSTEM_PROMPT_BASE
 
-        # HTTP клиент (persistent connection)
-        self._client: Optional[httpx.AsyncClient] = None
+        # Транспорт: пул соединений + бюджет на модель
+        self._transport: Optional[LLMTransport] = None
 
         logger.info(
             f"LLM Engine инициализирован: model={self._model}, "
@@ -148,30 +180,28 @@ class LLMEngine:
     # ─── Lifecycle ───────────────────────────────────────────────────────
 
     async def start(self) -> None:
-        """Запустить движок (создать HTTP клиент)."""
-        client_kwargs = dict(
-            base_url=self._base_url,
-            headers={
-                "Authorization": f"Bearer {self._api_key}",
-                "Content-Type": "application/json",
-            },
-            timeout=httpx.Timeout(self._timeout, connect=30.0),
-        )
+        """Запустить движок (создать транспорт с пулом соединений)."""
+        self._transport = LLMTransport.from_config()
         # Прокси для обхода блокировок
-        proxy_url = config.deepseek.proxy
-        if proxy_url:
-            client_kwargs["proxy"] = proxy_url
-            logger.info(f"LLM Engine proxy: {proxy_url}")
-        self._client = httpx.AsyncClient(**client_kwargs)
-        logger.info("LLM Engine запущен")
+        if config.deepseek.proxy:
+            logger.info(f"LLM Engine proxy: {config.deepseek.proxy}")
+        logger.info(
+            f"LLM Engine запущен (http2={self._transport.http2}, "
+            f"pool={config.deepseek.pool_max_connections}, "
+            f"concurrency={config.deepseek.max_concurrency}/модель)"
+        )
 
     async def stop(self) -> None:
-        """Остановить движок (закрыть HTTP клиент)."""
-        if self._client:
-            await self._client.aclose()
-            self._client = None
+        """Остановить движок (закрыть пул соединений)."""
+        if self._transport:
+            await self._transport.close()
+            self._transport = None
             logger.info("LLM Engine остановлен")
 
+    @property
+    def transport(self) -> Optional[LLMTransport]:
+        return self._transport
+
     # ─── Стиль общения ──────────────────────────────────────────────────
 
     def set_style_guide(self, style_guide: str) -> None:
@@ -402,6 +432,56 @@ class LLMEngine:
         messages.append({"role": "user", "content": message})
         return messages
 
+    async def complete(self, payload: dict[str, Any]) -> str:
+        """
+        Выполнить готовый payload chat/completions (без стриминга).
+        Для вызывающих со своим набором сообщений (Agent).
+        Запросы с temperature ≤ CACHE_LLM_MAX_TEMPERATURE кэшируются
+        (категория "llm"); usage при попадании в кэш не пишется.
+        """
+        if _cacheable(payload):
+            return await performance_engine.cached_call(
+                _cache_key(payload),
+                lambda: self._complete(payload),
+                category="llm",
+            )
+        return await self._complete(payload)
+
+    async def _complete(self, payload: dict[str, Any]) -> str:
+        if not self._transport:
+            await self.start()
+
+        data = await self._transport.complete({**payload, "stream": False})
+        content = data["choices"][0]["message"]["content"]
+        usage = data.get("usage", {})
+        logger.debug(
+            f"LLM response: model={payload.get('model')}, "
+            f"tokens={usage.get('total_tokens', '?')}, "
+            f"cache_hit={usage.get('prompt_cache_hit_tokens', '?')}"
+        )
+        sink = _usage_sink.get()
+        if sink and usage:
+            try:
+                sink(usage)
+            except Exception as e:
+                logger.debug(f"LLM usage sink error: {e}")
+        return content.strip()
+
+    async def stream(
+        self,
+        payload: dict[str, Any],
+    ) -> AsyncGenerator[str, None]:
+        """Выполнить готовый payload потоком — текстовые дельты."""
+        if not self._transport:
+            await self.start()
+
+        try:
+            async for chunk in self._transport.stream(payload):
+                yield chunk
+        except Exception as e:
+            logger.error(f"Ошибка стриминга: {type(e).__name__}: {e}")
+            raise
+
     async def _request(
         self,
         model: str,
@@ -411,76 +491,19 @@ class LLMEngine:
         json_mode: bool = False,
     ) -> str:
         """
-        Отправить запрос к DeepSeek API с retry.
+        Отправить запрос к DeepSeek API (retry — в LLMTransport).
         """
-        if not self._client:
-            await self.start()
-
         payload: dict[str, Any] = {
             "model": model,
             "messages": messages,
             "temperature": temperature,
             "max_tokens": max_tokens,
-            "stream": False,
         }
 
         if json_mode:
             payload["response_format"] = {"type": "json_object"}
 
-        last_error = None
-        for attempt in range(1, self._max_retries + 1):
-            try:
-                response = await self._client.post(
-                    "/v1/chat/completions",
-                    json=payload,
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                content = data["choices"][0]["message"]["content"]
-                usage = data.get("usage", {})
-                logger.debug(
-                    f"LLM response: model={model}, "
-                    f"tokens={usage.get('total_tokens', '?')}, "
-                    f"attempt={attempt}"
-                )
-                return content.strip()
-
-            except httpx.HTTPStatusError as e:
-                last_error = e
-                status = e.response.status_code
-                if status == 429:
-                    # Rate limit — ждём подольше
-                    wait = min(2 ** attempt * 5, 60)
-                    logger.warning(
-                        f"Rate limit, ожидание {wait}с (попытка {attempt})")
-                    await asyncio.sleep(wait)
-                elif status >= 500:
-                    wait = 2 ** attempt
-                    logger.warning(
-                        f"Серверная ошибка {status}, ожидание {wait}с")
-                    await asyncio.sleep(wait)
-                else:
-                    logger.error(f"HTTP ошибка {status}: {e.response.text}")
-                    raise
-
-            except (httpx.ConnectError, httpx.ReadTimeout) as e:
-                last_error = e
-                wait = 2 ** attempt
-                logger.warning(
-                    f"Сетевая ошибка: {type(e).__name__}, "
-                    f"ожидание {wait}с (попытка {attempt})"
-                )
-                await asyncio.sleep(wait)
-
-            except Exception as e:
-                logger.error(
-                    f"Неожиданная ошибка LLM: {type(e).__name__}: {e}")
-                raise
-
-        raise ConnectionError(
-            f"DeepSeek API недоступен после {self._max_retries} попыток: {last_error}"
-        )
+        return await self.complete(payload)
 
     async def _request_stream(
         self,
@@ -490,38 +513,15 @@ class LLMEngine:
         max_tokens: int,
     ) -> AsyncGenerator[str, None]:
         """Потоковый запрос к DeepSeek API."""
-        if not self._client:
-            await self.start()
-
         payload = {
             "model": model,
             "messages": messages,
             "temperature": temperature,
             "max_tokens": max_tokens,
-            "stream": True,
         }
 
-        try:
-            async with self._client.stream(
-                "POST", "/v1/chat/completions", json=payload
-            ) as response:
-                response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data_str = line[6:]
-                        if data_str.strip() == "[DONE]":
-                            break
-                        try:
-                            data = json.loads(data_str)
-                            delta = data["choices"][0].get("delta", {})
-                            content = delta.get("content", "")
-                            if content:
-                                yield content
-                        except (json.JSONDecodeError, KeyError, IndexError):
-                            continue
-        except Exception as e:
-            logger.error(f"Ошибка стриминга: {type(e).__name__}: {e}")
-            raise
+        async for chunk in self.stream(payload):
+            yield chunk
 
     @staticmethod
     def _extract_json_from_text(text: str) -> list | dict:
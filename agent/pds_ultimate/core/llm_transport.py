@@ -0,0 +1,517 @@
+"""
+PDS-Ultimate LLM Transport
+============================
+Транспортный слой к DeepSeek API (OpenAI-совместимый /v1/chat/completions).
+
+- Пул соединений httpx с настраиваемыми лимитами, HTTP/2 (если есть h2)
+- Бюджет на модель: семафор одновременных запросов + token bucket (RPM)
+- Заголовки лимитов: Retry-After, x-ratelimit-remaining/reset-requests
+  приостанавливают bucket модели для ВСЕХ запросов, а не только текущего
+- Retry с экспоненциальным backoff и full jitter
+- Потоковый режим: повтор только до первого полученного токена
+
+JsonObjectCollector — собирает первый JSON-объект из потока токенов,
+чтобы агент мог действовать, не дожидаясь конца генерации.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncGenerator
+
+import httpx
+
+from pds_ultimate.config import config, logger
+
+COMPLETIONS_PATH = "/v1/chat/completions"
+
+# Ошибки, после которых запрос имеет смысл повторить
+_RETRYABLE_ERRORS = (
+    httpx.ConnectError,
+    httpx.ReadTimeout,
+    httpx.PoolTimeout,
+    httpx.RemoteProtocolError,
+)
+
+
+def http2_available() -> bool:
+    """Установлен ли h2 (нужен httpx для HTTP/2)."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After: секунды или HTTP-дата → секунды ожидания."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset(value: str | None) -> float | None:
+    """x-ratelimit-reset-*: "1s", "6m0s", "250ms" или число секунд."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(num) * _DURATION_UNITS[unit] for num, unit in parts)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TOKEN BUCKET
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TokenBucket:
+    """
+    Async token bucket: rate токенов в секунду, до capacity в запасе.
+
+    rate <= 0 — без ограничения (работают только паузы из заголовков).
+    pause(seconds) — все следующие acquire ждут (429 / Retry-After).
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self._waited = 0.0
+
+    async def acquire(self) -> float:
+        """Взять токен. Возвращает, сколько секунд пришлось ждать."""
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self._rate <= 0:
+                    break
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+        waited = time.monotonic() - start
+        self._waited += waited
+        return waited
+
+    def try_acquire(self) -> bool:
+        """Взять токен без ожидания (False — токенов нет или пауза)."""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return False
+        if self._rate <= 0:
+            return True
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    @property
+    def available(self) -> float:
+        """Токенов в запасе сейчас (без списания)."""
+        if self._rate <= 0:
+            return self._capacity
+        self._refill(time.monotonic())
+        return self._tokens
+
+    def pause(self, seconds: float) -> None:
+        """Приостановить выдачу токенов на seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: httpx.Headers) -> None:
+        """Подстроиться под x-ratelimit-* заголовки ответа."""
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        reset = parse_reset(headers.get("x-ratelimit-reset-requests"))
+        if remaining is None:
+            return
+        try:
+            left = int(float(remaining))
+        except ValueError:
+            return
+        if left <= 0 and reset:
+            self.pause(reset)
+        elif self._rate > 0:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, float(left))
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+
+    @property
+    def waited(self) -> float:
+        """Суммарное время ожидания (секунды)."""
+        return self._waited
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STREAMING JSON
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class JsonObjectCollector:
+    """
+    Находит в потоке текста первый JSON-объект верхнего уровня.
+
+    feed(chunk) возвращает текст объекта, как только закрылась
+    его последняя скобка (строки и экранирование учитываются),
+    иначе None. Текст до первой '{' (```json и т.п.) пропускается.
+    """
+
+    def __init__(self):
+        self._buf: list[str] = []
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._done: str | None = None
+
+    def feed(self, chunk: str) -> str | None:
+        if self._done is not None:
+            return self._done
+        for ch in chunk:
+            if not self._started:
+                if ch != "{":
+                    continue
+                self._started = True
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._done = "".join(self._buf)
+                    return self._done
+        return None
+
+    @property
+    def complete(self) -> bool:
+        return self._done is not None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TRANSPORT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+@dataclass
+class TransportStats:
+    """Статистика транспорта."""
+    requests: int = 0
+    streams: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "streams": self.streams,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+        }
+
+
+class LLMTransport:
+    """
+    Пул соединений + бюджет запросов на модель.
+
+    Использование:
+        transport = LLMTransport(base_url, api_key)
+        data = await transport.complete(payload)        # JSON ответа
+        async for delta in transport.stream(payload):   # токены
+            ...
+        await transport.close()
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        timeout: float = 120,
+        max_retries: int = 3,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        max_concurrency: int = 8,
+        rpm: float = 0,
+        retry_base: float = 1.0,
+        retry_cap: float = 60.0,
+        proxy: str = "",
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self._max_retries = max(1, max_retries)
+        self._max_concurrency = max(1, max_concurrency)
+        self._rpm = rpm
+        self._retry_base = retry_base
+        self._retry_cap = retry_cap
+        self._stats = TransportStats()
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+
+        if http2 and not http2_available():
+            logger.warning(
+                "LLM Transport: пакет h2 не установлен — HTTP/1.1 "
+                "(pip install 'httpx[http2]')"
+            )
+            http2 = False
+        self._http2 = http2
+
+        client_kwargs: dict[str, Any] = dict(
+            base_url=base_url,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            },
+            timeout=httpx.Timeout(timeout, connect=30.0),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            http2=http2,
+        )
+        if proxy:
+            client_kwargs["proxy"] = proxy
+        if transport is not None:
+            client_kwargs["transport"] = transport
+        self._client = httpx.AsyncClient(**client_kwargs)
+
+    @classmethod
+    def from_config(cls) -> LLMTransport:
+        """Транспорт с настройками из config.deepseek."""
+        ds = config.deepseek
+        return cls(
+            base_url=ds.base_url.rstrip("/"),
+            api_key=ds.api_key,
+            timeout=ds.timeout,
+            max_retries=ds.max_retries,
+            max_connections=ds.pool_max_connections,
+            max_keepalive=ds.pool_max_keepalive,
+            http2=ds.http2,
+            max_concurrency=ds.max_concurrency,
+            rpm=ds.rpm,
+            proxy=ds.proxy,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client
+
+    @property
+    def http2(self) -> bool:
+        return self._http2
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    # ─── Budget ──────────────────────────────────────────────────────────
+
+    def _budget(self, model: str) -> tuple[asyncio.Semaphore, TokenBucket]:
+        if model not in self._semaphores:
+            self._semaphores[model] = asyncio.Semaphore(self._max_concurrency)
+            self._buckets[model] = TokenBucket(rate=self._rpm / 60)
+        return self._semaphores[model], self._buckets[model]
+
+    def bucket(self, model: str) -> TokenBucket:
+        return self._budget(model)[1]
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: случайная пауза в [0, min(cap, base * 2^attempt)]."""
+        return random.uniform(
+            0, min(self._retry_cap, self._retry_base * 2 ** attempt))
+
+    def _retry_delay(
+        self,
+        response: httpx.Response,
+        bucket: TokenBucket,
+        attempt: int,
+    ) -> float | None:
+        """Пауза перед повтором или None, если ошибка не повторяемая."""
+        status = response.status_code
+        if status != 429 and status < 500:
+            return None
+        retry_after = parse_retry_after(response.headers.get("retry-after"))
+        if status == 429:
+            self._stats.rate_limited += 1
+            wait = retry_after if retry_after is not None else self._backoff(attempt + 2)
+            bucket.pause(wait)
+            return wait
+        return retry_after if retry_after is not None else self._backoff(attempt)
+
+    # ─── Requests ────────────────────────────────────────────────────────
+
+    async def complete(self, payload: dict) -> dict:
+        """POST /v1/chat/completions (stream=False) с retry. Возвращает JSON."""
+        model = payload.get("model", "")
+        semaphore, bucket = self._budget(model)
+        last_error: Exception | None = None
+
+        for attempt in range(1, self._max_retries + 1):
+            await bucket.acquire()
+            try:
+                async with semaphore:
+                    self._stats.requests += 1
+                    response = await self._client.post(
+                        COMPLETIONS_PATH, json=payload)
+                bucket.update_from_headers(response.headers)
+                response.raise_for_status()
+                return response.json()
+
+            except httpx.HTTPStatusError as e:
+                last_error = e
+                wait = self._retry_delay(e.response, bucket, attempt)
+                if wait is None:
+                    self._stats.errors += 1
+                    logger.error(
+                        f"HTTP ошибка {e.response.status_code}: {e.response.text}")
+                    raise
+                logger.warning(
+                    f"LLM {model}: HTTP {e.response.status_code}, "
+                    f"ожидание {wait:.1f}с (попытка {attempt})"
+                )
+
+            except _RETRYABLE_ERRORS as e:
+                last_error = e
+                wait = self._backoff(attempt)
+                logger.warning(
+                    f"Сетевая ошибка: {type(e).__name__}, "
+                    f"ожидание {wait:.1f}с (попытка {attempt})"
+                )
+
+            if attempt < self._max_retries:
+                self._stats.retries += 1
+                await asyncio.sleep(wait)
+
+        self._stats.errors += 1
+        raise ConnectionError(
+            f"DeepSeek API недоступен после {self._max_retries} попыток: {last_error}"
+        )
+
+    async def stream(self, payload: dict) -> AsyncGenerator[str, None]:
+        """
+        Потоковый запрос (SSE). Отдаёт текстовые дельты.
+        Повтор — только пока не получен первый токен.
+        """
+        payload = {**payload, "stream": True}
+        model = payload.get("model", "")
+        semaphore, bucket = self._budget(model)
+        last_error: Exception | None = None
+
+        for attempt in range(1, self._max_retries + 1):
+            yielded = False
+            await bucket.acquire()
+            try:
+                async with semaphore:
+                    self._stats.streams += 1
+                    async with self._client.stream(
+                        "POST", COMPLETIONS_PATH, json=payload,
+                    ) as response:
+                        bucket.update_from_headers(response.headers)
+                        if response.is_error:
+                            await response.aread()
+                        response.raise_for_status()
+                        async for delta in _iter_sse_deltas(response):
+                            yielded = True
+                            yield delta
+                return
+
+            except httpx.HTTPStatusError as e:
+                last_error = e
+                wait = self._retry_delay(e.response, bucket, attempt)
+                if wait is None:
+                    self._stats.errors += 1
+                    raise
+
+            except _RETRYABLE_ERRORS as e:
+                if yielded:
+                    self._stats.errors += 1
+                    raise
+                last_error = e
+                wait = self._backoff(attempt)
+
+            logger.warning(
+                f"LLM stream {model}: {type(last_error).__name__}, "
+                f"ожидание {wait:.1f}с (попытка {attempt})"
+            )
+            if attempt < self._max_retries:
+                self._stats.retries += 1
+                await asyncio.sleep(wait)
+
+        self._stats.errors += 1
+        raise ConnectionError(
+            f"DeepSeek API недоступен после {self._max_retries} попыток: {last_error}"
+        )
+
+    def get_stats(self) -> dict:
+        return {
+            **self._stats.to_dict(),
+            "http2": self._http2,
+            "models": {
+                model: {
+                    "inflight": self._max_concurrency - sem._value,
+                    "throttled_sec": round(self._buckets[model].waited, 2),
+                }
+                for model, sem in self._semaphores.items()
+            },
+        }
+
+
+async def _iter_sse_deltas(response: httpx.Response) -> AsyncGenerator[str, None]:
+    """Текстовые дельты из SSE-потока chat/completions."""
+    async for line in response.aiter_lines():
+        if not line.startswith("data: "):
+            continue
+        data_str = line[6:]
+        if data_str.strip() == "[DONE]":
+            break
+        try:
+            data = json.loads(data_str)
+            content = data["choices"][0].get("delta", {}).get("content", "")
+        except (json.JSONDecodeError, KeyError, IndexError):
+            continue
+        if content:
+            yield content
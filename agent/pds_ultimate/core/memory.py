@@ -25,7 +25,11 @@ PDS-Ultimate Memory System
 
 from __future__ import annotations
 
+import bisect
+import heapq
 import json
+import math
+from collections import Counter
 from datetime import datetime
 from typing import Any
 
@@ -206,6 +210,187 @@ class WorkingMemory:
         self.context_vars.clear()
 
 
+# ─── Memory Index ───────────────────────────────────────────────────────────
+
+class MemoryIndex:
+    """
+    Инвертированный индекс долгосрочной памяти.
+
+    Поддерживается инкрементально при store/remove:
+    - postings: слово → {ключ записи: TF} (слова — content.lower().split())
+    - tag_terms: тег в нижнем регистре → ключи (для скоринга по тегам)
+    - by_type / by_tag: вторичные индексы для фильтров recall
+    - by_importance: отсортированный список (importance, seq, ключ)
+
+    Скоринг — BM25 по содержимому + бонус за совпавшие теги,
+    умноженные на importance (как и раньше). Поиск трогает
+    только postings слов запроса.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    TAG_WEIGHT = 2.0
+
+    def __init__(self):
+        self._entries: dict[int, MemoryEntry] = {}
+        self._terms: dict[int, Counter] = {}       # ключ → TF слов
+        self._doc_len: dict[int, int] = {}
+        self._tag_set: dict[int, set[str]] = {}    # ключ → теги (lower)
+        self._postings: dict[str, dict[int, int]] = {}
+        self._tag_terms: dict[str, set[int]] = {}
+        self._by_type: dict[str, set[int]] = {}
+        self._by_tag: dict[str, set[int]] = {}
+        self._by_importance: list[tuple[float, int, int]] = []
+        self._importance: dict[int, tuple[float, int, int]] = {}
+        self._total_len = 0
+        self._seq = 0
+
+    @staticmethod
+    def key(entry: MemoryEntry) -> int:
+        return id(entry)
+
+    def add(self, entry: MemoryEntry) -> None:
+        """Проиндексировать запись (токены считаются один раз)."""
+        key = self.key(entry)
+        if key in self._entries:
+            return
+        terms = Counter(entry.content.lower().split())
+        tag_set = {t.lower() for t in entry.tags}
+
+        self._entries[key] = entry
+        self._terms[key] = terms
+        self._tag_set[key] = tag_set
+        self._doc_len[key] = sum(terms.values())
+        self._total_len += self._doc_len[key]
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[key] = tf
+        for tag in tag_set:
+            self._tag_terms.setdefault(tag, set()).add(key)
+        for tag in entry.tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        self._by_type.setdefault(entry.memory_type, set()).add(key)
+
+        self._seq += 1
+        item = (entry.importance, self._seq, key)
+        self._importance[key] = item
+        bisect.insort(self._by_importance, item)
+
+    def remove(self, entry: MemoryEntry) -> None:
+        """Убрать запись из всех индексов."""
+        key = self.key(entry)
+        if self._entries.pop(key, None) is None:
+            return
+        terms = self._terms.pop(key)
+        self._total_len -= self._doc_len.pop(key)
+        for term in terms:
+            self._discard(self._postings, term, key)
+        for tag in self._tag_set.pop(key):
+            self._discard(self._tag_terms, tag, key)
+        for tag in entry.tags:
+            self._discard(self._by_tag, tag, key)
+        self._discard(self._by_type, entry.memory_type, key)
+
+        item = self._importance.pop(key)
+        pos = bisect.bisect_left(self._by_importance, item)
+        del self._by_importance[pos]
+
+    @staticmethod
+    def _discard(index: dict, term: str, key: int) -> None:
+        bucket = index.get(term)
+        if bucket is None:
+            return
+        if isinstance(bucket, dict):
+            bucket.pop(key, None)
+        else:
+            bucket.discard(key)
+        if not bucket:
+            del index[term]
+
+    def least_important(self) -> MemoryEntry | None:
+        """Наименее важная запись (при равенстве — самая старая)."""
+        if not self._by_importance:
+            return None
+        return self._entries[self._by_importance[0][2]]
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        memory_type: str | None = None,
+        tags: list[str] | None = None,
+        min_importance: float = 0.0,
+    ) -> list[MemoryEntry]:
+        """BM25 поиск только по postings слов запроса."""
+        query_words = set(query.lower().split())
+        if not query_words or not self._entries:
+            return []
+
+        allowed: set[int] | None = None
+        if memory_type:
+            allowed = self._by_type.get(memory_type, set())
+        if tags:
+            tagged: set[int] = set()
+            for tag in tags:
+                tagged |= self._by_tag.get(tag, set())
+            allowed = tagged if allowed is None else allowed & tagged
+        if allowed is not None and not allowed:
+            return []
+
+        n_docs = len(self._entries)
+        avg_len = self._total_len / n_docs if n_docs else 0.0
+        k1, b = self.K1, self.B
+        scores: dict[int, float] = {}
+
+        for word in query_words:
+            posting = self._postings.get(word)
+            if posting:
+                df = len(posting)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for key, tf in posting.items():
+                    if allowed is not None and key not in allowed:
+                        continue
+                    norm = k1 * (1 - b + b * self._doc_len[key] / avg_len) \
+                        if avg_len else k1
+                    scores[key] = scores.get(key, 0.0) + \
+                        idf * tf * (k1 + 1) / (tf + norm)
+            for key in self._tag_terms.get(word, ()):
+                if allowed is not None and key not in allowed:
+                    continue
+                scores[key] = scores.get(key, 0.0) + self.TAG_WEIGHT
+
+        scored = []
+        for key, score in scores.items():
+            entry = self._entries[key]
+            if entry.importance < min_importance:
+                continue
+            score *= entry.importance
+            if score > 0:
+                scored.append((score, -self._importance[key][1], key))
+
+        top = heapq.nlargest(limit, scored)
+        return [self._entries[key] for _, _, key in top]
+
+    def top_by_importance(
+        self,
+        limit: int,
+        memory_type: str | None = None,
+        min_importance: float = 0.0,
+    ) -> list[MemoryEntry]:
+        """Самые важные записи — с конца отсортированного индекса."""
+        type_keys = self._by_type.get(memory_type, set()) if memory_type else None
+        result: list[MemoryEntry] = []
+        for importance, _, key in reversed(self._by_importance):
+            if len(result) >= limit or importance < min_importance:
+                break
+            if type_keys is not None and key not in type_keys:
+                continue
+            result.append(self._entries[key])
+        return result
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 # ─── Memory Manager ─────────────────────────────────────────────────────────
 
 class MemoryManager:
@@ -256,7 +441,9 @@ class MemoryManager:
 РЕШЕНИЯ: [список принятых решений через |]"""
 
     def __init__(self):
-        self._memories: list[MemoryEntry] = []
+        # Ключ — MemoryIndex.key: вытеснение по ключу за O(1)
+        self._memories: dict[int, MemoryEntry] = {}
+        self._index = MemoryIndex()
         self._working: dict[int, WorkingMemory] = {}  # per chat_id
 
     def get_working(self, chat_id: int) -> WorkingMemory:
@@ -274,7 +461,8 @@ class MemoryManager:
 
     def store(self, entry: MemoryEntry) -> None:
         """Сохранить запись в долгосрочную память."""
-        self._memories.append(entry)
+        self._memories[MemoryIndex.key(entry)] = entry
+        self._index.add(entry)
         self._enforce_limits()
         logger.debug(
             f"Memory stored: [{entry.memory_type}] {entry.content[:50]}...")
@@ -334,8 +522,9 @@ class MemoryManager:
         """
         Найти релевантные воспоминания.
 
-        Простой keyword-based recall (без embeddings, т.к. не нужен
-        дополнительный API/модель — работаем с DeepSeek).
+        Keyword-based recall (без embeddings, т.к. не нужен
+        дополнительный API/модель — работаем с DeepSeek):
+        BM25 по инвертированному индексу + бонус за теги, × importance.
 
         Args:
             query: Поисковый запрос
@@ -347,43 +536,17 @@ class MemoryManager:
         Returns:
             Список релевантных MemoryEntry, отсортированных по релевантности
         """
-        candidates = self._memories.copy()
-
-        # Фильтры
-        if memory_type:
-            candidates = [
-                m for m in candidates if m.memory_type == memory_type]
-        if tags:
-            candidates = [m for m in candidates if any(
-                t in m.tags for t in tags)]
-        if min_importance > 0:
-            candidates = [
-                m for m in candidates if m.importance >= min_importance]
-
-        # Скоринг по keyword overlap
-        query_words = set(query.lower().split())
-        scored = []
-        for m in candidates:
-            content_words = set(m.content.lower().split())
-            tag_words = set(t.lower() for t in m.tags)
-
-            # Пересечение слов (простой TF)
-            word_overlap = len(query_words & content_words)
-            tag_overlap = len(query_words & tag_words)
-
-            # Итоговый скор
-            score = (word_overlap * 1.0 + tag_overlap * 2.0) * m.importance
-            if score > 0:
-                scored.append((score, m))
-
-        # Сортировка по скору (убывание)
-        scored.sort(key=lambda x: x[0], reverse=True)
+        results = self._index.search(
+            query,
+            limit=limit,
+            memory_type=memory_type,
+            tags=tags,
+            min_importance=min_importance,
+        )
 
         # Обновляем access
-        results = []
-        for _, m in scored[:limit]:
+        for m in results:
             m.touch()
-            results.append(m)
 
         return results
 
@@ -394,15 +557,9 @@ class MemoryManager:
         limit: int = 20,
     ) -> list[MemoryEntry]:
         """Получить все воспоминания (или по типу), отсортированные по важности."""
-        candidates = self._memories.copy()
-        if memory_type:
-            candidates = [
-                m for m in candidates if m.memory_type == memory_type]
-        if min_importance > 0:
-            candidates = [
-                m for m in candidates if m.importance >= min_importance]
-        candidates.sort(key=lambda m: m.importance, reverse=True)
-        return candidates[:limit]
+        return self._index.top_by_importance(
+            limit, memory_type=memory_type, min_importance=min_importance,
+        )
 
     def get_context_for_prompt(self, query: str, max_entries: int = 7) -> str:
         """
@@ -451,7 +608,7 @@ class MemoryManager:
         from pds_ultimate.core.database import AgentMemory
 
         count = 0
-        for m in self._memories:
+        for m in self._memories.values():
             if m.db_id is not None:
                 continue  # Уже в БД
 
@@ -489,7 +646,8 @@ class MemoryManager:
 
             count = 0
             existing_ids = {
-                m.db_id for m in self._memories if m.db_id is not None}
+                m.db_id for m in self._memories.values()
+                if m.db_id is not None}
 
             for db_entry in db_entries:
                 if db_entry.id in existing_ids:
@@ -519,7 +677,8 @@ class MemoryManager:
                 entry.db_id = db_entry.id
                 entry.access_count = db_entry.access_count or 0
                 entry.created_at = db_entry.created_at
-                self._memories.append(entry)
+                self._memories[MemoryIndex.key(entry)] = entry
+                self._index.add(entry)
                 count += 1
 
             logger.info(f"Загружено {count} записей памяти из БД")
@@ -623,13 +782,10 @@ class MemoryManager:
 
     def _enforce_limits(self) -> None:
         """Удалить наименее важные записи если превышен лимит."""
-        if len(self._memories) <= self.MAX_MEMORIES:
-            return
-
-        # Сортируем по важности (ascending) и удаляем наименее важные
-        self._memories.sort(key=lambda m: m.importance)
-        excess = len(self._memories) - self.MAX_MEMORIES
-        self._memories = self._memories[excess:]
+        while len(self._memories) > self.MAX_MEMORIES:
+            weakest = self._index.least_important()
+            self._index.remove(weakest)
+            del self._memories[MemoryIndex.key(weakest)]
 
     @property
     def total_count(self) -> int:
@@ -639,13 +795,13 @@ class MemoryManager:
     def get_stats(self) -> dict:
         """Статистика памяти."""
         type_counts: dict[str, int] = {}
-        for m in self._memories:
+        for m in self._memories.values():
             type_counts[m.memory_type] = type_counts.get(m.memory_type, 0) + 1
 
         return {
             "total": len(self._memories),
             "by_type": type_counts,
-            "avg_importance": sum(m.importance for m in self._memories) / max(1, len(self._memories)),
+            "avg_importance": sum(m.importance for m in self._memories.values()) / max(1, len(self._memories)),
             "working_memories": len(self._working),
         }
 
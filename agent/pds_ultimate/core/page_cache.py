@@ -0,0 +1,455 @@
+"""
+PDS-Ultimate Page Cache
+=========================
+Кэш страниц research-пайплайна на диске (SQLite).
+
+- Ключ — нормализованный URL (регистр хоста, порт по умолчанию,
+  фрагмент, utm-метки и порядок query-параметров не важны)
+- Содержимое адресуется хэшем: одинаковые страницы (зеркала, редиректы,
+  повторная загрузка без изменений) хранятся один раз
+- Свежесть — по оценке TimeRelevanceEngine: страница со свежими датами
+  (новости, курсы) устаревает за час, «вечный» контент — за неделю
+- Устаревшая запись с ETag/Last-Modified перепроверяется условным
+  запросом; 304 продлевает свежесть без повторного разбора
+- Результаты поиска кэшируются отдельно с коротким TTL
+
+Только stdlib (sqlite3, json, zlib).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from pds_ultimate.config import config, logger
+from pds_ultimate.core.browser_engine import ExtractedData, SearchResult
+from pds_ultimate.core.time_relevance import FreshnessGrade, TimeRelevanceEngine
+
+# Сколько страница считается свежей в зависимости от оценки её дат.
+# Свежие даты в тексте — контент меняется часто; старые — стабилен.
+FRESHNESS_TTL: dict[FreshnessGrade, float] = {
+    FreshnessGrade.FRESH: 3600,
+    FreshnessGrade.RECENT: 6 * 3600,
+    FreshnessGrade.CURRENT: 24 * 3600,
+    FreshnessGrade.AGING: 3 * 86400,
+    FreshnessGrade.STALE: 7 * 86400,
+    FreshnessGrade.OUTDATED: 7 * 86400,
+}
+
+# Параметры отслеживания — не влияют на содержимое страницы
+_TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "yclid", "msclkid", "mc_cid", "mc_eid", "ref_src",
+})
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_EVICT_EVERY = 200  # Очистка после каждых N записей
+# Поля ExtractedData, которые хранятся в pages, а не в блобе содержимого
+_ENVELOPE_FIELDS = ("url", "etag", "last_modified")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url_key       TEXT PRIMARY KEY,
+    url           TEXT NOT NULL,
+    content_hash  TEXT NOT NULL,
+    etag          TEXT NOT NULL DEFAULT '',
+    last_modified TEXT NOT NULL DEFAULT '',
+    grade         TEXT NOT NULL,
+    fetched_at    REAL NOT NULL,
+    fresh_until   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_fetched ON pages(fetched_at);
+CREATE INDEX IF NOT EXISTS idx_pages_hash ON pages(content_hash);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash  TEXT PRIMARY KEY,
+    data  BLOB NOT NULL,
+    size  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS searches (
+    key         TEXT PRIMARY KEY,
+    data        BLOB NOT NULL,
+    expires_at  REAL NOT NULL
+);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """Канонический вид URL для ключа кэша."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_")
+        and k.lower() not in _TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+@dataclass
+class CachedPage:
+    """Запись кэша страницы."""
+    url: str
+    data: ExtractedData
+    content_hash: str
+    grade: FreshnessGrade
+    fetched_at: float
+    fresh_until: float
+    etag: str = ""
+    last_modified: str = ""
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.fresh_until
+
+    @property
+    def can_revalidate(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class PageCache:
+    """
+    Кэш извлечённых страниц в SQLite-файле.
+
+    Использование:
+        cache = PageCache(DATA_DIR / "page_cache.sqlite")
+        cache.put(extracted)                 # CachedPage
+        entry = cache.get(url)               # CachedPage | None
+        if entry and not entry.is_fresh and entry.can_revalidate:
+            ...  # условный GET; при 304 — cache.touch(entry)
+
+    Методы синхронные — из async-кода вызываются через asyncio.to_thread.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        max_bytes: int = 128 * 1024 * 1024,
+        max_age_days: float = 30,
+        relevance: TimeRelevanceEngine | None = None,
+    ):
+        self._path = Path(path)
+        self._max_bytes = max_bytes
+        self._max_age = max_age_days * 86400
+        self._relevance = relevance or TimeRelevanceEngine()
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._dedup_writes = 0
+        self._revalidated = 0
+        self._errors = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    # ─── Connection ──────────────────────────────────────────────────────
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self._path), timeout=5.0, check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ─── Pages ───────────────────────────────────────────────────────────
+
+    def get(self, url: str) -> CachedPage | None:
+        """
+        Прочитать запись (в том числе устаревшую — её можно перепроверить).
+        Записи старше max_age_days не возвращаются.
+        """
+        key = normalize_url(url)
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT p.url, p.content_hash, p.etag, p.last_modified, "
+                    "p.grade, p.fetched_at, p.fresh_until, b.data "
+                    "FROM pages p JOIN blobs b ON b.hash = p.content_hash "
+                    "WHERE p.url_key = ? AND p.fetched_at > ?",
+                    (key, time.time() - self._max_age),
+                ).fetchone()
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.debug(f"Page cache: ошибка чтения '{key}': {e}")
+            return None
+
+        if row is None:
+            self._misses += 1
+            return None
+        (page_url, content_hash, etag, last_modified, grade, fetched_at,
+         fresh_until, blob) = row
+        try:
+            data = ExtractedData(
+                url=page_url, etag=etag, last_modified=last_modified,
+                **json.loads(zlib.decompress(blob)),
+            )
+        except Exception as e:
+            self._errors += 1
+            logger.debug(f"Page cache: битая запись '{key}': {e}")
+            return None
+
+        entry = CachedPage(
+            url=key,
+            data=data,
+            content_hash=content_hash,
+            grade=FreshnessGrade(grade),
+            fetched_at=fetched_at,
+            fresh_until=fresh_until,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        if entry.is_fresh:
+            self._hits += 1
+        else:
+            self._stale_hits += 1
+        return entry
+
+    def put(self, data: ExtractedData, url: str | None = None) -> CachedPage | None:
+        """
+        Сохранить извлечённую страницу. Срок свежести — по оценке дат
+        в тексте (FRESHNESS_TTL). None — ошибка записи.
+        """
+        page_url = url or data.url
+        key = normalize_url(page_url)
+        content = asdict(data)
+        for name in _ENVELOPE_FIELDS:
+            content.pop(name)
+        blob_json = json.dumps(
+            content, ensure_ascii=False, sort_keys=True,
+        ).encode("utf-8")
+        content_hash = hashlib.sha256(blob_json).hexdigest()
+        grade = self._relevance.check_freshness(data.text).grade
+        now = time.time()
+        fresh_until = now + FRESHNESS_TTL[grade]
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                exists = conn.execute(
+                    "SELECT 1 FROM blobs WHERE hash = ?", (content_hash,)
+                ).fetchone()
+                if exists is None:
+                    blob = zlib.compress(blob_json, 6)
+                    conn.execute(
+                        "INSERT INTO blobs (hash, data, size) VALUES (?, ?, ?)",
+                        (content_hash, blob, len(blob)),
+                    )
+                else:
+                    self._dedup_writes += 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO pages "
+                    "(url_key, url, content_hash, etag, last_modified, grade, "
+                    "fetched_at, fresh_until) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, page_url, content_hash, data.etag, data.last_modified,
+                     grade.value, now, fresh_until),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.debug(f"Page cache: ошибка записи '{key}': {e}")
+            return None
+
+        self._writes += 1
+        if self._writes % _EVICT_EVERY == 0:
+            self.evict()
+        return CachedPage(
+            url=key, data=data, content_hash=content_hash, grade=grade,
+            fetched_at=now, fresh_until=fresh_until,
+            etag=data.etag, last_modified=data.last_modified,
+        )
+
+    def touch(
+        self,
+        entry: CachedPage,
+        etag: str = "",
+        last_modified: str = "",
+    ) -> CachedPage:
+        """
+        Сервер подтвердил, что страница не изменилась (304):
+        продлеваем свежесть на TTL её оценки и обновляем валидаторы.
+        """
+        now = time.time()
+        entry.fresh_until = now + FRESHNESS_TTL[entry.grade]
+        entry.etag = entry.data.etag = etag or entry.etag
+        entry.last_modified = entry.data.last_modified = (
+            last_modified or entry.last_modified)
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "UPDATE pages SET fresh_until = ?, fetched_at = ?, "
+                    "etag = ?, last_modified = ? WHERE url_key = ?",
+                    (entry.fresh_until, now, entry.etag,
+                     entry.last_modified, entry.url),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.debug(f"Page cache: ошибка обновления '{entry.url}': {e}")
+        self._revalidated += 1
+        return entry
+
+    def invalidate(self, url: str) -> bool:
+        return self._execute(
+            "DELETE FROM pages WHERE url_key = ?", (normalize_url(url),)) > 0
+
+    # ─── Search results ──────────────────────────────────────────────────
+
+    @staticmethod
+    def search_key(query: str, max_results: int) -> str:
+        return f"{' '.join(query.lower().split())}|{max_results}"
+
+    def get_search(self, query: str, max_results: int) -> list[SearchResult] | None:
+        key = self.search_key(query, max_results)
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT data FROM searches WHERE key = ? AND expires_at > ?",
+                    (key, time.time()),
+                ).fetchone()
+            if row is None:
+                return None
+            return [SearchResult(**item)
+                    for item in json.loads(zlib.decompress(row[0]))]
+        except Exception as e:
+            self._errors += 1
+            logger.debug(f"Page cache: ошибка чтения поиска '{key}': {e}")
+            return None
+
+    def put_search(
+        self,
+        query: str,
+        max_results: int,
+        results: list[SearchResult],
+        ttl: float,
+    ) -> None:
+        key = self.search_key(query, max_results)
+        blob = zlib.compress(json.dumps(
+            [asdict(r) for r in results], ensure_ascii=False,
+        ).encode("utf-8"))
+        self._execute(
+            "INSERT OR REPLACE INTO searches (key, data, expires_at) "
+            "VALUES (?, ?, ?)",
+            (key, blob, time.time() + ttl),
+        )
+
+    # ─── Eviction ────────────────────────────────────────────────────────
+
+    def evict(self) -> int:
+        """
+        Удалить записи старше max_age_days, протухшие поиски и блобы
+        без ссылок; затем ужать файл до max_bytes (первыми уходят
+        давно загруженные страницы).
+        """
+        now = time.time()
+        removed = self._execute(
+            "DELETE FROM pages WHERE fetched_at <= ?", (now - self._max_age,))
+        self._execute("DELETE FROM searches WHERE expires_at <= ?", (now,))
+        try:
+            with self._lock:
+                conn = self._connect()
+                total = conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+                excess = total - self._max_bytes
+                if self._max_bytes and excess > 0:
+                    victims: list[tuple[str]] = []
+                    freed = 0
+                    for key, size in conn.execute(
+                        "SELECT p.url_key, b.size FROM pages p "
+                        "JOIN blobs b ON b.hash = p.content_hash "
+                        "ORDER BY p.fetched_at"
+                    ):
+                        victims.append((key,))
+                        freed += size
+                        if freed >= excess:
+                            break
+                    conn.executemany(
+                        "DELETE FROM pages WHERE url_key = ?", victims)
+                    removed += len(victims)
+                conn.execute(
+                    "DELETE FROM blobs WHERE hash NOT IN "
+                    "(SELECT content_hash FROM pages)")
+                conn.commit()
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.warning(f"Page cache: ошибка вытеснения: {e}")
+        return removed
+
+    def clear(self) -> None:
+        for table in ("pages", "blobs", "searches"):
+            self._execute(f"DELETE FROM {table}", ())
+
+    # ─── Statistics ──────────────────────────────────────────────────────
+
+    def get_stats(self) -> dict:
+        pages = blobs = size = 0
+        try:
+            with self._lock:
+                conn = self._connect()
+                pages = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+                blobs, size = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+                ).fetchone()
+        except sqlite3.Error:
+            pass
+        lookups = self._hits + self._stale_hits + self._misses
+        return {
+            "path": str(self._path),
+            "pages": pages,
+            "blobs": blobs,
+            "bytes": size,
+            "max_bytes": self._max_bytes,
+            "hits": self._hits,
+            "stale_hits": self._stale_hits,
+            "misses": self._misses,
+            "hit_rate": f"{self._hits / lookups:.1%}" if lookups else "0%",
+            "revalidated": self._revalidated,
+            "writes": self._writes,
+            "dedup_writes": self._dedup_writes,
+            "errors": self._errors,
+        }
+
+    # ─── Internal ────────────────────────────────────────────────────────
+
+    def _execute(self, sql: str, params: tuple) -> int:
+        try:
+            with self._lock:
+                conn = self._connect()
+                count = conn.execute(sql, params).rowcount
+                conn.commit()
+                return count
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.warning(f"Page cache: ошибка запроса: {e}")
+            return 0
+
+
+# ─── Глобальный экземпляр ────────────────────────────────────────────────────
+
+page_cache = PageCache(
+    config.research.cache_path,
+    max_bytes=config.research.cache_max_mb * 1024 * 1024,
+    max_age_days=config.research.cache_max_age_days,
+) if config.research.cache_enabled else None
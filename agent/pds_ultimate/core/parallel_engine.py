@@ -684,6 +684,9 @@ class ParallelEngine:
         self,
         tasks: dict[str, Callable[[], Coroutine]],
         category: str = "general",
+        timeout: float | None = None,
+        categories: dict[str, str] | None = None,
+        timeouts: dict[str, float | None] | None = None,
     ) -> dict[str, ParallelResult]:
         """
         Выполнить несколько задач параллельно.
@@ -691,25 +694,42 @@ class ParallelEngine:
         Args:
             tasks: {"task_id": coroutine_factory, ...}
             category: Категория для семафора
+            timeout: Таймаут одной задачи (секунды), None — без таймаута
+            categories: Категории отдельных задач {"task_id": "browser"}
+            timeouts: Таймауты отдельных задач (None — задача следит
+                      за временем сама)
 
         Returns:
             {"task_id": ParallelResult, ...}
         """
         if not tasks:
             return {}
+        categories = categories or {}
+        timeouts = timeouts or {}
 
         async def _run_one(task_id: str, factory: Callable) -> ParallelResult:
             start = time.time()
+            limit = timeouts.get(task_id, timeout)
             try:
-                result = await self._concurrency.run_limited(
-                    factory(), category=category
+                coro = self._concurrency.run_limited(
+                    factory(), category=categories.get(task_id, category)
                 )
+                if limit is not None:
+                    coro = asyncio.wait_for(coro, limit)
+                result = await coro
                 return ParallelResult(
                     task_id=task_id,
                     success=True,
                     result=result,
                     duration_ms=(time.time() - start) * 1000,
                 )
+            except asyncio.TimeoutError:
+                return ParallelResult(
+                    task_id=task_id,
+                    success=False,
+                    error=f"Таймаут {limit:g}с",
+                    duration_ms=(time.time() - start) * 1000,
+                )
             except Exception as e:
                 return ParallelResult(
                     task_id=task_id,
@@ -4,26 +4,38 @@ PDS-Ultimate Performance Engine
 Кэширование результатов + Batch API вызовы + пулинг.
 
 Компоненты:
-1. ResultCache — TTL-кэш результатов tool/LLM с умной инвалидацией
+1. ResultCache — шардированный TTL-кэш tool/LLM (бюджет памяти, TinyLFU)
 2. BatchAPIProcessor — группировка нескольких LLM вызовов в пакет
 3. RequestDeduplicator — дедупликация параллельных одинаковых запросов
 4. PerformanceMonitor — мониторинг latency, hit-rate, throughput
 
+L2-уровень cached_call и memoize(persist=True) — SQLite-файл
+(core/cache_store.py).
+
 Без внешних зависимостей — чистый asyncio + stdlib.
 """
 
 from __future__ import annotations
 
 import asyncio
+import functools
 import hashlib
+import inspect
 import json
+import sys
+import threading
 import time
 from collections import OrderedDict
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, is_dataclass
+from datetime import date, datetime
+from datetime import time as dt_time
+from decimal import Decimal
 from enum import Enum
+from itertools import islice
 from typing import Any, Callable, Coroutine
 
-from pds_ultimate.config import logger
+from pds_ultimate.config import config, logger
+from pds_ultimate.core.cache_store import PersistentCache, register_type
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # DATA MODELS
@@ -47,6 +59,7 @@ class CacheEntry:
     access_count: int = 0
     last_accessed: float = 0.0
     category: str = "general"  # tool / llm / search
+    size: int = 0  # Оценка размера value в байтах (estimate_size)
 
     @property
     def is_expired(self) -> bool:
@@ -57,6 +70,19 @@ class CacheEntry:
         return time.time() - self.created_at
 
 
+@register_type
+@dataclass
+class MemoEntry:
+    """Значение memoize: свежее до fresh_until, затем stale (до TTL записи)."""
+    value: Any
+    fresh_until: float
+    negative: bool = False
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() > self.fresh_until
+
+
 @dataclass
 class CacheStats:
     """Статистика кэша."""
@@ -128,10 +154,267 @@ class PerformanceMetrics:
 # ═══════════════════════════════════════════════════════════════════════════════
 
 
+_SIZE_SAMPLE = 64     # Сколько элементов контейнера оцениваем явно
+_SIZE_DEPTH = 4       # Глубина обхода вложенных структур
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Приблизительный размер объекта в байтах.
+
+    sys.getsizeof + обход вложенных dict/list/tuple/set и __dict__.
+    Для больших контейнеров оценивается выборка из _SIZE_SAMPLE элементов
+    и экстраполируется — стоимость оценки не зависит от размера значения.
+    """
+    size = sys.getsizeof(value)
+    if _depth >= _SIZE_DEPTH or isinstance(value, (str, bytes, bytearray)):
+        return size
+
+    if isinstance(value, dict):
+        n = len(value)
+        if not n:
+            return size
+        sample = sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+            for k, v in islice(value.items(), _SIZE_SAMPLE)
+        )
+        return size + sample * n // min(n, _SIZE_SAMPLE)
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        n = len(value)
+        if not n:
+            return size
+        sample = sum(
+            estimate_size(v, _depth + 1)
+            for v in islice(value, _SIZE_SAMPLE)
+        )
+        return size + sample * n // min(n, _SIZE_SAMPLE)
+
+    attrs = getattr(value, "__dict__", None)
+    if isinstance(attrs, dict):
+        size += estimate_size(attrs, _depth + 1)
+    return size
+
+
+class FrequencySketch:
+    """
+    Count-Min Sketch частот обращений для TinyLFU-admission.
+
+    4 строки по width 4-битных счётчиков (bytearray, насыщение на 15).
+    После sample_size инкрементов все счётчики делятся пополам (aging) —
+    старая популярность постепенно забывается.
+    """
+
+    DEPTH = 4
+    MAX_COUNT = 15
+    _SEEDS = (0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F)
+
+    def __init__(self, capacity: int):
+        width = 16
+        while width < max(capacity, 1) * 2:
+            width <<= 1
+        self._width = width
+        self._mask = width - 1
+        self._table = bytearray(width * self.DEPTH)
+        self._sample_size = 10 * width
+        self._additions = 0
+        self._resets = 0
+
+    def _slots(self, key: str) -> list[int]:
+        h = hash(key)
+        return [
+            row * self._width + ((h * seed) >> 16 & self._mask)
+            for row, seed in enumerate(self._SEEDS)
+        ]
+
+    def increment(self, key: str) -> None:
+        table = self._table
+        for slot in self._slots(key):
+            if table[slot] < self.MAX_COUNT:
+                table[slot] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._reset()
+
+    def estimate(self, key: str) -> int:
+        table = self._table
+        return min(table[slot] for slot in self._slots(key))
+
+    def _reset(self) -> None:
+        self._table = bytearray(c >> 1 for c in self._table)
+        self._additions //= 2
+        self._resets += 1
+
+    @property
+    def resets(self) -> int:
+        return self._resets
+
+
+class _CacheShard:
+    """
+    Один сегмент ResultCache: LRU (OrderedDict) + индексы.
+
+    _by_category: категория → ключи (инвалидация/счётчики без обхода)
+    _by_namespace: первый сегмент ключа до ':' → ключи (префиксы "tool:...")
+    """
+
+    __slots__ = (
+        "entries", "bytes", "max_entries", "max_bytes",
+        "by_category", "by_namespace", "lock",
+    )
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self.bytes = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.by_category: dict[str, set[str]] = {}
+        self.by_namespace: dict[str, set[str]] = {}
+        self.lock = threading.Lock()
+
+    def is_full(self, extra_bytes: int) -> bool:
+        if len(self.entries) >= self.max_entries:
+            return True
+        return bool(self.max_bytes) and self.bytes + extra_bytes > self.max_bytes
+
+    def insert(self, entry: CacheEntry) -> None:
+        self.entries[entry.key] = entry
+        self.bytes += entry.size
+        self.by_category.setdefault(entry.category, set()).add(entry.key)
+        self.by_namespace.setdefault(
+            _namespace(entry.key), set()).add(entry.key)
+
+    def remove(self, key: str) -> CacheEntry | None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        self.bytes -= entry.size
+        _discard(self.by_category, entry.category, key)
+        _discard(self.by_namespace, _namespace(key), key)
+        return entry
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.by_category.clear()
+        self.by_namespace.clear()
+        self.bytes = 0
+
+
+def _namespace(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+def _discard(index: dict[str, set[str]], name: str, key: str) -> None:
+    keys = index.get(name)
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del index[name]
+
+
+class UnkeyableArgument(TypeError):
+    """Аргумент без стабильного представления — ключ кэша не построить."""
+
+
+def canonicalize(value: Any) -> Any:
+    """
+    Привести значение к JSON-совместимой канонической форме.
+
+    Стабильна между вызовами и процессами: dict/set сортируются,
+    Enum/date/Decimal/dataclass раскладываются по значению,
+    объекты с методом cache_key() — по его результату.
+    Прочие объекты (default repr с адресом) → UnkeyableArgument.
+    """
+    if isinstance(value, Enum):
+        return [type(value).__qualname__, canonicalize(value.value)]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return "b:" + hashlib.sha1(value).hexdigest()
+    if isinstance(value, dict):
+        items = [[canonicalize(k), canonicalize(v)] for k, v in value.items()]
+        return {"__dict__": sorted(items, key=_sort_key)}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return {"__set__": sorted((canonicalize(v) for v in value), key=_sort_key)}
+    cache_key = getattr(value, "cache_key", None)
+    if callable(cache_key):
+        return [type(value).__qualname__, canonicalize(cache_key())]
+    if is_dataclass(value) and not isinstance(value, type):
+        return [
+            type(value).__qualname__,
+            [[f.name, canonicalize(getattr(value, f.name))]
+             for f in fields(value)],
+        ]
+    raise UnkeyableArgument(
+        f"{type(value).__qualname__} не имеет стабильного ключа"
+    )
+
+
+def _sort_key(item: Any) -> str:
+    return json.dumps(item, sort_keys=True, ensure_ascii=False)
+
+
+def canonical_key(prefix: str, payload: Any) -> str:
+    """Ключ кэша: prefix + sha1 канонической формы payload."""
+    raw = json.dumps(
+        canonicalize(payload),
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return f"{prefix}:{hashlib.sha1(raw.encode()).hexdigest()[:16]}"
+
+
+def bind_arguments(
+    sig: inspect.Signature,
+    args: tuple,
+    kwargs: dict,
+    ignore: tuple[str, ...] = (),
+) -> dict:
+    """
+    Аргументы вызова по именам параметров (с дефолтами):
+    f(1) и f(x=1) дают один и тот же ключ. ignore — параметры,
+    значение которых не влияет на результат (db_session): в ключ
+    попадает только то, переданы ли они (не None).
+    """
+    def strip(values: dict) -> dict:
+        return {
+            k: (v is not None) if k in ignore else v
+            for k, v in values.items()
+        }
+
+    try:
+        bound = sig.bind(*args, **kwargs)
+    except TypeError:
+        return {"args": list(args), "kwargs": strip(kwargs)}
+    bound.apply_defaults()
+    result = strip(bound.arguments)
+    for name, param in sig.parameters.items():
+        if param.kind is inspect.Parameter.VAR_KEYWORD and name in result:
+            result[name] = strip(result[name])
+    return result
+
+
 class ResultCache:
     """
     Умный кэш результатов с TTL, LRU-eviction и категориями.
 
+    Ключи распределяются по shards сегментам (hash(key) % shards),
+    у каждого свой LRU, lock и бюджет: max_size / shards записей и
+    max_bytes / shards байт (0 — без ограничения по памяти).
+    Размер значения оценивается через estimate_size().
+
+    Категории и префиксы ключей индексируются внутри сегментов —
+    invalidate_category / get_stats не обходят весь кэш.
+
+    admission=True включает TinyLFU: новый ключ при переполнении
+    вытесняет LRU-кандидата только если встречался чаще него —
+    разовые LLM-ответы не вымывают горячие результаты инструментов.
+
     Использование:
         cache = ResultCache(max_size=1000, default_ttl=300)
 
@@ -162,11 +445,24 @@ class ResultCache:
         self,
         max_size: int = MAX_SIZE,
         default_ttl: float = DEFAULT_TTL,
+        max_bytes: int = 0,
+        shards: int = 1,
+        admission: bool = False,
     ):
-        self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
+        shards = max(1, min(shards, max_size))
         self._max_size = max_size
+        self._max_bytes = max_bytes
         self._default_ttl = default_ttl
+        self._shards = [
+            _CacheShard(
+                max_entries=-(-max_size // shards),
+                max_bytes=max_bytes // shards if max_bytes else 0,
+            )
+            for _ in range(shards)
+        ]
+        self._sketch = FrequencySketch(max_size) if admission else None
         self._stats = CacheStats(max_size=max_size)
+        self._rejected = 0
         self._lock = asyncio.Lock()
 
     # ─── Core API ────────────────────────────────────────────────────────
@@ -176,26 +472,31 @@ class ResultCache:
         Получить значение из кэша.
         Возвращает None если нет или протух.
         """
-        entry = self._cache.get(key)
-
-        if entry is None:
-            self._stats.misses += 1
-            return None
-
-        if entry.is_expired:
-            # Протухло — удаляем
-            del self._cache[key]
-            self._stats.misses += 1
-            self._stats.size = len(self._cache)
-            return None
-
-        # Hit!
-        entry.access_count += 1
-        entry.last_accessed = time.time()
-        # LRU: двигаем в конец
-        self._cache.move_to_end(key)
-        self._stats.hits += 1
-        return entry.value
+        if self._sketch is not None:
+            self._sketch.increment(key)
+        shard = self._shard(key)
+
+        with shard.lock:
+            entry = shard.entries.get(key)
+
+            if entry is None:
+                self._stats.misses += 1
+                return None
+
+            if entry.is_expired:
+                # Протухло — удаляем
+                shard.remove(key)
+                self._stats.misses += 1
+                self._stats.size = self.size
+                return None
+
+            # Hit!
+            entry.access_count += 1
+            entry.last_accessed = time.time()
+            # LRU: двигаем в конец
+            shard.entries.move_to_end(key)
+            self._stats.hits += 1
+            return entry.value
 
     def put(
         self,
@@ -205,9 +506,7 @@ class ResultCache:
         category: str = "general",
     ) -> None:
         """Положить значение в кэш."""
-        # Определяем TTL
-        if ttl is None:
-            ttl = self.CATEGORY_TTL.get(category, self._default_ttl)
+        ttl = self.resolve_ttl(ttl, category)
 
         now = time.time()
         entry = CacheEntry(
@@ -217,60 +516,96 @@ class ResultCache:
             expires_at=now + ttl,
             last_accessed=now,
             category=category,
+            size=estimate_size(value) if self._max_bytes else 0,
         )
-
-        # Если ключ уже есть — обновляем
-        if key in self._cache:
-            self._cache[key] = entry
-            self._cache.move_to_end(key)
-        else:
-            # Eviction если переполнено
-            while len(self._cache) >= self._max_size:
-                self._evict()
-            self._cache[key] = entry
-
-        self._stats.size = len(self._cache)
+        shard = self._shard(key)
+
+        with shard.lock:
+            if shard.max_bytes and entry.size > shard.max_bytes:
+                # Больше бюджета сегмента — не кэшируем вовсе
+                shard.remove(key)
+                self._rejected += 1
+            elif key in shard.entries:
+                # Если ключ уже есть — обновляем
+                shard.remove(key)
+                self._make_room(shard, entry.size)
+                shard.insert(entry)
+            elif self._admit(shard, key, entry.size):
+                # Eviction если переполнено
+                self._make_room(shard, entry.size)
+                shard.insert(entry)
+            else:
+                self._rejected += 1
+
+        self._stats.size = self.size
+
+    def resolve_ttl(self, ttl: float | None, category: str) -> float:
+        """TTL записи: явный или по категории (CATEGORY_TTL)."""
+        if ttl is None:
+            return self.CATEGORY_TTL.get(category, self._default_ttl)
+        return ttl
 
     def invalidate(self, key: str) -> bool:
         """Удалить конкретный ключ."""
-        if key in self._cache:
-            del self._cache[key]
-            self._stats.size = len(self._cache)
-            return True
-        return False
+        shard = self._shard(key)
+        with shard.lock:
+            removed = shard.remove(key) is not None
+        self._stats.size = self.size
+        return removed
 
     def invalidate_pattern(self, pattern: str) -> int:
-        """Удалить все ключи, начинающиеся с pattern."""
-        keys_to_delete = [
-            k for k in self._cache if k.startswith(pattern)
-        ]
-        for k in keys_to_delete:
-            del self._cache[k]
-        self._stats.size = len(self._cache)
-        return len(keys_to_delete)
+        """
+        Удалить все ключи, начинающиеся с pattern.
+
+        Если pattern содержит ':', просматриваются только ключи
+        его пространства имён ("tool:weather:" → ключи "tool:...").
+        """
+        namespace = _namespace(pattern) if ":" in pattern else None
+        count = 0
+        for shard in self._shards:
+            with shard.lock:
+                if namespace is not None:
+                    candidates = shard.by_namespace.get(namespace, ())
+                else:
+                    candidates = shard.entries
+                for k in [k for k in candidates if k.startswith(pattern)]:
+                    shard.remove(k)
+                    count += 1
+        self._stats.size = self.size
+        return count
 
     def invalidate_category(self, category: str) -> int:
         """Удалить все записи определённой категории."""
-        keys_to_delete = [
-            k for k, v in self._cache.items() if v.category == category
-        ]
-        for k in keys_to_delete:
-            del self._cache[k]
-        self._stats.size = len(self._cache)
-        return len(keys_to_delete)
+        count = 0
+        for shard in self._shards:
+            with shard.lock:
+                for k in list(shard.by_category.get(category, ())):
+                    shard.remove(k)
+                    count += 1
+        self._stats.size = self.size
+        return count
 
     def clear(self) -> None:
         """Очистить весь кэш."""
-        self._cache.clear()
+        for shard in self._shards:
+            with shard.lock:
+                shard.clear()
         self._stats.size = 0
 
     def cleanup_expired(self) -> int:
         """Удалить все протухшие записи."""
-        expired = [k for k, v in self._cache.items() if v.is_expired]
-        for k in expired:
-            del self._cache[k]
-        self._stats.size = len(self._cache)
-        return len(expired)
+        count = 0
+        now = time.time()
+        for shard in self._shards:
+            with shard.lock:
+                expired = [
+                    k for k, v in shard.entries.items() if now > v.expires_at
+                ]
+                for k in expired:
+                    shard.remove(k)
+                count += len(expired)
+        self._stats.size = self.size
+        return count
 
     # ─── Decorator ───────────────────────────────────────────────────────
 
@@ -290,9 +625,12 @@ class ResultCache:
         def decorator(func):
             async def wrapper(*args, **kwargs):
                 # Генерируем ключ
-                cache_key = self._make_key(
-                    key_prefix or func.__name__, args, kwargs
-                )
+                try:
+                    cache_key = self._make_key(
+                        key_prefix or func.__name__, args, kwargs
+                    )
+                except UnkeyableArgument:
+                    return await func(*args, **kwargs)
 
                 # Проверяем кэш
                 cached_value = self.get(cache_key)
@@ -319,39 +657,74 @@ class ResultCache:
 
     @property
     def size(self) -> int:
-        return len(self._cache)
+        return sum(len(shard.entries) for shard in self._shards)
+
+    @property
+    def bytes_used(self) -> int:
+        """Оценка занятой памяти (байт), если задан max_bytes."""
+        return sum(shard.bytes for shard in self._shards)
+
+    @property
+    def _cache(self) -> dict[str, CacheEntry]:
+        """Все записи одним словарём (для отладки; при shards=1 — сам LRU)."""
+        if len(self._shards) == 1:
+            return self._shards[0].entries
+        merged: dict[str, CacheEntry] = {}
+        for shard in self._shards:
+            merged.update(shard.entries)
+        return merged
 
     def get_stats(self) -> dict:
         """Полная статистика кэша."""
-        # Подсчёт по категориям
+        # Подсчёт по категориям — размеры индексов сегментов
         categories: dict[str, int] = {}
-        for entry in self._cache.values():
-            categories[entry.category] = categories.get(entry.category, 0) + 1
-
+        for shard in self._shards:
+            for name, keys in shard.by_category.items():
+                categories[name] = categories.get(name, 0) + len(keys)
         return {
             **self._stats.to_dict(),
             "categories": categories,
+            "shards": len(self._shards),
+            "bytes": self.bytes_used,
+            "max_bytes": self._max_bytes,
+            "admission": self._sketch is not None,
+            "rejected": self._rejected,
         }
 
     # ─── Internal ────────────────────────────────────────────────────────
 
-    def _evict(self) -> None:
+    def _shard(self, key: str) -> _CacheShard:
+        if len(self._shards) == 1:
+            return self._shards[0]
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _admit(self, shard: _CacheShard, key: str, size: int) -> bool:
+        """TinyLFU: пускать новый ключ в полный сегмент, только если он
+        встречался чаще, чем LRU-кандидат на вытеснение."""
+        if self._sketch is None or not shard.entries:
+            return True
+        if not shard.is_full(size):
+            return True
+        victim = next(iter(shard.entries.values()))
+        if victim.is_expired:
+            return True
+        return self._sketch.estimate(key) > self._sketch.estimate(victim.key)
+
+    def _make_room(self, shard: _CacheShard, size: int) -> None:
+        while shard.entries and shard.is_full(size):
+            self._evict(shard)
+
+    def _evict(self, shard: _CacheShard) -> None:
         """Вытеснить самую старую неиспользуемую запись (LRU)."""
-        if self._cache:
+        if shard.entries:
             # OrderedDict — первый элемент = самый старый
-            self._cache.popitem(last=False)
+            shard.remove(next(iter(shard.entries)))
             self._stats.evictions += 1
 
     @staticmethod
     def _make_key(prefix: str, args: tuple, kwargs: dict) -> str:
-        """Создать ключ кэша из аргументов."""
-        raw = json.dumps(
-            {"args": [str(a) for a in args], "kwargs": {str(k): str(v)
-                                                        for k, v in kwargs.items()}},
-            sort_keys=True,
-        )
-        h = hashlib.md5(raw.encode()).hexdigest()[:12]
-        return f"{prefix}:{h}"
+        """Создать ключ кэша из аргументов (canonical_key)."""
+        return canonical_key(prefix, {"args": args, "kwargs": kwargs})
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -654,7 +1027,8 @@ class PerformanceEngine:
     Главный оркестратор производительности.
 
     Объединяет:
-    - ResultCache: кэш результатов
+    - ResultCache: кэш результатов (L1, в памяти процесса)
+    - PersistentCache: L2 в SQLite-файле (опционально)
     - RequestDeduplicator: дедупликация
     - BatchAPIProcessor: batch LLM
     - PerformanceMonitor: мониторинг
@@ -667,16 +1041,35 @@ class PerformanceEngine:
         cache_size: int = 2000,
         cache_ttl: float = 300,
         batch_window_ms: float = 100,
+        cache_shards: int = 8,
+        cache_max_bytes: int = 64 * 1024 * 1024,
+        cache_admission: bool = False,
+        l2: PersistentCache | None = None,
+        l2_evict_interval: float = 60,
     ):
-        self._cache = ResultCache(max_size=cache_size, default_ttl=cache_ttl)
+        self._cache = ResultCache(
+            max_size=cache_size,
+            default_ttl=cache_ttl,
+            max_bytes=cache_max_bytes,
+            shards=cache_shards,
+            admission=cache_admission,
+        )
+        self._l2 = l2
+        self._l2_evict_interval = l2_evict_interval
+        self._l2_task: asyncio.Task | None = None
         self._dedup = RequestDeduplicator()
         self._batch = BatchAPIProcessor(window_ms=batch_window_ms)
         self._monitor = PerformanceMonitor()
+        self._refreshing: set[asyncio.Task] = set()
 
     @property
     def cache(self) -> ResultCache:
         return self._cache
 
+    @property
+    def l2(self) -> PersistentCache | None:
+        return self._l2
+
     @property
     def dedup(self) -> RequestDeduplicator:
         return self._dedup
@@ -699,14 +1092,15 @@ class PerformanceEngine:
         """
         Вызов с кэшированием и дедупликацией.
 
-        1. Проверяем кэш
-        2. Если miss — дедуплицируем
-        3. Кэшируем результат
+        1. Проверяем кэш (L1)
+        2. Если miss — читаем L2 и поднимаем запись в L1
+        3. Если и там нет — дедуплицируем и выполняем
+        4. Кэшируем результат в L1 и L2
 
         Args:
             key: Ключ кэша
             coro_factory: Фабрика coroutine
-            ttl: Время жизни кэша
+            ttl: Время жизни кэша (None — CATEGORY_TTL)
             category: Категория кэша
 
         Returns:
@@ -721,30 +1115,201 @@ class PerformanceEngine:
             self._monitor.record_request(latency, cached=True)
             return cached
 
-        # 2. Дедуплицируем + выполняем
+        # 2. Read-through из L2 (оставшийся TTL сохраняется)
+        if self._l2 is not None:
+            entry = await asyncio.to_thread(self._l2.get, key)
+            if entry is not None:
+                self._cache.put(
+                    key, entry.value,
+                    ttl=entry.ttl_left, category=entry.category,
+                )
+                latency = (time.time() - start) * 1000
+                self._monitor.record_request(latency, cached=True)
+                return entry.value
+
+        # 3. Дедуплицируем + выполняем
         result = await self._dedup.deduplicate(key, coro_factory)
 
-        # 3. Кэшируем
+        # 4. Кэшируем
         self._cache.put(key, result, ttl=ttl, category=category)
+        if self._l2 is not None and result is not None:
+            await asyncio.to_thread(
+                self._l2.put, key, result,
+                self._cache.resolve_ttl(ttl, category), category,
+            )
 
         latency = (time.time() - start) * 1000
         self._monitor.record_request(latency, cached=False)
 
         return result
 
+    # ─── Memoize ─────────────────────────────────────────────────────────
+
+    NEGATIVE_TTL = 15  # Секунды для закэшированных неудач
+
+    def memoize(
+        self,
+        ttl: float | None = None,
+        category: str = "general",
+        key: Callable[..., Any] | None = None,
+        ignore: tuple[str, ...] = (),
+        stale_ttl: float = 0,
+        negative_ttl: float | None = NEGATIVE_TTL,
+        is_negative: Callable[[Any], bool] | None = None,
+        key_prefix: str = "",
+        persist: bool = False,
+    ):
+        """
+        Декоратор: кэш + single-flight для async функций.
+
+        - Ключ: canonical_key по связанным аргументам (f(1) == f(x=1)),
+          ignore — параметры вне ключа, key — своя функция ключа
+          (получает те же аргументы). Аргумент без стабильного
+          представления → вызов без кэша.
+        - Одновременные промахи по одному ключу выполняются один раз.
+        - stale_ttl: после ttl значение ещё stale_ttl секунд отдаётся
+          сразу, а обновляется в фоне. Только для функций без ресурсов
+          запроса в аргументах (db_session закроется раньше обновления).
+        - Негативный результат (None или is_negative(result)) кэшируется
+          на negative_ttl секунд (None — не кэшировать).
+        - persist: промах L1 читается из L2 (переживает перезапуск),
+          удачный результат пишется и в L2. Только для значений, которые
+          сериализуются в JSON (dataclass — через register_type).
+
+        @performance_engine.memoize(ttl=30, category="db", ignore=("db_session",))
+        async def tool_find_contact(query, db_session=None):
+            ...
+        """
+        fresh_ttl = self._cache.resolve_ttl(ttl, category)
+
+        def decorator(func):
+            sig = inspect.signature(func)
+            prefix = key_prefix or f"{func.__module__}.{func.__qualname__}"
+
+            def make_key(args: tuple, kwargs: dict) -> str:
+                if key is not None:
+                    return canonical_key(prefix, key(*args, **kwargs))
+                return canonical_key(
+                    prefix, bind_arguments(sig, args, kwargs, ignore))
+
+            async def compute(cache_key: str, args: tuple, kwargs: dict):
+                result = await func(*args, **kwargs)
+                negative = (
+                    is_negative(result) if is_negative is not None
+                    else result is None
+                )
+                life = negative_ttl if negative else fresh_ttl
+                if life:
+                    memo = MemoEntry(result, time.time() + life, negative)
+                    ttl_total = life if negative else life + stale_ttl
+                    self._cache.put(
+                        cache_key, memo, ttl=ttl_total, category=category)
+                    if persist and not negative and self._l2 is not None:
+                        await asyncio.to_thread(
+                            self._l2.put, cache_key, memo, ttl_total, category)
+                return result
+
+            async def load_l2(cache_key: str) -> MemoEntry | None:
+                entry = await asyncio.to_thread(self._l2.get, cache_key)
+                if entry is None or not isinstance(entry.value, MemoEntry):
+                    return None
+                self._cache.put(
+                    cache_key, entry.value,
+                    ttl=entry.ttl_left, category=category,
+                )
+                return entry.value
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                try:
+                    cache_key = make_key(args, kwargs)
+                except UnkeyableArgument as e:
+                    logger.debug(f"memoize {prefix}: без кэша ({e})")
+                    return await func(*args, **kwargs)
+
+                memo = self._cache.get(cache_key)
+                if memo is None and persist and self._l2 is not None:
+                    memo = await load_l2(cache_key)
+                if memo is not None:
+                    if memo.is_stale:
+                        self._revalidate(
+                            cache_key, lambda: compute(cache_key, args, kwargs))
+                    return memo.value
+
+                return await self._dedup.deduplicate(
+                    cache_key, lambda: compute(cache_key, args, kwargs))
+
+            def invalidate() -> int:
+                count = self._cache.invalidate_pattern(prefix + ":")
+                if persist and self._l2 is not None:
+                    count = max(
+                        count, self._l2.invalidate_pattern(prefix + ":"))
+                return count
+
+            wrapper.cache_prefix = prefix
+            wrapper.invalidate = invalidate
+            return wrapper
+        return decorator
+
+    def _revalidate(
+        self,
+        key: str,
+        coro_factory: Callable[[], Coroutine],
+    ) -> None:
+        """Фоновое обновление stale-записи (одно на ключ)."""
+        if key in self._dedup._inflight:
+            return
+
+        async def refresh():
+            try:
+                await self._dedup.deduplicate(key, coro_factory)
+            except Exception as e:
+                logger.debug(f"memoize: фоновое обновление '{key}': {e}")
+
+        task = asyncio.create_task(refresh())
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    def invalidate(self, key: str) -> bool:
+        """Удалить ключ из L1 и L2."""
+        removed = self._cache.invalidate(key)
+        if self._l2 is not None:
+            removed = self._l2.invalidate(key) or removed
+        return removed
+
+    def invalidate_category(self, category: str) -> int:
+        """Удалить категорию из L1 и L2."""
+        count = self._cache.invalidate_category(category)
+        if self._l2 is not None:
+            count = max(count, self._l2.invalidate_category(category))
+        return count
+
     async def start(self) -> None:
         """Запустить все компоненты."""
+        if self._l2 is not None and self._l2_task is None:
+            self._l2_task = asyncio.create_task(
+                self._l2.evict_loop(self._l2_evict_interval))
         logger.info("PerformanceEngine запущен")
 
     async def stop(self) -> None:
         """Остановить все компоненты."""
         await self._batch.stop()
+        if self._l2_task is not None:
+            self._l2_task.cancel()
+            try:
+                await self._l2_task
+            except asyncio.CancelledError:
+                pass
+            self._l2_task = None
+        if self._l2 is not None:
+            self._l2.close()
         logger.info("PerformanceEngine остановлен")
 
     def get_stats(self) -> dict:
         """Полная статистика."""
         return {
             "cache": self._cache.get_stats(),
+            "l2": self._l2.get_stats() if self._l2 is not None else None,
             "dedup": {
                 "saves": self._dedup.dedup_count,
                 "inflight": self._dedup.inflight_count,
@@ -756,4 +1321,10 @@ class PerformanceEngine:
 
 # ─── Глобальный экземпляр ────────────────────────────────────────────────────
 
-performance_engine = PerformanceEngine()
+performance_engine = PerformanceEngine(
+    l2=PersistentCache(
+        config.cache.l2_path,
+        max_bytes=config.cache.l2_max_mb * 1024 * 1024,
+    ) if config.cache.l2_enabled else None,
+    l2_evict_interval=config.cache.l2_evict_interval,
+)
@@ -24,13 +24,19 @@ PDS-Ultimate Plugin System (Part 8)
 Безопасность:
 - Ключи шифруются AES-256
 - Sandbox для пользовательского кода
-- Rate limiting per-plugin
+- Rate limiting per-plugin (token bucket, вызовы ждут в очереди)
 - Автоматические health checks
+
+Производительность:
+- PluginHTTPPool — httpx.AsyncClient на базовый URL: keep-alive и HTTP/2,
+  повторные вызовы не платят за TCP/TLS-рукопожатие
+- Кэш ответов идемпотентных GET (PluginEndpoint.cache_ttl)
 """
 
 from __future__ import annotations
 from collections import Counter
 
+import asyncio
 import hashlib
 import json
 import re
@@ -39,8 +45,13 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
 
-from pds_ultimate.config import DATA_DIR, logger
+from pds_ultimate.config import DATA_DIR, config, logger
+from pds_ultimate.core.llm_transport import TokenBucket, http2_available
+from pds_ultimate.core.performance_engine import ResultCache
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # PLUGIN TYPES & DATA CLASSES
@@ -80,6 +91,7 @@ class PluginEndpoint:
     headers: dict[str, str] = field(default_factory=dict)
     body_template: dict[str, Any] = field(default_factory=dict)
     response_format: str = "json"  # json, text, binary
+    cache_ttl: int = 0             # Кэш ответа GET (сек, 0 — по config)
 
 
 @dataclass
@@ -389,37 +401,150 @@ class APIDetector:
 
 
 class RateLimiter:
-    """Ограничение частоты запросов к API плагина."""
+    """
+    Ограничение частоты запросов к API плагина.
+
+    Token bucket на плагин: limit запросов в минуту, запас — limit
+    (limit <= 0 — без ограничения). acquire ждёт токен в очереди,
+    check — неблокирующая проверка; обе операции O(1).
+    """
 
     def __init__(self):
-        self._windows: dict[str, list[float]] = {}
+        self._buckets: dict[str, tuple[int, TokenBucket]] = {}
+        self._waits = 0
+        self._rejected = 0
+
+    def _bucket(self, plugin_id: str, limit: int) -> TokenBucket:
+        entry = self._buckets.get(plugin_id)
+        if entry is None or entry[0] != limit:
+            # Новый плагин или изменился лимит
+            entry = (limit, TokenBucket(rate=limit / 60, capacity=limit))
+            self._buckets[plugin_id] = entry
+        return entry[1]
 
     def check(self, plugin_id: str, limit: int = 60) -> bool:
-        """Проверить, разрешён ли запрос (True = ОК)."""
-        now = time.time()
-        window = self._windows.setdefault(plugin_id, [])
-
-        # Удаляем старые записи (>60 сек)
-        cutoff = now - 60
-        self._windows[plugin_id] = [t for t in window if t > cutoff]
-        window = self._windows[plugin_id]
+        """Проверить, разрешён ли запрос (True = ОК), без ожидания."""
+        return self._bucket(plugin_id, limit).try_acquire()
 
-        if len(window) >= limit:
-            return False
-
-        window.append(now)
-        return True
+    async def acquire(
+        self,
+        plugin_id: str,
+        limit: int = 60,
+        max_wait: float | None = None,
+    ) -> float | None:
+        """
+        Дождаться токена (вызовы встают в очередь).
+        Returns: сколько секунд ждали; None — не дождались за max_wait.
+        """
+        bucket = self._bucket(plugin_id, limit)
+        if bucket.try_acquire():
+            return 0.0
+        self._waits += 1
+        try:
+            return await asyncio.wait_for(bucket.acquire(), max_wait)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            return None
 
     def remaining(self, plugin_id: str, limit: int = 60) -> int:
-        """Сколько запросов осталось в текущем окне."""
-        now = time.time()
-        window = self._windows.get(plugin_id, [])
-        active = [t for t in window if t > now - 60]
-        return max(0, limit - len(active))
+        """Сколько запросов можно сделать прямо сейчас."""
+        entry = self._buckets.get(plugin_id)
+        if entry is None:
+            return max(0, limit)
+        return max(0, int(entry[1].available))
 
     def reset(self, plugin_id: str) -> None:
         """Сбросить лимит."""
-        self._windows.pop(plugin_id, None)
+        self._buckets.pop(plugin_id, None)
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "plugins": len(self._buckets),
+            "waits": self._waits,
+            "rejected": self._rejected,
+        }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HTTP POOL — Клиенты по базовому URL
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class PluginHTTPPool:
+    """
+    Пул httpx.AsyncClient: один клиент на origin (схема + хост + порт)
+    базового URL плагина, keep-alive и HTTP/2 (если установлен h2).
+
+    Авторизация и таймаут передаются в каждом запросе, поэтому плагины
+    с одним API делят соединения. Клиенты привязаны к event loop —
+    при смене loop пул создаётся заново.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 10,
+        max_keepalive: int = 5,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http2 = http2
+        self._transport = transport
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._created = 0
+        self._reused = 0
+
+    @staticmethod
+    def origin(url: str) -> str:
+        """https://API.example.com/v1/x → https://api.example.com"""
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def client(self, url: str) -> httpx.AsyncClient:
+        """Клиент для URL (создаётся при первом обращении к origin)."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._clients = {}
+            self._loop = loop
+
+        key = self.origin(url)
+        client = self._clients.get(key)
+        if client is not None and not client.is_closed:
+            self._reused += 1
+            return client
+
+        http2 = self._http2 and self._transport is None and http2_available()
+        client = httpx.AsyncClient(
+            limits=self._limits,
+            http2=http2,
+            transport=self._transport,
+        )
+        self._clients[key] = client
+        self._created += 1
+        return client
+
+    async def close(self) -> None:
+        """Закрыть все клиенты."""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug(f"Plugin HTTP client close: {e}")
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "clients": len(self._clients),
+            "created": self._created,
+            "reused": self._reused,
+            "http2": self._http2 and http2_available(),
+        }
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -442,9 +567,20 @@ class PluginManager:
 
     PLUGINS_DIR = DATA_DIR / "plugins"
 
-    def __init__(self):
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None):
+        cfg = config.plugins
         self._plugins: dict[str, Plugin] = {}
         self._rate_limiter = RateLimiter()
+        self._rate_max_wait = cfg.rate_max_wait
+        self._http = PluginHTTPPool(
+            max_connections=cfg.pool_max_connections,
+            max_keepalive=cfg.pool_max_keepalive,
+            keepalive_expiry=cfg.keepalive_expiry,
+            http2=cfg.http2,
+            transport=transport,
+        )
+        self._cache = ResultCache(max_size=cfg.cache_max_entries)
+        self._get_cache_ttl = cfg.get_cache_ttl
         self._detector = APIDetector()
         self.PLUGINS_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -493,6 +629,7 @@ class PluginManager:
         plugin = self._plugins.pop(plugin_id, None)
         if plugin:
             self._rate_limiter.reset(plugin_id)
+            self._cache.invalidate_pattern(f"plugin:{plugin_id}:")
             logger.info(
                 f"Plugin unregistered: {plugin.config.name} id={plugin_id}")
             return True
@@ -598,39 +735,38 @@ class PluginManager:
         start = time.time()
 
         try:
-            import httpx
-
             headers = self._build_headers(plugin.config)
             timeout = httpx.Timeout(plugin.config.timeout)
 
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                # Определяем URL для проверки
-                check_url = self._get_health_url(plugin.config)
-                if not check_url:
-                    # Нет URL для проверки — считаем OK
-                    health = PluginHealth(
-                        healthy=True,
-                        latency_ms=int((time.time() - start) * 1000),
-                        status_code=200,
-                    )
-                    plugin.status = PluginStatus.ACTIVE
-                    plugin.last_health = health
-                    return health
-
-                response = await client.get(check_url, headers=headers)
-                latency = int((time.time() - start) * 1000)
-
-                healthy = response.status_code < 500
+            # Определяем URL для проверки
+            check_url = self._get_health_url(plugin.config)
+            if not check_url:
+                # Нет URL для проверки — считаем OK
                 health = PluginHealth(
-                    healthy=healthy,
-                    latency_ms=latency,
-                    status_code=response.status_code,
+                    healthy=True,
+                    latency_ms=int((time.time() - start) * 1000),
+                    status_code=200,
                 )
-
-                plugin.status = PluginStatus.ACTIVE if healthy else PluginStatus.ERROR
+                plugin.status = PluginStatus.ACTIVE
                 plugin.last_health = health
                 return health
 
+            client = self._http.client(check_url)
+            response = await client.get(
+                check_url, headers=headers, timeout=timeout)
+            latency = int((time.time() - start) * 1000)
+
+            healthy = response.status_code < 500
+            health = PluginHealth(
+                healthy=healthy,
+                latency_ms=latency,
+                status_code=response.status_code,
+            )
+
+            plugin.status = PluginStatus.ACTIVE if healthy else PluginStatus.ERROR
+            plugin.last_health = health
+            return health
+
         except Exception as e:
             latency = int((time.time() - start) * 1000)
             health = PluginHealth(
@@ -670,8 +806,40 @@ class PluginManager:
         if plugin.status != PluginStatus.ACTIVE:
             return {"success": False, "error": f"Plugin status: {plugin.status.value}"}
 
-        # Rate limiting
-        if not self._rate_limiter.check(plugin_id, plugin.config.rate_limit):
+        # Определяем endpoint
+        ep = None
+        if plugin.config.endpoints and endpoint_index < len(plugin.config.endpoints):
+            ep = plugin.config.endpoints[endpoint_index]
+            url = f"{plugin.config.base_url.rstrip('/')}/{ep.path.lstrip('/')}"
+            method = ep.method.upper()
+            # Merge body template with provided body
+            merged_body = {**ep.body_template, **(body or {})}
+        else:
+            url = plugin.config.base_url
+            method = "POST" if body else "GET"
+            merged_body = body
+
+        if method not in ("GET", "POST", "PUT", "DELETE"):
+            return {"success": False, "error": f"Unknown method: {method}"}
+
+        # Кэш идемпотентных GET — до rate limit, попадание не тратит квоту
+        cache_key = None
+        cache_ttl = 0
+        if method == "GET":
+            cache_ttl = (ep.cache_ttl if ep else 0) or self._get_cache_ttl
+        if cache_ttl > 0:
+            cache_key = self._cache_key(plugin_id, url, params)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                plugin.usage_count += 1
+                plugin.last_used = datetime.utcnow()
+                return {**cached, "cached": True}
+
+        # Rate limiting: вызов ждёт токен в очереди, отказ — только
+        # если ожидание дольше rate_max_wait
+        waited = await self._rate_limiter.acquire(
+            plugin_id, plugin.config.rate_limit, self._rate_max_wait)
+        if waited is None:
             remaining = self._rate_limiter.remaining(
                 plugin_id, plugin.config.rate_limit)
             return {
@@ -680,56 +848,50 @@ class PluginManager:
             }
 
         try:
-            import httpx
-
             headers = self._build_headers(plugin.config)
             timeout = httpx.Timeout(plugin.config.timeout)
+            client = self._http.client(url)
+
+            response = await client.request(
+                method, url,
+                headers=headers,
+                params=params,
+                json=merged_body if method in ("POST", "PUT") else None,
+                timeout=timeout,
+            )
 
-            # Определяем endpoint
-            if plugin.config.endpoints and endpoint_index < len(plugin.config.endpoints):
-                ep = plugin.config.endpoints[endpoint_index]
-                url = f"{plugin.config.base_url.rstrip('/')}/{ep.path.lstrip('/')}"
-                method = ep.method
-                # Merge body template with provided body
-                merged_body = {**ep.body_template, **(body or {})}
-            else:
-                url = plugin.config.base_url
-                method = "POST" if body else "GET"
-                merged_body = body
-
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                if method.upper() == "GET":
-                    response = await client.get(url, headers=headers, params=params)
-                elif method.upper() == "POST":
-                    response = await client.post(
-                        url, headers=headers, params=params, json=merged_body)
-                elif method.upper() == "PUT":
-                    response = await client.put(
-                        url, headers=headers, params=params, json=merged_body)
-                elif method.upper() == "DELETE":
-                    response = await client.delete(url, headers=headers, params=params)
-                else:
-                    return {"success": False, "error": f"Unknown method: {method}"}
+            plugin.usage_count += 1
+            plugin.last_used = datetime.utcnow()
 
-                plugin.usage_count += 1
-                plugin.last_used = datetime.utcnow()
+            # Парсим ответ
+            try:
+                data = response.json()
+            except Exception:
+                data = {"text": response.text[:2000]}
+
+            result = {
+                "success": response.status_code < 400,
+                "status_code": response.status_code,
+                "data": data,
+            }
 
-                # Парсим ответ
-                try:
-                    data = response.json()
-                except Exception:
-                    data = {"text": response.text[:2000]}
-
-                return {
-                    "success": response.status_code < 400,
-                    "status_code": response.status_code,
-                    "data": data,
-                }
+            if result["success"]:
+                if cache_key:
+                    self._cache.put(
+                        cache_key, result, ttl=cache_ttl, category="plugin")
+                elif method != "GET":
+                    # Запись могла изменить данные — GET-кэш плагина устарел
+                    self._cache.invalidate_pattern(f"plugin:{plugin_id}:")
+            return result
 
         except Exception as e:
             plugin.error_count += 1
             return {"success": False, "error": str(e)}
 
+    async def close(self) -> None:
+        """Закрыть HTTP-клиенты плагинов."""
+        await self._http.close()
+
     # ─── Create Tool from Plugin ─────────────────────────────────────────
 
     def create_tool_for_plugin(self, plugin: Plugin) -> "Tool":
@@ -836,6 +998,7 @@ class PluginManager:
                                 "params": ep.params,
                                 "headers": ep.headers,
                                 "body_template": ep.body_template,
+                                "cache_ttl": ep.cache_ttl,
                             }
                             for ep in plugin.config.endpoints
                         ],
@@ -875,6 +1038,7 @@ class PluginManager:
                         params=ep_data.get("params", {}),
                         headers=ep_data.get("headers", {}),
                         body_template=ep_data.get("body_template", {}),
+                        cache_ttl=ep_data.get("cache_ttl", 0),
                     ))
 
                 config = PluginConfig(
@@ -932,6 +1096,9 @@ class PluginManager:
             )),
             "total_usage": sum(p.usage_count for p in plugins),
             "total_errors": sum(p.error_count for p in plugins),
+            "http": self._http.get_stats(),
+            "rate_limiter": self._rate_limiter.get_stats(),
+            "cache": self._cache.get_stats(),
         }
 
     # ─── Internal ────────────────────────────────────────────────────────
@@ -963,6 +1130,16 @@ class PluginManager:
 
         return headers
 
+    @staticmethod
+    def _cache_key(
+        plugin_id: str,
+        url: str,
+        params: dict[str, Any] | None,
+    ) -> str:
+        """Ключ GET-кэша: плагин + URL + параметры (порядок не важен)."""
+        query = json.dumps(params or {}, sort_keys=True, default=str)
+        return f"plugin:{plugin_id}:{url}?{query}"
+
     def _get_health_url(self, config: PluginConfig) -> str | None:
         """URL для health check."""
         if not config.base_url:
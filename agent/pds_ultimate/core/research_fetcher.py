@@ -0,0 +1,510 @@
+"""
+PDS-Ultimate Research Fetcher
+===============================
+Стадия загрузки страниц для Internet Reasoning Layer.
+
+- Глобальный лимит одновременных загрузок + лимит на домен
+  и минимальный интервал между запросами к одному домену (вежливость)
+- Браузерный путь: extract_data(isolated=True) — вкладки из пула
+  BrowserEngine, загрузки идут параллельно, текущая вкладка не трогается
+- Быстрый путь (опционально): статический HTML через httpx без браузера;
+  если текста мало (страница рендерится JS) — откат на браузер
+- stream() отдаёт страницы по мере готовности, чтобы извлечение фактов
+  шло параллельно с загрузкой остальных
+- PageCache (core/page_cache.py): свежие страницы и результаты поиска
+  берутся с диска; устаревшие с ETag/Last-Modified перепроверяются
+  условным запросом (304 — без загрузки и разбора)
+
+Использование:
+    async for page in research_fetcher.stream(urls):
+        if page.ok:
+            handle(page.data)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Any, AsyncIterator
+from urllib.parse import urljoin, urlparse
+
+from pds_ultimate.config import config, logger
+from pds_ultimate.core.browser_engine import (
+    USER_AGENTS,
+    ExtractedData,
+    SearchResult,
+)
+from pds_ultimate.core.page_cache import CachedPage, PageCache, page_cache
+
+# Теги, текст которых не относится к содержимому (как в extract_data)
+_SKIP_TAGS = frozenset({
+    "script", "style", "nav", "footer", "header", "aside",
+    "noscript", "iframe", "svg", "template",
+})
+# Блочные теги — перенос строки в тексте
+_BLOCK_TAGS = frozenset({
+    "p", "div", "br", "li", "ul", "ol", "tr", "table", "section",
+    "article", "main", "h1", "h2", "h3", "h4", "h5", "h6",
+    "blockquote", "pre", "dd", "dt",
+})
+_HEADING_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+
+MAX_LINKS = 100
+
+# Адрес поиска DuckDuckGo (ключ доменного лимита для web_search)
+DDG_SEARCH_URL = "https://html.duckduckgo.com/html/"
+
+
+def domain_of(url: str) -> str:
+    """Домен URL без www (ключ лимитов вежливости)."""
+    netloc = urlparse(url).netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HTML → ExtractedData (быстрый путь)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class _PageParser(HTMLParser):
+    """Потоковый разбор HTML: заголовок, текст, ссылки, заголовки, meta."""
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self._base_url = base_url
+        self._skip_depth = 0
+        self._in_title = False
+        self._heading: str | None = None
+        self._heading_parts: list[str] = []
+        self._link: str | None = None
+        self._link_parts: list[str] = []
+        self.title = ""
+        self.parts: list[str] = []
+        self.links: list[dict[str, str]] = []
+        self.headings: list[dict[str, str]] = []
+        self.meta: dict[str, str] = {}
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        attributes = dict(attrs)
+        if tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            key = attributes.get("name") or attributes.get("property")
+            content = attributes.get("content")
+            if key and content:
+                self.meta[key] = content
+        if self._skip_depth:
+            return
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+        if tag in _HEADING_TAGS:
+            self._heading = tag
+            self._heading_parts = []
+        elif tag == "a":
+            href = attributes.get("href") or ""
+            if href and not href.startswith("javascript:"):
+                self._link = urljoin(self._base_url, href)
+                self._link_parts = []
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if tag == "title":
+            self._in_title = False
+        if self._skip_depth:
+            return
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+        if tag == self._heading:
+            text = " ".join("".join(self._heading_parts).split())
+            if text:
+                self.headings.append({"level": tag, "text": text})
+            self._heading = None
+        elif tag == "a" and self._link is not None:
+            text = " ".join("".join(self._link_parts).split())
+            if text and len(self.links) < MAX_LINKS:
+                self.links.append({"url": self._link, "text": text[:200]})
+            self._link = None
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip_depth:
+            return
+        self.parts.append(data)
+        if self._heading is not None:
+            self._heading_parts.append(data)
+        if self._link is not None:
+            self._link_parts.append(data)
+
+
+def parse_html(url: str, html: str) -> ExtractedData:
+    """Разобрать статический HTML в ExtractedData (без JS)."""
+    parser = _PageParser(url)
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:
+        logger.debug(f"HTML parse error {url}: {e}")
+
+    text = "".join(parser.parts)
+    text = re.sub(r"[ \t\r\f\v]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text).strip()
+
+    return ExtractedData(
+        url=url,
+        title=" ".join(parser.title.split()),
+        text=text,
+        links=parser.links,
+        headings=parser.headings,
+        meta=parser.meta,
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ЛИМИТЫ
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class DomainLimiter:
+    """
+    Вежливость по доменам: не больше per_domain загрузок одновременно
+    и не чаще одного старта в delay секунд на домен.
+    """
+
+    def __init__(self, per_domain: int, delay: float):
+        self._per_domain = max(1, per_domain)
+        self._delay = max(0.0, delay)
+        self._sems: dict[str, asyncio.Semaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, domain: str) -> AsyncIterator[None]:
+        sem = self._sems.get(domain)
+        if sem is None:
+            sem = self._sems[domain] = asyncio.Semaphore(self._per_domain)
+        async with sem:
+            # Резервируем время старта без await — гонок нет
+            now = time.monotonic()
+            start_at = max(now, self._next_start.get(domain, 0.0))
+            self._next_start[domain] = start_at + self._delay
+            if start_at > now:
+                await asyncio.sleep(start_at - now)
+            yield
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FETCHER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+@dataclass
+class FetchedPage:
+    """Результат загрузки одной страницы."""
+    url: str
+    index: int = 0
+    data: ExtractedData | None = None
+    via: str = ""  # http | browser | cache | revalidated
+    error: str = ""
+    elapsed_ms: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.data is not None and not self.error
+
+    @property
+    def from_cache(self) -> bool:
+        return self.via in ("cache", "revalidated")
+
+
+@dataclass
+class FetcherStats:
+    """Статистика загрузок."""
+    http_pages: int = 0
+    browser_pages: int = 0
+    http_fallbacks: int = 0
+    failures: int = 0
+    cache_hits: int = 0
+    revalidated: int = 0
+    search_cache_hits: int = 0
+    total_time_ms: int = 0
+    max_in_flight: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "http_pages": self.http_pages,
+            "browser_pages": self.browser_pages,
+            "http_fallbacks": self.http_fallbacks,
+            "failures": self.failures,
+            "cache_hits": self.cache_hits,
+            "revalidated": self.revalidated,
+            "search_cache_hits": self.search_cache_hits,
+            "time_ms": self.total_time_ms,
+            "max_in_flight": self.max_in_flight,
+        }
+
+
+class ResearchFetcher:
+    """
+    Параллельная загрузка страниц для research с ограничением нагрузки.
+
+    Лимиты создаются заново для каждого event loop: asyncio-примитивы
+    привязаны к циклу, а глобальный экземпляр живёт дольше одного цикла.
+    """
+
+    def __init__(
+        self,
+        cfg: Any | None = None,
+        cache: PageCache | None = None,
+    ):
+        self._cfg = cfg or config.research
+        self._cache = cache
+        self._stats = FetcherStats()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._global: asyncio.Semaphore | None = None
+        self._domains: DomainLimiter | None = None
+        self._client: Any = None
+        self._in_flight = 0
+        self._user_agent = random.choice(USER_AGENTS)
+
+    @property
+    def stats(self) -> FetcherStats:
+        return self._stats
+
+    @property
+    def cache(self) -> PageCache | None:
+        return self._cache
+
+    def _ensure_limits(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._global = asyncio.Semaphore(max(1, self._cfg.max_concurrency))
+        self._domains = DomainLimiter(
+            self._cfg.per_domain, self._cfg.domain_delay_ms / 1000)
+        # httpx-клиент тоже привязан к циклу
+        self._client = None
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Слот загрузки: сначала домен (вежливость), затем общий лимит."""
+        self._ensure_limits()
+        async with self._domains.slot(domain_of(url)):
+            async with self._global:
+                self._in_flight += 1
+                self._stats.max_in_flight = max(
+                    self._stats.max_in_flight, self._in_flight)
+                try:
+                    yield
+                finally:
+                    self._in_flight -= 1
+
+    async def fetch(self, url: str, index: int = 0) -> FetchedPage:
+        """
+        Загрузить страницу. Ошибки не бросаются — см. FetchedPage.error.
+
+        Порядок: свежий кэш → условная перепроверка устаревшей записи →
+        быстрый HTTP-путь → браузер.
+        """
+        start = time.monotonic()
+        result = FetchedPage(url=url, index=index)
+        entry: CachedPage | None = None
+        try:
+            if self._cache is not None:
+                entry = await asyncio.to_thread(self._cache.get, url)
+                if entry is not None and entry.is_fresh:
+                    result.data, result.via = entry.data, "cache"
+                    self._stats.cache_hits += 1
+                    return result
+
+            async with self.slot(url):
+                data, via = None, ""
+                if entry is not None and entry.can_revalidate:
+                    data, via = await self._revalidate(url, entry)
+                if data is None and self._cfg.http_fast_path:
+                    data = await self._fetch_http(url)
+                    via = "http"
+                    if data is None:
+                        self._stats.http_fallbacks += 1
+                if data is None:
+                    data = await self._fetch_browser(url)
+                    via = "browser"
+                result.data, result.via = data, via
+
+            if via == "revalidated":
+                self._stats.revalidated += 1
+            else:
+                if via == "http":
+                    self._stats.http_pages += 1
+                else:
+                    self._stats.browser_pages += 1
+                if self._cache is not None and data.text:
+                    await asyncio.to_thread(self._cache.put, data, url)
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+            self._stats.failures += 1
+        finally:
+            result.elapsed_ms = int((time.monotonic() - start) * 1000)
+            self._stats.total_time_ms += result.elapsed_ms
+        return result
+
+    async def search(self, query: str, max_results: int = 10) -> list[SearchResult]:
+        """
+        Поиск через browser_engine.web_search (во вкладке из пула,
+        под доменным лимитом DDG) с кэшем результатов.
+        """
+        ttl = self._cfg.search_cache_ttl
+        if self._cache is not None and ttl > 0:
+            cached = await asyncio.to_thread(
+                self._cache.get_search, query, max_results)
+            if cached is not None:
+                self._stats.search_cache_hits += 1
+                return cached
+
+        from pds_ultimate.core.browser_engine import browser_engine
+        async with self.slot(DDG_SEARCH_URL):
+            results = await browser_engine.web_search(
+                query, max_results=max_results, isolated=True)
+
+        if self._cache is not None and ttl > 0 and results:
+            await asyncio.to_thread(
+                self._cache.put_search, query, max_results, results, ttl)
+        return results
+
+    async def stream(self, urls: list[str]) -> AsyncIterator[FetchedPage]:
+        """
+        Загрузить страницы параллельно, отдавая каждую по готовности.
+
+        FetchedPage.index — позиция URL во входном списке.
+        Если потребитель прервал итерацию, оставшиеся загрузки отменяются.
+        """
+        tasks = [
+            asyncio.ensure_future(self.fetch(url, index=i))
+            for i, url in enumerate(urls)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def fetch_all(self, urls: list[str]) -> list[FetchedPage]:
+        """Загрузить все страницы; результат в порядке urls."""
+        pages = [page async for page in self.stream(urls)]
+        pages.sort(key=lambda p: p.index)
+        return pages
+
+    async def _fetch_browser(self, url: str) -> ExtractedData:
+        from pds_ultimate.core.browser_engine import browser_engine
+        return await browser_engine.extract_data(url, isolated=True)
+
+    async def _fetch_http(self, url: str) -> ExtractedData | None:
+        """Быстрый путь. None — страницу нужно открыть в браузере."""
+        try:
+            response = await self._http_client().get(url)
+        except Exception as e:
+            logger.debug(f"HTTP fast path error {url}: {e}")
+            return None
+        return self._parse_response(response)
+
+    async def _revalidate(
+        self,
+        url: str,
+        entry: CachedPage,
+    ) -> tuple[ExtractedData | None, str]:
+        """
+        Условный GET по ETag/Last-Modified. 304 — запись из кэша
+        продлевается; новый 200-ответ используется, если включён
+        быстрый путь, иначе страница идёт в браузер.
+        """
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        try:
+            response = await self._http_client().get(url, headers=headers)
+        except Exception as e:
+            logger.debug(f"Revalidation error {url}: {e}")
+            return None, ""
+
+        if response.status_code == 304:
+            await asyncio.to_thread(
+                self._cache.touch, entry,
+                response.headers.get("etag", ""),
+                response.headers.get("last-modified", ""),
+            )
+            return entry.data, "revalidated"
+        if self._cfg.http_fast_path:
+            data = self._parse_response(response)
+            if data is not None:
+                return data, "http"
+        return None, ""
+
+    def _parse_response(self, response: Any) -> ExtractedData | None:
+        """Разобрать HTML-ответ; None — не HTML или текста мало (JS)."""
+        content_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or "html" not in content_type:
+            return None
+        data = parse_html(str(response.url), response.text)
+        if len(data.text) < self._cfg.http_min_text:
+            return None
+        data.etag = response.headers.get("etag", "")
+        data.last_modified = response.headers.get("last-modified", "")
+        return data
+
+    def _http_client(self) -> Any:
+        if self._client is None:
+            import httpx
+
+            from pds_ultimate.core.llm_transport import http2_available
+            self._client = httpx.AsyncClient(
+                http2=http2_available(),
+                follow_redirects=True,
+                timeout=self._cfg.http_timeout,
+                headers={
+                    "User-Agent": self._user_agent,
+                    "Accept": "text/html,application/xhtml+xml",
+                },
+                limits=httpx.Limits(
+                    max_connections=max(1, self._cfg.max_concurrency),
+                    max_keepalive_connections=max(1, self._cfg.max_concurrency),
+                ),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Закрыть HTTP-клиент и файл кэша."""
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except Exception:
+                pass
+            self._client = None
+        if self._cache is not None:
+            self._cache.close()
+
+    def get_stats(self) -> dict:
+        stats = self._stats.to_dict()
+        if self._cache is not None:
+            stats["cache"] = self._cache.get_stats()
+        return stats
+
+
+# ─── Глобальный экземпляр ────────────────────────────────────────────────────
+
+research_fetcher = ResearchFetcher(cache=page_cache)
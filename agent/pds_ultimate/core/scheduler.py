@@ -14,6 +14,7 @@ PDS-Ultimate Scheduler
 - Отчёт каждые 3 дня (09:00)
 - Ежесуточный бэкап (03:00)
 - Проверка статусов позиций (T+4, каждый вторник)
+- Сверка леджера балансов с транзакциями (04:00)
 - Пересканирование стиля (раз в неделю)
 """
 
@@ -377,6 +378,33 @@ class TaskScheduler:
             hours=1,
         )
 
+        # 7. Сверка леджера балансов (04:00 — после бэкапа)
+        self.add_cron(
+            func=self._job_verify_ledger,
+            job_id="builtin_verify_ledger",
+            jobstore=_js,
+            hour=4,
+            minute=0,
+        )
+
+        # 8. Пересборка All_Orders_Archive.xlsx из журнала (если изменился)
+        if config.logistics.archive_export_minutes > 0:
+            self.add_interval(
+                func=self._job_export_archive,
+                job_id="builtin_archive_export",
+                jobstore=_js,
+                minutes=config.logistics.archive_export_minutes,
+            )
+
+        # 9. Пакетное обновление снапшота курсов валют
+        if config.currency.refresh_minutes > 0:
+            self.add_interval(
+                func=self._job_refresh_rates,
+                job_id="builtin_refresh_rates",
+                jobstore=_js,
+                minutes=config.currency.refresh_minutes,
+            )
+
         logger.info("Встроенные задачи зарегистрированы")
 
     # ─── Реальные job-функции ────────────────────────────────────────────
@@ -473,6 +501,48 @@ class TaskScheduler:
             logger.error(
                 f"Ошибка проверки статусов: {e}", exc_info=True)
 
+    async def _job_verify_ledger(self) -> None:
+        """Сверка леджера с transactions; расхождения — перестройка."""
+        if not self._session_factory:
+            return
+
+        try:
+            from pds_ultimate.core.aggregates import verify_ledger
+            from pds_ultimate.core.db_executor import db_executor
+
+            drift = await db_executor.run_session(
+                self._session_factory, verify_ledger,
+                name="scheduler.verify_ledger",
+            )
+            if drift:
+                logger.warning(
+                    f"Леджер перестроен, расхождения: "
+                    f"{[d.to_dict() for d in drift[:5]]}"
+                )
+            else:
+                logger.info("Леджер сверен: расхождений нет")
+        except Exception as e:
+            logger.error(f"Ошибка сверки леджера: {e}", exc_info=True)
+
+    async def _job_export_archive(self) -> None:
+        """Фоновая сборка XLSX-архива из append-only журнала."""
+        try:
+            from pds_ultimate.modules.logistics.archive_sink import archive_sink
+
+            if await archive_sink.export_if_dirty():
+                logger.info("Архив заказов: XLSX пересобран")
+        except Exception as e:
+            logger.error(f"Ошибка экспорта архива: {e}", exc_info=True)
+
+    async def _job_refresh_rates(self) -> None:
+        """Все курсы одним запросом → новый снапшот + запись в CurrencyRate."""
+        try:
+            from pds_ultimate.modules.finance.rate_snapshot import rate_book
+
+            await rate_book.refresh(self._session_factory)
+        except Exception as e:
+            logger.error(f"Ошибка обновления курсов: {e}", exc_info=True)
+
     async def _job_check_reminders(self) -> None:
         """Проверка пропущенных напоминаний (каждый час)."""
         if not self._session_factory or not self._bot:
@@ -0,0 +1,335 @@
+"""
+PDS-Ultimate Full-Text Search
+================================
+Полнотекстовый поиск по архиву, контактам и заказам — SQLite FTS5.
+
+ILIKE '%q%' не использует индексы и сканирует всю таблицу. Здесь:
+- archive_fts / contacts_fts / orders_fts — FTS5 с tokenize='trigram':
+  подстроки от 3 символов, кириллица и латиница вперемешку,
+  регистронезависимо
+- Индексы ведут триггеры SQLite (INSERT/UPDATE/DELETE на исходных
+  таблицах) — синхронизация в той же транзакции, в том числе для
+  bulk-delete и правок мимо ORM
+- Ранжирование — bm25() с весами колонок (номер/имя важнее заметок)
+- Запросы короче 3 символов (trigram их не индексирует) и БД без
+  FTS5 — fallback на LIKE по исходным таблицам
+
+Установка — install_search_index() после Base.metadata.create_all
+(подписано в database.py), пустой индекс заполняется по истории.
+
+Использование:
+    hits = search(session, "ромашка")               # все виды, по рангу
+    ids = search_ids(session, "contacts", "Ахмед")  # id в порядке ранга
+"""
+
+from __future__ import annotations
+
+import weakref
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from pds_ultimate.config import logger
+
+MIN_TERM_LENGTH = 3  # Минимальная длина термина для trigram
+
+
+@dataclass(frozen=True)
+class _Kind:
+    """Описание одного поискового индекса."""
+    fts: str
+    source: str
+    columns: tuple[str, ...]
+    weights: tuple[float, ...]
+    title: str          # SQL-выражение заголовка (колонки есть в обеих таблицах)
+    like_where: str     # WHERE для LIKE-fallback по исходной таблице
+
+
+_KINDS: dict[str, _Kind] = {
+    "archive": _Kind(
+        fts="archive_fts",
+        source="archived_order_items",
+        columns=("order_number", "item_name", "supplier_name",
+                 "client_name", "tracking_number"),
+        weights=(5.0, 3.0, 2.0, 2.0, 1.0),
+        title="order_number || ' · ' || item_name",
+        like_where=(
+            "order_number LIKE :p OR item_name LIKE :p "
+            "OR supplier_name LIKE :p OR client_name LIKE :p"
+        ),
+    ),
+    "contacts": _Kind(
+        fts="contacts_fts",
+        source="contacts",
+        columns=("name", "company", "phone", "telegram_username", "notes"),
+        weights=(5.0, 3.0, 2.0, 2.0, 1.0),
+        title="name",
+        like_where=(
+            "name LIKE :p OR company LIKE :p OR phone LIKE :p "
+            "OR telegram_username LIKE :p OR notes LIKE :p"
+        ),
+    ),
+    "orders": _Kind(
+        fts="orders_fts",
+        source="orders",
+        columns=("order_number", "description", "notes", "items"),
+        weights=(5.0, 2.0, 1.0, 2.0),
+        title="order_number",
+        like_where=(
+            "order_number LIKE :p OR description LIKE :p OR notes LIKE :p "
+            "OR id IN (SELECT order_id FROM order_items WHERE name LIKE :p)"
+        ),
+    ),
+}
+
+ALL_KINDS: tuple[str, ...] = tuple(_KINDS)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DDL: FTS-таблицы и триггеры
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _row_sql(kind: _Kind, alias: str) -> str:
+    return ", ".join(f"coalesce({alias}.{c}, '')" for c in kind.columns)
+
+
+_ARCHIVE = _KINDS["archive"]
+_CONTACTS = _KINDS["contacts"]
+_ORDERS = _KINDS["orders"]
+
+# Заказ индексируется вместе с названиями позиций (колонка items)
+_ORDERS_SELECT = (
+    "SELECT o.id, coalesce(o.order_number, ''), coalesce(o.description, ''), "
+    "coalesce(o.notes, ''), coalesce((SELECT group_concat(i.name, ' ') "
+    "FROM order_items i WHERE i.order_id = o.id), '') FROM orders o"
+)
+_ORDERS_COLS = "rowid, " + ", ".join(_ORDERS.columns)
+
+
+def _orders_refresh(ids: str) -> str:
+    return (
+        f"DELETE FROM orders_fts WHERE rowid IN ({ids}); "
+        f"INSERT INTO orders_fts({_ORDERS_COLS}) "
+        f"{_ORDERS_SELECT} WHERE o.id IN ({ids});"
+    )
+
+
+def _simple_triggers(kind: _Kind) -> list[str]:
+    cols = ", ".join(kind.columns)
+    insert = (
+        f"INSERT INTO {kind.fts}(rowid, {cols}) "
+        f"VALUES (new.id, {_row_sql(kind, 'new')});"
+    )
+    delete = f"DELETE FROM {kind.fts} WHERE rowid = old.id;"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {kind.fts}_ai AFTER INSERT ON "
+        f"{kind.source} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {kind.fts}_ad AFTER DELETE ON "
+        f"{kind.source} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {kind.fts}_au AFTER UPDATE OF "
+        f"{cols} ON {kind.source} BEGIN {delete} {insert} END",
+    ]
+
+
+def _ddl() -> list[str]:
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {k.fts} USING fts5("
+        f"{', '.join(k.columns)}, tokenize='trigram')"
+        for k in _KINDS.values()
+    ]
+    statements += _simple_triggers(_ARCHIVE)
+    statements += _simple_triggers(_CONTACTS)
+    statements += [
+        "CREATE TRIGGER IF NOT EXISTS orders_fts_ai AFTER INSERT ON orders "
+        f"BEGIN {_orders_refresh('new.id')} END",
+        "CREATE TRIGGER IF NOT EXISTS orders_fts_ad AFTER DELETE ON orders "
+        "BEGIN DELETE FROM orders_fts WHERE rowid = old.id; END",
+        "CREATE TRIGGER IF NOT EXISTS orders_fts_au AFTER UPDATE OF "
+        "order_number, description, notes ON orders "
+        f"BEGIN {_orders_refresh('new.id')} END",
+        "CREATE TRIGGER IF NOT EXISTS order_items_fts_ai AFTER INSERT ON "
+        f"order_items BEGIN {_orders_refresh('new.order_id')} END",
+        "CREATE TRIGGER IF NOT EXISTS order_items_fts_ad AFTER DELETE ON "
+        f"order_items BEGIN {_orders_refresh('old.order_id')} END",
+        "CREATE TRIGGER IF NOT EXISTS order_items_fts_au AFTER UPDATE OF "
+        "name, order_id ON order_items "
+        f"BEGIN {_orders_refresh('old.order_id, new.order_id')} END",
+    ]
+    return statements
+
+
+def install_search_index(connection) -> bool:
+    """
+    Создать FTS-таблицы и триггеры (идемпотентно), заполнить пустые индексы.
+    connection — SQLAlchemy Connection. False — FTS5/trigram недоступен.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    try:
+        for statement in _ddl():
+            connection.exec_driver_sql(statement)
+        for kind in _KINDS.values():
+            empty = connection.exec_driver_sql(
+                f"SELECT NOT EXISTS (SELECT 1 FROM {kind.fts})"
+            ).scalar()
+            has_rows = connection.exec_driver_sql(
+                f"SELECT EXISTS (SELECT 1 FROM {kind.source})"
+            ).scalar()
+            if empty and has_rows:
+                _rebuild_kind(connection, kind)
+                logger.info(f"FTS-индекс {kind.fts} построен по истории")
+    except OperationalError as e:
+        logger.warning(f"FTS5 недоступен, поиск через LIKE: {e}")
+        return False
+    return True
+
+
+def _rebuild_kind(connection, kind: _Kind) -> None:
+    connection.exec_driver_sql(f"DELETE FROM {kind.fts}")
+    if kind is _ORDERS:
+        connection.exec_driver_sql(
+            f"INSERT INTO orders_fts({_ORDERS_COLS}) {_ORDERS_SELECT}"
+        )
+        return
+    cols = ", ".join(kind.columns)
+    connection.exec_driver_sql(
+        f"INSERT INTO {kind.fts}(rowid, {cols}) "
+        f"SELECT s.id, {_row_sql(kind, 's')} FROM {kind.source} s"
+    )
+
+
+def rebuild_search_index(session: Session) -> None:
+    """Полная перестройка всех FTS-индексов по исходным таблицам."""
+    connection = session.connection()
+    for kind in _KINDS.values():
+        _rebuild_kind(connection, kind)
+    session.commit()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ПОИСК
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class SearchHit:
+    """Результат поиска: вид записи, её id, заголовок, фрагмент, ранг."""
+    kind: str
+    id: int
+    title: str
+    snippet: str
+    score: float
+
+    def to_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "id": self.id,
+            "title": self.title,
+            "snippet": self.snippet,
+            "score": round(self.score, 4),
+        }
+
+
+def match_expression(query: str) -> Optional[str]:
+    """
+    Запрос → FTS5 MATCH: каждый термин в кавычках, термины через AND.
+    None — нет терминов длиной >= MIN_TERM_LENGTH (нужен LIKE).
+    """
+    terms = [t for t in query.replace('"', " ").split()
+             if len(t) >= MIN_TERM_LENGTH]
+    if not terms:
+        return None
+    return " AND ".join(f'"{t}"' for t in terms)
+
+
+_fts_ready: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _has_fts(session: Session) -> bool:
+    bind = session.get_bind()
+    engine = getattr(bind, "engine", bind)
+    ready = _fts_ready.get(engine)
+    if ready is None:
+        if engine.dialect.name != "sqlite":
+            ready = False
+        else:
+            found = session.execute(text(
+                "SELECT count(*) FROM sqlite_master "
+                "WHERE type = 'table' AND name IN "
+                "('archive_fts', 'contacts_fts', 'orders_fts')"
+            )).scalar()
+            ready = found == len(_KINDS)
+        _fts_ready[engine] = ready
+    return ready
+
+
+def _search_kind(
+    session: Session,
+    name: str,
+    query: str,
+    limit: int,
+) -> list[SearchHit]:
+    kind = _KINDS[name]
+    match = match_expression(query)
+
+    if match is not None and _has_fts(session):
+        weights = ", ".join(str(w) for w in kind.weights)
+        rows = session.execute(
+            text(
+                f"SELECT rowid, {kind.title}, "
+                f"snippet({kind.fts}, -1, '[', ']', '…', 8), "
+                f"bm25({kind.fts}, {weights}) AS rank "
+                f"FROM {kind.fts} WHERE {kind.fts} MATCH :q "
+                f"ORDER BY rank LIMIT :limit"
+            ),
+            {"q": match, "limit": limit},
+        ).all()
+        # bm25: меньше — лучше; score: больше — лучше
+        return [
+            SearchHit(name, r[0], r[1] or "", r[2] or "", -float(r[3]))
+            for r in rows
+        ]
+
+    query = query.strip()
+    if not query:
+        return []
+    rows = session.execute(
+        text(
+            f"SELECT id, {kind.title} FROM {kind.source} "
+            f"WHERE {kind.like_where} ORDER BY id DESC LIMIT :limit"
+        ),
+        {"p": f"%{query}%", "limit": limit},
+    ).all()
+    return [SearchHit(name, r[0], r[1] or "", "", 0.0) for r in rows]
+
+
+def search(
+    session: Session,
+    query: str,
+    kinds: Iterable[str] = ALL_KINDS,
+    limit: int = 20,
+) -> list[SearchHit]:
+    """
+    Поиск по нескольким индексам, общий список по убыванию ранга.
+    Ранги bm25 разных таблиц сопоставимы приближённо — для выдачи
+    «лучшее сверху» этого достаточно.
+    """
+    hits: list[SearchHit] = []
+    for name in kinds:
+        if name not in _KINDS:
+            raise ValueError(f"Неизвестный вид поиска: {name}")
+        hits.extend(_search_kind(session, name, query, limit))
+    hits.sort(key=lambda h: h.score, reverse=True)
+    return hits[:limit]
+
+
+def search_ids(
+    session: Session,
+    kind: str,
+    query: str,
+    limit: int = 50,
+) -> list[int]:
+    """id записей одного вида в порядке ранга."""
+    return [h.id for h in search(session, query, (kind,), limit)]
@@ -6,6 +6,7 @@ PDS-Ultimate Semantic Embeddings Engine
 Компоненты:
 1. EmbeddingModel — лёгкая модель embeddings (bag-of-words + character n-grams)
 2. VectorIndex — индекс для быстрого similarity search
+   SparseVectorIndex — CSR-матрица для больших корпусов (numpy + scipy)
 3. SemanticSearchEngine — полный поисковый pipeline
 
 Архитектура:
@@ -28,8 +29,10 @@ import re
 import time
 from collections import Counter
 from dataclasses import dataclass, field
+from pathlib import Path
 
-from pds_ultimate.config import logger
+from pds_ultimate.config import config, logger
+from pds_ultimate.core.semantic_store import SnapshotStore
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # STOP WORDS
@@ -93,6 +96,20 @@ class SearchResult:
         }
 
 
+@dataclass
+class IndexRows:
+    """
+    Индекс в CSR-виде для снапшота на диск (semantic_store.py).
+    Строка i — документ doc_ids[i], столбцы — признаки vocab.
+    """
+    doc_ids: list[str]
+    vocab: list[str]
+    indptr: object   # sequence[int] | np.ndarray
+    indices: object  # sequence[int] | np.ndarray
+    data: object     # sequence[float] | np.ndarray
+    normalized: bool = False  # строки уже L2-нормированы
+
+
 @dataclass
 class IndexStats:
     """Статистика индекса."""
@@ -127,10 +144,17 @@ class EmbeddingModel:
     TRIGRAM_WEIGHT = 0.3  # Character trigrams
     TAG_WEIGHT = 2.0
 
-    def __init__(self):
+    def __init__(self, incremental: bool = False):
         self._idf: dict[str, float] = {}  # token → IDF score
         self._total_docs = 0
         self._doc_freq: Counter = Counter()
+        # Incremental режим: _doc_freq обновляется на add/remove,
+        # embed() отдаёт сырые TF веса, IDF применяется при поиске
+        self._incremental = incremental
+
+    @property
+    def incremental(self) -> bool:
+        return self._incremental
 
     def tokenize(self, text: str) -> list[str]:
         """Токенизация: слова + нормализация."""
@@ -156,21 +180,85 @@ class EmbeddingModel:
         self._total_docs = len(documents)
 
         for doc in documents:
-            tokens = set(self.tokenize(doc))
-            # Добавляем char trigrams
-            for word in list(tokens):
-                for tg in self.char_trigrams(word):
-                    tokens.add(f"c:{tg}")
-
-            for token in tokens:
+            for token in self.document_features(doc):
                 self._doc_freq[token] += 1
 
         # Вычисляем IDF
         self._idf = {
-            token: math.log((self._total_docs + 1) / (freq + 1)) + 1
+            token: self._idf_formula(self._total_docs, freq)
             for token, freq in self._doc_freq.items()
         }
 
+    def document_features(self, text: str) -> set[str]:
+        """Признаки документа, по которым считается document frequency."""
+        tokens = set(self.tokenize(text))
+        # Добавляем char trigrams
+        for word in list(tokens):
+            for tg in self.char_trigrams(word):
+                tokens.add(f"c:{tg}")
+        return tokens
+
+    def add_document_freq(self, text: str) -> None:
+        """Учесть документ в _doc_freq — O(признаков документа)."""
+        self._total_docs += 1
+        for token in self.document_features(text):
+            self._doc_freq[token] += 1
+
+    def remove_document_freq(self, text: str) -> None:
+        """Исключить документ из _doc_freq — O(признаков документа)."""
+        self._total_docs = max(0, self._total_docs - 1)
+        for token in self.document_features(text):
+            freq = self._doc_freq.get(token, 0) - 1
+            if freq > 0:
+                self._doc_freq[token] = freq
+            else:
+                self._doc_freq.pop(token, None)
+
+    def get_state(self) -> dict:
+        """IDF-таблица и document frequency (для снапшота)."""
+        return {
+            "incremental": self._incremental,
+            "total_docs": self._total_docs,
+            "idf": self._idf,
+            "doc_freq": dict(self._doc_freq),
+        }
+
+    def set_state(self, state: dict) -> None:
+        """Восстановить IDF-таблицу и document frequency."""
+        self._total_docs = state.get("total_docs", 0)
+        self._idf = dict(state.get("idf", {}))
+        self._doc_freq = Counter(state.get("doc_freq", {}))
+
+    @staticmethod
+    def _idf_formula(total_docs: int, freq: int) -> float:
+        return math.log((total_docs + 1) / (freq + 1)) + 1
+
+    def idf(self, token: str) -> float:
+        """IDF токена (в incremental режиме — по текущему _doc_freq)."""
+        if self._incremental:
+            freq = self._doc_freq.get(token, 0)
+            return self._idf_formula(self._total_docs, freq) if freq else 1.0
+        return self._idf.get(token, 1.0)
+
+    def feature_idf(self, key: str) -> float:
+        """IDF признака вектора (w:/b:/c: — по токену, t: — без IDF)."""
+        kind, _, token = key.partition(":")
+        if kind == "c":
+            return self.idf(key)
+        if kind in ("w", "b"):
+            return self.idf(token)
+        return 1.0
+
+    def apply_idf(self, emb: EmbeddingVector) -> EmbeddingVector:
+        """Применить текущий IDF к вектору с сырыми TF весами."""
+        weighted = EmbeddingVector(
+            doc_id=emb.doc_id,
+            vector={k: v * self.feature_idf(k) for k, v in emb.vector.items()},
+            metadata=emb.metadata,
+        )
+        weighted.compute_norm()
+        return weighted
+
     def embed(
         self,
         text: str,
@@ -178,10 +266,12 @@ class EmbeddingModel:
     ) -> EmbeddingVector:
         """
         Создать embedding для текста.
+        В incremental режиме веса — сырые TF (IDF = 1), см. apply_idf().
 
         Returns:
             EmbeddingVector (sparse)
         """
+        idf_of = (lambda _: 1.0) if self._incremental else self.idf
         tokens = self.tokenize(text)
         vector: dict[str, float] = {}
 
@@ -190,7 +280,7 @@ class EmbeddingModel:
         doc_len = len(tokens)
         for token, count in token_counts.items():
             tf = count / max(1, doc_len)  # Term frequency
-            idf = self._idf.get(token, 1.0)
+            idf = idf_of(token)
             vector[f"w:{token}"] = tf * idf * self.WORD_WEIGHT
 
         # Word bigram features
@@ -198,14 +288,14 @@ class EmbeddingModel:
         bigram_counts = Counter(bigrams)
         for bg, count in bigram_counts.items():
             tf = count / max(1, len(bigrams))
-            idf = self._idf.get(bg, 1.0)
+            idf = idf_of(bg)
             vector[f"b:{bg}"] = tf * idf * self.BIGRAM_WEIGHT
 
         # Character trigram features
         for token in set(tokens):
             for tg in self.char_trigrams(token):
                 key = f"c:{tg}"
-                idf = self._idf.get(key, 1.0)
+                idf = idf_of(key)
                 # TF для char trigrams = 1/len(tokens)
                 vector[key] = vector.get(key, 0) + (
                     idf * self.TRIGRAM_WEIGHT / max(1, doc_len)
@@ -280,9 +370,14 @@ class VectorIndex:
         metadata: dict | None = None,
     ) -> EmbeddingVector:
         """Добавить документ в индекс."""
+        if doc_id in self._vectors:
+            self.remove(doc_id)
+
         emb = self._model.embed(text, tags=tags)
         emb.doc_id = doc_id
         emb.metadata = metadata or {}
+        if self._model.incremental:
+            self._model.add_document_freq(text)
 
         self._vectors[doc_id] = emb
         self._contents[doc_id] = text
@@ -302,6 +397,8 @@ class VectorIndex:
             return False
 
         emb = self._vectors.pop(doc_id)
+        if self._model.incremental:
+            self._model.remove_document_freq(self._contents.get(doc_id, ""))
         self._contents.pop(doc_id, None)
         self._metadata.pop(doc_id, None)
 
@@ -351,9 +448,15 @@ class VectorIndex:
         ]
 
         # Cosine similarity для кандидатов
+        # (incremental: IDF применяется здесь, к запросу и кандидатам)
+        lazy_idf = self._model.incremental
+        if lazy_idf:
+            query_emb = self._model.apply_idf(query_emb)
         results: list[SearchResult] = []
         for doc_id in top_candidates:
             doc_emb = self._vectors[doc_id]
+            if lazy_idf:
+                doc_emb = self._model.apply_idf(doc_emb)
             score = self._model.cosine_similarity(query_emb, doc_emb)
 
             if score >= min_score:
@@ -368,6 +471,50 @@ class VectorIndex:
         results.sort(key=lambda r: r.score, reverse=True)
         return results[:top_k]
 
+    def export_rows(self) -> IndexRows:
+        """Выгрузить векторы в CSR-виде (для снапшота)."""
+        vocab: dict[str, int] = {}
+        doc_ids: list[str] = []
+        indptr = [0]
+        indices: list[int] = []
+        data: list[float] = []
+        for doc_id, emb in self._vectors.items():
+            doc_ids.append(doc_id)
+            for key, val in emb.vector.items():
+                col = vocab.setdefault(key, len(vocab))
+                indices.append(col)
+                data.append(val)
+            indptr.append(len(indices))
+        return IndexRows(
+            doc_ids=doc_ids, vocab=list(vocab),
+            indptr=indptr, indices=indices, data=data,
+        )
+
+    def import_rows(
+        self,
+        rows: IndexRows,
+        contents: dict[str, str],
+        metadata: dict[str, dict],
+    ) -> None:
+        """Загрузить векторы из CSR-вида без повторного embedding."""
+        self.clear()
+        vocab = rows.vocab
+        indptr, indices, data = rows.indptr, rows.indices, rows.data
+        for row, doc_id in enumerate(rows.doc_ids):
+            start, end = int(indptr[row]), int(indptr[row + 1])
+            vector = {
+                vocab[int(indices[i])]: float(data[i])
+                for i in range(start, end)
+            }
+            meta = metadata.get(doc_id, {})
+            emb = EmbeddingVector(doc_id=doc_id, vector=vector, metadata=meta)
+            emb.compute_norm()
+            self._vectors[doc_id] = emb
+            self._contents[doc_id] = contents.get(doc_id, "")
+            self._metadata[doc_id] = meta
+            for key in vector:
+                self._inverted.setdefault(key, set()).add(doc_id)
+
     @property
     def size(self) -> int:
         return len(self._vectors)
@@ -382,6 +529,341 @@ class VectorIndex:
         self._contents.clear()
         self._metadata.clear()
         self._inverted.clear()
+        if self._model.incremental:
+            self._model._doc_freq.clear()
+            self._model._total_docs = 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 2b. SPARSE MATRIX INDEX (numpy + scipy)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def sparse_backend_available() -> bool:
+    """Установлены ли numpy и scipy (нужны для SparseVectorIndex)."""
+    try:
+        import numpy  # noqa: F401
+        import scipy.sparse  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class SparseVectorIndex(VectorIndex):
+    """
+    Векторизованный индекс: весь корпус — одна CSR матрица.
+
+    Стратегия:
+    - Словарь признаков: feature → column id
+    - Строки матрицы — L2-нормированные векторы документов
+    - Запрос = один sparse mat-vec + argpartition для top-k
+    - Новые документы копятся в буфере и вливаются в матрицу
+      при следующем поиске (одним vstack)
+    - Удаление = tombstone (строка помечается мёртвой),
+      компакция при доле мёртвых строк > compact_ratio
+    - Incremental модель: строки хранят сырые TF, document frequency
+      ведётся по столбцам, IDF и нормы считаются при поиске (2 mat-vec)
+
+    Требует numpy + scipy. API совпадает с VectorIndex.
+    """
+
+    def __init__(self, model: EmbeddingModel, compact_ratio: float = 0.25):
+        import numpy as np
+        import scipy.sparse as sp
+
+        super().__init__(model)
+        self._np = np
+        self._sp = sp
+        self._compact_ratio = compact_ratio
+        self._vocab: dict[str, int] = {}          # feature → column id
+        self._row_of: dict[str, int] = {}         # doc_id → row
+        self._row_ids: list[str | None] = []      # row → doc_id (None = tombstone)
+        self._matrix = sp.csr_matrix((0, 0), dtype=np.float32)
+        self._matrix_sq = None  # matrix ** 2 (кэш для норм с IDF)
+        self._alive = np.zeros(0, dtype=bool)
+        # Буфер добавленных, но ещё не влитых в матрицу строк
+        self._pending: list[tuple[list[int], list[float]]] = []
+        self._dead = 0
+        self._compactions = 0
+        # Для incremental модели: df по столбцам и какие столбцы берут IDF
+        self._col_df = np.zeros(0, dtype=np.int32)
+        self._col_idf: list[bool] = []
+
+    def add(
+        self,
+        doc_id: str,
+        text: str,
+        tags: list[str] | None = None,
+        metadata: dict | None = None,
+    ) -> EmbeddingVector:
+        """Добавить документ (повторный doc_id заменяет старую строку)."""
+        if doc_id in self._row_of:
+            self.remove(doc_id)
+
+        emb = self._model.embed(text, tags=tags)
+        emb.doc_id = doc_id
+        emb.metadata = metadata or {}
+        raw_tf = self._model.incremental
+        if raw_tf:
+            self._model.add_document_freq(text)
+
+        self._contents[doc_id] = text
+        self._metadata[doc_id] = metadata or {}
+
+        cols: list[int] = []
+        vals: list[float] = []
+        if emb.norm > 0:
+            for key, val in emb.vector.items():
+                col = self._vocab.get(key)
+                if col is None:
+                    col = len(self._vocab)
+                    self._vocab[key] = col
+                    self._col_idf.append(key[:2] in ("w:", "c:"))
+                cols.append(col)
+                vals.append(val if raw_tf else val / emb.norm)
+
+        self._row_of[doc_id] = len(self._row_ids)
+        self._row_ids.append(doc_id)
+        self._pending.append((cols, vals))
+        return emb
+
+    def remove(self, doc_id: str) -> bool:
+        """Удалить документ (tombstone + компакция по порогу)."""
+        if doc_id not in self._row_of:
+            return False
+        self._tombstone(doc_id)
+        if self._model.incremental:
+            self._model.remove_document_freq(self._contents.get(doc_id, ""))
+        self._contents.pop(doc_id, None)
+        self._metadata.pop(doc_id, None)
+        if self._dead > len(self._row_ids) * self._compact_ratio:
+            self.compact()
+        return True
+
+    def search(
+        self,
+        query: str,
+        tags: list[str] | None = None,
+        top_k: int = 10,
+        min_score: float = 0.01,
+    ) -> list[SearchResult]:
+        """
+        Поиск похожих документов.
+
+        Алгоритм:
+        1. Embed query → плотный вектор по словарю
+        2. scores = matrix @ query (cosine, строки уже нормированы)
+        3. Маскируем tombstones и score < min_score
+        4. argpartition → top-K
+        """
+        if not self._row_of or top_k <= 0:
+            return []
+
+        np = self._np
+        self._flush()
+
+        query_emb = self._model.embed(query, tags=tags)
+        if query_emb.norm == 0:
+            return []
+
+        q = np.zeros(len(self._vocab), dtype=np.float32)
+        unmatched_sq = 0.0  # вклад признаков вне словаря в норму запроса
+        matched = False
+        for key, val in query_emb.vector.items():
+            col = self._vocab.get(key)
+            if col is not None:
+                q[col] = val
+                matched = True
+            else:
+                unmatched_sq += val * val
+        if not matched:
+            return []
+
+        if self._model.incremental:
+            scores = self._lazy_idf_scores(q, unmatched_sq)
+        else:
+            scores = self._matrix @ (q / query_emb.norm)
+        scores[~self._alive] = -1.0
+        hits = np.flatnonzero(scores >= min_score)
+        if hits.size == 0:
+            return []
+        if hits.size > top_k:
+            part = np.argpartition(-scores[hits], top_k - 1)[:top_k]
+            hits = hits[part]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+
+        results: list[SearchResult] = []
+        for row in hits:
+            doc_id = self._row_ids[row]
+            results.append(SearchResult(
+                doc_id=doc_id,
+                score=float(scores[row]),
+                content=self._contents.get(doc_id, ""),
+                metadata=self._metadata.get(doc_id, {}),
+            ))
+        return results
+
+    def _lazy_idf_scores(self, q, unmatched_sq: float):
+        """Cosine с IDF по текущему df: dot и нормы строк — два mat-vec."""
+        np = self._np
+        df = self._col_df
+        idf = np.ones(df.size, dtype=np.float32)
+        mask = np.asarray(self._col_idf, dtype=bool) & (df > 0)
+        n = self._model._total_docs
+        idf[mask] = np.log((n + 1) / (df[mask] + 1)) + 1
+
+        qw = q * idf
+        q_norm = math.sqrt(float(qw @ qw) + unmatched_sq)
+        if self._matrix_sq is None:
+            self._matrix_sq = self._matrix.multiply(self._matrix).tocsr()
+        row_norms = np.sqrt(self._matrix_sq @ (idf * idf))
+        row_norms[row_norms == 0] = np.inf
+        return (self._matrix @ (qw * idf)) / (row_norms * q_norm)
+
+    def compact(self) -> None:
+        """Выкинуть мёртвые строки и перенумеровать документы."""
+        self._flush()
+        if self._dead == 0:
+            return
+        keep = self._np.flatnonzero(self._alive)
+        self._matrix = self._matrix[keep]
+        self._matrix_sq = None
+        self._row_ids = [self._row_ids[i] for i in keep]
+        self._row_of = {doc_id: i for i, doc_id in enumerate(self._row_ids)}
+        self._alive = self._np.ones(len(self._row_ids), dtype=bool)
+        self._dead = 0
+        self._compactions += 1
+
+    def _tombstone(self, doc_id: str) -> None:
+        row = self._row_of.pop(doc_id)
+        self._row_ids[row] = None
+        if row < self._alive.size:
+            self._alive[row] = False
+            start, end = self._matrix.indptr[row], self._matrix.indptr[row + 1]
+            self._np.subtract.at(self._col_df, self._matrix.indices[start:end], 1)
+        else:
+            # Строка ещё в буфере — обнуляем её до вливания
+            self._pending[row - self._alive.size] = ([], [])
+        self._dead += 1
+
+    def _flush(self) -> None:
+        """Влить буфер новых строк в CSR матрицу."""
+        np, sp = self._np, self._sp
+        n_cols = len(self._vocab)
+        if self._col_df.size != n_cols:
+            self._col_df = np.concatenate([
+                self._col_df,
+                np.zeros(n_cols - self._col_df.size, dtype=np.int32),
+            ])
+        if not self._pending:
+            if self._matrix.shape[1] != n_cols:
+                self._matrix.resize((self._matrix.shape[0], n_cols))
+                self._matrix_sq = None
+            return
+
+        indptr = [0]
+        indices: list[int] = []
+        data: list[float] = []
+        for cols, vals in self._pending:
+            indices.extend(cols)
+            data.extend(vals)
+            indptr.append(len(indices))
+        new_rows = sp.csr_matrix(
+            (np.asarray(data, dtype=np.float32),
+             np.asarray(indices, dtype=np.int32),
+             np.asarray(indptr, dtype=np.int32)),
+            shape=(len(self._pending), n_cols),
+        )
+        old = self._matrix
+        if old.shape[1] != n_cols:
+            old.resize((old.shape[0], n_cols))
+        self._matrix = sp.vstack([old, new_rows], format="csr")
+        self._matrix_sq = None
+        np.add.at(self._col_df, new_rows.indices, 1)
+
+        alive_new = np.array(
+            [self._row_ids[i] is not None
+             for i in range(self._alive.size, len(self._row_ids))],
+            dtype=bool,
+        )
+        self._alive = np.concatenate([self._alive, alive_new])
+        self._pending.clear()
+
+    def export_rows(self) -> IndexRows:
+        """Выгрузить матрицу (после компакции) для снапшота."""
+        self.compact()
+        vocab = [""] * len(self._vocab)
+        for key, col in self._vocab.items():
+            vocab[col] = key
+        return IndexRows(
+            doc_ids=list(self._row_ids),
+            vocab=vocab,
+            indptr=self._matrix.indptr,
+            indices=self._matrix.indices,
+            data=self._matrix.data,
+            normalized=not self._model.incremental,
+        )
+
+    def import_rows(
+        self,
+        rows: IndexRows,
+        contents: dict[str, str],
+        metadata: dict[str, dict],
+    ) -> None:
+        """
+        Загрузить матрицу из CSR-вида.
+        Массивы берутся как есть — memory-mapped данные не копируются.
+        """
+        np, sp = self._np, self._sp
+        self.clear()
+        n_rows, n_cols = len(rows.doc_ids), len(rows.vocab)
+        self._vocab = {key: col for col, key in enumerate(rows.vocab)}
+        self._col_idf = [key[:2] in ("w:", "c:") for key in rows.vocab]
+        self._row_ids = list(rows.doc_ids)
+        self._row_of = {doc_id: i for i, doc_id in enumerate(self._row_ids)}
+        matrix = sp.csr_matrix(
+            (rows.data, rows.indices, rows.indptr),
+            shape=(n_rows, n_cols), copy=False,
+        )
+        if not self._model.incremental and not rows.normalized:
+            norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)))
+            norms[norms == 0] = 1.0
+            matrix = sp.csr_matrix(
+                matrix.multiply(1.0 / norms), dtype=np.float32)
+        self._matrix = matrix
+        self._alive = np.ones(n_rows, dtype=bool)
+        self._col_df = np.bincount(
+            np.asarray(matrix.indices), minlength=n_cols,
+        ).astype(np.int32)
+        for doc_id in self._row_ids:
+            self._contents[doc_id] = contents.get(doc_id, "")
+            self._metadata[doc_id] = metadata.get(doc_id, {})
+
+    @property
+    def size(self) -> int:
+        return len(self._row_of)
+
+    @property
+    def vocab_size(self) -> int:
+        return len(self._vocab)
+
+    @property
+    def tombstones(self) -> int:
+        return self._dead
+
+    def clear(self) -> None:
+        """Очистить индекс."""
+        super().clear()
+        self._vocab.clear()
+        self._row_of.clear()
+        self._row_ids.clear()
+        self._matrix = self._sp.csr_matrix((0, 0), dtype=self._np.float32)
+        self._matrix_sq = None
+        self._alive = self._np.zeros(0, dtype=bool)
+        self._pending.clear()
+        self._dead = 0
+        self._col_df = self._np.zeros(0, dtype=self._np.int32)
+        self._col_idf.clear()
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -411,12 +893,40 @@ class SemanticSearchEngine:
         # → [SearchResult(doc_id="doc1", score=0.87)]
     """
 
-    def __init__(self):
-        self._model = EmbeddingModel()
-        self._index = VectorIndex(self._model)
+    def __init__(
+        self,
+        backend: str | None = None,
+        incremental: bool | None = None,
+    ):
+        if incremental is None:
+            incremental = config.semantic.incremental_idf
+        self._model = EmbeddingModel(incremental=incremental)
+        self._index = self._make_index(backend or config.semantic.backend)
         self._stats = IndexStats()
         self._doc_counter = 0
         self._search_times: list[float] = []
+        self._store: SnapshotStore | None = None  # WAL после save/load
+
+    def _make_index(self, backend: str) -> VectorIndex:
+        """dict — VectorIndex, sparse — SparseVectorIndex (numpy + scipy)."""
+        if backend == "sparse":
+            if sparse_backend_available():
+                return SparseVectorIndex(self._model)
+            logger.warning(
+                "SemanticSearch: numpy/scipy не установлены — "
+                "используем dict backend"
+            )
+        elif backend != "dict":
+            logger.warning(f"SemanticSearch: неизвестный backend '{backend}'")
+        return VectorIndex(self._model)
+
+    @property
+    def backend(self) -> str:
+        return "sparse" if isinstance(self._index, SparseVectorIndex) else "dict"
+
+    @property
+    def incremental(self) -> bool:
+        return self._model.incremental
 
     @property
     def model(self) -> EmbeddingModel:
@@ -451,6 +961,12 @@ class SemanticSearchEngine:
 
         self._index.add(doc_id, text, tags=tags, metadata=metadata)
         self._stats.total_docs = self._index.size
+        if self._store:
+            self._store.append({
+                "op": "add", "doc_id": doc_id, "text": text,
+                "tags": tags, "metadata": metadata,
+                "counter": self._doc_counter,
+            })
 
         return doc_id
 
@@ -458,16 +974,32 @@ class SemanticSearchEngine:
         """Удалить документ."""
         result = self._index.remove(doc_id)
         self._stats.total_docs = self._index.size
+        if result and self._store:
+            self._store.append({"op": "remove", "doc_id": doc_id})
         return result
 
+    def clear(self) -> None:
+        """Очистить индекс."""
+        self._index.clear()
+        self._stats.total_docs = 0
+        if self._store:
+            self._store.append({"op": "clear"})
+
     def rebuild_index(self, documents: list[tuple[str, str]] | None = None) -> None:
         """
         Перестроить IDF индекс.
         Вызывать после массового добавления/удаления.
+        В incremental режиме IDF всегда актуален — re-embedding не нужен.
 
         Args:
             documents: Список (doc_id, text) или None для rebuild из текущих
         """
+        if self._model.incremental:
+            self._stats.vocab_size = self._index.vocab_size
+            return
+        if self._store:
+            self._store.append({"op": "rebuild", "documents": documents})
+
         if documents:
             texts = [text for _, text in documents]
         else:
@@ -526,9 +1058,58 @@ class SemanticSearchEngine:
 
         return results
 
+    # ─── Persistence ─────────────────────────────────────────────────────
+
+    def save(self, path: Path | str) -> bool:
+        """
+        Сохранить снапшот индекса в директорию path.
+        Дальнейшие add/remove пишутся в WAL этой директории.
+        """
+        store = self._store
+        if store is None or store.path != Path(path):
+            store = SnapshotStore(path)
+        if not store.save(self):
+            return False
+        self._store = store
+        return True
+
+    def load(self, path: Path | str) -> bool:
+        """
+        Загрузить снапшот (memory-mapped) и проиграть WAL.
+
+        Returns:
+            False если снапшота нет или он несовместим — индекс не тронут.
+        """
+        store = SnapshotStore(path)
+        if store.load(self) is None:
+            return False
+        for record in store.read_log():
+            self._apply_log(record)
+        self._store = store
+        return True
+
+    def _apply_log(self, record: dict) -> None:
+        op = record.get("op")
+        if op == "add":
+            self._doc_counter = max(self._doc_counter, record.get("counter", 0))
+            self.add_document(
+                doc_id=record["doc_id"],
+                text=record.get("text", ""),
+                tags=record.get("tags"),
+                metadata=record.get("metadata"),
+            )
+        elif op == "remove":
+            self.remove_document(record["doc_id"])
+        elif op == "clear":
+            self.clear()
+        elif op == "rebuild":
+            self.rebuild_index(record.get("documents"))
+
     def get_stats(self) -> dict:
         """Статистика движка."""
         return {
+            "backend": self.backend,
+            "incremental": self.incremental,
             "total_docs": self._stats.total_docs,
             "vocab_size": self._stats.vocab_size,
             "total_searches": self._stats.total_searches,
@@ -22,6 +22,9 @@ import time
 from collections import Counter, defaultdict
 from dataclasses import dataclass, field
 from enum import Enum
+from pathlib import Path
+
+from pds_ultimate.core.semantic_store import SnapshotStore
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # ENUMS & DATA MODELS
@@ -322,6 +325,7 @@ class DocumentStore:
         self._chunk_overlap = chunk_overlap
         self._documents: dict[str, dict] = {}  # doc_id → metadata
         self._chunk_map: dict[str, str] = {}   # chunk_id → doc_id
+        self._store: SnapshotStore | None = None  # WAL после save/load
 
     def add_document(
         self,
@@ -337,6 +341,11 @@ class DocumentStore:
 
         Returns: количество чанков
         """
+        if self._store:
+            self._store.append({
+                "op": "add", "doc_id": doc_id, "text": text, "title": title,
+                "source": source, "tags": tags, "metadata": metadata,
+            })
         chunks = self._chunk_text(text)
         meta = metadata or {}
         meta.update({"title": title, "source": source})
@@ -376,6 +385,8 @@ class DocumentStore:
             self._engine.remove_document(cid)
             del self._chunk_map[cid]
         del self._documents[doc_id]
+        if self._store:
+            self._store.append({"op": "remove", "doc_id": doc_id})
         return True
 
     def search(
@@ -431,6 +442,40 @@ class DocumentStore:
             start = end - self._chunk_overlap
         return [c for c in chunks if c]
 
+    def save(self, path: Path | str) -> bool:
+        """Сохранить снапшот (индекс + документы); дальше — WAL."""
+        store = self._store
+        if store is None or store.path != Path(path):
+            store = SnapshotStore(path)
+        state = {"documents": self._documents, "chunk_map": self._chunk_map}
+        if not store.save(self._engine, state=state):
+            return False
+        self._store = store
+        return True
+
+    def load(self, path: Path | str) -> bool:
+        """Загрузить снапшот и проиграть WAL."""
+        store = SnapshotStore(path)
+        state = store.load(self._engine)
+        if state is None:
+            return False
+        self._documents = state.get("documents", {})
+        self._chunk_map = state.get("chunk_map", {})
+        for record in store.read_log():
+            if record.get("op") == "add":
+                self.add_document(
+                    doc_id=record["doc_id"],
+                    text=record.get("text", ""),
+                    title=record.get("title", ""),
+                    source=record.get("source", ""),
+                    tags=record.get("tags"),
+                    metadata=record.get("metadata"),
+                )
+            elif record.get("op") == "remove":
+                self.remove_document(record["doc_id"])
+        self._store = store
+        return True
+
     @property
     def document_count(self) -> int:
         return len(self._documents)
@@ -485,26 +530,61 @@ class ContextualSearch:
         self._kb = knowledge_base
         self._engine = SemanticSearchEngine()
         self._synced = False
+        # id → отпечаток проиндексированной версии (текст, теги, категория)
+        self._fingerprints: dict[str, str] = {}
 
     def sync_from_kb(self) -> int:
         """Синхронизировать индекс с базой знаний."""
+        if self._engine.incremental:
+            return self._sync_incremental()
+
         self._engine.index.clear()
+        self._fingerprints.clear()
         count = 0
         for item in self._kb._items.values():
             if not item.is_expired:
-                self._engine.add_document(
-                    doc_id=item.id,
-                    text=item.content,
-                    tags=item.tags + [item.category.value],
-                    metadata={"category": item.category.value,
-                              "confidence": item.confidence},
-                )
+                self._index_item(item)
                 count += 1
         if count > 5:
             self._engine.rebuild_index()
         self._synced = True
         return count
 
+    def _sync_incremental(self) -> int:
+        """
+        Синхронизация по разнице id и отпечатков — embedding только для
+        новых и изменённых знаний (отредактированный текст тоже).
+        """
+        live = {
+            item_id: item for item_id, item in self._kb._items.items()
+            if not item.is_expired
+        }
+        indexed = set(self._engine.index._contents)
+        for item_id in indexed - live.keys():
+            self._engine.remove_document(item_id)
+            self._fingerprints.pop(item_id, None)
+        for item_id, item in live.items():
+            if self._fingerprints.get(item_id) != self._fingerprint(item):
+                self._index_item(item)  # повторный id заменяет документ
+        self._synced = True
+        return len(live)
+
+    @staticmethod
+    def _fingerprint(item: KnowledgeItem) -> str:
+        """Хэш того, что попадает в индекс: текст, теги, категория."""
+        raw = "\x1f".join([item.content, item.category.value, *item.tags])
+        return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+    def _index_item(self, item: KnowledgeItem) -> None:
+        self._fingerprints[item.id] = self._fingerprint(item)
+        self._engine.add_document(
+            doc_id=item.id,
+            text=item.content,
+            tags=item.tags + [item.category.value],
+            metadata={"category": item.category.value,
+                      "confidence": item.confidence},
+        )
+
     def search(
         self,
         query: SearchQuery,
@@ -693,6 +773,7 @@ class SemanticCache:
         self._threshold = similarity_threshold
         self._hits = 0
         self._misses = 0
+        self._store: SnapshotStore | None = None  # WAL после save/load
 
     def get(self, query: str) -> dict | None:
         """
@@ -736,6 +817,12 @@ class SemanticCache:
             "access_count": 0,
             "metadata": metadata or {},
         }
+        if self._store:
+            self._store.append({
+                "op": "put", "query": query, "response": response,
+                "metadata": metadata,
+                "created_at": self._responses[doc_id]["created_at"],
+            })
         return doc_id
 
     def invalidate(self, doc_id: str) -> bool:
@@ -743,13 +830,57 @@ class SemanticCache:
         if doc_id in self._responses:
             self._engine.remove_document(doc_id)
             del self._responses[doc_id]
+            if self._store:
+                self._store.append({"op": "invalidate", "doc_id": doc_id})
             return True
         return False
 
     def clear(self) -> None:
         """Очистить кэш."""
-        self._engine.index.clear()
+        self._engine.clear()
         self._responses.clear()
+        if self._store:
+            self._store.append({"op": "clear"})
+
+    def save(self, path: Path | str) -> bool:
+        """Сохранить снапшот (индекс запросов + ответы); дальше — WAL."""
+        store = self._store
+        if store is None or store.path != Path(path):
+            store = SnapshotStore(path)
+        state = {
+            "responses": self._responses,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+        if not store.save(self._engine, state=state):
+            return False
+        self._store = store
+        return True
+
+    def load(self, path: Path | str) -> bool:
+        """Загрузить снапшот и проиграть WAL."""
+        store = SnapshotStore(path)
+        state = store.load(self._engine)
+        if state is None:
+            return False
+        self._responses = state.get("responses", {})
+        self._hits = state.get("hits", 0)
+        self._misses = state.get("misses", 0)
+        for record in store.read_log():
+            op = record.get("op")
+            if op == "put":
+                doc_id = self.put(
+                    record["query"], record.get("response", ""),
+                    metadata=record.get("metadata"),
+                )
+                self._responses[doc_id]["created_at"] = record.get(
+                    "created_at", time.time())
+            elif op == "invalidate":
+                self.invalidate(record["doc_id"])
+            elif op == "clear":
+                self.clear()
+        self._store = store
+        return True
 
     def _evict_oldest(self) -> None:
         """Удалить самую старую запись."""
@@ -861,6 +992,20 @@ class SemanticSearchV2:
         """Очистка устаревших знаний."""
         return self.pruner.prune_all()
 
+    def save(self, path: Path | str) -> bool:
+        """Снапшот DocumentStore и SemanticCache в поддиректории path."""
+        path = Path(path)
+        docs_ok = self.document_store.save(path / "documents")
+        cache_ok = self.cache.save(path / "cache")
+        return docs_ok and cache_ok
+
+    def load(self, path: Path | str) -> bool:
+        """Загрузить снапшоты DocumentStore и SemanticCache."""
+        path = Path(path)
+        docs_ok = self.document_store.load(path / "documents")
+        cache_ok = self.cache.load(path / "cache")
+        return docs_ok and cache_ok
+
     def get_stats(self) -> dict:
         return {
             "knowledge_base": self.knowledge_base.get_stats(),
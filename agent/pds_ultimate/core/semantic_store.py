@@ -0,0 +1,248 @@
+"""
+PDS-Ultimate Semantic Index Store
+===================================
+Снапшот семантического индекса на диск + write-ahead лог.
+
+Формат снапшота (директория):
+- manifest.json — версия формата, режим модели, состояние владельца
+- idf.json      — IDF-таблица и document frequency (EmbeddingModel)
+- vocab.json    — признаки по номерам столбцов
+- indptr.npy / indices.npy / data.npy — CSR-строки документов
+- docs.jsonl    — doc_id, текст и метаданные по строкам
+- wal.jsonl     — операции после снапшота (append-only)
+
+Загрузка: .npy открываются через np.load(mmap_mode="r") —
+страницы общие для всех worker-процессов, warm start без re-embedding.
+Операции из wal.jsonl проигрывает владелец (engine / DocumentStore /
+SemanticCache) своими обычными методами.
+
+Требует numpy (опционально, как и SEMANTIC_BACKEND=sparse).
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pds_ultimate.config import logger
+
+if TYPE_CHECKING:
+    from pds_ultimate.core.semantic_engine import SemanticSearchEngine
+
+SNAPSHOT_FORMAT = 1
+
+
+class SnapshotStore:
+    """
+    Снапшот + WAL одного SemanticSearchEngine.
+
+    Использование:
+        store = SnapshotStore(DATA_DIR / "semantic" / "engine")
+        store.save(engine, state={...})   # полный снапшот, WAL обнуляется
+        state = store.load(engine)        # mmap-загрузка, None если нет
+        for record in store.read_log():   # операции после снапшота
+            ...
+        store.append({"op": "add", ...})  # новая операция
+    """
+
+    MANIFEST = "manifest.json"
+    WAL = "wal.jsonl"
+
+    def __init__(self, path: Path | str):
+        self._path = Path(path)
+        self._wal_fh = None
+        self._appended = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def exists(self) -> bool:
+        return (self._path / self.MANIFEST).exists()
+
+    # ─── Snapshot ────────────────────────────────────────────────────────
+
+    def save(
+        self,
+        engine: SemanticSearchEngine,
+        state: dict | None = None,
+    ) -> bool:
+        """
+        Записать полный снапшот engine (атомарно: tmp-директория + rename).
+        WAL после снапшота пустой.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            logger.warning("SnapshotStore: numpy не установлен — снапшот пропущен")
+            return False
+
+        start = time.time()
+        self.close()
+        rows = engine.index.export_rows()
+        nnz = len(rows.data)
+        int_type = np.int32 if nnz < 2 ** 31 else np.int64
+
+        tmp = self._path.with_name(self._path.name + ".tmp")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+
+        np.save(tmp / "indptr.npy", np.asarray(rows.indptr, dtype=int_type))
+        np.save(tmp / "indices.npy", np.asarray(rows.indices, dtype=int_type))
+        np.save(tmp / "data.npy", np.asarray(rows.data, dtype=np.float32))
+        self._write_json(tmp / "vocab.json", rows.vocab)
+        self._write_json(tmp / "idf.json", engine.model.get_state())
+
+        contents = engine.index._contents
+        metadata = engine.index._metadata
+        with open(tmp / "docs.jsonl", "w", encoding="utf-8") as fh:
+            for doc_id in rows.doc_ids:
+                fh.write(json.dumps({
+                    "id": doc_id,
+                    "text": contents.get(doc_id, ""),
+                    "meta": metadata.get(doc_id, {}),
+                }, ensure_ascii=False, default=str) + "\n")
+
+        self._write_json(tmp / self.MANIFEST, {
+            "format": SNAPSHOT_FORMAT,
+            "created_at": time.time(),
+            "backend": engine.backend,
+            "incremental": engine.incremental,
+            "normalized": rows.normalized,
+            "docs": len(rows.doc_ids),
+            "doc_counter": engine._doc_counter,
+            "state": state or {},
+        })
+        (tmp / self.WAL).touch()
+
+        old = self._path.with_name(self._path.name + ".old")
+        if old.exists():
+            shutil.rmtree(old)
+        if self._path.exists():
+            self._path.rename(old)
+        tmp.rename(self._path)
+        if old.exists():
+            shutil.rmtree(old)
+
+        self._appended = 0
+        logger.debug(
+            f"SnapshotStore: saved {len(rows.doc_ids)} docs to {self._path} "
+            f"in {(time.time() - start) * 1000:.1f}ms"
+        )
+        return True
+
+    def load(self, engine: SemanticSearchEngine) -> dict | None:
+        """
+        Загрузить снапшот в engine (CSR-массивы — memory-mapped).
+
+        Returns:
+            Состояние владельца из manifest или None (нет снапшота /
+            несовместимый формат / нет numpy) — тогда индекс строится заново.
+        """
+        if not self.exists:
+            return None
+        try:
+            import numpy as np
+        except ImportError:
+            logger.warning("SnapshotStore: numpy не установлен — снапшот пропущен")
+            return None
+
+        from pds_ultimate.core.semantic_engine import IndexRows
+
+        start = time.time()
+        manifest = self._read_json(self._path / self.MANIFEST)
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            logger.warning(
+                f"SnapshotStore: формат {manifest.get('format')} "
+                f"не поддерживается ({self._path})"
+            )
+            return None
+        if manifest.get("incremental") != engine.incremental:
+            logger.warning(
+                "SnapshotStore: снапшот сохранён в другом IDF-режиме "
+                f"({self._path}) — нужен rebuild"
+            )
+            return None
+
+        contents: dict[str, str] = {}
+        metadata: dict[str, dict] = {}
+        doc_ids: list[str] = []
+        with open(self._path / "docs.jsonl", encoding="utf-8") as fh:
+            for line in fh:
+                doc = json.loads(line)
+                doc_ids.append(doc["id"])
+                contents[doc["id"]] = doc["text"]
+                metadata[doc["id"]] = doc["meta"]
+
+        rows = IndexRows(
+            doc_ids=doc_ids,
+            vocab=self._read_json(self._path / "vocab.json"),
+            indptr=np.load(self._path / "indptr.npy", mmap_mode="r"),
+            indices=np.load(self._path / "indices.npy", mmap_mode="r"),
+            data=np.load(self._path / "data.npy", mmap_mode="r"),
+            normalized=manifest.get("normalized", False),
+        )
+        engine.index.import_rows(rows, contents, metadata)
+        engine.model.set_state(self._read_json(self._path / "idf.json"))
+        engine._doc_counter = manifest.get("doc_counter", 0)
+        engine._stats.total_docs = engine.index.size
+        engine._stats.vocab_size = engine.index.vocab_size
+
+        logger.debug(
+            f"SnapshotStore: loaded {len(doc_ids)} docs from {self._path} "
+            f"in {(time.time() - start) * 1000:.1f}ms"
+        )
+        return manifest.get("state", {})
+
+    # ─── Write-ahead log ─────────────────────────────────────────────────
+
+    def append(self, record: dict) -> None:
+        """Дописать операцию в WAL."""
+        if self._wal_fh is None:
+            self._path.mkdir(parents=True, exist_ok=True)
+            self._wal_fh = open(self._path / self.WAL, "a", encoding="utf-8")
+        self._wal_fh.write(
+            json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._wal_fh.flush()
+        self._appended += 1
+
+    def read_log(self) -> list[dict]:
+        """Прочитать операции WAL (оборванная последняя строка пропускается)."""
+        wal = self._path / self.WAL
+        if not wal.exists():
+            return []
+        records: list[dict] = []
+        with open(wal, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"SnapshotStore: битая запись WAL в {wal}")
+        return records
+
+    @property
+    def log_size(self) -> int:
+        """Операций дописано в WAL с момента открытия/снапшота."""
+        return self._appended
+
+    def close(self) -> None:
+        if self._wal_fh is not None:
+            self._wal_fh.close()
+            self._wal_fh = None
+
+    # ─── Helpers ─────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _write_json(path: Path, data) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _read_json(path: Path):
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
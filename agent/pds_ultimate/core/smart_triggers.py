@@ -13,23 +13,30 @@ PDS-Ultimate — Smart Triggers Engine (Part 9)
 - Цепочки триггеров (если A → запустить B)
 - История срабатываний
 - Снузинг и мьютинг
+- Событийная проверка: изменилось поле → проверяются только триггеры
+  на это поле (курсы из RateBook, вставки транзакций)
 
 Архитектура:
     TriggerManager
     ├── TriggerEvaluator — проверяет условия
     ├── AlertHistory — история срабатываний
     ├── TriggerChain — цепочки триггеров
-    └── NotificationRouter — маршрутизация алертов
+    ├── NotificationRouter — маршрутизация алертов
+    └── TriggerEngine — индекс «поле → триггеры» и очередь изменений
 """
 
 from __future__ import annotations
 
+import asyncio
 import re
+import threading
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Callable
+from typing import Any, Awaitable, Callable, Iterable, Mapping
+
+from pds_ultimate.config import config, logger
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # ENUMS
@@ -328,6 +335,7 @@ class TriggerEvaluator:
 
     def __init__(self):
         self._data_providers: dict[str, Callable] = {}
+        self._provider_calls = 0
         self._register_default_providers()
 
     def _register_default_providers(self) -> None:
@@ -342,17 +350,32 @@ class TriggerEvaluator:
         """Зарегистрировать провайдер данных."""
         self._data_providers[field] = provider
 
-    def get_current_value(self, field: str) -> Any:
-        """Получить текущее значение поля."""
+    def get_current_value(
+        self,
+        field: str,
+        values: dict | None = None,
+    ) -> Any:
+        """
+        Получить текущее значение поля.
+        values — кэш цикла проверки: провайдер поля вызывается один раз
+        на цикл, сколько бы триггеров его ни смотрели.
+        """
+        if values is not None and field in values:
+            return values[field]
         provider = self._data_providers.get(field)
+        value = None
         if provider:
-            return provider()
-        return None
+            self._provider_calls += 1
+            value = provider()
+        if values is not None:
+            values[field] = value
+        return value
 
     def evaluate_trigger(
         self,
         trigger: Trigger,
         context: dict | None = None,
+        values: dict | None = None,
     ) -> tuple[bool, Any]:
         """
         Проверить триггер.
@@ -370,7 +393,9 @@ class TriggerEvaluator:
         if context and trigger.condition.field in context:
             current_value = context[trigger.condition.field]
         else:
-            current_value = self.get_current_value(trigger.condition.field)
+            current_value = self.get_current_value(
+                trigger.condition.field, values,
+            )
 
         if current_value is None:
             return False, None
@@ -437,6 +462,11 @@ class TriggerEvaluator:
         """Доступные поля для мониторинга."""
         return list(self._data_providers.keys())
 
+    @property
+    def provider_calls(self) -> int:
+        """Сколько раз вызывались провайдеры данных."""
+        return self._provider_calls
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # ALERT HISTORY
@@ -640,6 +670,304 @@ class TriggerChain:
         return False
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# TRIGGER ENGINE (событийная проверка)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Событие без значения: поле изменилось, значение — у провайдера
+_UNSET = object()
+
+# session.info: суммы вставленных транзакций до commit сессии
+_PENDING_TRANSACTIONS = "smart_triggers.pending_transactions"
+
+
+def rate_fields(changed: Mapping[str, float]) -> dict[str, float]:
+    """Изменённые курсы RateBook (единиц за 1 USD) → поля триггеров."""
+    fields = {}
+    for currency, rate in changed.items():
+        code = currency.lower()
+        if code == "usd" or not rate:
+            continue
+        fields[f"rate_usd_{code}"] = rate
+        fields[f"rate_{code}_usd"] = 1 / rate
+    return fields
+
+
+class TriggerEngine:
+    """
+    Событийная проверка триггеров.
+
+    Индекс «поле → триггеры»: notify(field, value) ставит изменение в
+    очередь, повторные изменения поля до цикла склеиваются (остаётся
+    последнее значение). Цикл (process/flush) проверяет только триггеры
+    изменённых полей и их цепочки, провайдер каждого поля — один раз.
+    notify безопасен из любого потока (хуки БД в потоках db_executor).
+    Загрузчики (add_loader) — async-источники полей: flush получает их
+    значения до цикла, не блокируя event loop.
+    """
+
+    def __init__(self, manager: TriggerManager, coalesce_ms: int = 0):
+        self._manager = manager
+        self._by_field: dict[str, dict[str, None]] = {}
+        self._field_of: dict[str, str] = {}
+        self._pending: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._delay = max(coalesce_ms, 0) / 1000
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._loaders: list[tuple[frozenset[str], Callable]] = []
+        self._sources_attached = False
+        self._events = 0
+        self._coalesced = 0
+        self._ignored = 0
+        self._cycles = 0
+        self._evaluated = 0
+
+    # ── Индекс ────────────────────────────────────────────────────────────
+
+    def watch(self, trigger: Trigger) -> None:
+        """Добавить (или переиндексировать) триггер."""
+        self.unwatch(trigger.id)
+        if not trigger.condition:
+            return
+        fld = trigger.condition.field
+        self._by_field.setdefault(fld, {})[trigger.id] = None
+        self._field_of[trigger.id] = fld
+
+    def unwatch(self, trigger_id: str) -> None:
+        """Убрать триггер из индекса."""
+        fld = self._field_of.pop(trigger_id, None)
+        if fld is None:
+            return
+        ids = self._by_field.get(fld)
+        if ids is not None:
+            ids.pop(trigger_id, None)
+            if not ids:
+                del self._by_field[fld]
+
+    def watchers(self, field: str) -> list[str]:
+        """ID триггеров, которые смотрят поле."""
+        return list(self._by_field.get(field, ()))
+
+    @property
+    def watched_fields(self) -> list[str]:
+        return list(self._by_field)
+
+    # ── События ───────────────────────────────────────────────────────────
+
+    def notify(self, field: str, value: Any = _UNSET) -> bool:
+        """
+        Поле изменилось. Без value значение в цикле возьмётся у провайдера.
+        Returns: False — поле никто не смотрит, событие отброшено.
+        """
+        if field not in self._by_field:
+            self._ignored += 1
+            return False
+        with self._lock:
+            self._events += 1
+            if field in self._pending:
+                self._coalesced += 1
+            self._pending[field] = value
+        self._wakeup()
+        return True
+
+    def notify_many(self, values: Mapping[str, Any]) -> int:
+        """Несколько изменений разом. Returns: сколько принято."""
+        return sum(self.notify(f, v) for f, v in values.items())
+
+    @property
+    def pending(self) -> list[str]:
+        """Поля, ждущие цикла проверки."""
+        with self._lock:
+            return list(self._pending)
+
+    def process(self, context: dict | None = None) -> list[Alert]:
+        """Один цикл: проверить триггеры изменённых полей."""
+        with self._lock:
+            changes, self._pending = self._pending, {}
+        if not changes:
+            return []
+        self._cycles += 1
+
+        # Значения из событий приоритетнее переданного контекста
+        ctx = dict(context or {})
+        ctx.update((f, v) for f, v in changes.items() if v is not _UNSET)
+
+        triggers = self._manager._triggers
+        affected = [
+            triggers[tid]
+            for fld in changes
+            for tid in self._by_field.get(fld, ())
+            if tid in triggers
+        ]
+        alerts, checked = self._manager._evaluate(affected, ctx)
+        self._evaluated += checked
+        return alerts
+
+    def add_loader(
+        self,
+        fields: Iterable[str],
+        loader: Callable[[], Awaitable[Mapping[str, Any]]],
+    ) -> None:
+        """
+        Async-источник значений нескольких полей (например, итоги леджера
+        через db_executor). Вызывается во flush, если одно из полей
+        изменилось без значения.
+        """
+        self._loaders.append((frozenset(fields), loader))
+
+    async def _load(self, context: dict | None) -> dict:
+        """Контекст цикла + значения загрузчиков для ожидающих полей."""
+        ctx = dict(context or {})
+        with self._lock:
+            wanted = {
+                f for f, v in self._pending.items()
+                if v is _UNSET and f not in ctx
+            }
+        for fields, loader in self._loaders:
+            if not fields & wanted:
+                continue
+            try:
+                ctx.update(await loader())
+            except Exception as e:
+                logger.warning(f"Загрузчик полей {sorted(fields)}: {e}")
+        return ctx
+
+    async def flush(self, context: dict | None = None) -> list[Alert]:
+        """Цикл проверки + отправка алертов через NotificationRouter."""
+        alerts = self.process(await self._load(context))
+        for alert in alerts:
+            await self._manager.router.route(alert)
+        return alerts
+
+    # ── Фоновый цикл ──────────────────────────────────────────────────────
+
+    def _wakeup(self) -> None:
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass  # loop закрывается
+
+    async def start(self) -> None:
+        """Запустить фоновую обработку событий в текущем event loop."""
+        if self._task and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        if self._pending:
+            self._wake.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        self._loop = None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            # Окно склейки: пачка обновлений — один цикл
+            if self._delay:
+                await asyncio.sleep(self._delay)
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Ошибка цикла триггеров: {e}")
+
+    # ── Источники событий ─────────────────────────────────────────────────
+
+    def attach_sources(self, session_factory=None) -> None:
+        """
+        Подписаться на обновления курсов (RateBook) и вставки транзакций.
+        Вставки копятся в сессии и уходят в очередь только после commit
+        (откат — отбрасываются). С session_factory — ещё загрузчик
+        balance и net_profit из леджера (в потоке db_executor).
+        """
+        if self._sources_attached:
+            return
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        from pds_ultimate.core.database import Transaction
+        from pds_ultimate.modules.finance.rate_snapshot import rate_book
+
+        rate_book.subscribe(self._on_rates)
+        event.listen(Transaction, "after_insert", self._on_transaction)
+        event.listen(Session, "after_commit", self._on_commit)
+        event.listen(Session, "after_rollback", self._on_rollback)
+        if session_factory is not None:
+            self._register_ledger_loader(session_factory)
+        self._sources_attached = True
+
+    def _register_ledger_loader(self, session_factory) -> None:
+        from pds_ultimate.core.aggregates import ledger_totals
+        from pds_ultimate.core.db_executor import db_executor
+
+        async def load() -> dict[str, float]:
+            totals = await db_executor.run_session(
+                session_factory, ledger_totals, name="triggers.ledger_totals",
+            )
+            return {
+                "balance": totals.available,
+                "net_profit": totals.net_profit,
+            }
+
+        self.add_loader(("balance", "net_profit"), load)
+
+    def _on_rates(self, snap, changed: Mapping[str, float]) -> None:
+        self.notify_many(rate_fields(changed))
+
+    def _on_transaction(self, mapper, connection, target) -> None:
+        from sqlalchemy.orm import object_session
+
+        # До commit — только запомнить: вставка ещё может откатиться
+        session = object_session(target)
+        if session is None:
+            return
+        session.info.setdefault(_PENDING_TRANSACTIONS, []).append(
+            target.amount_usd)
+
+    def _on_commit(self, session) -> None:
+        amounts = session.info.pop(_PENDING_TRANSACTIONS, None)
+        if not amounts:
+            return
+        # Суммы леджера читаются загрузчиком в цикле — уже после commit
+        self.notify("balance")
+        self.notify("net_profit")
+        for amount in amounts:
+            if amount is not None:
+                self.notify("transaction_amount_usd", amount)
+
+    def _on_rollback(self, session) -> None:
+        session.info.pop(_PENDING_TRANSACTIONS, None)
+
+    # ── Stats ─────────────────────────────────────────────────────────────
+
+    def get_stats(self) -> dict:
+        return {
+            "watched_fields": len(self._by_field),
+            "indexed_triggers": len(self._field_of),
+            "events": self._events,
+            "coalesced": self._coalesced,
+            "ignored": self._ignored,
+            "pending": len(self._pending),
+            "cycles": self._cycles,
+            "evaluated": self._evaluated,
+            "provider_calls": self._manager.evaluator.provider_calls,
+            "running": bool(self._task and not self._task.done()),
+        }
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # TRIGGER TEMPLATES
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -806,6 +1134,7 @@ class TriggerManager:
         self.router = NotificationRouter()
         self.chains = TriggerChain()
         self.templates = TriggerTemplates()
+        self.engine = TriggerEngine(self, config.triggers.coalesce_ms)
 
     # ── CRUD ──────────────────────────────────────────────────────────────
 
@@ -857,6 +1186,7 @@ class TriggerManager:
             trigger.expires_at = datetime.utcnow() + timedelta(hours=expires_hours)
 
         self._triggers[trigger.id] = trigger
+        self.engine.watch(trigger)
         return trigger
 
     def create_from_template(
@@ -884,6 +1214,7 @@ class TriggerManager:
         trigger = factory(**kwargs)
         trigger.owner_id = owner_id
         self._triggers[trigger.id] = trigger
+        self.engine.watch(trigger)
         return trigger
 
     def get_trigger(self, trigger_id: str) -> Trigger | None:
@@ -927,6 +1258,7 @@ class TriggerManager:
         """Удалить триггер."""
         if trigger_id in self._triggers:
             del self._triggers[trigger_id]
+            self.engine.unwatch(trigger_id)
             return True
         return False
 
@@ -960,6 +1292,7 @@ class TriggerManager:
         self,
         trigger_id: str,
         context: dict | None = None,
+        values: dict | None = None,
     ) -> Alert | None:
         """Проверить конкретный триггер."""
         trigger = self._triggers.get(trigger_id)
@@ -967,7 +1300,7 @@ class TriggerManager:
             return None
 
         fired, current_value = self.evaluator.evaluate_trigger(
-            trigger, context
+            trigger, context, values
         )
 
         if fired:
@@ -986,20 +1319,45 @@ class TriggerManager:
         self,
         context: dict | None = None,
     ) -> list[Alert]:
-        """Проверить все активные триггеры."""
+        """
+        Проверить все активные триггеры (полный опрос).
+        Для реакции на изменения данных — engine.notify + engine.process.
+        """
+        alerts, _ = self._evaluate(self.get_active_triggers(), context)
+        return alerts
+
+    def _evaluate(
+        self,
+        triggers: list[Trigger],
+        context: dict | None = None,
+    ) -> tuple[list[Alert], int]:
+        """
+        Цикл проверки: каждый триггер (и цель цепочки) — не больше
+        одного раза, провайдер каждого поля — один раз на цикл.
+        Returns: (алерты, сколько триггеров проверено)
+        """
         alerts = []
-        for trigger in self.get_active_triggers():
-            alert = self.check_trigger(trigger.id, context)
+        values: dict[str, Any] = {}
+        checked: set[str] = set()
+        for trigger in triggers:
+            if trigger.id in checked:
+                continue
+            checked.add(trigger.id)
+            alert = self.check_trigger(trigger.id, context, values)
             if alert:
                 alerts.append(alert)
                 # Проверяем цепочки
                 chain_targets = self.chains.get_chain_targets(trigger.id)
                 for target_id in chain_targets:
-                    chain_alert = self.check_trigger(target_id, context)
+                    if target_id in checked:
+                        continue
+                    checked.add(target_id)
+                    chain_alert = self.check_trigger(
+                        target_id, context, values)
                     if chain_alert:
                         alerts.append(chain_alert)
 
-        return alerts
+        return alerts, len(checked)
 
     async def check_and_notify(
         self,
@@ -1023,6 +1381,7 @@ class TriggerManager:
         ]
         for tid in expired:
             del self._triggers[tid]
+            self.engine.unwatch(tid)
         return len(expired)
 
     # ── Stats ─────────────────────────────────────────────────────────────
@@ -1048,6 +1407,7 @@ class TriggerManager:
             "total_fires": total_fires,
             "alerts": self.history.get_stats(),
             "chains": len(self.chains.get_all_chains()),
+            "engine": self.engine.get_stats(),
         }
 
     def format_triggers_list(self) -> str:
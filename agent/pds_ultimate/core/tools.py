@@ -14,16 +14,20 @@ Phidata (tools + memory + knowledge), KodeAgent (ReAct/CodeAct).
 - description: описание для LLM (что делает, когда использовать)
 - parameters: JSON Schema параметров
 - execute(): асинхронная функция выполнения
+  (синхронный handler выполняется в потоке DBExecutor, не на event loop)
 """
 
 from __future__ import annotations
 
+import functools
+import inspect
 import json
 import traceback
 from dataclasses import dataclass, field
 from typing import Any, Callable, Coroutine, Optional
 
 from pds_ultimate.config import logger
+from pds_ultimate.core.cache_store import register_type
 
 # ─── Tool Definition ─────────────────────────────────────────────────────────
 
@@ -100,6 +104,7 @@ class Tool:
 
 # ─── Tool Result ─────────────────────────────────────────────────────────────
 
+@register_type
 @dataclass
 class ToolResult:
     """Результат выполнения инструмента."""
@@ -129,6 +134,10 @@ class ToolRegistry:
     def __init__(self):
         self._tools: dict[str, Tool] = {}
         self._categories: dict[str, list[str]] = {}
+        # Версия реестра: растёт при каждом register/unregister.
+        # По ней кэшируется описание tools для system prompt.
+        self._version = 0
+        self._prompt_cache: tuple[int, str] | None = None
 
     def register(self, tool: Tool) -> None:
         """Зарегистрировать инструмент."""
@@ -143,6 +152,7 @@ class ToolRegistry:
         if tool.name not in self._categories[tool.category]:
             self._categories[tool.category].append(tool.name)
 
+        self._version += 1
         logger.debug(f"Tool зарегистрирован: {tool.name} [{tool.category}]")
 
     def unregister(self, name: str) -> None:
@@ -153,6 +163,7 @@ class ToolRegistry:
                 self._categories[tool.category] = [
                     n for n in self._categories[tool.category] if n != name
                 ]
+            self._version += 1
 
     def get(self, name: str) -> Tool | None:
         """Получить инструмент по имени."""
@@ -181,6 +192,11 @@ class ToolRegistry:
         """Количество зарегистрированных инструментов."""
         return len(self._tools)
 
+    @property
+    def version(self) -> int:
+        """Версия реестра (меняется при register/unregister)."""
+        return self._version
+
     async def execute(self, name: str, params: dict | None = None, db_session=None) -> ToolResult:
         """
         Выполнить инструмент.
@@ -217,7 +233,17 @@ class ToolRegistry:
             if tool.needs_db and db_session:
                 params["db_session"] = db_session
 
-            result = await tool.handler(**params)
+            if inspect.iscoroutinefunction(tool.handler):
+                result = await tool.handler(**params)
+            else:
+                # Синхронный handler (обычно — запросы к БД) — в пул потоков
+                from pds_ultimate.core.db_executor import db_executor
+                result = await db_executor.run(
+                    functools.partial(tool.handler, **params),
+                    name=f"tool:{name}", bind=params.get("db_session"),
+                )
+                if inspect.isawaitable(result):
+                    result = await result
 
             # Нормализуем результат
             if isinstance(result, ToolResult):
@@ -262,7 +288,11 @@ class ToolRegistry:
 
         Формат: каждый tool с описанием и параметрами.
         Используется в ReAct loop для LLM.
+        Результат кэшируется до следующего изменения реестра.
         """
+        if self._prompt_cache and self._prompt_cache[0] == self._version:
+            return self._prompt_cache[1]
+
         lines = []
         for category in sorted(self._categories.keys()):
             tool_names = self._categories[category]
@@ -285,7 +315,9 @@ class ToolRegistry:
                 lines.append(
                     f"- **{tool.name}**: {tool.description}{params_desc}")
 
-        return "\n".join(lines)
+        prompt = "\n".join(lines)
+        self._prompt_cache = (self._version, prompt)
+        return prompt
 
     def get_tools_json_schema(self) -> list[dict]:
         """Получить JSON Schema всех видимых инструментов."""
@@ -64,6 +64,7 @@ async def main():
     from pds_ultimate.core.business_tools import register_all_tools
     from pds_ultimate.core.cognitive_engine import cognitive_engine
     from pds_ultimate.core.memory import memory_manager
+    from pds_ultimate.core.research_fetcher import research_fetcher
 
     # Регистрируем бизнес-инструменты
     tools_count = register_all_tools()
@@ -94,15 +95,29 @@ async def main():
     logger.info("  💖 Emotional Intelligence Engine: готов")
     logger.info(
         f"  ⚡ Performance Engine: cache_max={performance_engine.cache._max_size}, "
-        f"dedup={performance_engine.dedup is not None}"
+        f"shards={performance_engine.cache.get_stats()['shards']}, "
+        f"dedup={performance_engine.dedup is not None}, "
+        f"l2={performance_engine.l2.path if performance_engine.l2 else 'off'}"
+    )
+    await performance_engine.start()
+
+    from pds_ultimate.core.db_executor import db_executor
+
+    logger.info(
+        f"  🗄 DB Executor: workers={config.database.workers}, "
+        f"max_queue={config.database.max_queue}"
     )
     logger.info(
         f"  🔀 Parallel Engine: "
         f"max_concurrent={parallel_engine.concurrency._max_concurrent}"
     )
+    semantic_dir = config.semantic.snapshot_dir
+    if config.semantic.persist and semantic_engine.load(semantic_dir / "engine"):
+        logger.info("  🔍 Semantic Engine: индекс загружен из снапшота")
     logger.info(
         f"  🔍 Semantic Engine: "
-        f"index_size={len(semantic_engine.index._vectors)}"
+        f"backend={semantic_engine.backend}, "
+        f"index_size={semantic_engine.index.size}"
     )
 
     # Загружаем долгосрочную память из БД (оба менеджера)
@@ -172,6 +187,10 @@ async def main():
         f"  🔔 Smart Triggers: {trig_stats['total']} триггеров, "
         f"{trig_stats['active']} активных"
     )
+    if config.triggers.event_sources:
+        # Курсы и транзакции → проверка только затронутых триггеров
+        trigger_manager.engine.attach_sources(session_factory)
+        await trigger_manager.engine.start()
     ad_stats = analytics_dashboard.get_stats()
     logger.info(
         f"  📊 Analytics Dashboard: "
@@ -203,6 +222,8 @@ async def main():
     from pds_ultimate.core.task_prioritizer import task_prioritizer
     from pds_ultimate.core.time_relevance import time_relevance
 
+    if config.semantic.persist:
+        semantic_search_v2.load(semantic_dir)
     ss_stats = semantic_search_v2.get_stats()
     logger.info(
         f"  🔍 Semantic Search V2: "
@@ -329,6 +350,22 @@ async def main():
     profit_calc = ProfitCalculator(session_factory)
     sync_engine = SyncEngine(session_factory)
 
+    # Снапшот курсов: последние курсы из БД одним запросом
+    from pds_ultimate.modules.finance.rate_snapshot import rate_book
+
+    try:
+        await db_executor.run_session(
+            session_factory, rate_book.load_from_db,
+            name="rates.load_snapshot",
+        )
+    except Exception as e:
+        logger.warning(f"  ⚠️ Снапшот курсов из БД не загружен: {e}")
+    logger.info(
+        f"  💱 Rate Snapshot: v{rate_book.current.version}, "
+        f"{len(rate_book.current.rates)} валют, "
+        f"refresh={config.currency.refresh_minutes}мин"
+    )
+
     # Executive
     from pds_ultimate.modules.executive.backup_security import (
         BackupManager,
@@ -352,6 +389,24 @@ async def main():
     # Part 7: Business Integrations
 
     logger.info("  📄 File Engines: Excel, PDF, OCR, Converter — готовы")
+
+    # OCR: воркеры и модель грузятся в фоне, бот стартует не дожидаясь
+    from pds_ultimate.modules.files.ocr_service import ocr_service
+
+    ocr_warmup = None
+    if config.ocr.warmup:
+        ocr_warmup = asyncio.create_task(ocr_service.start())
+    logger.info(
+        f"  🧾 OCR Service: workers={config.ocr.workers}, "
+        f"max_queue={config.ocr.max_queue}, warmup={config.ocr.warmup}"
+    )
+    from pds_ultimate.modules.files.converter import file_converter
+
+    logger.info(
+        f"  🔁 Converter: workers={config.converter.workers}, "
+        f"max_queue={config.converter.max_queue}, "
+        f"cache={config.converter.cache_enabled}"
+    )
     logger.info("  🧾 Executive: Receipt Scanner, Translator, Archivist — готовы")
     logger.info("  💱 Integrations: Exchange Rates, Google Calendar — готовы")
 
@@ -410,7 +465,22 @@ async def main():
         except Exception as e:
             logger.warning(f"  ⚠ Ошибка сохранения памяти: {e}")
 
+        # Снапшоты семантических индексов (warm start при следующем запуске)
+        if config.semantic.persist:
+            try:
+                semantic_engine.save(semantic_dir / "engine")
+                semantic_search_v2.save(semantic_dir)
+                logger.info("  💾 Семантические индексы сохранены")
+            except Exception as e:
+                logger.warning(f"  ⚠ Ошибка сохранения индексов: {e}")
+
+        await performance_engine.stop()
         await scheduler.stop()
+        db_executor.shutdown(wait=False)
+        if ocr_warmup is not None and not ocr_warmup.done():
+            ocr_warmup.cancel()
+        ocr_service.shutdown(wait=False)
+        file_converter.shutdown(wait=False)
         await telethon_client.stop()
         await wa_client.stop()
         await gmail_client.stop()
@@ -418,6 +488,9 @@ async def main():
             await browser_engine.stop()
         except Exception:
             pass
+        await research_fetcher.close()
+        await trigger_manager.engine.stop()
+        await plugin_manager.close()
         await llm_engine.stop()
         logger.info("PDS-ULTIMATE остановлен. До встречи!")
 
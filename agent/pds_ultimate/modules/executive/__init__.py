@@ -5,6 +5,7 @@ Executive Module
 - SecurityManager: Кодовое слово, экстренное удаление
 - ReceiptScanner: Сканирование чеков и учёт расходов
 - TranslatorService: Многоязычный перевод с бизнес-глоссарием
+- TranslationMemory: Постоянная память переводов (SQLite)
 - ArchivistService: Автоименование, организация, поиск файлов
 """
 
@@ -18,6 +19,9 @@ from pds_ultimate.modules.executive.receipt_scanner import (
     ReceiptScanner,
     receipt_scanner,
 )
+from pds_ultimate.modules.executive.translation_memory import (
+    TranslationMemory,
+)
 from pds_ultimate.modules.executive.translator import (
     TranslatorService,
     translator,
@@ -31,6 +35,7 @@ __all__ = [
     "receipt_scanner",
     "TranslatorService",
     "translator",
+    "TranslationMemory",
     "ArchivistService",
     "archivist",
 ]
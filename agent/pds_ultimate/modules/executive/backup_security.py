@@ -18,6 +18,7 @@ from datetime import datetime
 from pathlib import Path
 
 from pds_ultimate.config import (
+    ALL_ORDERS_ARCHIVE_LOG_PATH,
     ALL_ORDERS_ARCHIVE_PATH,
     BACKUPS_DIR,
     DATA_DIR,
@@ -62,7 +63,17 @@ class BackupManager:
                     (str(MASTER_FINANCE_PATH), "finance/Master_Finance.xlsx")
                 )
 
-            # Archive
+            # Archive (журнал — источник, XLSX — актуальная выгрузка)
+            from pds_ultimate.modules.logistics.archive_sink import archive_sink
+            try:
+                archive_sink.ensure_xlsx()
+            except Exception as e:
+                logger.warning(f"Archive XLSX export failed: {e}")
+            if ALL_ORDERS_ARCHIVE_LOG_PATH.exists():
+                files_to_backup.append(
+                    (str(ALL_ORDERS_ARCHIVE_LOG_PATH),
+                     "finance/All_Orders_Archive.jsonl")
+                )
             if ALL_ORDERS_ARCHIVE_PATH.exists():
                 files_to_backup.append(
                     (str(ALL_ORDERS_ARCHIVE_PATH),
@@ -163,6 +174,21 @@ class BackupManager:
             if archive_backup.exists():
                 shutil.copy2(str(archive_backup), str(ALL_ORDERS_ARCHIVE_PATH))
 
+            # Журнал архива: из бэкапа, а в старых бэкапах его нет —
+            # тогда журнал пересоздаётся из восстановленного XLSX
+            archive_log_backup = (
+                restore_dir / "finance" / "All_Orders_Archive.jsonl"
+            )
+            if archive_log_backup.exists():
+                shutil.copy2(
+                    str(archive_log_backup), str(ALL_ORDERS_ARCHIVE_LOG_PATH)
+                )
+            elif archive_backup.exists() and ALL_ORDERS_ARCHIVE_LOG_PATH.exists():
+                os.remove(str(ALL_ORDERS_ARCHIVE_LOG_PATH))
+
+            from pds_ultimate.modules.logistics.archive_sink import archive_sink
+            archive_sink.forget_state()
+
             # Очистка
             shutil.rmtree(str(restore_dir), ignore_errors=True)
 
@@ -257,12 +283,14 @@ class SecurityManager:
         from pds_ultimate.core.database import (
             ArchivedOrderItem,
             FinanceSummary,
+            LedgerBalance,
             Transaction,
         )
 
         with self._session_factory() as session:
             deleted_transactions = session.query(Transaction).delete()
             deleted_summaries = session.query(FinanceSummary).delete()
+            session.query(LedgerBalance).delete()
             deleted_archive = session.query(ArchivedOrderItem).delete()
             session.commit()
 
@@ -277,6 +305,13 @@ class SecurityManager:
             os.remove(str(ALL_ORDERS_ARCHIVE_PATH))
             deleted_files.append("All_Orders_Archive.xlsx")
 
+        if ALL_ORDERS_ARCHIVE_LOG_PATH.exists():
+            os.remove(str(ALL_ORDERS_ARCHIVE_LOG_PATH))
+            deleted_files.append("All_Orders_Archive.jsonl")
+
+        from pds_ultimate.modules.logistics.archive_sink import archive_sink
+        archive_sink.forget_state()
+
         logger.warning(
             f"SECURITY: Wiped {deleted_transactions} transactions, "
             f"{deleted_summaries} summaries, "
@@ -170,28 +170,13 @@ class MorningBrief:
 
     async def _finance_section(self) -> str:
         """Секция: финансовый баланс."""
-        from sqlalchemy import func
-
-        from pds_ultimate.core.database import Transaction, TransactionType
+        from pds_ultimate.core.aggregates import ledger_totals
 
         with self._session_factory() as session:
-            def _sum_type(tx_type: TransactionType) -> float:
-                result = (
-                    session.query(func.sum(Transaction.amount_usd))
-                    .filter(Transaction.transaction_type == tx_type)
-                    .scalar()
-                )
-                return result or 0.0
-
-            total_income = _sum_type(TransactionType.INCOME)
-            total_goods = _sum_type(TransactionType.EXPENSE_GOODS)
-            total_delivery = _sum_type(TransactionType.EXPENSE_DELIVERY)
-            total_personal = _sum_type(TransactionType.EXPENSE_PERSONAL)
-            total_savings = _sum_type(TransactionType.PROFIT_SAVINGS)
-            total_expenses_alloc = _sum_type(TransactionType.PROFIT_EXPENSES)
-
-            net_profit = total_income - total_goods - total_delivery
-            available = total_expenses_alloc - total_personal
+            totals = ledger_totals(session)
+            net_profit = totals.net_profit
+            available = totals.available
+            total_savings = totals.to_savings
 
             return (
                 f"💰 Баланс: ${available:,.0f} | "
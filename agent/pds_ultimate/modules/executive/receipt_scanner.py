@@ -205,8 +205,67 @@ class ReceiptScanner:
         """
         from pds_ultimate.modules.files.ocr_engine import ocr_engine
 
-        # 1. OCR
+        # 1. OCR (пул процессов ocr_service, event loop не блокируется)
         ocr_result = await ocr_engine.recognize(image_path)
+        return self._build_receipt(
+            ocr_result, image_path, category_hint, currency_hint,
+        )
+
+    async def scan_receipt_bytes(
+        self,
+        image_bytes: bytes,
+        filename: str = "receipt.jpg",
+        category_hint: Optional[str] = None,
+        currency_hint: Optional[str] = None,
+    ) -> ScannedReceipt:
+        """Сканировать чек из байтов (без временного файла)."""
+        from pds_ultimate.modules.files.ocr_engine import ocr_engine
+
+        ocr_result = await ocr_engine.recognize_bytes(image_bytes, filename)
+        return self._build_receipt(
+            ocr_result, filename, category_hint, currency_hint,
+        )
+
+    async def scan_receipt_pages(
+        self,
+        pages: list[str | bytes],
+        category_hint: Optional[str] = None,
+        currency_hint: Optional[str] = None,
+    ) -> ScannedReceipt:
+        """
+        Сканировать многостраничный чек/накладную: страницы распознаются
+        параллельно (recognize_batch), текст склеивается по порядку.
+        """
+        from pds_ultimate.modules.files.ocr_engine import OCRResult, ocr_engine
+
+        results = await ocr_engine.recognize_batch(pages)
+        ok = [r for r in results if r.success]
+        if ok:
+            merged = OCRResult(
+                blocks=[b for r in ok for b in r.blocks],
+                full_text="\n".join(r.full_text for r in ok),
+                language=ok[0].language,
+                engine_used=ok[0].engine_used,
+                processing_time_ms=sum(r.processing_time_ms for r in results),
+            )
+        else:
+            errors = "; ".join(r.error for r in results if r.error)
+            merged = OCRResult(error=errors or "Нет текста на страницах")
+
+        label = next((p for p in pages if isinstance(p, str)), "pages")
+        return self._build_receipt(
+            merged, label, category_hint, currency_hint,
+        )
+
+    def _build_receipt(
+        self,
+        ocr_result,
+        image_path: str,
+        category_hint: Optional[str],
+        currency_hint: Optional[str],
+    ) -> ScannedReceipt:
+        """OCR-результат → ScannedReceipt (сумма, категория, продавец)."""
+        from pds_ultimate.modules.files.ocr_engine import ocr_engine
 
         if not ocr_result.success:
             logger.warning(
@@ -249,32 +308,6 @@ class ReceiptScanner:
             image_path=image_path,
         )
 
-    async def scan_receipt_bytes(
-        self,
-        image_bytes: bytes,
-        filename: str = "receipt.jpg",
-        category_hint: Optional[str] = None,
-        currency_hint: Optional[str] = None,
-    ) -> ScannedReceipt:
-        """Сканировать чек из байтов."""
-        import tempfile
-        from pathlib import Path
-
-        with tempfile.NamedTemporaryFile(
-            suffix=Path(filename).suffix or ".jpg",
-            delete=False,
-        ) as tmp:
-            tmp.write(image_bytes)
-            tmp_path = tmp.name
-
-        try:
-            return await self.scan_receipt(
-                tmp_path, category_hint, currency_hint
-            )
-        finally:
-            from pathlib import Path as P
-            P(tmp_path).unlink(missing_ok=True)
-
     # ═══════════════════════════════════════════════════════════════════════
     # Category Detection
     # ═══════════════════════════════════════════════════════════════════════
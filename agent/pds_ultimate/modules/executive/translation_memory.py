@@ -0,0 +1,385 @@
+"""
+PDS-Ultimate Translation Memory
+==================================
+Постоянная память переводов — файл SQLite.
+
+Большая часть трафика — однотипные сообщения поставщиков
+(«Отгрузили 120 коробок, трек 8812…»), отличающиеся цифрами.
+TranslationCache (LRU в памяти) теряется при перезапуске и знает
+только точный текст. Здесь:
+- Ключ — нормализованный текст (NFKC, casefold, пробелы) + пара языков
+- Шаблон — тот же текст с числами, заменёнными на «#»: совпал шаблон —
+  в сохранённый перевод подставляются новые числа
+- Fuzzy — почти совпавший шаблон (difflib ratio >= fuzzy_threshold)
+  среди записей близкой длины. Это только подсказка для LLM: «не
+  получена» и «получена» отличаются на пару символов, поэтому чужой
+  перевод как ответ не возвращается (MemoryMatch.reusable == False)
+- journal_mode=WAL + busy_timeout, как L2-кэш (core/cache_store.py)
+
+Только stdlib (sqlite3, difflib, unicodedata).
+
+Использование:
+    tm = TranslationMemory(DATA_DIR / "translation_memory.sqlite")
+    tm.put("Отгрузили 120 коробок", "ru", "en", "Shipped 120 boxes")
+    match = tm.lookup("Отгрузили 95 коробок", "ru", "en")
+    match.translated  # "Shipped 95 boxes", match.kind == "template"
+    match.reusable    # True — готовый перевод (exact/template)
+"""
+
+from __future__ import annotations
+
+import difflib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from pds_ultimate.config import logger
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_SPACE_RE = re.compile(r"\s+")
+
+_FUZZY_LENGTH_SLACK = 0.15   # Кандидаты fuzzy: длина шаблона ±15%
+_FUZZY_CANDIDATES = 200      # Максимум кандидатов на один поиск
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tm (
+    source_lang  TEXT NOT NULL,
+    target_lang  TEXT NOT NULL,
+    norm         TEXT NOT NULL,
+    template     TEXT NOT NULL,
+    length       INTEGER NOT NULL,
+    original     TEXT NOT NULL,
+    translated   TEXT NOT NULL,
+    uses         INTEGER NOT NULL DEFAULT 0,
+    created_at   REAL NOT NULL,
+    used_at      REAL NOT NULL,
+    PRIMARY KEY (source_lang, target_lang, norm)
+);
+CREATE INDEX IF NOT EXISTS idx_tm_template
+    ON tm(source_lang, target_lang, template);
+CREATE INDEX IF NOT EXISTS idx_tm_length
+    ON tm(source_lang, target_lang, length);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Ключ памяти: NFKC, casefold, схлопнутые пробелы."""
+    text = unicodedata.normalize("NFKC", text)
+    return _SPACE_RE.sub(" ", text.casefold()).strip()
+
+
+def text_template(norm: str) -> str:
+    """Шаблон: числа → «#»."""
+    return _NUMBER_RE.sub("#", norm)
+
+
+def substitute_numbers(
+    translated: str,
+    old_numbers: list[str],
+    new_numbers: list[str],
+) -> Optional[str]:
+    """
+    Заменить числа старого оригинала в переводе на новые.
+    None — число из оригинала не найдено в переводе (подстановка
+    ненадёжна, нужен LLM).
+    """
+    if len(old_numbers) != len(new_numbers):
+        return None
+    if old_numbers == new_numbers:
+        return translated
+
+    found = _NUMBER_RE.findall(translated)
+    remaining = list(found)
+    for num in old_numbers:
+        if num not in remaining:
+            return None
+        remaining.remove(num)
+
+    # Числа подставляются по порядку появления в оригинале:
+    # k-е вхождение old[i] в переводе ↔ new[i]
+    mapping: dict[str, list[str]] = {}
+    for old, new in zip(old_numbers, new_numbers):
+        mapping.setdefault(old, []).append(new)
+
+    def _replace(m: re.Match) -> str:
+        queue = mapping.get(m.group(0))
+        return queue.pop(0) if queue else m.group(0)
+
+    return _NUMBER_RE.sub(_replace, translated)
+
+
+@dataclass
+class MemoryMatch:
+    """Найденный в памяти перевод."""
+    translated: str
+    kind: str            # exact | template | fuzzy
+    score: float         # 1.0 — точное совпадение
+    original: str = ""   # Оригинал сохранённой записи
+
+    @property
+    def reusable(self) -> bool:
+        """Перевод можно отдать как есть (fuzzy — только подсказка LLM)."""
+        return self.kind != "fuzzy"
+
+
+class TranslationMemory:
+    """
+    Память переводов в SQLite-файле.
+
+    Соединение открывается лениво при первом обращении.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        fuzzy_threshold: float = 0.92,
+    ):
+        self._path = Path(path)
+        self._fuzzy_threshold = fuzzy_threshold
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._hits = {"exact": 0, "template": 0, "fuzzy": 0}
+        self._misses = 0
+        self._writes = 0
+        self._errors = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    # ─── Connection ──────────────────────────────────────────────────────
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self._path), timeout=5.0, check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ─── Core API ────────────────────────────────────────────────────────
+
+    def lookup(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+    ) -> Optional[MemoryMatch]:
+        """
+        Найти перевод: точный → по шаблону → fuzzy.
+        Fuzzy-совпадение — перевод ДРУГОГО сообщения (original), как есть.
+        """
+        norm = normalize_text(text)
+        if not norm:
+            return None
+        template = text_template(norm)
+        numbers = _NUMBER_RE.findall(norm)
+
+        try:
+            with self._lock:
+                match = self._lookup_locked(
+                    norm, template, numbers, source_lang, target_lang,
+                )
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.debug(f"[TM] Ошибка чтения: {e}")
+            return None
+
+        if match is None:
+            self._misses += 1
+        else:
+            self._hits[match.kind] += 1
+        return match
+
+    def lookup_many(
+        self,
+        texts: list[str],
+        source_langs: list[str],
+        target_lang: str,
+    ) -> list[Optional[MemoryMatch]]:
+        """lookup для пакета (один вызов из потока на весь пакет)."""
+        return [
+            self.lookup(text, src, target_lang)
+            for text, src in zip(texts, source_langs)
+        ]
+
+    def put(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        translated: str,
+    ) -> bool:
+        """Сохранить перевод (повторная запись обновляет перевод)."""
+        return self.put_many([(text, source_lang, translated)], target_lang) > 0
+
+    def put_many(
+        self,
+        items: list[tuple[str, str, str]],
+        target_lang: str,
+    ) -> int:
+        """Сохранить пакет (text, source_lang, translated) одной транзакцией."""
+        now = time.time()
+        rows = []
+        for text, src, translated in items:
+            norm = normalize_text(text)
+            if not norm or not translated:
+                continue
+            template = text_template(norm)
+            rows.append((
+                src, target_lang, norm, template, len(template),
+                text, translated, now, now,
+            ))
+        if not rows:
+            return 0
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.executemany(
+                    "INSERT INTO tm (source_lang, target_lang, norm, template, "
+                    "length, original, translated, created_at, used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(source_lang, target_lang, norm) DO UPDATE SET "
+                    "translated = excluded.translated, "
+                    "original = excluded.original, used_at = excluded.used_at",
+                    rows,
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.debug(f"[TM] Ошибка записи: {e}")
+            return 0
+
+        self._writes += len(rows)
+        return len(rows)
+
+    def clear(self) -> None:
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("DELETE FROM tm")
+                conn.commit()
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.warning(f"[TM] Ошибка очистки: {e}")
+
+    # ─── Statistics ──────────────────────────────────────────────────────
+
+    def get_stats(self) -> dict:
+        entries = 0
+        try:
+            with self._lock:
+                entries = self._connect().execute(
+                    "SELECT COUNT(*) FROM tm").fetchone()[0]
+        except sqlite3.Error:
+            pass
+        hits = sum(self._hits.values())
+        total = hits + self._misses
+        return {
+            "path": str(self._path),
+            "entries": entries,
+            "hits": dict(self._hits),
+            "misses": self._misses,
+            "hit_rate": f"{hits / total:.1%}" if total else "0%",
+            "writes": self._writes,
+            "errors": self._errors,
+            "fuzzy_threshold": self._fuzzy_threshold,
+        }
+
+    # ─── Internal ────────────────────────────────────────────────────────
+
+    def _lookup_locked(
+        self,
+        norm: str,
+        template: str,
+        numbers: list[str],
+        source_lang: str,
+        target_lang: str,
+    ) -> Optional[MemoryMatch]:
+        conn = self._connect()
+
+        row = conn.execute(
+            "SELECT translated, original FROM tm "
+            "WHERE source_lang = ? AND target_lang = ? AND norm = ?",
+            (source_lang, target_lang, norm),
+        ).fetchone()
+        if row is not None:
+            self._touch(conn, source_lang, target_lang, norm)
+            return MemoryMatch(row[0], "exact", 1.0, row[1])
+
+        # Тот же шаблон, другие числа
+        if numbers:
+            for translated, original, stored_norm in conn.execute(
+                "SELECT translated, original, norm FROM tm "
+                "WHERE source_lang = ? AND target_lang = ? AND template = ? "
+                "ORDER BY used_at DESC LIMIT 5",
+                (source_lang, target_lang, template),
+            ):
+                result = substitute_numbers(
+                    translated, _NUMBER_RE.findall(stored_norm), numbers,
+                )
+                if result is not None:
+                    self._touch(conn, source_lang, target_lang, stored_norm)
+                    return MemoryMatch(result, "template", 1.0, original)
+
+        if self._fuzzy_threshold >= 1.0:
+            return None
+
+        # Почти совпавший шаблон среди записей близкой длины
+        slack = max(2, int(len(template) * _FUZZY_LENGTH_SLACK))
+        best: Optional[tuple[float, str, str, str]] = None
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        matcher.set_seq2(template)
+        for translated, original, stored_norm, stored_template in conn.execute(
+            "SELECT translated, original, norm, template FROM tm "
+            "WHERE source_lang = ? AND target_lang = ? "
+            "AND length BETWEEN ? AND ? ORDER BY used_at DESC LIMIT ?",
+            (source_lang, target_lang, len(template) - slack,
+             len(template) + slack, _FUZZY_CANDIDATES),
+        ):
+            matcher.set_seq1(stored_template)
+            if matcher.real_quick_ratio() < self._fuzzy_threshold:
+                continue
+            if matcher.quick_ratio() < self._fuzzy_threshold:
+                continue
+            score = matcher.ratio()
+            if score >= self._fuzzy_threshold and (
+                best is None or score > best[0]
+            ):
+                best = (score, translated, original, stored_norm)
+
+        if best is None:
+            return None
+        score, translated, original, stored_norm = best
+        self._touch(conn, source_lang, target_lang, stored_norm)
+        return MemoryMatch(translated, "fuzzy", score, original)
+
+    @staticmethod
+    def _touch(
+        conn: sqlite3.Connection,
+        source_lang: str,
+        target_lang: str,
+        norm: str,
+    ) -> None:
+        conn.execute(
+            "UPDATE tm SET uses = uses + 1, used_at = ? "
+            "WHERE source_lang = ? AND target_lang = ? AND norm = ?",
+            (time.time(), source_lang, target_lang, norm),
+        )
+        conn.commit()
@@ -11,6 +11,15 @@ PDS-Ultimate Translator (Language Bridge)
 - Кэширование переводов
 - Словарь бизнес-терминов (логистика, торговля)
 
+Пакетный перевод:
+- Повторы внутри пакета переводятся один раз
+- Промахи кэша и памяти переводов (translation_memory.py) режутся
+  на чанки по бюджету токенов (TRANSLATOR_BATCH_TOKENS) и числу
+  сообщений (TRANSLATOR_BATCH_ITEMS)
+- Чанки уходят в LLM параллельно, не больше TRANSLATOR_CONCURRENCY
+  запросов одновременно; пропущенные в ответе сообщения
+  переводятся по одному
+
 Поддерживаемые языки:
     ru (Русский), en (English), zh (中文),
     tk (Türkmen), tr (Türkçe), ar (العربية)
@@ -18,6 +27,7 @@ PDS-Ultimate Translator (Language Bridge)
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import re
 import time
@@ -25,7 +35,13 @@ from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Optional
 
-from pds_ultimate.config import logger
+from pds_ultimate.config import config, logger
+from pds_ultimate.modules.executive.translation_memory import (
+    MemoryMatch,
+    TranslationMemory,
+    normalize_text,
+)
+from pds_ultimate.utils.tokens import estimate_tokens
 
 # ─── Data Models ─────────────────────────────────────────────────────────────
 
@@ -76,7 +92,9 @@ class BatchTranslation:
     results: list[TranslationResult] = field(default_factory=list)
     total_time_ms: float = 0.0
     from_cache: int = 0
+    from_memory: int = 0
     from_api: int = 0
+    llm_calls: int = 0
 
     @property
     def success_count(self) -> int:
@@ -87,7 +105,9 @@ class BatchTranslation:
             "count": len(self.results),
             "success": self.success_count,
             "from_cache": self.from_cache,
+            "from_memory": self.from_memory,
             "from_api": self.from_api,
+            "llm_calls": self.llm_calls,
             "total_time_ms": round(self.total_time_ms, 1),
         }
 
@@ -225,6 +245,40 @@ BUSINESS_GLOSSARY: dict[str, dict[str, str]] = {
 }
 
 
+# ─── Batch Response Parsing ─────────────────────────────────────────────────
+
+_NUMBERED_RE = re.compile(r"^\s*(\d+)[.)]\s*(.*)$")
+
+
+def _hint_block(matches: list[MemoryMatch]) -> str:
+    """Fuzzy-совпадения памяти переводов — справка для LLM, не ответ."""
+    lines = [
+        "Похожие сообщения, переведённые раньше (только для терминологии "
+        "и стиля; смысл, отрицания и числа бери из исходного текста):"
+    ]
+    for m in matches:
+        lines.append(f"- {m.original} → {m.translated}")
+    return "\n".join(lines)
+
+
+def _parse_numbered(response: str, count: int) -> list[str]:
+    """
+    Нумерованный ответ LLM → переводы по номерам.
+    Строки без номера продолжают предыдущий пункт (многострочные
+    сообщения); пропущенные номера → "".
+    """
+    found: dict[int, list[str]] = {}
+    current: Optional[int] = None
+    for line in response.strip().split("\n"):
+        m = _NUMBERED_RE.match(line)
+        if m and 1 <= int(m.group(1)) <= count:
+            current = int(m.group(1))
+            found[current] = [m.group(2).strip()]
+        elif current is not None and line.strip():
+            found[current].append(line.strip())
+    return ["\n".join(found.get(i, [])).strip() for i in range(1, count + 1)]
+
+
 # ─── Translation Cache ──────────────────────────────────────────────────────
 
 class TranslationCache:
@@ -284,8 +338,9 @@ class TranslatorService:
     - LanguageDetector: offline определение языка
     - DeepSeek LLM: основной движок перевода
     - TranslationCache: LRU-кэш результатов
+    - TranslationMemory: постоянная память переводов (точный/шаблон/fuzzy)
     - Business Glossary: словарь торговых терминов
-    - Batch API: пакетный перевод
+    - Batch API: пакетный перевод чанками, параллельно
 
     Использование:
         result = await translator.translate("Привет", target_lang="en")
@@ -293,12 +348,26 @@ class TranslatorService:
         batch = await translator.translate_batch(messages, target_lang="ru")
     """
 
-    def __init__(self, cache_size: int = 1000):
+    def __init__(
+        self,
+        cache_size: int = 1000,
+        memory: Optional[TranslationMemory] = None,
+        token_budget: int = 1500,
+        max_items: int = 20,
+        concurrency: int = 4,
+    ):
         self._detector = LanguageDetector()
         self._cache = TranslationCache(max_size=cache_size)
+        self._memory = memory
         self._glossary = BUSINESS_GLOSSARY
         self._translation_count = 0
         self._total_chars = 0
+        self._token_budget = max(1, token_budget)
+        self._max_items = max(1, max_items)
+        self._concurrency = max(1, concurrency)
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+        self._llm_calls = 0
 
     # ═══════════════════════════════════════════════════════════════════════
     # Public API
@@ -361,10 +430,32 @@ class TranslatorService:
             ) * 1000
             return cached
 
-        # Перевод через LLM
-        translated = await self._translate_llm(
-            text, source_lang, target_lang
-        )
+        # Память переводов (переживает перезапуск, ловит почти-дубли)
+        hint: Optional[MemoryMatch] = None
+        if self._memory is not None:
+            match = await asyncio.to_thread(
+                self._memory.lookup, text, source_lang, target_lang,
+            )
+            if match is not None and match.reusable:
+                result = TranslationResult(
+                    original=text,
+                    translated=match.translated,
+                    source_lang=source_lang,
+                    target_lang=target_lang,
+                    detected_lang=detected,
+                    confidence=0.9 * match.score,
+                    cached=True,
+                    translation_time_ms=(time.monotonic() - start) * 1000,
+                )
+                self._cache.put(result)
+                return result
+            hint = match
+
+        # Перевод через LLM (fuzzy-совпадение из памяти — подсказка)
+        async with self._get_slots():
+            translated = await self._translate_llm(
+                text, source_lang, target_lang, hint=hint,
+            )
 
         elapsed = (time.monotonic() - start) * 1000
         self._translation_count += 1
@@ -383,6 +474,11 @@ class TranslatorService:
         # Кэшировать
         if translated:
             self._cache.put(result)
+            if self._memory is not None:
+                await asyncio.to_thread(
+                    self._memory.put,
+                    text, source_lang, target_lang, translated,
+                )
 
         return result
 
@@ -393,54 +489,90 @@ class TranslatorService:
         source_lang: Optional[str] = None,
     ) -> BatchTranslation:
         """
-        Пакетный перевод списка текстов.
-        Оптимизирует: кэш + объединение для одного LLM-запроса.
+        Пакетный перевод списка текстов (порядок результатов сохраняется).
+        Кэш → память переводов → LLM чанками по бюджету токенов,
+        чанки параллельно под общим лимитом запросов.
         """
         start = time.monotonic()
-        results = []
-        from_cache = 0
-        from_api = 0
-        to_translate = []
+        batch = BatchTranslation()
+        results: list[Optional[TranslationResult]] = [None] * len(texts)
+        langs: list[str] = []
+        misses: list[int] = []
+        hints: dict[str, MemoryMatch] = {}
 
-        # Проверяем кэш для каждого
-        for text in texts:
+        for i, text in enumerate(texts):
             src = source_lang
             if not src:
                 src, _ = self.detect_language(text)
+            langs.append(src)
+
+            if not text or not text.strip() or src == target_lang:
+                results[i] = TranslationResult(
+                    original=text, translated=text,
+                    source_lang=src, target_lang=target_lang,
+                    confidence=1.0,
+                )
+                continue
 
             cached = self._cache.get(text, src, target_lang)
             if cached:
-                results.append(cached)
-                from_cache += 1
+                results[i] = cached
+                batch.from_cache += 1
             else:
-                to_translate.append((text, src))
-                results.append(None)  # placeholder
-
-        # Переводим оставшиеся
-        if to_translate:
-            # Объединяем для одного LLM-запроса (если < 10)
-            if len(to_translate) <= 10:
-                translations = await self._translate_batch_llm(
-                    to_translate, target_lang
+                misses.append(i)
+
+        # Память переводов — одним вызовом в потоке на весь пакет
+        if misses and self._memory is not None:
+            matches = await asyncio.to_thread(
+                self._memory.lookup_many,
+                [texts[i] for i in misses],
+                [langs[i] for i in misses],
+                target_lang,
+            )
+            remaining = []
+            for i, match in zip(misses, matches):
+                if match is None or not match.reusable:
+                    if match is not None:
+                        hints[texts[i]] = match
+                    remaining.append(i)
+                    continue
+                result = TranslationResult(
+                    original=texts[i], translated=match.translated,
+                    source_lang=langs[i], target_lang=target_lang,
+                    confidence=0.9 * match.score, cached=True,
                 )
-            else:
-                # По одному для больших пакетов
-                translations = []
-                for text, src in to_translate:
-                    t = await self._translate_llm(text, src, target_lang)
-                    translations.append(t)
-
-            # Заполняем placeholders
-            t_idx = 0
-            for i, r in enumerate(results):
-                if r is None:
-                    text, src = to_translate[t_idx]
-                    translated = (
-                        translations[t_idx]
-                        if t_idx < len(translations) else ""
-                    )
+                self._cache.put(result)
+                results[i] = result
+                batch.from_memory += 1
+            misses = remaining
+
+        if misses:
+            # Повторы внутри пакета — один перевод на уникальный текст
+            unique: dict[tuple[str, str], list[int]] = {}
+            for i in misses:
+                key = (normalize_text(texts[i]), langs[i])
+                unique.setdefault(key, []).append(i)
+            items = [(texts[idx[0]], langs[idx[0]]) for idx in unique.values()]
+
+            calls_before = self._llm_calls
+            translated_chunks = await asyncio.gather(*(
+                self._translate_chunk(chunk, target_lang, hints)
+                for chunk in self._chunk(items)
+            ))
+            translations = [t for chunk in translated_chunks for t in chunk]
+            batch.llm_calls = self._llm_calls - calls_before
+
+            learned = []
+            for (text, src), indices, translated in zip(
+                items, unique.values(), translations,
+            ):
+                if translated:
+                    self._translation_count += 1
+                    self._total_chars += len(text)
+                    learned.append((text, src, translated))
+                for i in indices:
                     result = TranslationResult(
-                        original=text,
+                        original=texts[i],
                         translated=translated,
                         source_lang=src,
                         target_lang=target_lang,
@@ -449,17 +581,16 @@ class TranslatorService:
                     if translated:
                         self._cache.put(result)
                     results[i] = result
-                    from_api += 1
-                    t_idx += 1
+                    batch.from_api += 1
 
-        elapsed = (time.monotonic() - start) * 1000
+            if learned and self._memory is not None:
+                await asyncio.to_thread(
+                    self._memory.put_many, learned, target_lang,
+                )
 
-        return BatchTranslation(
-            results=results,
-            total_time_ms=elapsed,
-            from_cache=from_cache,
-            from_api=from_api,
-        )
+        batch.results = results
+        batch.total_time_ms = (time.monotonic() - start) * 1000
+        return batch
 
     def lookup_glossary(
         self,
@@ -499,11 +630,95 @@ class TranslatorService:
         return {
             "translations_total": self._translation_count,
             "total_chars": self._total_chars,
+            "llm_calls": self._llm_calls,
             "cache": self._cache.stats,
+            "memory": (
+                self._memory.get_stats() if self._memory is not None
+                else None
+            ),
             "supported_languages": list(LANGUAGE_NAMES.keys()),
             "glossary_size": len(self._glossary),
         }
 
+    # ═══════════════════════════════════════════════════════════════════════
+    # Internal: Batch Pipeline
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _chunk(
+        self,
+        items: list[tuple[str, str]],
+    ) -> list[list[tuple[str, str]]]:
+        """Разбить (text, src) на чанки по бюджету токенов и числу сообщений."""
+        chunks: list[list[tuple[str, str]]] = []
+        current: list[tuple[str, str]] = []
+        used = 0
+        for item in items:
+            # +8 — номер и метка языка в нумерованном списке
+            cost = estimate_tokens(item[0]) + 8
+            if current and (
+                used + cost > self._token_budget
+                or len(current) >= self._max_items
+            ):
+                chunks.append(current)
+                current, used = [], 0
+            current.append(item)
+            used += cost
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _translate_chunk(
+        self,
+        chunk: list[tuple[str, str]],
+        target_lang: str,
+        hints: Optional[dict[str, MemoryMatch]] = None,
+    ) -> list[str]:
+        """
+        Перевести чанк одним LLM-запросом.
+        Сообщения, пропущенные в ответе, переводятся по одному.
+        hints — fuzzy-совпадения из памяти по тексту сообщения.
+        """
+        hints = hints or {}
+        async with self._get_slots():
+            if len(chunk) == 1:
+                text, src = chunk[0]
+                return [await self._translate_llm(
+                    text, src, target_lang, hint=hints.get(text))]
+            translations = await self._translate_batch_llm(
+                chunk, target_lang,
+                hints={t: hints[t] for t, _ in chunk if t in hints},
+            )
+
+        missing = [i for i, t in enumerate(translations) if not t]
+        if missing:
+            retried = await asyncio.gather(*(
+                self._translate_single(
+                    *chunk[i], target_lang, hints.get(chunk[i][0]))
+                for i in missing
+            ))
+            for i, t in zip(missing, retried):
+                translations[i] = t
+        return translations
+
+    async def _translate_single(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        hint: Optional[MemoryMatch] = None,
+    ) -> str:
+        async with self._get_slots():
+            return await self._translate_llm(
+                text, source_lang, target_lang, hint=hint)
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Семафор привязывается к event loop — пересоздаём при смене loop
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self._concurrency)
+            self._slots_loop = loop
+        return self._slots
+
     # ═══════════════════════════════════════════════════════════════════════
     # Internal: LLM Translation
     # ═══════════════════════════════════════════════════════════════════════
@@ -513,8 +728,10 @@ class TranslatorService:
         text: str,
         source_lang: str,
         target_lang: str,
+        hint: Optional[MemoryMatch] = None,
     ) -> str:
-        """Перевод через DeepSeek LLM."""
+        """Перевод через DeepSeek LLM (hint — похожий перевод из памяти)."""
+        self._llm_calls += 1
         try:
             from pds_ultimate.core.llm_engine import llm_engine
 
@@ -526,6 +743,8 @@ class TranslatorService:
                 f"Верни ТОЛЬКО перевод, без объяснений и комментариев.\n\n"
                 f"Текст: {text}"
             )
+            if hint is not None:
+                prompt += "\n\n" + _hint_block([hint])
 
             result = await llm_engine.chat(
                 message=prompt,
@@ -543,8 +762,10 @@ class TranslatorService:
         self,
         texts_with_langs: list[tuple[str, str]],
         target_lang: str,
+        hints: Optional[dict[str, MemoryMatch]] = None,
     ) -> list[str]:
         """Пакетный перевод через один LLM-запрос."""
+        self._llm_calls += 1
         try:
             from pds_ultimate.core.llm_engine import llm_engine
 
@@ -560,6 +781,8 @@ class TranslatorService:
                 f"Верни ТОЛЬКО переводы, по одному на строку, "
                 f"с номерами:\n\n" + "\n".join(numbered)
             )
+            if hints:
+                prompt += "\n\n" + _hint_block(list(hints.values()))
 
             result = await llm_engine.chat(
                 message=prompt,
@@ -570,21 +793,7 @@ class TranslatorService:
             if not result:
                 return [""] * len(texts_with_langs)
 
-            # Парсим нумерованный список
-            lines = result.strip().split("\n")
-            translations = []
-
-            for line in lines:
-                # Remove leading number: "1. text" → "text"
-                cleaned = re.sub(r'^\d+[.)]\s*', '', line.strip())
-                if cleaned:
-                    translations.append(cleaned)
-
-            # Дополняем если не хватает
-            while len(translations) < len(texts_with_langs):
-                translations.append("")
-
-            return translations[:len(texts_with_langs)]
+            return _parse_numbered(result, len(texts_with_langs))
 
         except Exception as e:
             logger.warning(f"[Translator] Batch LLM failed: {e}")
@@ -593,4 +802,15 @@ class TranslatorService:
 
 # ─── Глобальный экземпляр ────────────────────────────────────────────────────
 
-translator = TranslatorService()
+translator = TranslatorService(
+    memory=(
+        TranslationMemory(
+            config.translator.memory_path,
+            fuzzy_threshold=config.translator.fuzzy_threshold,
+        )
+        if config.translator.memory_enabled else None
+    ),
+    token_budget=config.translator.batch_token_budget,
+    max_items=config.translator.batch_max_items,
+    concurrency=config.translator.concurrency,
+)
@@ -4,6 +4,7 @@ Files Module
 - ExcelEngine: Профессиональные Excel-отчёты (standalone)
 - PDFEngine: Генерация PDF-инвойсов (standalone)
 - OCREngine: Распознавание текста (EasyOCR + Tesseract)
+- OCRService: Пул процессов OCR с прогревом модели
 - FileConverter: Конвертация форматов (Word↔PDF, Excel↔CSV, etc.)
 """
 
@@ -11,6 +12,7 @@ from pds_ultimate.modules.files.converter import FileConverter, file_converter
 from pds_ultimate.modules.files.excel_engine import ExcelEngine, excel_engine
 from pds_ultimate.modules.files.file_manager import FileManager
 from pds_ultimate.modules.files.ocr_engine import OCREngine, ocr_engine
+from pds_ultimate.modules.files.ocr_service import OCRService, ocr_service
 from pds_ultimate.modules.files.pdf_engine import PDFEngine, pdf_engine
 
 __all__ = [
@@ -21,6 +23,8 @@ __all__ = [
     "pdf_engine",
     "OCREngine",
     "ocr_engine",
+    "OCRService",
+    "ocr_service",
     "FileConverter",
     "file_converter",
 ]
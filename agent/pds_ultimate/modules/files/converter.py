@@ -16,17 +16,36 @@ PDS-Ultimate File Converter (Standalone)
     pdf  → txt (extraction)
     txt  → pdf, docx
     json → csv, xlsx, txt
+
+Конвейер:
+- Конвертеры — синхронные функции модуля, выполняются в пуле процессов
+  (CONVERTER_WORKERS, spawn), event loop не занят openpyxl/reportlab
+- convert_batch — файлы параллельно по воркерам, очередь ограничена
+  (CONVERTER_MAX_QUEUE), порядок результатов сохраняется
+- CSV ↔ XLSX потоково: openpyxl read_only + xlsxwriter constant_memory,
+  книга целиком в память не загружается
+- Кэш по sha256 содержимого: неизменённый файл повторно не
+  конвертируется, если результат на месте и не тронут
+- Время каждого файла — ConversionResult.duration_ms, сводка — get_stats()
+- CONVERTER_WORKERS=0 — конвертация в потоке (asyncio.to_thread)
 """
 
 from __future__ import annotations
 
+import asyncio
 import csv
+import hashlib
 import json
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
-from pds_ultimate.config import USER_FILES_DIR
+from pds_ultimate.config import USER_FILES_DIR, config, logger
+from pds_ultimate.core.db_executor import QueryStats
 
 # ─── Conversion Matrix ──────────────────────────────────────────────────────
 
@@ -40,6 +59,8 @@ SUPPORTED_CONVERSIONS = {
     "md": ["pdf", "txt", "docx"],
 }
 
+_HASH_CHUNK = 1024 * 1024
+
 
 class ConversionResult:
     """Результат конвертации."""
@@ -52,6 +73,9 @@ class ConversionResult:
         source_format: str = "",
         target_format: str = "",
         error: Optional[str] = None,
+        duration_ms: float = 0.0,
+        cached: bool = False,
+        source_hash: str = "",
     ):
         self.success = success
         self.source_path = source_path
@@ -59,6 +83,9 @@ class ConversionResult:
         self.source_format = source_format
         self.target_format = target_format
         self.error = error
+        self.duration_ms = duration_ms
+        self.cached = cached
+        self.source_hash = source_hash
 
     def to_dict(self) -> dict:
         return {
@@ -68,21 +95,383 @@ class ConversionResult:
             "from": self.source_format,
             "to": self.target_format,
             "error": self.error,
+            "duration_ms": round(self.duration_ms, 2),
+            "cached": self.cached,
         }
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONVERTERS (синхронные, выполняются в воркере пула)
+# ═══════════════════════════════════════════════════════════════════════════════
+# Каждая функция пишет target и бросает исключение при ошибке.
+
+
+def _xlsx_to_csv(source: str, target: str) -> None:
+    """Excel → CSV, построчно (read_only)."""
+    import openpyxl
+
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        with open(target, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            for row in wb.active.iter_rows(values_only=True):
+                writer.writerow(
+                    [str(v) if v is not None else "" for v in row]
+                )
+    finally:
+        wb.close()
+
+
+def _csv_to_xlsx(source: str, target: str) -> None:
+    """CSV → Excel, построчно (constant_memory)."""
+    import xlsxwriter
+
+    from pds_ultimate.modules.files.excel_engine import ExcelEngine
+
+    wb = xlsxwriter.Workbook(target, {"constant_memory": True})
+    try:
+        header_fmt = wb.add_format(ExcelEngine.DEFAULT_HEADER_FORMAT)
+        cell_fmt = wb.add_format(ExcelEngine.DEFAULT_CELL_FORMAT)
+        ws = wb.add_worksheet(Path(source).stem[:31])
+
+        with open(source, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.reader(f)
+            headers = next(reader, [])
+            for col, h in enumerate(headers):
+                ws.write(0, col, str(h), header_fmt)
+            col_widths = [len(str(h)) + 2 for h in headers]
+
+            last_row = 0
+            for row_idx, row in enumerate(reader, 1):
+                last_row = row_idx
+                for col_idx, val in enumerate(row[:len(headers)]):
+                    # Форматы как в ExcelEngine.create: числа — числами
+                    try:
+                        num = float(val)
+                        ws.write_number(row_idx, col_idx, num, cell_fmt)
+                        val_len = len(f"{num:.2f}")
+                    except (ValueError, TypeError):
+                        ws.write(row_idx, col_idx, val, cell_fmt)
+                        val_len = len(val)
+                    col_widths[col_idx] = max(
+                        col_widths[col_idx], val_len + 2
+                    )
+
+        for col, width in enumerate(col_widths):
+            ws.set_column(col, col, min(width, 50))
+        if headers and last_row:
+            ws.autofilter(0, 0, last_row, len(headers) - 1)
+        if headers:
+            ws.freeze_panes(1, 0)
+    finally:
+        wb.close()
+
+
+def _xlsx_to_pdf(source: str, target: str) -> None:
+    """Excel → PDF (таблица)."""
+    import openpyxl
+
+    from pds_ultimate.modules.files.pdf_engine import render_pdf
+
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = list(next(rows, ()))
+        data = [list(r) for r in rows]
+    finally:
+        wb.close()
+
+    _check(render_pdf(target, {
+        "title": Path(source).stem,
+        "headers": headers,
+        "rows": data,
+    }))
+
+
+def _docx_paragraphs(source: str) -> str:
+    from docx import Document
+
+    doc = Document(source)
+    return "\n".join(p.text for p in doc.paragraphs if p.text.strip())
+
+
+def _docx_to_pdf(source: str, target: str) -> None:
+    """Word → PDF."""
+    from pds_ultimate.modules.files.pdf_engine import render_pdf
+
+    _check(render_pdf(target, {
+        "title": Path(source).stem,
+        "content": _docx_paragraphs(source),
+    }))
+
+
+def _docx_to_txt(source: str, target: str) -> None:
+    """Word → Text."""
+    text = _docx_paragraphs(source)
+    with open(target, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _pdf_to_txt(source: str, target: str) -> None:
+    """PDF → Text."""
+    from pds_ultimate.modules.files.pdf_engine import extract_pdf_text
+
+    data = _check(extract_pdf_text(source))
+    with open(target, "w", encoding="utf-8") as f:
+        f.write(data.get("content", ""))
+
+
+def _json_to_csv(source: str, target: str) -> None:
+    """JSON → CSV."""
+    with open(source, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if not (isinstance(data, list) and data):
+        raise ValueError("JSON не является массивом объектов")
+
+    if isinstance(data[0], dict):
+        headers = list(data[0].keys())
+        rows = (
+            [str(item.get(h, "")) for h in headers] for item in data
+        )
+    else:
+        headers = [f"col_{i}" for i in range(len(data[0]))]
+        rows = ([str(v) for v in row] for row in data)
+
+    with open(target, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(rows)
+
+
+def _txt_to_pdf(source: str, target: str) -> None:
+    """Text → PDF."""
+    from pds_ultimate.modules.files.pdf_engine import render_pdf
+
+    with open(source, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    _check(render_pdf(target, {
+        "title": Path(source).stem,
+        "content": content,
+    }))
+
+
+def _via_text(source: str, target: str, target_format: str) -> None:
+    """Fallback: конвертация через промежуточный текст."""
+    if target_format not in ("txt", "json"):
+        raise ValueError("Нет подходящего конвертера")
+
+    with open(source, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    with open(target, "w", encoding="utf-8") as f:
+        if target_format == "txt":
+            f.write(content)
+        else:
+            json.dump({"content": content}, f, ensure_ascii=False, indent=2)
+
+
+def _check(result: dict) -> dict:
+    """Ответ движка {"error": ...} → исключение."""
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result
+
+
+_CONVERTERS: dict[tuple[str, str], Callable[[str, str], None]] = {
+    ("xlsx", "csv"): _xlsx_to_csv,
+    ("csv", "xlsx"): _csv_to_xlsx,
+    ("xlsx", "pdf"): _xlsx_to_pdf,
+    ("docx", "pdf"): _docx_to_pdf,
+    ("docx", "txt"): _docx_to_txt,
+    ("pdf", "txt"): _pdf_to_txt,
+    ("json", "csv"): _json_to_csv,
+    ("txt", "pdf"): _txt_to_pdf,
+}
+
+
+def file_sha256(path: str) -> str:
+    """sha256 содержимого файла (читается блоками)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def convert_file(
+    source: str,
+    target: str,
+    source_format: str,
+    target_format: str,
+    previous_hash: Optional[str] = None,
+    hashing: bool = False,
+) -> ConversionResult:
+    """
+    Конвертировать один файл (синхронно — в воркере пула).
+
+    hashing=True — посчитать sha256 источника; совпал с previous_hash
+    и результат на месте — конвертация пропускается (cached=True).
+    """
+    started = time.perf_counter()
+    result = ConversionResult(
+        source_path=source, target_path=target,
+        source_format=source_format, target_format=target_format,
+    )
+    try:
+        if hashing:
+            result.source_hash = file_sha256(source)
+            if (result.source_hash == previous_hash
+                    and os.path.exists(target)):
+                result.cached = True
+                return result
+
+        converter = _CONVERTERS.get((source_format, target_format))
+        if converter is not None:
+            converter(source, target)
+        else:
+            _via_text(source, target, target_format)
+
+    except Exception as e:
+        result.success = False
+        result.error = str(e)
+    finally:
+        result.duration_ms = (time.perf_counter() - started) * 1000
+    return result
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CACHE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class _ConversionCache:
+    """
+    Манифест target → {source, sha256, размер/mtime результата}.
+    Запись действительна, пока результат не изменён после конвертации.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: Optional[dict[str, dict]] = None
+        self._dirty = False
+
+    def lookup(self, source: str, target: str) -> Optional[str]:
+        """sha256 источника прошлой конвертации (None — пересчитать)."""
+        entry = self._load().get(target)
+        if not entry or entry.get("source") != source:
+            return None
+        try:
+            st = os.stat(target)
+        except OSError:
+            return None
+        if (st.st_size, st.st_mtime_ns) != (
+            entry.get("target_size"), entry.get("target_mtime_ns"),
+        ):
+            return None
+        return entry.get("sha256")
+
+    def store(self, result: ConversionResult) -> None:
+        if not result.success or not result.source_hash:
+            return
+        try:
+            st = os.stat(result.target_path)
+        except OSError:
+            return
+        self._load()[result.target_path] = {
+            "source": result.source_path,
+            "sha256": result.source_hash,
+            "target_size": st.st_size,
+            "target_mtime_ns": st.st_mtime_ns,
+        }
+        self._dirty = True
+
+    def flush(self) -> None:
+        if not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(
+                json.dumps(self._entries, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"[Converter] Кэш не сохранён: {e}")
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is None:
+            try:
+                self._entries = json.loads(
+                    self.path.read_text(encoding="utf-8")
+                )
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+
+def _batch_stems(source_paths: list[str]) -> list[str]:
+    """
+    Имена результатов пакета без коллизий: файлы с одинаковым stem из
+    разных папок → report, report_2, … (без учёта регистра — для ФС
+    Windows/macOS). Один и тот же файл — одно имя.
+    """
+    by_source: dict[str, str] = {}
+    used: set[str] = set()
+    for path in source_paths:
+        key = os.path.abspath(path)
+        if key in by_source:
+            continue
+        stem = name = Path(path).stem
+        n = 1
+        while name.lower() in used:
+            n += 1
+            name = f"{stem}_{n}"
+        used.add(name.lower())
+        by_source[key] = name
+    return [by_source[os.path.abspath(path)] for path in source_paths]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONVERTER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
 class FileConverter:
     """
     Конвертер файлов между форматами.
 
     Использование:
         result = await converter.convert("/path/to/file.xlsx", "csv")
+        results = await converter.convert_batch(paths, "pdf")
         formats = converter.get_supported_formats("xlsx")
         can = converter.can_convert("xlsx", "csv")
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        workers: int = 0,
+        max_queue: int = 32,
+        cache_path: Optional[Path] = None,
+    ):
         self._conversion_count = 0
+        self._workers = max(0, workers)
+        self._max_queue = max(1, max_queue)
+        self._cache = _ConversionCache(cache_path) if cache_path else None
+        self._cache_hits = 0
+        self._pool: ProcessPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+        self._pending = 0
+        self._peak_pending = 0
+        self._restarts = 0
+        self._stats = QueryStats()
 
     # ═══════════════════════════════════════════════════════════════════════
     # Public API
@@ -114,6 +503,58 @@ class FileConverter:
             target_format: Целевой формат (csv, pdf, xlsx, etc.)
             output_dir: Директория для результата (default: USER_FILES_DIR)
         """
+        try:
+            return await self._convert_one(
+                source_path, target_format, output_dir,
+            )
+        finally:
+            self._flush_cache()
+
+    async def convert_batch(
+        self,
+        source_paths: list[str],
+        target_format: str,
+        output_dir: Optional[str] = None,
+    ) -> list[ConversionResult]:
+        """
+        Пакетная конвертация: файлы параллельно по воркерам,
+        порядок результатов совпадает с source_paths.
+        Одноимённые файлы из разных папок получают разные имена
+        результата (report.csv, report_2.csv), повторы одного файла
+        конвертируются один раз.
+        """
+        started = time.perf_counter()
+        jobs: dict[str, Awaitable[ConversionResult]] = {}
+        for path, stem in zip(source_paths, _batch_stems(source_paths)):
+            key = os.path.abspath(path)
+            if key not in jobs:
+                jobs[key] = self._convert_one(
+                    path, target_format, output_dir, stem)
+        try:
+            done = dict(zip(jobs, await asyncio.gather(*jobs.values())))
+        finally:
+            self._flush_cache()
+        results = [done[os.path.abspath(path)] for path in source_paths]
+
+        logger.info(
+            f"[Converter] Пакет {len(results)} → {target_format}: "
+            f"ok={sum(r.success for r in results)}, "
+            f"из кэша={sum(r.cached for r in results)}, "
+            f"{(time.perf_counter() - started) * 1000:.0f} мс"
+        )
+        return results
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # Pipeline
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def _convert_one(
+        self,
+        source_path: str,
+        target_format: str,
+        output_dir: Optional[str],
+        stem: Optional[str] = None,
+    ) -> ConversionResult:
         source = Path(source_path)
         if not source.exists():
             return ConversionResult(
@@ -142,416 +583,94 @@ class FileConverter:
         # Целевой путь
         out_dir = output_dir or str(USER_FILES_DIR)
         os.makedirs(out_dir, exist_ok=True)
-        target_name = f"{source.stem}.{target_format}"
-        target_path = os.path.join(out_dir, target_name)
+        target_path = os.path.join(
+            out_dir, f"{stem or source.stem}.{target_format}")
 
-        # Маршрутизация конвертации
-        converter_key = f"{source_format}_to_{target_format}"
-        converter_method = getattr(
-            self, f"_convert_{converter_key}", None
+        previous = (
+            self._cache.lookup(source_path, target_path)
+            if self._cache is not None else None
         )
 
-        if converter_method:
-            return await converter_method(source_path, target_path)
-
-        # Fallback через промежуточный текст
-        return await self._convert_via_text(
-            source_path, target_path, source_format, target_format
-        )
-
-    async def convert_batch(
-        self,
-        source_paths: list[str],
-        target_format: str,
-        output_dir: Optional[str] = None,
-    ) -> list[ConversionResult]:
-        """Пакетная конвертация."""
-        results = []
-        for path in source_paths:
-            result = await self.convert(path, target_format, output_dir)
-            results.append(result)
-        return results
-
-    # ═══════════════════════════════════════════════════════════════════════
-    # Specific Converters
-    # ═══════════════════════════════════════════════════════════════════════
-
-    async def _convert_xlsx_to_csv(
-        self, source: str, target: str
-    ) -> ConversionResult:
-        """Excel → CSV."""
-        try:
-            import openpyxl
-
-            wb = openpyxl.load_workbook(source, data_only=True)
-            ws = wb.active
-
-            with open(target, "w", encoding="utf-8-sig", newline="") as f:
-                writer = csv.writer(f)
-                for row in ws.iter_rows(values_only=True):
-                    writer.writerow(
-                        [str(v) if v is not None else "" for v in row]
-                    )
-
-            wb.close()
-            self._conversion_count += 1
-
-            return ConversionResult(
-                source_path=source,
-                target_path=target,
-                source_format="xlsx",
-                target_format="csv",
-            )
-
-        except Exception as e:
-            return ConversionResult(
-                success=False,
-                source_path=source,
-                target_path=target,
-                source_format="xlsx",
-                target_format="csv",
-                error=str(e),
-            )
-
-    async def _convert_csv_to_xlsx(
-        self, source: str, target: str,
-    ) -> ConversionResult:
-        """CSV → Excel."""
-        try:
-            from pds_ultimate.modules.files.excel_engine import excel_engine
-
-            with open(source, "r", encoding="utf-8-sig") as f:
-                reader = csv.reader(f)
-                rows = list(reader)
-
-            headers = rows[0] if rows else []
-            data = rows[1:] if len(rows) > 1 else []
-
-            structure = {
-                "title": Path(source).stem,
-                "headers": headers,
-                "rows": data,
-            }
-
-            result = await excel_engine.create(target, structure)
-            self._conversion_count += 1
-
-            if result.get("success"):
-                return ConversionResult(
-                    source_path=source,
-                    target_path=target,
-                    source_format="csv",
-                    target_format="xlsx",
+        slots = self._get_slots()
+        queued_at = time.perf_counter()
+        async with slots:
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = await self._dispatch(
+                    source_path, target_path, source_format, target_format,
+                    previous,
                 )
-
-            return ConversionResult(
-                success=False,
-                source_path=source,
-                target_path=target,
-                source_format="csv",
-                target_format="xlsx",
-                error=result.get("error", "Unknown"),
-            )
-
-        except Exception as e:
-            return ConversionResult(
-                success=False, source_path=source,
-                target_path=target,
-                source_format="csv", target_format="xlsx",
-                error=str(e),
-            )
-
-    async def _convert_xlsx_to_pdf(
-        self, source: str, target: str,
-    ) -> ConversionResult:
-        """Excel → PDF (таблица)."""
-        try:
-            from pds_ultimate.modules.files.excel_engine import excel_engine
-            from pds_ultimate.modules.files.pdf_engine import pdf_engine
-
-            data = await excel_engine.read(source)
-            if "error" in data:
-                return ConversionResult(
-                    success=False, source_path=source,
-                    target_path=target,
-                    source_format="xlsx", target_format="pdf",
-                    error=data["error"],
+                ok = result.success
+            finally:
+                self._pending -= 1
+                self._stats.record(
+                    (time.perf_counter() - started) * 1000,
+                    (started - queued_at) * 1000,
+                    ok,
+                    inline=self._workers == 0,
                 )
 
-            structure = {
-                "title": Path(source).stem,
-                "headers": data.get("headers", []),
-                "rows": data.get("rows", []),
-            }
-
-            result = await pdf_engine.create(target, structure)
+        if result.cached:
+            self._cache_hits += 1
+        elif result.success:
             self._conversion_count += 1
+            if self._cache is not None:
+                self._cache.store(result)
+        return result
 
-            if result.get("success"):
-                return ConversionResult(
-                    source_path=source, target_path=target,
-                    source_format="xlsx", target_format="pdf",
-                )
-
-            return ConversionResult(
-                success=False, source_path=source,
-                target_path=target,
-                source_format="xlsx", target_format="pdf",
-                error=result.get("error", "Unknown"),
-            )
-
-        except Exception as e:
-            return ConversionResult(
-                success=False, source_path=source,
-                target_path=target,
-                source_format="xlsx", target_format="pdf",
-                error=str(e),
-            )
-
-    async def _convert_docx_to_pdf(
-        self, source: str, target: str,
-    ) -> ConversionResult:
-        """Word → PDF."""
-        try:
-            from docx import Document
-
-            from pds_ultimate.modules.files.pdf_engine import pdf_engine
-
-            doc = Document(source)
-            paragraphs = [
-                p.text for p in doc.paragraphs if p.text.strip()
-            ]
-            content = "\n".join(paragraphs)
-
-            structure = {
-                "title": Path(source).stem,
-                "content": content,
-            }
-
-            result = await pdf_engine.create(target, structure)
-            self._conversion_count += 1
-
-            if result.get("success"):
-                return ConversionResult(
-                    source_path=source, target_path=target,
-                    source_format="docx", target_format="pdf",
-                )
-
-            return ConversionResult(
-                success=False, source_path=source,
-                target_path=target,
-                source_format="docx", target_format="pdf",
-                error=result.get("error", "Unknown"),
-            )
-
-        except Exception as e:
-            return ConversionResult(
-                success=False, source_path=source,
-                target_path=target,
-                source_format="docx", target_format="pdf",
-                error=str(e),
-            )
-
-    async def _convert_docx_to_txt(
-        self, source: str, target: str,
-    ) -> ConversionResult:
-        """Word → Text."""
-        try:
-            from docx import Document
-
-            doc = Document(source)
-            text = "\n".join(
-                p.text for p in doc.paragraphs if p.text.strip()
-            )
-
-            with open(target, "w", encoding="utf-8") as f:
-                f.write(text)
-
-            self._conversion_count += 1
-            return ConversionResult(
-                source_path=source, target_path=target,
-                source_format="docx", target_format="txt",
-            )
-
-        except Exception as e:
-            return ConversionResult(
-                success=False, source_path=source,
-                target_path=target,
-                source_format="docx", target_format="txt",
-                error=str(e),
-            )
-
-    async def _convert_pdf_to_txt(
-        self, source: str, target: str,
-    ) -> ConversionResult:
-        """PDF → Text."""
-        try:
-            from pds_ultimate.modules.files.pdf_engine import pdf_engine
-
-            data = await pdf_engine.read(source)
-            if "error" in data:
-                return ConversionResult(
-                    success=False, source_path=source,
-                    target_path=target,
-                    source_format="pdf", target_format="txt",
-                    error=data["error"],
-                )
-
-            with open(target, "w", encoding="utf-8") as f:
-                f.write(data.get("content", ""))
-
-            self._conversion_count += 1
-            return ConversionResult(
-                source_path=source, target_path=target,
-                source_format="pdf", target_format="txt",
-            )
-
-        except Exception as e:
-            return ConversionResult(
-                success=False, source_path=source,
-                target_path=target,
-                source_format="pdf", target_format="txt",
-                error=str(e),
-            )
-
-    async def _convert_json_to_csv(
-        self, source: str, target: str,
-    ) -> ConversionResult:
-        """JSON → CSV."""
-        try:
-            with open(source, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            if isinstance(data, list) and data:
-                # List of dicts
-                if isinstance(data[0], dict):
-                    headers = list(data[0].keys())
-                    rows = [
-                        [str(item.get(h, "")) for h in headers]
-                        for item in data
-                    ]
-                else:
-                    headers = [f"col_{i}" for i in range(len(data[0]))]
-                    rows = [[str(v) for v in row] for row in data]
-
-                with open(
-                    target, "w", encoding="utf-8-sig", newline=""
-                ) as f:
-                    writer = csv.writer(f)
-                    writer.writerow(headers)
-                    writer.writerows(rows)
-
-                self._conversion_count += 1
-                return ConversionResult(
-                    source_path=source, target_path=target,
-                    source_format="json", target_format="csv",
-                )
-
-            return ConversionResult(
-                success=False, source_path=source,
-                target_path=target,
-                source_format="json", target_format="csv",
-                error="JSON не является массивом объектов",
-            )
-
-        except Exception as e:
-            return ConversionResult(
-                success=False, source_path=source,
-                target_path=target,
-                source_format="json", target_format="csv",
-                error=str(e),
-            )
-
-    async def _convert_txt_to_pdf(
-        self, source: str, target: str,
-    ) -> ConversionResult:
-        """Text → PDF."""
-        try:
-            from pds_ultimate.modules.files.pdf_engine import pdf_engine
-
-            with open(source, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            structure = {
-                "title": Path(source).stem,
-                "content": content,
-            }
-
-            result = await pdf_engine.create(target, structure)
-            self._conversion_count += 1
-
-            if result.get("success"):
-                return ConversionResult(
-                    source_path=source, target_path=target,
-                    source_format="txt", target_format="pdf",
-                )
-
-            return ConversionResult(
-                success=False, source_path=source,
-                target_path=target,
-                source_format="txt", target_format="pdf",
-                error=result.get("error"),
-            )
-
-        except Exception as e:
-            return ConversionResult(
-                success=False, source_path=source,
-                target_path=target,
-                source_format="txt", target_format="pdf",
-                error=str(e),
-            )
-
-    # ═══════════════════════════════════════════════════════════════════════
-    # Fallback: via text
-    # ═══════════════════════════════════════════════════════════════════════
-
-    async def _convert_via_text(
+    async def _dispatch(
         self,
         source: str,
         target: str,
         source_format: str,
         target_format: str,
+        previous_hash: Optional[str],
     ) -> ConversionResult:
-        """Fallback: конвертация через промежуточный текст."""
-        try:
-            # Читаем как текст
-            with open(source, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            # Пишем в целевой формат
-            if target_format == "txt":
-                with open(target, "w", encoding="utf-8") as f:
-                    f.write(content)
-            elif target_format == "json":
-                with open(target, "w", encoding="utf-8") as f:
-                    json.dump(
-                        {"content": content},
-                        f, ensure_ascii=False, indent=2,
-                    )
-            else:
-                return ConversionResult(
-                    success=False, source_path=source,
-                    target_path=target,
-                    source_format=source_format,
-                    target_format=target_format,
-                    error="Нет подходящего конвертера",
-                )
+        args = (
+            source, target, source_format, target_format,
+            previous_hash, self._cache is not None,
+        )
+        if self._workers == 0:
+            return await asyncio.to_thread(convert_file, *args)
 
-            self._conversion_count += 1
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        try:
+            return await loop.run_in_executor(pool, convert_file, *args)
+        except BrokenProcessPool as e:
+            # Воркер упал (OOM на огромной книге) — пул пересоздаётся
+            logger.error(f"[Converter] Пул воркеров сломан, перезапуск: {e}")
+            if self._pool is pool:
+                self.shutdown(wait=False)
+                self._restarts += 1
             return ConversionResult(
-                source_path=source, target_path=target,
-                source_format=source_format,
-                target_format=target_format,
+                success=False, source_path=source, target_path=target,
+                source_format=source_format, target_format=target_format,
+                error=f"Converter worker crashed: {e}",
             )
 
-        except Exception as e:
-            return ConversionResult(
-                success=False, source_path=source,
-                target_path=target,
-                source_format=source_format,
-                target_format=target_format,
-                error=str(e),
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn"),
             )
+        return self._pool
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Семафор привязывается к event loop — пересоздаём при смене loop
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self._max_queue)
+            self._slots_loop = loop
+        return self._slots
+
+    def _flush_cache(self) -> None:
+        if self._cache is not None:
+            self._cache.flush()
 
     # ═══════════════════════════════════════════════════════════════════════
     # Formatting
@@ -583,9 +702,33 @@ class FileConverter:
         return {
             "total_conversions": self._conversion_count,
             "supported_formats": list(SUPPORTED_CONVERSIONS.keys()),
+            "workers": self._workers,
+            "max_queue": self._max_queue,
+            "pending": self._pending,
+            "peak_pending": self._peak_pending,
+            "restarts": self._restarts,
+            "cache_hits": self._cache_hits,
+            "cache_entries": len(self._cache) if self._cache is not None else 0,
+            "convert": self._stats.to_dict(),
         }
 
+    # ═══════════════════════════════════════════════════════════════════════
+    # Lifecycle
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=not wait)
+            self._pool = None
+
 
 # ─── Глобальный экземпляр ────────────────────────────────────────────────────
 
-file_converter = FileConverter()
+file_converter = FileConverter(
+    workers=config.converter.workers,
+    max_queue=config.converter.max_queue,
+    cache_path=(
+        config.converter.cache_path
+        if config.converter.cache_enabled else None
+    ),
+)
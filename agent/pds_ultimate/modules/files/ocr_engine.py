@@ -11,6 +11,9 @@ PDS-Ultimate OCR Engine
 - Два бэкенда: EasyOCR (primary) и Tesseract (fallback)
 - Confidence scoring для каждого блока текста
 
+Распознавание (EasyOCR/Tesseract) выполняется в пуле процессов
+modules/files/ocr_service.py — event loop бота не блокируется.
+
 Config:
     config.ocr.engine → "easyocr" | "tesseract"
     config.ocr.languages → ["ru", "en", "ch_sim"]
@@ -19,7 +22,9 @@ Config:
 
 from __future__ import annotations
 
+import io
 import re
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
@@ -132,6 +137,179 @@ class ReceiptData:
         }
 
 
+# ─── Backends (синхронные, выполняются в воркерах ocr_service) ───────────────
+
+def _source_label(source: str | bytes) -> str:
+    return source if isinstance(source, str) else f"<{len(source)} bytes>"
+
+
+def recognize_image(
+    source: str | bytes,
+    languages: list[str],
+    engine: str,
+    easyocr_reader=None,
+) -> OCRResult:
+    """
+    Распознать изображение: EasyOCR (если engine="easyocr"),
+    при неудаче — Tesseract. Синхронно, блокирует поток.
+
+    easyocr_reader — заранее загруженный easyocr.Reader (прогрев воркера);
+    None — reader создаётся здесь; EASYOCR_UNAVAILABLE — модель не
+    загрузилась, сразу Tesseract.
+    """
+    start = time.monotonic()
+
+    if engine == "easyocr" and easyocr_reader is not EASYOCR_UNAVAILABLE:
+        result = recognize_easyocr(source, languages, easyocr_reader)
+        if result.success:
+            result.processing_time_ms = (time.monotonic() - start) * 1000
+            return result
+        logger.info("[OCR] EasyOCR failed, falling back to Tesseract")
+
+    result = recognize_tesseract(source, languages)
+    result.processing_time_ms = (time.monotonic() - start) * 1000
+    return result
+
+
+# Маркер «EasyOCR не загрузился» — кэшируется вместо reader,
+# чтобы не пересоздавать модель на каждый запрос
+EASYOCR_UNAVAILABLE = object()
+
+
+def create_easyocr_reader(languages: list[str]):
+    """Загрузить модель EasyOCR (несколько секунд). None — не установлен."""
+    try:
+        import easyocr
+    except ImportError:
+        return None
+    return easyocr.Reader(languages, gpu=False, verbose=False)
+
+
+def recognize_easyocr(
+    source: str | bytes,
+    languages: list[str],
+    reader=None,
+) -> OCRResult:
+    """Распознавание через EasyOCR (readtext принимает путь или байты)."""
+    label = _source_label(source)
+    try:
+        if reader is None:
+            reader = create_easyocr_reader(languages)
+        if reader is None:
+            raise ImportError("easyocr")
+
+        raw_results = reader.readtext(source)
+
+        blocks = []
+        texts = []
+
+        for i, (bbox, text, conf) in enumerate(raw_results):
+            blocks.append(OCRBlock(
+                text=text.strip(),
+                confidence=float(conf),
+                bbox=tuple(bbox[0] + bbox[2]) if bbox else None,
+                line_number=i + 1,
+            ))
+            texts.append(text.strip())
+
+        full_text = "\n".join(texts)
+
+        return OCRResult(
+            blocks=blocks,
+            full_text=full_text,
+            language=",".join(languages),
+            engine_used="easyocr",
+            image_path=label,
+        )
+
+    except ImportError:
+        return OCRResult(
+            error="easyocr не установлен (pip install easyocr)",
+            engine_used="easyocr",
+            image_path=label,
+        )
+    except Exception as e:
+        return OCRResult(
+            error=f"EasyOCR error: {e}",
+            engine_used="easyocr",
+            image_path=label,
+        )
+
+
+def recognize_tesseract(
+    source: str | bytes,
+    languages: list[str],
+) -> OCRResult:
+    """Распознавание через Tesseract."""
+    label = _source_label(source)
+    try:
+        import pytesseract
+        from PIL import Image
+
+        # Map language codes
+        lang_map = {
+            "ru": "rus", "en": "eng", "ch_sim": "chi_sim",
+            "ch_tra": "chi_tra", "de": "deu", "fr": "fra",
+        }
+        tess_langs = "+".join(
+            lang_map.get(l, l) for l in languages
+        )
+
+        img = Image.open(
+            io.BytesIO(source) if isinstance(source, bytes) else source
+        )
+
+        # Получаем с детализацией
+        data = pytesseract.image_to_data(
+            img, lang=tess_langs, output_type=pytesseract.Output.DICT
+        )
+
+        blocks = []
+        texts = []
+        n_boxes = len(data["text"])
+
+        for i in range(n_boxes):
+            text = data["text"][i].strip()
+            conf = int(float(data["conf"][i]))
+
+            if text and conf > 0:
+                blocks.append(OCRBlock(
+                    text=text,
+                    confidence=conf / 100.0,
+                    bbox=(
+                        data["left"][i],
+                        data["top"][i],
+                        data["left"][i] + data["width"][i],
+                        data["top"][i] + data["height"][i],
+                    ),
+                    line_number=data["line_num"][i],
+                ))
+                texts.append(text)
+
+        full_text = " ".join(texts)
+
+        return OCRResult(
+            blocks=blocks,
+            full_text=full_text,
+            language=tess_langs,
+            engine_used="tesseract",
+            image_path=label,
+        )
+
+    except ImportError:
+        return OCRResult(
+            error="pytesseract не установлен",
+            engine_used="tesseract",
+            image_path=label,
+        )
+    except Exception as e:
+        return OCRResult(
+            error=f"Tesseract error: {e}",
+            engine_used="tesseract",
+            image_path=label,
+        )
+
+
 # ─── OCR Engine ──────────────────────────────────────────────────────────────
 
 class OCREngine:
@@ -206,10 +384,6 @@ class OCREngine:
         "₺": "TRY", "try": "TRY", "лира": "TRY",
     }
 
-    def __init__(self):
-        self._easyocr_reader = None
-        self._tesseract_available = False
-
     # ═══════════════════════════════════════════════════════════════════════
     # OCR Recognition
     # ═══════════════════════════════════════════════════════════════════════
@@ -221,22 +395,13 @@ class OCREngine:
         engine: Optional[str] = None,
     ) -> OCRResult:
         """
-        Распознать текст на изображении.
+        Распознать текст на изображении (в пуле процессов ocr_service).
 
         Args:
             image_path: Путь к изображению
             languages: Языки ["ru", "en", "ch_sim"]
             engine: "easyocr" | "tesseract" (default from config)
         """
-        import time as time_mod
-        start = time_mod.monotonic()
-
-        if languages is None:
-            languages = list(config.ocr.languages)
-
-        if engine is None:
-            engine = config.ocr.engine
-
         path = Path(image_path)
         if not path.exists():
             return OCRResult(
@@ -244,21 +409,9 @@ class OCREngine:
                 image_path=image_path,
             )
 
-        # Попытка EasyOCR
-        if engine == "easyocr":
-            result = await self._recognize_easyocr(str(path), languages)
-            if result.success:
-                result.processing_time_ms = (
-                    time_mod.monotonic() - start
-                ) * 1000
-                return result
-            # Fallback to tesseract
-            logger.info("[OCR] EasyOCR failed, falling back to Tesseract")
-
-        # Tesseract
-        result = await self._recognize_tesseract(str(path), languages)
-        result.processing_time_ms = (time_mod.monotonic() - start) * 1000
-        return result
+        from pds_ultimate.modules.files.ocr_service import ocr_service
+
+        return await ocr_service.recognize(str(path), languages, engine)
 
     async def recognize_bytes(
         self,
@@ -266,20 +419,35 @@ class OCREngine:
         filename: str = "ocr_temp.jpg",
         languages: Optional[list[str]] = None,
     ) -> OCRResult:
-        """Распознать текст из байтов изображения."""
-        import tempfile
+        """Распознать текст из байтов изображения (без временного файла)."""
+        from pds_ultimate.modules.files.ocr_service import ocr_service
 
-        with tempfile.NamedTemporaryFile(
-            suffix=Path(filename).suffix or ".jpg",
-            delete=False,
-        ) as tmp:
-            tmp.write(image_bytes)
-            tmp_path = tmp.name
+        result = await ocr_service.recognize(image_bytes, languages)
+        result.image_path = filename
+        return result
 
-        try:
-            return await self.recognize(tmp_path, languages)
-        finally:
-            Path(tmp_path).unlink(missing_ok=True)
+    async def recognize_batch(
+        self,
+        images: list[str | bytes],
+        languages: Optional[list[str]] = None,
+    ) -> list[OCRResult]:
+        """
+        Распознать несколько изображений (многостраничная загрузка).
+        Страницы распределяются по воркерам, порядок результатов сохраняется.
+        """
+        from pds_ultimate.modules.files.ocr_service import ocr_service
+
+        missing = {
+            i: OCRResult(error=f"Файл не найден: {img}", image_path=img)
+            for i, img in enumerate(images)
+            if isinstance(img, str) and not Path(img).exists()
+        }
+        found = [img for i, img in enumerate(images) if i not in missing]
+        results = iter(await ocr_service.recognize_batch(found, languages))
+        return [
+            missing[i] if i in missing else next(results)
+            for i in range(len(images))
+        ]
 
     # ═══════════════════════════════════════════════════════════════════════
     # Data Extraction
@@ -424,132 +592,6 @@ class OCREngine:
 
         return dates
 
-    # ═══════════════════════════════════════════════════════════════════════
-    # Internal: EasyOCR
-    # ═══════════════════════════════════════════════════════════════════════
-
-    async def _recognize_easyocr(
-        self,
-        image_path: str,
-        languages: list[str],
-    ) -> OCRResult:
-        """Распознавание через EasyOCR."""
-        try:
-            import easyocr
-
-            if self._easyocr_reader is None:
-                self._easyocr_reader = easyocr.Reader(
-                    languages, gpu=False, verbose=False
-                )
-
-            raw_results = self._easyocr_reader.readtext(image_path)
-
-            blocks = []
-            texts = []
-
-            for i, (bbox, text, conf) in enumerate(raw_results):
-                blocks.append(OCRBlock(
-                    text=text.strip(),
-                    confidence=conf,
-                    bbox=tuple(bbox[0] + bbox[2]) if bbox else None,
-                    line_number=i + 1,
-                ))
-                texts.append(text.strip())
-
-            full_text = "\n".join(texts)
-
-            return OCRResult(
-                blocks=blocks,
-                full_text=full_text,
-                language=",".join(languages),
-                engine_used="easyocr",
-                image_path=image_path,
-            )
-
-        except ImportError:
-            return OCRResult(
-                error="easyocr не установлен (pip install easyocr)",
-                engine_used="easyocr",
-                image_path=image_path,
-            )
-        except Exception as e:
-            return OCRResult(
-                error=f"EasyOCR error: {e}",
-                engine_used="easyocr",
-                image_path=image_path,
-            )
-
-    async def _recognize_tesseract(
-        self,
-        image_path: str,
-        languages: list[str],
-    ) -> OCRResult:
-        """Распознавание через Tesseract."""
-        try:
-            import pytesseract
-            from PIL import Image
-
-            # Map language codes
-            lang_map = {
-                "ru": "rus", "en": "eng", "ch_sim": "chi_sim",
-                "ch_tra": "chi_tra", "de": "deu", "fr": "fra",
-            }
-            tess_langs = "+".join(
-                lang_map.get(l, l) for l in languages
-            )
-
-            img = Image.open(image_path)
-
-            # Получаем с детализацией
-            data = pytesseract.image_to_data(
-                img, lang=tess_langs, output_type=pytesseract.Output.DICT
-            )
-
-            blocks = []
-            texts = []
-            n_boxes = len(data["text"])
-
-            for i in range(n_boxes):
-                text = data["text"][i].strip()
-                conf = int(data["conf"][i])
-
-                if text and conf > 0:
-                    blocks.append(OCRBlock(
-                        text=text,
-                        confidence=conf / 100.0,
-                        bbox=(
-                            data["left"][i],
-                            data["top"][i],
-                            data["left"][i] + data["width"][i],
-                            data["top"][i] + data["height"][i],
-                        ),
-                        line_number=data["line_num"][i],
-                    ))
-                    texts.append(text)
-
-            full_text = " ".join(texts)
-
-            return OCRResult(
-                blocks=blocks,
-                full_text=full_text,
-                language=tess_langs,
-                engine_used="tesseract",
-                image_path=image_path,
-            )
-
-        except ImportError:
-            return OCRResult(
-                error="pytesseract не установлен",
-                engine_used="tesseract",
-                image_path=image_path,
-            )
-        except Exception as e:
-            return OCRResult(
-                error=f"Tesseract error: {e}",
-                engine_used="tesseract",
-                image_path=image_path,
-            )
-
     def _detect_currency(self, raw: str, context: str) -> str:
         """Определить валюту из контекста."""
         raw_lower = raw.lower()
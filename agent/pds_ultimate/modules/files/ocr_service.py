@@ -0,0 +1,264 @@
+"""
+PDS-Ultimate OCR Service
+===========================
+Распознавание изображений вне event loop — пул процессов.
+
+EasyOCR/Tesseract держат CPU секундами; вызов прямо в async def
+останавливал бота на каждом фото чека. Здесь:
+- ProcessPoolExecutor (spawn) на OCR_WORKERS процессов, в каждом —
+  свой easyocr.Reader, загруженный в initializer (start() прогревает
+  воркеры при запуске бота и после перезапуска упавшего пула —
+  пользователь не ждёт модель). Не загрузилась — воркер запоминает
+  это и распознаёт Tesseract, не пересоздавая Reader
+- Очередь ограничена (OCR_MAX_QUEUE) — при перегрузке вызывающие ждут
+- Источник — путь или байты: байты уходят в воркер как есть,
+  без временного файла
+- recognize_batch — страницы многостраничной загрузки параллельно
+  по воркерам, порядок результатов сохраняется
+- OCR_WORKERS=0 — распознавание в потоке (asyncio.to_thread)
+
+Использование:
+    await ocr_service.start()                       # прогрев
+    result = await ocr_service.recognize(image_bytes)
+    pages = await ocr_service.recognize_batch([p1, p2, p3])
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from pds_ultimate.config import config, logger
+from pds_ultimate.core.db_executor import QueryStats
+from pds_ultimate.modules.files.ocr_engine import (
+    EASYOCR_UNAVAILABLE,
+    OCRResult,
+    create_easyocr_reader,
+    recognize_image,
+)
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# WORKER (выполняется в процессе пула)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_readers: dict[tuple[str, ...], object] = {}
+_readers_lock = threading.Lock()
+
+
+def _get_reader(languages: tuple[str, ...]):
+    """
+    easyocr.Reader для набора языков — один на процесс.
+    Неудачная загрузка (нет easyocr, ошибка модели) тоже кэшируется —
+    EASYOCR_UNAVAILABLE, воркер дальше распознаёт Tesseract.
+    """
+    with _readers_lock:
+        if languages not in _readers:
+            try:
+                reader = create_easyocr_reader(list(languages))
+            except Exception as e:
+                logger.warning(f"[OCR] EasyOCR model load failed: {e}")
+                reader = None
+            _readers[languages] = (
+                EASYOCR_UNAVAILABLE if reader is None else reader)
+        return _readers[languages]
+
+
+def _worker_init(engine: str, languages: tuple[str, ...]) -> None:
+    """Initializer воркера: загрузить модель до первого запроса."""
+    if engine == "easyocr":
+        _get_reader(languages)
+
+
+def _worker_ping() -> int:
+    return os.getpid()
+
+
+def _worker_recognize(
+    source: str | bytes,
+    languages: tuple[str, ...],
+    engine: str,
+) -> OCRResult:
+    reader = _get_reader(languages) if engine == "easyocr" else None
+    return recognize_image(source, list(languages), engine, reader)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SERVICE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class OCRService:
+    """Пул OCR-воркеров с ограниченной очередью и метриками."""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 16,
+    ):
+        self._workers = max(0, workers)
+        self._max_queue = max(1, max_queue)
+        self._pool: ProcessPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+        self._pending = 0
+        self._peak_pending = 0
+        self._restarts = 0
+        self._warmup: asyncio.Task | None = None
+        self._stats = QueryStats()
+
+    # ─── Public API ──────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        """Поднять воркеры и загрузить в них модель (прогрев)."""
+        engine, languages = config.ocr.engine, tuple(config.ocr.languages)
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            if self._workers == 0:
+                if engine == "easyocr":
+                    await asyncio.to_thread(_get_reader, languages)
+            else:
+                pool = self._get_pool(engine, languages)
+                # Каждый ping поднимает процесс; initializer грузит модель
+                await asyncio.gather(*(
+                    loop.run_in_executor(pool, _worker_ping)
+                    for _ in range(self._workers)
+                ))
+        except Exception as e:
+            logger.warning(f"[OCR] Прогрев не удался: {e}")
+            return
+        logger.info(
+            f"[OCR] Воркеры готовы: {self._workers or 'thread'}, "
+            f"прогрев {(time.perf_counter() - start):.1f}с"
+        )
+
+    async def recognize(
+        self,
+        source: str | bytes,
+        languages: Optional[list[str]] = None,
+        engine: Optional[str] = None,
+    ) -> OCRResult:
+        """Распознать одно изображение (путь или байты)."""
+        langs = tuple(languages or config.ocr.languages)
+        engine = engine or config.ocr.engine
+
+        slots = self._get_slots()
+        queued_at = time.perf_counter()
+        async with slots:
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = await self._dispatch(source, langs, engine)
+                ok = result.error is None
+                return result
+            finally:
+                self._pending -= 1
+                self._stats.record(
+                    (time.perf_counter() - started) * 1000,
+                    (started - queued_at) * 1000,
+                    ok,
+                    inline=self._workers == 0,
+                )
+
+    async def recognize_batch(
+        self,
+        sources: list[str | bytes],
+        languages: Optional[list[str]] = None,
+        engine: Optional[str] = None,
+    ) -> list[OCRResult]:
+        """Распознать несколько изображений параллельно (порядок сохраняется)."""
+        return list(await asyncio.gather(*(
+            self.recognize(src, languages, engine) for src in sources
+        )))
+
+    def get_stats(self) -> dict:
+        return {
+            "workers": self._workers,
+            "max_queue": self._max_queue,
+            "pending": self._pending,
+            "peak_pending": self._peak_pending,
+            "restarts": self._restarts,
+            "recognize": self._stats.to_dict(),
+        }
+
+    # ─── Lifecycle ───────────────────────────────────────────────────────
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=not wait)
+            self._pool = None
+
+    # ─── Internal ────────────────────────────────────────────────────────
+
+    async def _dispatch(
+        self,
+        source: str | bytes,
+        languages: tuple[str, ...],
+        engine: str,
+    ) -> OCRResult:
+        if self._workers == 0:
+            return await asyncio.to_thread(
+                _worker_recognize, source, languages, engine,
+            )
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool(engine, languages)
+        try:
+            return await loop.run_in_executor(
+                pool, _worker_recognize, source, languages, engine,
+            )
+        except BrokenProcessPool as e:
+            # Воркер упал (OOM на большом фото) — пул пересоздаётся
+            logger.error(f"[OCR] Пул воркеров сломан, перезапуск: {e}")
+            if self._pool is pool:
+                self.shutdown(wait=False)
+                self._restarts += 1
+                # Новый пул прогревается в фоне — следующий запрос
+                # не ждёт загрузку модели
+                if self._warmup is None or self._warmup.done():
+                    self._warmup = asyncio.create_task(self.start())
+            return OCRResult(
+                error=f"OCR worker crashed: {e}",
+                engine_used=engine,
+                image_path=source if isinstance(source, str) else "",
+            )
+
+    def _get_pool(
+        self,
+        engine: str,
+        languages: tuple[str, ...],
+    ) -> ProcessPoolExecutor:
+        # initializer прогревает модель текущего engine/языков;
+        # другие языки воркер загрузит сам при первом запросе
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_worker_init,
+                initargs=(engine, languages),
+            )
+        return self._pool
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Семафор привязывается к event loop — пересоздаём при смене loop
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self._max_queue)
+            self._slots_loop = loop
+        return self._slots
+
+
+# ─── Глобальный экземпляр ────────────────────────────────────────────────────
+
+ocr_service = OCRService(
+    workers=config.ocr.workers,
+    max_queue=config.ocr.max_queue,
+)
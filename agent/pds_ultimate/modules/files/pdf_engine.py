@@ -21,6 +21,104 @@ from pathlib import Path
 from typing import Optional
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# SYNC CORE (без event loop — для пула процессов конвертера)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def render_pdf(filepath: str, structure: dict) -> dict:
+    """Синхронная генерация PDF из structure dict (см. PDFEngine.create)."""
+    try:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import (
+            Paragraph,
+            SimpleDocTemplate,
+            Spacer,
+            Table,
+            TableStyle,
+        )
+
+        doc = SimpleDocTemplate(filepath, pagesize=A4)
+        styles = getSampleStyleSheet()
+        elements = []
+
+        # Заголовок
+        title = structure.get("title", "Документ")
+        elements.append(Paragraph(title, styles["Title"]))
+        elements.append(Spacer(1, 12))
+
+        # Текст
+        content = structure.get("content", "")
+        if content:
+            for line in content.split("\n"):
+                if line.strip():
+                    elements.append(Paragraph(line, styles["Normal"]))
+                    elements.append(Spacer(1, 6))
+
+        # Таблица
+        headers = structure.get("headers", [])
+        rows = structure.get("rows", [])
+
+        if headers:
+            table_data = [headers]
+            for row in rows:
+                table_data.append([str(v or "") for v in row])
+
+            t = Table(table_data)
+            t.setStyle(TableStyle([
+                ("BACKGROUND", (0, 0), (-1, 0),
+                 colors.HexColor("#4472C4")),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+                ("FONTSIZE", (0, 0), (-1, 0), 10),
+                ("FONTSIZE", (0, 1), (-1, -1), 9),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("ROWBACKGROUNDS", (0, 1), (-1, -1),
+                 [colors.white, colors.HexColor("#D9E2F3")]),
+            ]))
+            elements.append(t)
+
+        doc.build(elements)
+        size = os.path.getsize(filepath) if os.path.exists(filepath) else 0
+
+        return {
+            "success": True,
+            "path": filepath,
+            "format": "pdf",
+            "size_bytes": size,
+        }
+
+    except ImportError:
+        return {"error": "reportlab не установлен"}
+    except Exception as e:
+        return {"error": f"PDF creation failed: {e}"}
+
+
+def extract_pdf_text(filepath: str) -> dict:
+    """Синхронное извлечение текста из PDF (см. PDFEngine.read)."""
+    try:
+        import PyPDF2
+
+        with open(filepath, "rb") as f:
+            reader = PyPDF2.PdfReader(f)
+            text = ""
+            for page in reader.pages:
+                text += (page.extract_text() or "") + "\n"
+
+        return {
+            "content": text.strip(),
+            "format": "pdf",
+            "pages": len(reader.pages),
+        }
+
+    except ImportError:
+        return {"error": "PyPDF2 не установлен"}
+    except Exception as e:
+        return {"error": f"PDF read failed: {e}"}
+
+
 class PDFEngine:
     """
     Продвинутый PDF-движок.
@@ -54,73 +152,7 @@ class PDFEngine:
             "rows": [["v1", "v2"], ...],
         }
         """
-        try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import A4
-            from reportlab.lib.styles import getSampleStyleSheet
-            from reportlab.platypus import (
-                Paragraph,
-                SimpleDocTemplate,
-                Spacer,
-                Table,
-                TableStyle,
-            )
-
-            doc = SimpleDocTemplate(filepath, pagesize=A4)
-            styles = getSampleStyleSheet()
-            elements = []
-
-            # Заголовок
-            title = structure.get("title", "Документ")
-            elements.append(Paragraph(title, styles["Title"]))
-            elements.append(Spacer(1, 12))
-
-            # Текст
-            content = structure.get("content", "")
-            if content:
-                for line in content.split("\n"):
-                    if line.strip():
-                        elements.append(Paragraph(line, styles["Normal"]))
-                        elements.append(Spacer(1, 6))
-
-            # Таблица
-            headers = structure.get("headers", [])
-            rows = structure.get("rows", [])
-
-            if headers:
-                table_data = [headers]
-                for row in rows:
-                    table_data.append([str(v or "") for v in row])
-
-                t = Table(table_data)
-                t.setStyle(TableStyle([
-                    ("BACKGROUND", (0, 0), (-1, 0),
-                     colors.HexColor("#4472C4")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                    ("FONTSIZE", (0, 0), (-1, 0), 10),
-                    ("FONTSIZE", (0, 1), (-1, -1), 9),
-                    ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                    ("ROWBACKGROUNDS", (0, 1), (-1, -1),
-                     [colors.white, colors.HexColor("#D9E2F3")]),
-                ]))
-                elements.append(t)
-
-            doc.build(elements)
-            size = os.path.getsize(filepath) if os.path.exists(filepath) else 0
-
-            return {
-                "success": True,
-                "path": filepath,
-                "format": "pdf",
-                "size_bytes": size,
-            }
-
-        except ImportError:
-            return {"error": "reportlab не установлен"}
-        except Exception as e:
-            return {"error": f"PDF creation failed: {e}"}
+        return render_pdf(filepath, structure)
 
     async def create_invoice(
         self,
@@ -192,25 +224,7 @@ class PDFEngine:
 
     async def read(self, filepath: str) -> dict:
         """Извлечь текст из PDF."""
-        try:
-            import PyPDF2
-
-            with open(filepath, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                text = ""
-                for page in reader.pages:
-                    text += (page.extract_text() or "") + "\n"
-
-            return {
-                "content": text.strip(),
-                "format": "pdf",
-                "pages": len(reader.pages),
-            }
-
-        except ImportError:
-            return {"error": "PyPDF2 не установлен"}
-        except Exception as e:
-            return {"error": f"PDF read failed: {e}"}
+        return extract_pdf_text(filepath)
 
     # ═══════════════════════════════════════════════════════════════════════
     # Merge / Split
@@ -2,6 +2,7 @@
 Finance Module
 - MasterFinance: Транзакции, баланс, месячные сводки, Excel
 - CurrencyManager: Курсы валют (фиксированные + API)
+- RateBook / RateSnapshot: Версионированный снапшот курсов, пакетная конвертация
 - ProfitCalculator: Формула прибыли + аналитика
 - SyncEngine: Excel ↔ БД синхронизация
 """
@@ -9,11 +10,19 @@ Finance Module
 from pds_ultimate.modules.finance.currency import CurrencyManager
 from pds_ultimate.modules.finance.master_finance import MasterFinance
 from pds_ultimate.modules.finance.profit_calc import ProfitCalculator
+from pds_ultimate.modules.finance.rate_snapshot import (
+    RateBook,
+    RateSnapshot,
+    rate_book,
+)
 from pds_ultimate.modules.finance.sync_engine import SyncEngine
 
 __all__ = [
     "MasterFinance",
     "CurrencyManager",
     "ProfitCalculator",
+    "RateBook",
+    "RateSnapshot",
+    "rate_book",
     "SyncEngine",
 ]
@@ -8,14 +8,17 @@ PDS-Ultimate Currency Manager
 - 1 USD = 7.1 CNY (фиксированный)
 - Все остальные — динамически из API (exchangerate-api.com)
 - Кэш курсов: 6 часов
+- Пакетная конвертация — снапшот курсов (rate_snapshot.py)
 """
 
 from __future__ import annotations
 
 from datetime import date, datetime
-from typing import Optional
+from typing import Iterable, Optional
 
-from pds_ultimate.config import config, logger
+from pds_ultimate.config import config
+from pds_ultimate.core.db_executor import db_executor
+from pds_ultimate.modules.finance.rate_snapshot import rate_book
 
 
 class CurrencyManager:
@@ -91,6 +94,23 @@ class CurrencyManager:
 
         return amount
 
+    async def to_usd_many(
+        self,
+        pairs: Iterable[tuple[float, str]],
+    ) -> list[float]:
+        """
+        Пакетная конвертация (сумма, валюта) → USD по снапшоту курсов.
+        Валюты, которых нет в снапшоте, дозапрашиваются по одной на валюту
+        (не на сумму).
+        """
+        pairs = list(pairs)
+        snap = rate_book.current
+        for currency in snap.missing(c for _, c in pairs):
+            rate = await self.get_rate(currency)
+            if rate is not None:
+                snap = rate_book.current
+        return snap.to_usd_many(pairs)
+
     async def from_usd(self, amount_usd: float, currency: str) -> float:
         """Конвертация из USD в другую валюту."""
         currency = currency.upper()
@@ -124,63 +144,57 @@ class CurrencyManager:
         if fixed is not None:
             return fixed
 
-        # 2. Кэш в памяти
+        # 2. Снапшот курсов (обновляется пакетом планировщиком)
+        snap = rate_book.current
+        snap_rate = snap.rate(currency)
+        if snap_rate is not None and snap.is_fresh(self._cache_ttl):
+            return snap_rate
+
+        # 3. Кэш в памяти
         cached = self._cache.get(currency)
         if cached:
             rate, cached_at = cached
             if (datetime.now() - cached_at).total_seconds() < self._cache_ttl:
                 return rate
 
-        # 3. Кэш в БД
+        # 4. Кэш в БД
         db_rate = await self._get_db_rate(currency)
         if db_rate is not None:
             self._cache[currency] = (db_rate, datetime.now())
             return db_rate
 
-        # 4. API (если нет в кэше)
-        api_rate = await self._fetch_from_api(currency)
+        # 5. API (если нет в кэше) — все курсы одним запросом
+        snap = await rate_book.refresh(self._session_factory)
+        api_rate = snap.rate(currency) if snap is not None else None
         if api_rate is not None:
             self._cache[currency] = (api_rate, datetime.now())
-            await self._save_db_rate(currency, api_rate)
             return api_rate
 
         return None
 
     async def update_dynamic_rates(self) -> dict:
         """
-        Обновить все динамические курсы из API.
+        Обновить все динамические курсы из API (снапшот + БД).
         Вызывается планировщиком каждые 6 часов.
         """
-        try:
-            import httpx
-
-            url = config.currency.exchange_api_url
-            async with httpx.AsyncClient(timeout=15) as client:
-                resp = await client.get(url)
-                resp.raise_for_status()
-                data = resp.json()
-
-            rates = data.get("rates", {})
-            updated = 0
-
-            for currency, rate in rates.items():
-                # Пропускаем фиксированные
-                if currency in config.currency.fixed_rates:
-                    continue
+        snap = await rate_book.refresh(self._session_factory)
+        if snap is None:
+            return {"error": "Курсы не обновлены: провайдеры недоступны"}
+
+        now = datetime.now()
+        fixed = config.currency.fixed_rates
+        updated = 0
+        for currency, rate in snap.rates.items():
+            if currency == "USD" or currency in fixed:
+                continue
+            self._cache[currency] = (rate, now)
+            updated += 1
 
-                if currency == "USD":
-                    continue
-
-                await self._save_db_rate(currency, rate)
-                self._cache[currency] = (rate, datetime.now())
-                updated += 1
-
-            logger.info(f"Dynamic rates updated: {updated} currencies")
-            return {"updated": updated, "source": url}
-
-        except Exception as e:
-            logger.error(f"Failed to update rates: {e}")
-            return {"error": str(e)}
+        return {
+            "updated": updated,
+            "source": snap.source,
+            "version": snap.version,
+        }
 
     # ═══════════════════════════════════════════════════════════════════════
     # Форматирование
@@ -223,7 +237,7 @@ class CurrencyManager:
         """Получить курс из БД."""
         from pds_ultimate.core.database import CurrencyRate
 
-        with self._session_factory() as session:
+        def _query(session):
             record = (
                 session.query(CurrencyRate)
                 .filter(
@@ -243,55 +257,6 @@ class CurrencyManager:
                 if age <= 1:  # Актуален в пределах 1 дня
                     return record.rate
 
-        return None
-
-    async def _save_db_rate(self, currency: str, rate: float) -> None:
-        """Сохранить курс в БД."""
-        from pds_ultimate.core.database import CurrencyRate
-
-        with self._session_factory() as session:
-            existing = (
-                session.query(CurrencyRate)
-                .filter(
-                    CurrencyRate.base_currency == "USD",
-                    CurrencyRate.target_currency == currency,
-                    CurrencyRate.rate_date == date.today(),
-                )
-                .first()
-            )
-
-            if existing:
-                existing.rate = rate
-            else:
-                session.add(CurrencyRate(
-                    base_currency="USD",
-                    target_currency=currency,
-                    rate=rate,
-                    is_fixed=False,
-                    rate_date=date.today(),
-                ))
-
-            session.commit()
-
-    async def _fetch_from_api(self, currency: str) -> Optional[float]:
-        """Получить курс из API."""
-        try:
-            import httpx
-
-            url = config.currency.exchange_api_url
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.get(url)
-                resp.raise_for_status()
-                data = resp.json()
-
-            rates = data.get("rates", {})
-            rate = rates.get(currency)
-
-            if rate:
-                logger.info(f"API rate fetched: 1 USD = {rate} {currency}")
-                return float(rate)
-
-        except Exception as e:
-            logger.warning(f"API rate fetch failed for {currency}: {e}")
-
-        return None
+        return await db_executor.run_session(
+            self._session_factory, _query, name="currency.get_db_rate",
+        )
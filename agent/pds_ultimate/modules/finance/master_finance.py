@@ -17,9 +17,10 @@ from typing import Optional
 
 from pds_ultimate.config import (
     MASTER_FINANCE_PATH,
-    config,
     logger,
 )
+from pds_ultimate.core.db_executor import db_executor
+from pds_ultimate.modules.finance.rate_snapshot import rate_book
 
 
 class MasterFinance:
@@ -63,11 +64,11 @@ class MasterFinance:
         if not tx_type:
             return {"error": f"Неизвестный тип транзакции: {transaction_type}"}
 
-        # Конвертация в USD
-        amount_usd = await self._to_usd(amount, currency)
-        rate = amount_usd / amount if amount != 0 else 1.0
+        def _query(session):
+            # Конвертация в USD
+            amount_usd = self._to_usd(session, amount, currency)
+            rate = amount_usd / amount if amount != 0 else 1.0
 
-        with self._session_factory() as session:
             tx = Transaction(
                 order_id=order_id,
                 transaction_type=tx_type,
@@ -83,7 +84,7 @@ class MasterFinance:
             session.commit()
 
             # Пересчитать сводку за текущий месяц
-            await self._update_monthly_summary(session)
+            self._update_monthly_summary(session)
 
             logger.info(
                 f"Transaction recorded: {tx_type.value} "
@@ -98,6 +99,10 @@ class MasterFinance:
                 "amount_usd": round(amount_usd, 2),
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="finance.record_transaction",
+        )
+
     # ═══════════════════════════════════════════════════════════════════════
     # Личные расходы (сканер чеков)
     # ═══════════════════════════════════════════════════════════════════════
@@ -124,28 +129,19 @@ class MasterFinance:
 
     async def get_balance(self) -> dict:
         """Текущий баланс: итого по всем категориям."""
-        from sqlalchemy import func
+        from pds_ultimate.core.aggregates import ledger_totals
 
-        from pds_ultimate.core.database import Transaction, TransactionType
-
-        with self._session_factory() as session:
-            def _sum_type(tx_type: TransactionType) -> float:
-                result = (
-                    session.query(func.sum(Transaction.amount_usd))
-                    .filter(Transaction.transaction_type == tx_type)
-                    .scalar()
-                )
-                return result or 0.0
+        def _query(session):
+            totals = ledger_totals(session)
+            total_income = totals.income
+            total_goods = totals.expense_goods
+            total_delivery = totals.expense_delivery
+            total_personal = totals.expense_personal
+            total_to_expenses = totals.to_expenses
+            total_to_savings = totals.to_savings
 
-            total_income = _sum_type(TransactionType.INCOME)
-            total_goods = _sum_type(TransactionType.EXPENSE_GOODS)
-            total_delivery = _sum_type(TransactionType.EXPENSE_DELIVERY)
-            total_personal = _sum_type(TransactionType.EXPENSE_PERSONAL)
-            total_to_expenses = _sum_type(TransactionType.PROFIT_EXPENSES)
-            total_to_savings = _sum_type(TransactionType.PROFIT_SAVINGS)
-
-            net_profit = total_income - total_goods - total_delivery
-            available = total_to_expenses - total_personal
+            net_profit = totals.net_profit
+            available = totals.available
 
             return {
                 "total_income": round(total_income, 2),
@@ -158,6 +154,28 @@ class MasterFinance:
                 "available_for_expenses": round(available, 2),
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="finance.get_balance",
+        )
+
+    async def verify_ledger(self, repair: bool = True) -> dict:
+        """
+        Сверить леджер балансов с полным пересчётом транзакций.
+        При расхождениях (и repair=True) — перестроить.
+        """
+        from pds_ultimate.core.aggregates import verify_ledger
+
+        drift = await db_executor.run_session(
+            self._session_factory,
+            lambda session: verify_ledger(session, repair=repair),
+            name="finance.verify_ledger",
+        )
+        return {
+            "ok": not drift,
+            "repaired": bool(drift) and repair,
+            "drift": [d.to_dict() for d in drift],
+        }
+
     async def get_monthly_summary(
         self,
         year: Optional[int] = None,
@@ -171,7 +189,7 @@ class MasterFinance:
         if month is None:
             month = date.today().month
 
-        with self._session_factory() as session:
+        def _query(session):
             summary = (
                 session.query(FinanceSummary)
                 .filter(
@@ -205,6 +223,10 @@ class MasterFinance:
                 "orders_completed": summary.orders_completed,
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="finance.get_monthly_summary",
+        )
+
     async def get_recent_transactions(
         self,
         limit: int = 20,
@@ -213,7 +235,7 @@ class MasterFinance:
         """Последние транзакции."""
         from pds_ultimate.core.database import Transaction, TransactionType
 
-        with self._session_factory() as session:
+        def _query(session):
             query = session.query(Transaction)
 
             if tx_type:
@@ -249,6 +271,10 @@ class MasterFinance:
                 for tx in transactions
             ]
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="finance.get_recent_transactions",
+        )
+
     # ═══════════════════════════════════════════════════════════════════════
     # Master Finance Excel
     # ═══════════════════════════════════════════════════════════════════════
@@ -334,27 +360,30 @@ class MasterFinance:
 
             from pds_ultimate.core.database import FinanceSummary
 
-            with self._session_factory() as session:
-                summaries = (
+            summaries = await db_executor.run_session(
+                self._session_factory,
+                lambda session: (
                     session.query(FinanceSummary)
                     .order_by(
                         FinanceSummary.period_year.desc(),
                         FinanceSummary.period_month.desc(),
                     )
                     .all()
-                )
+                ),
+                name="finance.export_summaries",
+            )
 
-                for i, s in enumerate(summaries, 1):
-                    ws3.write(
-                        i, 0, f"{s.period_year}-{s.period_month:02d}", text_fmt)
-                    ws3.write(i, 1, s.total_income, money_fmt)
-                    ws3.write(i, 2, s.total_expense_goods, money_fmt)
-                    ws3.write(i, 3, s.total_expense_delivery, money_fmt)
-                    ws3.write(i, 4, s.total_expense_personal, money_fmt)
-                    ws3.write(i, 5, s.total_net_profit, money_fmt)
-                    ws3.write(i, 6, s.total_to_expenses, money_fmt)
-                    ws3.write(i, 7, s.total_to_savings, money_fmt)
-                    ws3.write(i, 8, s.orders_completed, text_fmt)
+            for i, s in enumerate(summaries, 1):
+                ws3.write(
+                    i, 0, f"{s.period_year}-{s.period_month:02d}", text_fmt)
+                ws3.write(i, 1, s.total_income, money_fmt)
+                ws3.write(i, 2, s.total_expense_goods, money_fmt)
+                ws3.write(i, 3, s.total_expense_delivery, money_fmt)
+                ws3.write(i, 4, s.total_expense_personal, money_fmt)
+                ws3.write(i, 5, s.total_net_profit, money_fmt)
+                ws3.write(i, 6, s.total_to_expenses, money_fmt)
+                ws3.write(i, 7, s.total_to_savings, money_fmt)
+                ws3.write(i, 8, s.orders_completed, text_fmt)
 
             wb.close()
             logger.info(f"Master Finance exported: {path}")
@@ -390,16 +419,15 @@ class MasterFinance:
     # Internal
     # ═══════════════════════════════════════════════════════════════════════
 
-    async def _update_monthly_summary(self, session) -> None:
+    def _update_monthly_summary(self, session) -> None:
         """Пересчитать сводку за текущий месяц."""
         from sqlalchemy import extract, func
 
+        from pds_ultimate.core.aggregates import ledger_totals
         from pds_ultimate.core.database import (
             FinanceSummary,
             Order,
             OrderStatus,
-            Transaction,
-            TransactionType,
         )
 
         today = date.today()
@@ -423,31 +451,14 @@ class MasterFinance:
             )
             session.add(summary)
 
-        def _month_sum(tx_type: TransactionType) -> float:
-            result = (
-                session.query(func.sum(Transaction.amount_usd))
-                .filter(
-                    Transaction.transaction_type == tx_type,
-                    extract("year", Transaction.transaction_date) == year,
-                    extract("month", Transaction.transaction_date) == month,
-                )
-                .scalar()
-            )
-            return result or 0.0
-
-        summary.total_income = _month_sum(TransactionType.INCOME)
-        summary.total_expense_goods = _month_sum(TransactionType.EXPENSE_GOODS)
-        summary.total_expense_delivery = _month_sum(
-            TransactionType.EXPENSE_DELIVERY)
-        summary.total_expense_personal = _month_sum(
-            TransactionType.EXPENSE_PERSONAL)
-        summary.total_net_profit = (
-            summary.total_income
-            - summary.total_expense_goods
-            - summary.total_expense_delivery
-        )
-        summary.total_to_expenses = _month_sum(TransactionType.PROFIT_EXPENSES)
-        summary.total_to_savings = _month_sum(TransactionType.PROFIT_SAVINGS)
+        totals = ledger_totals(session, year, month)
+        summary.total_income = totals.income
+        summary.total_expense_goods = totals.expense_goods
+        summary.total_expense_delivery = totals.expense_delivery
+        summary.total_expense_personal = totals.expense_personal
+        summary.total_net_profit = totals.net_profit
+        summary.total_to_expenses = totals.to_expenses
+        summary.total_to_savings = totals.to_savings
 
         # Количество закрытых заказов за месяц
         completed = (
@@ -464,30 +475,6 @@ class MasterFinance:
 
         session.commit()
 
-    async def _to_usd(self, amount: float, currency: str) -> float:
-        """Конвертация в USD."""
-        if currency == "USD":
-            return amount
-
-        from pds_ultimate.core.database import CurrencyRate
-
-        with self._session_factory() as session:
-            rate_record = (
-                session.query(CurrencyRate)
-                .filter(
-                    CurrencyRate.base_currency == "USD",
-                    CurrencyRate.target_currency == currency,
-                )
-                .order_by(CurrencyRate.rate_date.desc())
-                .first()
-            )
-
-            if rate_record and rate_record.rate > 0:
-                return amount / rate_record.rate
-
-        fixed = config.currency.fixed_rates.get(currency)
-        if fixed and fixed > 0:
-            return amount / fixed
-
-        logger.warning(f"No rate for {currency}/USD")
-        return amount
+    def _to_usd(self, session, amount: float, currency: str) -> float:
+        """Конвертация в USD по снапшоту курсов (без запроса на каждую сумму)."""
+        return rate_book.snapshot(session).to_usd(amount, currency)
@@ -20,6 +20,7 @@ from __future__ import annotations
 from typing import Optional
 
 from pds_ultimate.config import config
+from pds_ultimate.core.db_executor import db_executor
 
 
 class ProfitCalculator:
@@ -83,7 +84,7 @@ class ProfitCalculator:
         """Аналитика прибыли за N последних месяцев."""
         from pds_ultimate.core.database import FinanceSummary
 
-        with self._session_factory() as session:
+        def _query(session):
             summaries = (
                 session.query(FinanceSummary)
                 .order_by(
@@ -126,6 +127,10 @@ class ProfitCalculator:
                 "period": f"Последние {len(summaries)} мес.",
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="profit.get_profit_analytics",
+        )
+
     async def get_order_profitability(
         self,
         limit: int = 10,
@@ -133,7 +138,7 @@ class ProfitCalculator:
         """Топ заказов по прибыльности."""
         from pds_ultimate.core.database import Order, OrderStatus
 
-        with self._session_factory() as session:
+        def _query(session):
             orders = (
                 session.query(Order)
                 .filter(
@@ -166,6 +171,10 @@ class ProfitCalculator:
                 for o in orders
             ]
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="profit.get_order_profitability",
+        )
+
     # ═══════════════════════════════════════════════════════════════════════
     # Форматирование
     # ═══════════════════════════════════════════════════════════════════════
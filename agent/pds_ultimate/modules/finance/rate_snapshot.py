@@ -0,0 +1,343 @@
+"""
+PDS-Ultimate Rate Snapshot
+=============================
+Снапшот курсов валют: один объект на все конвертации.
+
+Раньше каждая сумма конвертировалась отдельно: _to_usd делал запрос
+CurrencyRate в БД на каждую строку, CurrencyManager.get_rate при
+промахе ходил в API за одной валютой. Здесь:
+- RateSnapshot — неизменяемый словарь «валюта → единиц за 1 USD»
+  (фиксированные курсы из config + динамические), версия = метка
+  времени снимка в миллисекундах
+- RateBook — держатель текущего снапшота: публикация атомарно
+  (замена ссылки), последние снимки доступны по версии (at)
+- Обновление пакетом: ExchangeRateService.refresh_all — все курсы
+  одним запросом, затем одна транзакция в CurrencyRate
+  (задача планировщика builtin_refresh_rates)
+- До первого обновления — последние курсы из БД одним GROUP BY
+  (snapshot(session) при первом обращении)
+- to_usd_many / convert_many — массив (сумма, валюта) за один вызов
+- subscribe — подписка на изменённые курсы (событийные триггеры,
+  core/smart_triggers.py)
+
+Использование:
+    snap = rate_book.snapshot(session)
+    income, expense = snap.to_usd_many([(1950, "TMT"), (71, "CNY")])
+    snap.version      # для логов и аудита
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Callable, Iterable, Mapping, Optional
+
+from pds_ultimate.config import config, logger
+
+
+def _fixed_rates() -> dict[str, float]:
+    rates = {c.upper(): float(r) for c, r in config.currency.fixed_rates.items()}
+    rates["USD"] = 1.0
+    return rates
+
+
+@dataclass(frozen=True)
+class RateSnapshot:
+    """Неизменяемый снимок курсов к USD."""
+    rates: Mapping[str, float]
+    taken_at: datetime = field(default_factory=datetime.now)
+    source: str = "fixed"
+    version: int = 0
+
+    # ─── Курсы ───────────────────────────────────────────────────────────
+
+    def rate(self, currency: str) -> Optional[float]:
+        """Сколько единиц currency за 1 USD (None — курса нет)."""
+        rate = self.rates.get((currency or "USD").upper())
+        return rate if rate and rate > 0 else None
+
+    def has(self, currency: str) -> bool:
+        return self.rate(currency) is not None
+
+    def missing(self, currencies: Iterable[str]) -> set[str]:
+        """Валюты, для которых в снимке нет курса."""
+        return {c.upper() for c in currencies if not self.has(c)}
+
+    @property
+    def age_seconds(self) -> float:
+        return (datetime.now() - self.taken_at).total_seconds()
+
+    def is_fresh(self, ttl: Optional[float] = None) -> bool:
+        ttl = config.currency.cache_ttl if ttl is None else ttl
+        return self.age_seconds < ttl
+
+    # ─── Конвертация ─────────────────────────────────────────────────────
+
+    def to_usd(self, amount: float, currency: str) -> float:
+        """
+        Сумма в USD. Нет курса — сумма как есть (как прежний _to_usd),
+        с предупреждением в лог.
+        """
+        return self.to_usd_many([(amount, currency)])[0]
+
+    def to_usd_many(
+        self,
+        pairs: Iterable[tuple[float, str]],
+    ) -> list[float]:
+        """Массив (сумма, валюта) → суммы в USD, порядок сохраняется."""
+        pairs = list(pairs)
+        # Курс на каждую валюту ищется один раз на весь массив
+        divisors = {
+            cur: self.rate(cur)
+            for cur in {(c or "USD").upper() for _, c in pairs}
+        }
+        unknown = sorted(c for c, r in divisors.items() if r is None)
+        if unknown:
+            logger.warning(
+                f"Нет курса для {', '.join(unknown)}/USD "
+                f"(снимок v{self.version}), суммы без конвертации"
+            )
+        return [
+            amount / (divisors[(cur or "USD").upper()] or 1.0)
+            for amount, cur in pairs
+        ]
+
+    def convert_many(
+        self,
+        pairs: Iterable[tuple[float, str]],
+        to_currency: str = "USD",
+    ) -> list[float]:
+        """Массив (сумма, валюта) → суммы в to_currency (через USD)."""
+        usd = self.to_usd_many(pairs)
+        target = self.rate(to_currency)
+        if target is None:
+            raise ValueError(f"Курс не найден: {to_currency}")
+        return [amount * target for amount in usd]
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "taken_at": self.taken_at.isoformat(),
+            "source": self.source,
+            "currencies": len(self.rates),
+            "age_seconds": round(self.age_seconds, 1),
+        }
+
+
+class RateBook:
+    """
+    Держатель текущего снапшота курсов.
+
+    snapshot() читается из любого потока (потоки db_executor) без
+    блокировок: снимок неизменяем, публикация — замена ссылки.
+    """
+
+    def __init__(self, history: int = 8):
+        self._snapshot = RateSnapshot(rates=_fixed_rates())
+        self._history: deque[RateSnapshot] = deque(
+            [self._snapshot], maxlen=history,
+        )
+        self._lock = threading.Lock()
+        self._db_loaded = False
+        self._refreshes = 0
+        self._errors = 0
+        self._listeners: list[Callable[[RateSnapshot, dict], None]] = []
+
+    # ─── Чтение ──────────────────────────────────────────────────────────
+
+    @property
+    def current(self) -> RateSnapshot:
+        return self._snapshot
+
+    def snapshot(self, session=None) -> RateSnapshot:
+        """
+        Текущий снимок. С session и без единого обновления — сначала
+        последние курсы из БД (один запрос на все валюты, один раз).
+        """
+        if session is not None and not self._db_loaded:
+            self.load_from_db(session)
+        return self._snapshot
+
+    def at(self, version: int) -> Optional[RateSnapshot]:
+        """Снимок по версии (из последних history)."""
+        for snap in self._history:
+            if snap.version == version:
+                return snap
+        return None
+
+    # ─── Публикация ──────────────────────────────────────────────────────
+
+    def subscribe(
+        self,
+        listener: Callable[[RateSnapshot, dict], None],
+    ) -> None:
+        """
+        listener(snap, changed) после каждой публикации, где changed —
+        только валюты, курс которых изменился. Вызывается в потоке
+        публикации, поэтому должен быть быстрым.
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def publish(
+        self,
+        rates: Mapping[str, float],
+        source: str,
+        taken_at: Optional[datetime] = None,
+    ) -> RateSnapshot:
+        """
+        Опубликовать новый снимок. Динамические курсы прошлого снимка,
+        которых нет в rates, сохраняются; фиксированные не перезаписываются.
+        """
+        taken_at = taken_at or datetime.now()
+        with self._lock:
+            previous = self._snapshot.rates
+            merged = dict(previous)
+            merged.update(
+                (c.upper(), float(r)) for c, r in rates.items() if r and r > 0
+            )
+            merged.update(_fixed_rates())
+            # Версия монотонна даже при двух снимках в одну миллисекунду
+            version = max(
+                int(taken_at.timestamp() * 1000), self._snapshot.version + 1,
+            )
+            snap = RateSnapshot(
+                rates=merged, taken_at=taken_at,
+                source=source, version=version,
+            )
+            self._snapshot = snap
+            self._history.append(snap)
+            self._db_loaded = True
+
+        changed = {c: r for c, r in merged.items() if previous.get(c) != r}
+        if changed:
+            for listener in list(self._listeners):
+                try:
+                    listener(snap, changed)
+                except Exception as e:
+                    logger.warning(f"Подписчик курсов упал: {e}")
+        return snap
+
+    def load_from_db(self, session) -> RateSnapshot:
+        """Последний курс каждой валюты из CurrencyRate — один запрос."""
+        from sqlalchemy import and_, func
+
+        from pds_ultimate.core.database import CurrencyRate
+
+        latest = (
+            session.query(
+                CurrencyRate.target_currency.label("currency"),
+                func.max(CurrencyRate.rate_date).label("rate_date"),
+            )
+            .filter(CurrencyRate.base_currency == "USD")
+            .group_by(CurrencyRate.target_currency)
+            .subquery()
+        )
+        rows = (
+            session.query(CurrencyRate.target_currency, CurrencyRate.rate)
+            .join(latest, and_(
+                CurrencyRate.target_currency == latest.c.currency,
+                CurrencyRate.rate_date == latest.c.rate_date,
+            ))
+            .filter(CurrencyRate.base_currency == "USD")
+            .all()
+        )
+        with self._lock:
+            if self._db_loaded:
+                return self._snapshot
+        if not rows:
+            self._db_loaded = True
+            return self._snapshot
+        return self.publish(dict(rows), source="db")
+
+    async def refresh(self, session_factory=None) -> Optional[RateSnapshot]:
+        """
+        Обновить все курсы одним запросом к провайдеру и сохранить
+        их в CurrencyRate одной транзакцией.
+        """
+        from pds_ultimate.integrations.exchange_rates import exchange_service
+
+        start = time.monotonic()
+        result = await exchange_service.refresh_all()
+        if result.error:
+            self._errors += 1
+            logger.warning(f"Курсы не обновлены: {result.error}")
+            return None
+
+        snap = self.publish(
+            {c: info.rate for c, info in result.rates.items()
+             if not info.is_fixed},
+            source=result.source,
+            taken_at=result.fetched_at,
+        )
+        self._refreshes += 1
+
+        if session_factory is not None:
+            from pds_ultimate.core.db_executor import db_executor
+
+            await db_executor.run_session(
+                session_factory,
+                lambda session: save_snapshot(session, snap),
+                name="rates.save_snapshot",
+            )
+
+        logger.info(
+            f"Снимок курсов v{snap.version}: {len(snap.rates)} валют "
+            f"из {snap.source}, {(time.monotonic() - start) * 1000:.0f}мс"
+        )
+        return snap
+
+    def get_stats(self) -> dict:
+        return {
+            **self._snapshot.to_dict(),
+            "db_loaded": self._db_loaded,
+            "refreshes": self._refreshes,
+            "errors": self._errors,
+            "history": [s.version for s in self._history],
+        }
+
+
+def save_snapshot(session, snap: RateSnapshot) -> int:
+    """Записать динамические курсы снимка за сегодня (upsert пакетом)."""
+    from pds_ultimate.core.database import CurrencyRate
+
+    fixed = _fixed_rates()
+    dynamic = {c: r for c, r in snap.rates.items() if c not in fixed}
+    if not dynamic:
+        return 0
+
+    today = date.today()
+    existing = {
+        row.target_currency: row
+        for row in session.query(CurrencyRate).filter(
+            CurrencyRate.base_currency == "USD",
+            CurrencyRate.rate_date == today,
+            CurrencyRate.target_currency.in_(list(dynamic)),
+        )
+    }
+    for currency, rate in dynamic.items():
+        row = existing.get(currency)
+        if row is not None:
+            row.rate = rate
+        else:
+            session.add(CurrencyRate(
+                base_currency="USD",
+                target_currency=currency,
+                rate=rate,
+                is_fixed=False,
+                rate_date=today,
+            ))
+    session.commit()
+    return len(dynamic)
+
+
+# ─── Глобальный экземпляр ────────────────────────────────────────────────────
+
+rate_book = RateBook()
@@ -11,11 +11,13 @@ PDS-Ultimate Sync Engine
 
 from __future__ import annotations
 
+import asyncio
 import os
 from datetime import date, datetime
 from typing import Optional
 
 from pds_ultimate.config import MASTER_FINANCE_PATH, logger
+from pds_ultimate.core.db_executor import db_executor
 
 
 class SyncEngine:
@@ -76,6 +78,12 @@ class SyncEngine:
 
         if file_path is None:
             file_path = str(ALL_ORDERS_ARCHIVE_PATH)
+            # XLSX собирается из журнала архива — довести до актуального
+            from pds_ultimate.modules.logistics.archive_sink import archive_sink
+            try:
+                await asyncio.to_thread(archive_sink.ensure_xlsx)
+            except Exception as e:
+                logger.warning(f"Archive XLSX export failed: {e}")
 
         if not os.path.exists(file_path):
             return {"error": "Архивный файл не найден"}
@@ -97,7 +105,7 @@ class SyncEngine:
             # Очистить таблицу archived_order_items
             from pds_ultimate.core.database import ArchivedOrderItem
 
-            with self._session_factory() as session:
+            def _query(session):
                 session.query(ArchivedOrderItem).delete()
 
                 # Загрузить из файла
@@ -149,9 +157,18 @@ class SyncEngine:
                     imported += 1
 
                 session.commit()
+                return imported
+
+            imported = await db_executor.run_session(
+                self._session_factory, _query, name="sync.sync_archive",
+            )
 
             wb.close()
 
+            # Журнал архива = файл, иначе следующий экспорт затрёт правки
+            from pds_ultimate.modules.logistics.archive_sink import archive_sink
+            await asyncio.to_thread(archive_sink.replace_from_xlsx, file_path)
+
             logger.info(f"Archive synced: {imported} items from {file_path}")
             return {
                 "status": "ok",
@@ -169,7 +186,11 @@ class SyncEngine:
 
     async def _sync_transactions_sheet(self, ws) -> dict:
         """Синхронизация листа транзакций: файл → БД."""
-        from pds_ultimate.core.database import Transaction, TransactionType
+        from pds_ultimate.core.database import (
+            LedgerBalance,
+            Transaction,
+            TransactionType,
+        )
 
         headers = [cell.value for cell in ws[1]]
         if not headers:
@@ -184,9 +205,11 @@ class SyncEngine:
             "profit_savings": TransactionType.PROFIT_SAVINGS,
         }
 
-        with self._session_factory() as session:
+        def _query(session):
             # Удаляем старые транзакции (файл = эталон)
+            # Bulk delete минует хуки маппера — леджер обнуляем сами
             session.query(Transaction).delete()
+            session.query(LedgerBalance).delete()
 
             imported = 0
             for row in ws.iter_rows(min_row=2, values_only=True):
@@ -216,7 +239,11 @@ class SyncEngine:
                 imported += 1
 
             session.commit()
+            return imported
 
+        imported = await db_executor.run_session(
+            self._session_factory, _query, name="sync.sync_transactions_sheet",
+        )
         return {"imported": imported}
 
     # ═══════════════════════════════════════════════════════════════════════
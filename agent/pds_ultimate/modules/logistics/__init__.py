@@ -4,9 +4,11 @@ Logistics Module
 - ItemTracker: Трекинг позиций (T+4, вторники)
 - DeliveryCalculator: Распределение доставки
 - ArchiveManager: Архивация в БД + Excel
+- ArchiveSink: Append-only журнал архива → XLSX
 """
 
 from pds_ultimate.modules.logistics.archive import ArchiveManager
+from pds_ultimate.modules.logistics.archive_sink import ArchiveSink, archive_sink
 from pds_ultimate.modules.logistics.delivery_calc import DeliveryCalculator
 from pds_ultimate.modules.logistics.item_tracker import ItemTracker
 from pds_ultimate.modules.logistics.order_manager import OrderManager
@@ -16,4 +18,6 @@ __all__ = [
     "ItemTracker",
     "DeliveryCalculator",
     "ArchiveManager",
+    "ArchiveSink",
+    "archive_sink",
 ]
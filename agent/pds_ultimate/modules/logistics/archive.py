@@ -5,7 +5,8 @@ PDS-Ultimate Archive Manager
 
 По ТЗ:
 1. Все позиции закрытого заказа → копируются в ЕДИНЫЙ АРХИВНЫЙ ФАЙЛ
-   (All_Orders_Archive.xlsx) — хранит ВСЕ заказы за ВСЁ время
+   (All_Orders_Archive.xlsx) — хранит ВСЕ заказы за ВСЁ время.
+   Запись — append в журнал (archive_sink), XLSX собирается из него
 2. Только после успешного сохранения в архив → временный файл удаляется
 3. Итоговые суммы → переносятся в Master_Finance.xlsx
 """
@@ -20,6 +21,8 @@ from pds_ultimate.config import (
     ALL_ORDERS_ARCHIVE_PATH,
     logger,
 )
+from pds_ultimate.core.db_executor import db_executor
+from pds_ultimate.modules.logistics.archive_sink import archive_sink
 
 
 class ArchiveManager:
@@ -34,7 +37,7 @@ class ArchiveManager:
         """
         Полный цикл архивации заказа:
         1. Копировать позиции в archived_order_items (БД)
-        2. Записать в All_Orders_Archive.xlsx
+        2. Дописать в журнал архива (→ All_Orders_Archive.xlsx)
         3. Удалить временный Excel-файл
         4. Установить статус ARCHIVED
         """
@@ -45,7 +48,7 @@ class ArchiveManager:
             OrderStatus,
         )
 
-        with self._session_factory() as session:
+        def _query(session):
             order = session.query(Order).filter(Order.id == order_id).first()
             if not order:
                 return {"error": "Заказ не найден"}
@@ -91,14 +94,14 @@ class ArchiveManager:
                 session.add(archived)
                 archived_items.append(archived)
 
-            # 2. Запись в Excel-архив
-            archive_ok = await self._write_to_archive_excel(
+            # 2. Запись в журнал архива
+            archive_ok = self._write_to_archive_excel(
                 order, items, supplier_name, client_name
             )
 
             if not archive_ok:
                 session.rollback()
-                return {"error": "Ошибка записи в архивный Excel"}
+                return {"error": "Ошибка записи в архив"}
 
             # 3. Удаление временного файла
             if order.temp_file_path and os.path.exists(order.temp_file_path):
@@ -126,11 +129,15 @@ class ArchiveManager:
                 "temp_file_deleted": True,
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="archive.archive_order",
+        )
+
     async def get_archive_stats(self) -> dict:
         """Статистика архива."""
         from pds_ultimate.core.database import ArchivedOrderItem
 
-        with self._session_factory() as session:
+        def _query(session):
             total_items = session.query(ArchivedOrderItem).count()
 
             # Уникальные заказы
@@ -153,30 +160,36 @@ class ArchiveManager:
                 "total_items": total_items,
                 "total_profit": round(total_profit, 2),
                 "archive_file": str(ALL_ORDERS_ARCHIVE_PATH),
-                "archive_exists": ALL_ORDERS_ARCHIVE_PATH.exists(),
+                "archive_exists": (
+                    ALL_ORDERS_ARCHIVE_PATH.exists()
+                    or archive_sink.log_path.exists()
+                ),
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="archive.get_archive_stats",
+        )
+
     async def search_archive(
         self,
         query: str,
         limit: int = 50,
     ) -> list[dict]:
-        """Поиск в архиве по тексту."""
+        """Поиск в архиве по тексту (FTS, по убыванию релевантности)."""
         from pds_ultimate.core.database import ArchivedOrderItem
-
-        with self._session_factory() as session:
-            items = (
-                session.query(ArchivedOrderItem)
-                .filter(
-                    ArchivedOrderItem.order_number.ilike(f"%{query}%")
-                    | ArchivedOrderItem.item_name.ilike(f"%{query}%")
-                    | ArchivedOrderItem.supplier_name.ilike(f"%{query}%")
-                    | ArchivedOrderItem.client_name.ilike(f"%{query}%")
-                )
-                .order_by(ArchivedOrderItem.archived_date.desc())
-                .limit(limit)
+        from pds_ultimate.core.search_index import search_ids
+
+        def _query(session):
+            ids = search_ids(session, "archive", query, limit)
+            if not ids:
+                return []
+            by_id = {
+                it.id: it
+                for it in session.query(ArchivedOrderItem)
+                .filter(ArchivedOrderItem.id.in_(ids))
                 .all()
-            )
+            }
+            items = [by_id[i] for i in ids if i in by_id]
 
             return [
                 {
@@ -195,11 +208,15 @@ class ArchiveManager:
                 for it in items
             ]
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="archive.search_archive",
+        )
+
     # ═══════════════════════════════════════════════════════════════════════
     # Excel Archive
     # ═══════════════════════════════════════════════════════════════════════
 
-    async def _write_to_archive_excel(
+    def _write_to_archive_excel(
         self,
         order,
         items: list,
@@ -207,50 +224,13 @@ class ArchiveManager:
         client_name: Optional[str],
     ) -> bool:
         """
-        Записать позиции закрытого заказа в All_Orders_Archive.xlsx.
-        Если файл существует → добавить строки.
-        Если нет → создать с заголовками.
+        Дописать позиции закрытого заказа в журнал архива (archive_sink).
+        All_Orders_Archive.xlsx пересобирается из журнала потоково —
+        по требованию или фоновой задачей планировщика.
         """
         try:
-            import openpyxl
-
-            archive_path = str(ALL_ORDERS_ARCHIVE_PATH)
-
-            if os.path.exists(archive_path):
-                wb = openpyxl.load_workbook(archive_path)
-                ws = wb.active
-            else:
-                wb = openpyxl.Workbook()
-                ws = wb.active
-                ws.title = "Archive"
-
-                # Заголовки
-                headers = [
-                    "Заказ", "Дата заказа", "Дата закрытия", "Дата архивации",
-                    "Поставщик", "Клиент",
-                    "Позиция", "Кол-во", "Ед.", "Цена/ед.", "Валюта",
-                    "Трек-номер", "Дата прибытия",
-                    "Доставка", "Итого",
-                    "Доход заказа", "Расход товар", "Доставка заказа",
-                    "Чистая прибыль",
-                ]
-                ws.append(headers)
-
-                # Стиль заголовков
-                from openpyxl.styles import Font, PatternFill
-                for col in range(1, len(headers) + 1):
-                    cell = ws.cell(row=1, column=col)
-                    cell.font = Font(bold=True)
-                    cell.fill = PatternFill(
-                        start_color="4472C4",
-                        end_color="4472C4",
-                        fill_type="solid",
-                    )
-                    cell.font = Font(bold=True, color="FFFFFF")
-
-            # Добавление строк
-            for item in items:
-                row = [
+            rows = [
+                [
                     order.order_number,
                     order.order_date.isoformat() if order.order_date else "",
                     order.completed_date.isoformat() if order.completed_date else "",
@@ -271,17 +251,18 @@ class ArchiveManager:
                     order.delivery_cost,
                     order.net_profit,
                 ]
-                ws.append(row)
+                for item in items
+            ]
 
-            wb.save(archive_path)
+            archive_sink.append(rows)
             logger.info(
-                f"Archive Excel updated: {len(items)} rows added "
+                f"Archive log updated: {len(rows)} rows added "
                 f"for order #{order.order_number}"
             )
             return True
 
         except Exception as e:
-            logger.error(f"Failed to write archive Excel: {e}")
+            logger.error(f"Failed to write archive log: {e}")
             return False
 
     def format_archive_stats(self, stats: dict) -> str:
@@ -0,0 +1,300 @@
+"""
+PDS-Ultimate Archive Sink
+============================
+Append-only хранилище строк архива заказов.
+
+All_Orders_Archive.xlsx больше не переписывается целиком на каждый
+archive_order:
+- Строки закрытого заказа дописываются одним блоком в журнал
+  All_Orders_Archive.jsonl (append + fsync) — O(размер заказа),
+  не O(размер архива)
+- XLSX собирается из журнала потоково (xlsxwriter, constant_memory):
+  по требованию (ensure_xlsx) или фоновой задачей планировщика
+- Старый XLSX без журнала импортируется в журнал один раз
+
+Использование:
+    archive_sink.append(rows)        # list[list] — строки по ARCHIVE_HEADERS
+    archive_sink.ensure_xlsx()       # актуальный XLSX перед чтением/отправкой
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterator, Optional
+
+from pds_ultimate.config import (
+    ALL_ORDERS_ARCHIVE_LOG_PATH,
+    ALL_ORDERS_ARCHIVE_PATH,
+    logger,
+)
+
+ARCHIVE_HEADERS = [
+    "Заказ", "Дата заказа", "Дата закрытия", "Дата архивации",
+    "Поставщик", "Клиент",
+    "Позиция", "Кол-во", "Ед.", "Цена/ед.", "Валюта",
+    "Трек-номер", "Дата прибытия",
+    "Доставка", "Итого",
+    "Доход заказа", "Расход товар", "Доставка заказа",
+    "Чистая прибыль",
+]
+
+_HEADER_COLOR = "#4472C4"
+
+
+class ArchiveSink:
+    """
+    Журнал архива (JSON Lines) + ленивый экспорт в XLSX.
+
+    Каждая строка журнала — JSON-массив значений в порядке ARCHIVE_HEADERS.
+    Экспорт актуален, пока размер журнала совпадает с размером
+    на момент последней сборки XLSX.
+    """
+
+    def __init__(
+        self,
+        log_path: Path | str = ALL_ORDERS_ARCHIVE_LOG_PATH,
+        xlsx_path: Path | str = ALL_ORDERS_ARCHIVE_PATH,
+    ):
+        self._log_path = Path(log_path)
+        self._xlsx_path = Path(xlsx_path)
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._migrated = False
+        self._exported_size: Optional[int] = None
+        self._rows_appended = 0
+        self._exports = 0
+
+    @property
+    def log_path(self) -> Path:
+        return self._log_path
+
+    @property
+    def xlsx_path(self) -> Path:
+        return self._xlsx_path
+
+    # ─── Запись ──────────────────────────────────────────────────────────
+
+    def append(self, rows: list[list]) -> None:
+        """
+        Дописать строки одного заказа в журнал.
+        Возвращает управление только после fsync — строки на диске.
+        """
+        if not rows:
+            return
+        payload = "".join(
+            json.dumps(row, ensure_ascii=False, default=str) + "\n"
+            for row in rows
+        )
+        with self._lock:
+            self._migrate_legacy()
+            self._log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._log_path, "a", encoding="utf-8") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            self._rows_appended += len(rows)
+
+    def iter_rows(self) -> Iterator[list]:
+        """Построчное чтение журнала (битые строки пропускаются)."""
+        with self._lock:
+            self._migrate_legacy()
+        if not self._log_path.exists():
+            return
+        with open(self._log_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Archive log: skipped corrupt line")
+
+    def forget_state(self) -> None:
+        """Сбросить кэш состояния (файлы подменены/удалены извне)."""
+        with self._lock:
+            self._exported_size = None
+            self._migrated = False
+
+    # ─── Экспорт XLSX ────────────────────────────────────────────────────
+
+    @property
+    def is_dirty(self) -> bool:
+        """XLSX отстаёт от журнала (или ещё не создан)."""
+        log_size = self._log_size()
+        if log_size == 0 and not self._xlsx_path.exists():
+            return False
+        if not self._xlsx_path.exists():
+            return True
+        return self._exported_size != log_size
+
+    def ensure_xlsx(self) -> Path:
+        """Пересобрать XLSX, если журнал изменился с последнего экспорта."""
+        with self._lock:
+            self._migrate_legacy()
+        if self.is_dirty:
+            self.export_xlsx()
+        return self._xlsx_path
+
+    def export_xlsx(self, path: Optional[Path | str] = None) -> Path:
+        """
+        Потоковая сборка XLSX из журнала.
+        Пишется во временный файл и атомарно подменяет целевой.
+        """
+        target = Path(path) if path else self._xlsx_path
+        tmp = target.with_name(target.name + ".tmp")
+
+        with self._export_lock:
+            size_before = self._log_size()
+            try:
+                count = self._write_xlsxwriter(tmp)
+            except ImportError:
+                count = self._write_openpyxl(tmp)
+            os.replace(tmp, target)
+
+            if target == self._xlsx_path:
+                self._exported_size = size_before
+            self._exports += 1
+
+        logger.info(f"Archive XLSX exported: {count} rows → {target}")
+        return target
+
+    def _write_xlsxwriter(self, path: Path) -> int:
+        import xlsxwriter
+
+        wb = xlsxwriter.Workbook(str(path), {"constant_memory": True})
+        try:
+            ws = wb.add_worksheet("Archive")
+            header_fmt = wb.add_format({
+                "bold": True,
+                "font_color": "#FFFFFF",
+                "bg_color": _HEADER_COLOR,
+            })
+            ws.write_row(0, 0, ARCHIVE_HEADERS, header_fmt)
+            count = 0
+            for row in self.iter_rows():
+                count += 1
+                ws.write_row(count, 0, row)
+        finally:
+            wb.close()
+        return count
+
+    def _write_openpyxl(self, path: Path) -> int:
+        """Fallback без xlsxwriter: openpyxl в write_only-режиме."""
+        import openpyxl
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill
+
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Archive")
+        fill = PatternFill(
+            start_color=_HEADER_COLOR[1:],
+            end_color=_HEADER_COLOR[1:],
+            fill_type="solid",
+        )
+        header = []
+        for title in ARCHIVE_HEADERS:
+            cell = WriteOnlyCell(ws, value=title)
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.fill = fill
+            header.append(cell)
+        ws.append(header)
+
+        count = 0
+        for row in self.iter_rows():
+            ws.append(row)
+            count += 1
+        wb.save(str(path))
+        return count
+
+    async def export_if_dirty(self) -> bool:
+        """Фоновая пересборка (для планировщика), вне event loop."""
+        import asyncio
+
+        if not self.is_dirty:
+            return False
+        await asyncio.to_thread(self.export_xlsx)
+        return True
+
+    # ─── Миграция ────────────────────────────────────────────────────────
+
+    def _migrate_legacy(self) -> None:
+        """
+        Однократный импорт старого XLSX в журнал (вызывать под self._lock).
+        Журнал уже есть или XLSX нет — ничего не делаем.
+        """
+        if self._migrated:
+            return
+        self._migrated = True
+        if self._log_path.exists() or not self._xlsx_path.exists():
+            return
+
+        try:
+            count = self._import_xlsx(self._xlsx_path)
+        except ImportError:
+            logger.warning("Archive sink: openpyxl недоступен, миграция пропущена")
+            return
+        logger.info(f"Archive sink: imported {count} rows from legacy XLSX")
+
+    def replace_from_xlsx(self, path: Path | str) -> int:
+        """
+        Перезаписать журнал содержимым XLSX (Sync Logic: файл = эталон).
+        Следующий экспорт не затрёт правки владельца.
+        """
+        with self._lock:
+            self._migrated = True
+            return self._import_xlsx(Path(path))
+
+    def _import_xlsx(self, path: Path) -> int:
+        import openpyxl
+
+        tmp = self._log_path.with_name(self._log_path.name + ".tmp")
+        self._log_path.parent.mkdir(parents=True, exist_ok=True)
+        count = 0
+        wb = openpyxl.load_workbook(str(path), read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            with open(tmp, "w", encoding="utf-8") as f:
+                for row in ws.iter_rows(min_row=2, values_only=True):
+                    if not row or row[0] is None:
+                        continue
+                    f.write(json.dumps(
+                        list(row), ensure_ascii=False, default=str,
+                    ) + "\n")
+                    count += 1
+                f.flush()
+                os.fsync(f.fileno())
+        finally:
+            wb.close()
+        os.replace(tmp, self._log_path)
+        if path == self._xlsx_path:
+            # Существующий XLSX соответствует журналу
+            self._exported_size = self._log_size()
+        else:
+            self._exported_size = None
+        return count
+
+    # ─── Служебное ───────────────────────────────────────────────────────
+
+    def _log_size(self) -> int:
+        try:
+            return self._log_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def get_stats(self) -> dict:
+        return {
+            "log_path": str(self._log_path),
+            "log_bytes": self._log_size(),
+            "xlsx_path": str(self._xlsx_path),
+            "dirty": self.is_dirty,
+            "rows_appended": self._rows_appended,
+            "exports": self._exports,
+        }
+
+
+# Глобальный экземпляр
+archive_sink = ArchiveSink()
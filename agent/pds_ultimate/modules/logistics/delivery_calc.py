@@ -10,6 +10,8 @@ PDS-Ultimate Delivery Calculator
 
 from __future__ import annotations
 
+from pds_ultimate.core.db_executor import db_executor
+
 
 class DeliveryCalculator:
     """
@@ -31,7 +33,7 @@ class DeliveryCalculator:
         """
         from pds_ultimate.core.database import OrderItem
 
-        with self._session_factory() as session:
+        def _query(session):
             items = (
                 session.query(OrderItem)
                 .filter(OrderItem.order_id == order_id)
@@ -64,6 +66,10 @@ class DeliveryCalculator:
                 ],
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="delivery.calculate_total_delivery",
+        )
+
     async def set_per_item_delivery(
         self,
         order_id: int,
@@ -75,7 +81,7 @@ class DeliveryCalculator:
         """
         from pds_ultimate.core.database import OrderItem
 
-        with self._session_factory() as session:
+        def _query(session):
             total = 0.0
             updated = []
 
@@ -103,11 +109,15 @@ class DeliveryCalculator:
                 "items": updated,
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="delivery.set_per_item_delivery",
+        )
+
     async def get_delivery_summary(self, order_id: int) -> dict:
         """Получить сводку по доставке заказа."""
         from pds_ultimate.core.database import Order, OrderItem
 
-        with self._session_factory() as session:
+        def _query(session):
             order = session.query(Order).filter(Order.id == order_id).first()
             if not order:
                 return {"error": "Заказ не найден"}
@@ -138,6 +148,10 @@ class DeliveryCalculator:
                 "items": items_data,
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="delivery.get_delivery_summary",
+        )
+
     def format_delivery_question(self, order_data: dict) -> str:
         """Сформировать вопрос о способе ввода доставки."""
         items = order_data.get("items", [])
@@ -16,6 +16,7 @@ from datetime import date, datetime, timedelta
 from typing import Optional
 
 from pds_ultimate.config import config, logger
+from pds_ultimate.core.db_executor import db_executor
 
 
 class ItemTracker:
@@ -39,7 +40,7 @@ class ItemTracker:
 
         today = date.today()
 
-        with self._session_factory() as session:
+        def _query(session):
             items = (
                 session.query(OrderItem)
                 .join(Order)
@@ -71,6 +72,10 @@ class ItemTracker:
                 for it in items
             ]
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="items.get_items_to_check",
+        )
+
     async def generate_check_message(self, item: dict) -> str:
         """
         Сгенерировать сообщение-запрос статуса позиции.
@@ -96,7 +101,7 @@ class ItemTracker:
         """Отметить позицию как прибывшую."""
         from pds_ultimate.core.database import ItemStatus, OrderItem
 
-        with self._session_factory() as session:
+        def _query(session):
             item = session.query(OrderItem).filter(
                 OrderItem.id == item_id
             ).first()
@@ -120,7 +125,7 @@ class ItemTracker:
             )
 
             # Проверить — все ли позиции заказа прибыли
-            all_arrived = await self._check_all_arrived(item.order_id)
+            all_arrived = self._check_all_arrived(session, item.order_id)
 
             return {
                 "item_id": item.id,
@@ -131,6 +136,10 @@ class ItemTracker:
                 "order_id": item.order_id,
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="items.mark_arrived",
+        )
+
     async def mark_shipped(
         self,
         item_id: int,
@@ -139,7 +148,7 @@ class ItemTracker:
         """Отметить позицию как отправленную."""
         from pds_ultimate.core.database import ItemStatus, OrderItem
 
-        with self._session_factory() as session:
+        def _query(session):
             item = session.query(OrderItem).filter(
                 OrderItem.id == item_id
             ).first()
@@ -161,6 +170,10 @@ class ItemTracker:
                 "tracking_number": tracking_number,
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="items.mark_shipped",
+        )
+
     async def set_tracking_number(
         self,
         item_id: int,
@@ -170,7 +183,7 @@ class ItemTracker:
         """Установить трек-номер для позиции."""
         from pds_ultimate.core.database import OrderItem
 
-        with self._session_factory() as session:
+        def _query(session):
             item = session.query(OrderItem).filter(
                 OrderItem.id == item_id
             ).first()
@@ -194,6 +207,10 @@ class ItemTracker:
                 "source": source,
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="items.set_tracking_number",
+        )
+
     # ═══════════════════════════════════════════════════════════════════════
     # Антизабывание: перенос следующей проверки
     # ═══════════════════════════════════════════════════════════════════════
@@ -205,7 +222,7 @@ class ItemTracker:
         """
         from pds_ultimate.core.database import OrderItem
 
-        with self._session_factory() as session:
+        def _query(session):
             item = session.query(OrderItem).filter(
                 OrderItem.id == item_id
             ).first()
@@ -245,6 +262,10 @@ class ItemTracker:
                 ),
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="items.postpone_check",
+        )
+
     async def mark_not_arrived(self, item_id: int) -> dict:
         """
         Пользователь ответил «нет, не пришла».
@@ -252,7 +273,7 @@ class ItemTracker:
         """
         from pds_ultimate.core.database import OrderItem
 
-        with self._session_factory() as session:
+        def _query(session):
             item = session.query(OrderItem).filter(
                 OrderItem.id == item_id
             ).first()
@@ -274,6 +295,10 @@ class ItemTracker:
                 "next_check": next_tuesday.isoformat(),
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="items.mark_not_arrived",
+        )
+
     # ═══════════════════════════════════════════════════════════════════════
     # Запросы
     # ═══════════════════════════════════════════════════════════════════════
@@ -282,7 +307,7 @@ class ItemTracker:
         """Все ожидающие позиции (опционально по заказу)."""
         from pds_ultimate.core.database import ItemStatus, Order, OrderItem
 
-        with self._session_factory() as session:
+        def _query(session):
             query = (
                 session.query(OrderItem)
                 .join(Order)
@@ -310,6 +335,10 @@ class ItemTracker:
                 for it in items
             ]
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="items.get_pending_items",
+        )
+
     async def get_items_with_tracking(
         self,
         order_id: Optional[int] = None,
@@ -317,7 +346,7 @@ class ItemTracker:
         """Позиции с трек-номерами."""
         from pds_ultimate.core.database import Order, OrderItem
 
-        with self._session_factory() as session:
+        def _query(session):
             query = (
                 session.query(OrderItem)
                 .join(Order)
@@ -340,40 +369,43 @@ class ItemTracker:
                 for it in items
             ]
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="items.get_items_with_tracking",
+        )
+
     # ═══════════════════════════════════════════════════════════════════════
     # Internal
     # ═══════════════════════════════════════════════════════════════════════
 
-    async def _check_all_arrived(self, order_id: int) -> bool:
-        """Проверить, все ли позиции заказа прибыли."""
+    def _check_all_arrived(self, session, order_id: int) -> bool:
+        """Проверить, все ли позиции заказа прибыли (в сессии вызывающего)."""
         from pds_ultimate.core.database import ItemStatus, Order, OrderItem, OrderStatus
 
-        with self._session_factory() as session:
-            pending_count = (
-                session.query(OrderItem)
-                .filter(
-                    OrderItem.order_id == order_id,
-                    OrderItem.status != ItemStatus.ARRIVED,
-                    OrderItem.status != ItemStatus.CANCELLED,
-                )
-                .count()
+        pending_count = (
+            session.query(OrderItem)
+            .filter(
+                OrderItem.order_id == order_id,
+                OrderItem.status != ItemStatus.ARRIVED,
+                OrderItem.status != ItemStatus.CANCELLED,
             )
+            .count()
+        )
+
+        if pending_count == 0:
+            # Перевести заказ в DELIVERY_CALC
+            order = session.query(Order).filter(
+                Order.id == order_id
+            ).first()
+            if order and order.status == OrderStatus.TRACKING:
+                order.status = OrderStatus.DELIVERY_CALC
+                session.commit()
+                logger.info(
+                    f"Order #{order.order_number}: "
+                    f"all items arrived → DELIVERY_CALC"
+                )
+            return True
 
-            if pending_count == 0:
-                # Перевести заказ в DELIVERY_CALC
-                order = session.query(Order).filter(
-                    Order.id == order_id
-                ).first()
-                if order and order.status == OrderStatus.TRACKING:
-                    order.status = OrderStatus.DELIVERY_CALC
-                    session.commit()
-                    logger.info(
-                        f"Order #{order.order_number}: "
-                        f"all items arrived → DELIVERY_CALC"
-                    )
-                return True
-
-            return False
+        return False
 
     @staticmethod
     def _next_weekday(from_date: date, weekday: int) -> date:
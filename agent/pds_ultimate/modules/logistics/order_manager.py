@@ -18,6 +18,8 @@ from datetime import date, timedelta
 from typing import Optional
 
 from pds_ultimate.config import config, logger
+from pds_ultimate.core.db_executor import db_executor
+from pds_ultimate.modules.finance.rate_snapshot import rate_book
 
 
 class OrderManager:
@@ -55,21 +57,21 @@ class OrderManager:
             OrderStatus,
         )
 
-        with self._session_factory() as session:
+        def _query(session):
             # Генерация номера заказа
-            order_number = await self._generate_order_number(session)
+            order_number = self._generate_order_number(session)
 
             # Поиск/создание контрагентов
             supplier_id = None
             client_id = None
 
             if supplier_name:
-                supplier_id = await self._find_or_create_contact(
+                supplier_id = self._find_or_create_contact(
                     session, supplier_name, ContactType.SUPPLIER
                 )
 
             if client_name:
-                client_id = await self._find_or_create_contact(
+                client_id = self._find_or_create_contact(
                     session, client_name, ContactType.CLIENT
                 )
 
@@ -130,11 +132,15 @@ class OrderManager:
                 ],
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="orders.create_order",
+        )
+
     async def confirm_order(self, order_id: int) -> bool:
         """Перевести заказ DRAFT → CONFIRMED."""
         from pds_ultimate.core.database import Order, OrderStatus
 
-        with self._session_factory() as session:
+        def _query(session):
             order = session.query(Order).filter(Order.id == order_id).first()
             if not order or order.status != OrderStatus.DRAFT:
                 return False
@@ -144,6 +150,10 @@ class OrderManager:
             logger.info(f"Order #{order.order_number} confirmed")
             return True
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="orders.confirm_order",
+        )
+
     # ═══════════════════════════════════════════════════════════════════════
     # Фаза 2: Финансовые шаги (income, expense, delivery)
     # ═══════════════════════════════════════════════════════════════════════
@@ -161,7 +171,7 @@ class OrderManager:
             TransactionType,
         )
 
-        with self._session_factory() as session:
+        def _query(session):
             order = session.query(Order).filter(Order.id == order_id).first()
             if not order:
                 return {"error": "Заказ не найден"}
@@ -192,6 +202,10 @@ class OrderManager:
                 "currency": currency,
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="orders.set_income",
+        )
+
     async def set_expense(
         self,
         order_id: int,
@@ -205,7 +219,7 @@ class OrderManager:
             TransactionType,
         )
 
-        with self._session_factory() as session:
+        def _query(session):
             order = session.query(Order).filter(Order.id == order_id).first()
             if not order:
                 return {"error": "Заказ не найден"}
@@ -217,10 +231,12 @@ class OrderManager:
             remainder = None
             if order.income is not None:
                 # Конвертация в одну валюту (USD) для расчёта
-                income_usd = await self._to_usd(
-                    order.income, order.income_currency or "USD"
-                )
-                expense_usd = await self._to_usd(amount, currency)
+                income_usd, expense_usd = rate_book.snapshot(
+                    session
+                ).to_usd_many([
+                    (order.income, order.income_currency or "USD"),
+                    (amount, currency),
+                ])
                 remainder = income_usd - expense_usd
 
             tx = Transaction(
@@ -244,6 +260,10 @@ class OrderManager:
 
             return result
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="orders.set_expense",
+        )
+
     async def set_delivery_cost(
         self,
         order_id: int,
@@ -264,7 +284,7 @@ class OrderManager:
             TransactionType,
         )
 
-        with self._session_factory() as session:
+        def _query(session):
             order = session.query(Order).filter(Order.id == order_id).first()
             if not order:
                 return {"error": "Заказ не найден"}
@@ -283,7 +303,7 @@ class OrderManager:
                         item.delivery_cost = ic["cost"]
             elif delivery_type == "total":
                 # Пропорциональное распределение по цене или весу
-                await self._distribute_delivery(session, order, amount)
+                self._distribute_delivery(session, order, amount)
 
             # Транзакция
             tx = Transaction(
@@ -304,6 +324,10 @@ class OrderManager:
                 "delivery_type": delivery_type,
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="orders.set_delivery_cost",
+        )
+
     # ═══════════════════════════════════════════════════════════════════════
     # Фаза 3: Закрытие заказа
     # ═══════════════════════════════════════════════════════════════════════
@@ -325,7 +349,7 @@ class OrderManager:
             TransactionType,
         )
 
-        with self._session_factory() as session:
+        def _query(session):
             order = session.query(Order).filter(Order.id == order_id).first()
             if not order:
                 return {"error": "Заказ не найден"}
@@ -336,18 +360,14 @@ class OrderManager:
             if order.expense_goods is None:
                 return {"error": "Не указан расход на товар"}
 
-            # Конвертация в USD
-            income_usd = await self._to_usd(
-                order.income, order.income_currency or "USD"
-            )
-            expense_usd = await self._to_usd(
-                order.expense_goods, order.expense_goods_currency or "USD"
-            )
-            delivery_usd = 0.0
-            if order.delivery_cost:
-                delivery_usd = await self._to_usd(
-                    order.delivery_cost, order.delivery_currency or "USD"
-                )
+            # Конвертация в USD — один снапшот на все суммы заказа
+            income_usd, expense_usd, delivery_usd = rate_book.snapshot(
+                session
+            ).to_usd_many([
+                (order.income, order.income_currency or "USD"),
+                (order.expense_goods, order.expense_goods_currency or "USD"),
+                (order.delivery_cost or 0.0, order.delivery_currency or "USD"),
+            ])
 
             # Расчёт
             remainder = income_usd - expense_usd
@@ -411,6 +431,10 @@ class OrderManager:
                 "savings_percent": sav_pct,
             }
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="orders.finalize_order",
+        )
+
     # ═══════════════════════════════════════════════════════════════════════
     # Запросы
     # ═══════════════════════════════════════════════════════════════════════
@@ -419,7 +443,7 @@ class OrderManager:
         """Все активные заказы (не архивные)."""
         from pds_ultimate.core.database import Order, OrderStatus
 
-        with self._session_factory() as session:
+        def _query(session):
             orders = (
                 session.query(Order)
                 .filter(Order.status.notin_([
@@ -431,21 +455,29 @@ class OrderManager:
 
             return [self._order_to_dict(o) for o in orders]
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="orders.get_active_orders",
+        )
+
     async def get_order_by_id(self, order_id: int) -> Optional[dict]:
         """Получить заказ по ID."""
         from pds_ultimate.core.database import Order
 
-        with self._session_factory() as session:
+        def _query(session):
             order = session.query(Order).filter(Order.id == order_id).first()
             if not order:
                 return None
             return self._order_to_dict(order, include_items=True)
 
+        return await db_executor.run_session(
+            self._session_factory, _query, name="orders.get_order_by_id",
+        )
+
     async def get_order_by_number(self, order_number: str) -> Optional[dict]:
         """Получить заказ по номеру."""
         from pds_ultimate.core.database import Order
 
-        with self._session_factory() as session:
+        def _query(session):
             order = (
                 session.query(Order)
                 .filter(Order.order_number == order_number)
@@ -455,25 +487,28 @@ class OrderManager:
                 return None
             return self._order_to_dict(order, include_items=True)
 
-    async def search_orders(self, query: str) -> list[dict]:
-        """Поиск заказов по тексту (номер, описание, контрагент)."""
-        from pds_ultimate.core.database import Order, OrderItem
+        return await db_executor.run_session(
+            self._session_factory, _query, name="orders.get_order_by_number",
+        )
 
-        with self._session_factory() as session:
-            orders = (
-                session.query(Order)
-                .outerjoin(OrderItem)
-                .filter(
-                    Order.order_number.ilike(f"%{query}%")
-                    | Order.description.ilike(f"%{query}%")
-                    | Order.notes.ilike(f"%{query}%")
-                    | OrderItem.name.ilike(f"%{query}%")
-                )
-                .distinct()
-                .all()
-            )
+    async def search_orders(self, query: str) -> list[dict]:
+        """Поиск заказов по тексту (номер, описание, заметки, позиции)."""
+        from pds_ultimate.core.database import Order
+        from pds_ultimate.core.search_index import search_ids
+
+        def _query(session):
+            ids = search_ids(session, "orders", query, limit=100)
+            if not ids:
+                return []
+            by_id = {
+                o.id: o
+                for o in session.query(Order).filter(Order.id.in_(ids)).all()
+            }
+            return [self._order_to_dict(by_id[i]) for i in ids if i in by_id]
 
-            return [self._order_to_dict(o) for o in orders]
+        return await db_executor.run_session(
+            self._session_factory, _query, name="orders.search_orders",
+        )
 
     # ═══════════════════════════════════════════════════════════════════════
     # Форматирование
@@ -553,7 +588,7 @@ class OrderManager:
     # Internal helpers
     # ═══════════════════════════════════════════════════════════════════════
 
-    async def _generate_order_number(self, session) -> str:
+    def _generate_order_number(self, session) -> str:
         """Генерация уникального номера заказа: PDS-YYYYMMDD-NNN."""
         from pds_ultimate.core.database import Order
 
@@ -579,7 +614,7 @@ class OrderManager:
 
         return f"{prefix}-{next_num:03d}"
 
-    async def _find_or_create_contact(
+    def _find_or_create_contact(
         self,
         session,
         name: str,
@@ -602,7 +637,7 @@ class OrderManager:
         session.flush()
         return contact.id
 
-    async def _distribute_delivery(
+    def _distribute_delivery(
         self,
         session,
         order,
@@ -647,37 +682,6 @@ class OrderManager:
         for it in items:
             it.delivery_cost = per_item
 
-    async def _to_usd(self, amount: float, currency: str) -> float:
-        """Конвертация в USD."""
-        if currency == "USD":
-            return amount
-
-        from pds_ultimate.core.database import CurrencyRate
-
-        with self._session_factory() as session:
-            rate_record = (
-                session.query(CurrencyRate)
-                .filter(
-                    CurrencyRate.base_currency == "USD",
-                    CurrencyRate.target_currency == currency,
-                )
-                .order_by(CurrencyRate.rate_date.desc())
-                .first()
-            )
-
-            if rate_record and rate_record.rate > 0:
-                # rate = сколько единиц target за 1 USD
-                # значит amount target / rate = USD
-                return amount / rate_record.rate
-
-        # Фиксированные курсы из конфига как fallback
-        fixed = config.currency.fixed_rates.get(currency)
-        if fixed and fixed > 0:
-            return amount / fixed
-
-        logger.warning(f"No rate found for {currency}/USD, returning as-is")
-        return amount
-
     def _order_to_dict(
         self,
         order,
@@ -24,6 +24,19 @@ os.environ.setdefault("WA_ENABLED", "false")
 os.environ.setdefault("LOG_LEVEL", "DEBUG")
 os.environ.setdefault("FINANCE_EXPENSE_PERCENT", "50.0")
 os.environ.setdefault("FINANCE_SAVINGS_PERCENT", "50.0")
+# Кэш страниц research на диске переносил бы результаты между тестами
+os.environ.setdefault("RESEARCH_CACHE_ENABLED", "false")
+# L2 (SQLite) общий для процессов — тестовые результаты memoize(persist)
+# пережили бы прогон
+os.environ.setdefault("CACHE_L2_ENABLED", "false")
+
+
+@pytest.fixture(autouse=True)
+def _clear_result_cache():
+    """Кэш memoize общий на процесс — не переносим результаты между тестами."""
+    yield
+    from pds_ultimate.core.performance_engine import performance_engine
+    performance_engine.cache.clear()
 
 
 @pytest.fixture(scope="session")
@@ -439,6 +439,49 @@ class TestMemoryManager:
             memory.store_fact(f"Fact {i}", importance=i / 10)
         assert memory.total_count == 5
 
+    def test_enforce_limits_updates_index(self, memory):
+        memory.MAX_MEMORIES = 2
+        memory.store_fact("контейнер Мерсин", importance=0.1)
+        memory.store_fact("контейнер Шанхай", importance=0.9)
+        memory.store_fact("контейнер Дубай", importance=0.5)
+        found = [m.content for m in memory.recall("контейнер", limit=10)]
+        assert "контейнер Мерсин" not in found
+        assert len(found) == 2
+
+    def test_enforce_limits_evicts_weakest(self, memory):
+        memory.MAX_MEMORIES = 3
+        weights = [0.1, 0.9, 0.2, 0.8, 0.3, 0.7, 0.05, 0.6]
+        entries = [memory.store_fact(f"Fact {i}", importance=w)
+                   for i, w in enumerate(weights)]
+        memory.store(entries[1])  # повторное сохранение — не дубликат
+        kept = {m.content for m in memory.recall("Fact", limit=10)}
+        assert kept == {"Fact 1", "Fact 3", "Fact 5"}
+        assert memory.get_stats()["total"] == 3
+
+    def test_recall_bm25_prefers_rare_terms(self, memory):
+        for i in range(5):
+            memory.store_fact(f"заказ номер {i}", importance=0.5)
+        memory.store_fact("заказ ткани Ахмед", importance=0.5)
+        results = memory.recall("заказ Ахмед")
+        assert results[0].content == "заказ ткани Ахмед"
+
+    def test_recall_filters(self, memory):
+        memory.store_fact("курс доллара", importance=0.3, tags=["currency"])
+        memory.store_rule("курс фиксировать утром")
+        assert [m.memory_type for m in memory.recall(
+            "курс", memory_type="rule")] == ["rule"]
+        assert [m.tags for m in memory.recall(
+            "курс", tags=["currency"])] == [["currency"]]
+        assert memory.recall("курс", min_importance=0.5)[0].memory_type == "rule"
+
+    def test_recall_all_sorted_by_importance(self, memory):
+        memory.store_fact("A", importance=0.2)
+        memory.store_fact("B", importance=0.9)
+        memory.store_rule("C", importance=0.5)
+        assert [m.content for m in memory.recall_all()] == ["B", "C", "A"]
+        assert [m.content for m in memory.recall_all(memory_type="fact")] == \
+            ["B", "A"]
+
     def test_stats(self, memory):
         memory.store_fact("F1")
         memory.store_preference("P1")
@@ -626,6 +669,240 @@ class TestAgentParsing:
         action = agent_instance._parse_response(raw)
         assert action._should_remember == "Пользователь предпочитает краткие ответы"
 
+    def test_parse_tool_batch(self):
+        from pds_ultimate.core.agent import Agent
+        agent_instance = Agent(tool_reg=ToolRegistry(),
+                               mem_mgr=MemoryManager())
+
+        raw = json.dumps({
+            "thought": "Три независимых факта",
+            "action": {
+                "type": "tool_batch",
+                "calls": [
+                    {"tool": "get_financial_summary", "params": {}},
+                    {"tool": "get_orders_status"},
+                    {"params": {"x": 1}},  # без tool — пропускается
+                ],
+            },
+        })
+        action = agent_instance._parse_response(raw)
+        assert action.action_type == "tool_batch"
+        assert [c["tool"] for c in action.tool_calls] == [
+            "get_financial_summary", "get_orders_status"]
+        assert action.tool_calls[1]["params"] == {}
+
+    def test_parse_tool_batch_single_call(self):
+        from pds_ultimate.core.agent import Agent
+        agent_instance = Agent(tool_reg=ToolRegistry(),
+                               mem_mgr=MemoryManager())
+
+        raw = json.dumps({"action": {
+            "type": "tool_batch",
+            "calls": [{"tool": "find_contact", "params": {"query": "Ахмед"}}],
+        }})
+        action = agent_instance._parse_response(raw)
+        assert action.action_type == "tool_call"
+        assert action.tool_name == "find_contact"
+        assert action.tool_params == {"query": "Ахмед"}
+
+
+class TestAgentToolBatch:
+    """Параллельное выполнение tool_batch."""
+
+    def setup_method(self):
+        import asyncio
+
+        from pds_ultimate.core.agent import Agent
+
+        self.registry = ToolRegistry()
+        self.active = 0
+        self.peak = 0
+
+        async def slow(value: str = "", **kwargs):
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0.05)
+            self.active -= 1
+            return ToolResult("slow", True, f"ok {value}")
+
+        async def hang(**kwargs):
+            await asyncio.sleep(10)
+
+        self.registry.register(Tool(
+            name="slow", description="", handler=slow,
+            parameters=[ToolParameter("value", "string", "", False, "")]))
+        self.registry.register(Tool(name="hang", description="", handler=hang))
+        self.agent = Agent(tool_reg=self.registry, mem_mgr=MemoryManager())
+
+    @pytest.mark.asyncio
+    async def test_batch_runs_concurrently(self):
+        import time
+
+        start = time.time()
+        results = await self.agent._execute_batch([
+            {"tool": "slow", "params": {"value": str(i)}} for i in range(3)
+        ])
+        assert time.time() - start < 0.14
+        assert self.peak == 3
+        assert [r.output for r in results] == ["ok 0", "ok 1", "ok 2"]
+
+    @pytest.mark.asyncio
+    async def test_batch_timeout_and_unknown_tool(self):
+        self.agent.TOOL_TIMEOUT = 0.2
+        results = await self.agent._execute_batch([
+            {"tool": "hang", "params": {}},
+            {"tool": "missing", "params": {}},
+            {"tool": "slow", "params": {}},
+        ])
+        assert not results[0].success and "Таймаут" in results[0].error
+        assert not results[1].success
+        assert results[2].success
+
+    @pytest.mark.asyncio
+    async def test_db_timeout_holds_session_until_worker_done(self):
+        """По таймауту сессия не отдаётся, пока поток БД работает."""
+        import asyncio
+        import threading
+        import time
+
+        from pds_ultimate.core.db_executor import db_executor
+
+        in_use = []
+        overlaps = []
+
+        def query(value):
+            if in_use:
+                overlaps.append(value)
+            in_use.append(value)
+            time.sleep(0.25 if value == "slow" else 0.01)
+            in_use.remove(value)
+            return threading.get_ident()
+
+        async def db_tool(value: str = "", db_session=None, **kwargs):
+            await db_executor.run(query, value)
+            return ToolResult("db", True, value)
+
+        self.registry.register(Tool(
+            name="db", description="", handler=db_tool, needs_db=True,
+            parameters=[ToolParameter("value", "string", "", False, "")]))
+        self.agent.TOOL_TIMEOUT = 0.1
+
+        results = await self.agent._execute_batch([
+            {"tool": "db", "params": {"value": "slow"}},
+            {"tool": "db", "params": {"value": "fast"}},
+        ], db_session=object())
+
+        assert "Таймаут" in results[0].error
+        # Ожидание очереди не съело таймаут второго инструмента
+        assert results[1].success and results[1].output == "fast"
+        assert overlaps == []
+        await asyncio.sleep(0)
+
+    @pytest.mark.asyncio
+    async def test_process_one_round_trip_for_batch(self):
+        replies = [
+            json.dumps({"thought": "", "action": {"type": "tool_batch", "calls": [
+                {"tool": "slow", "params": {"value": "a"}},
+                {"tool": "slow", "params": {"value": "b"}},
+            ]}}),
+            json.dumps({"action": {"type": "final_answer", "answer": "готово"}}),
+        ]
+        seen = []
+
+        async def fake_llm(messages):
+            seen.append(messages[-1]["content"])
+            return replies[len(seen) - 1]
+
+        self.agent._call_llm = fake_llm
+        response = await self.agent.process("баланс и заказы", chat_id=4242)
+        assert response.answer == "готово"
+        assert response.tools_used == ["slow", "slow"]
+        assert response.total_iterations == 2
+        assert "ok a" in seen[1] and "ok b" in seen[1]
+
+
+class TestPromptPrefixCache:
+    """Кэш статического префикса system prompt и учёт токенов."""
+
+    def setup_method(self):
+        from pds_ultimate.core.agent import Agent
+
+        self.registry = ToolRegistry()
+        self.registry.register(Tool(name="balance", description="Баланс"))
+        self.agent = Agent(tool_reg=self.registry, mem_mgr=MemoryManager())
+
+    def test_registry_version_invalidates_tools_prompt(self):
+        v0 = self.registry.version
+        first = self.registry.get_tools_prompt()
+        assert self.registry.get_tools_prompt() is first
+        self.registry.register(Tool(name="orders", description="Заказы"))
+        assert self.registry.version == v0 + 1
+        assert "orders" in self.registry.get_tools_prompt()
+        self.registry.unregister("orders")
+        assert self.registry.version == v0 + 2
+        assert "orders" not in self.registry.get_tools_prompt()
+
+    def test_static_prefix_stable_dynamic_after(self):
+        working = WorkingMemory()
+        one = self.agent._build_system_prompt("a", working, "коротко")
+        two = self.agent._build_system_prompt(
+            "b", working, None, extra_context="Сейчас 10:00")
+        _, static, _ = self.agent._get_static_prompt()
+        assert one.startswith(static) and two.startswith(static)
+        assert "balance" in static
+        assert "коротко" not in static and "10:00" in two[len(static):]
+
+    def test_static_prefix_rebuilt_on_new_tool(self):
+        _, before, _ = self.agent._get_static_prompt()
+        assert self.agent._get_static_prompt()[1] is before
+        self.registry.register(Tool(name="orders", description="Заказы"))
+        assert "orders" in self.agent._get_static_prompt()[1]
+
+    def test_ledger_counts_only_reused_prefix(self):
+        from pds_ultimate.core.agent import PromptLedger
+        from pds_ultimate.utils.tokens import estimate_tokens
+
+        messages = [{"role": "system", "content": "s" * 300},
+                    {"role": "user", "content": "u" * 30}]
+        ledger = PromptLedger(static_tokens=100, prefix_warm=False)
+        ledger.record_call(messages)
+        assert ledger.usage.saved_tokens == 0
+        messages.append({"role": "assistant", "content": "a" * 60})
+        ledger.record_call(messages)
+        assert ledger.usage.saved_tokens == estimate_tokens("s" * 300) + 10
+        assert ledger.usage.prompt_tokens == 110 + 130
+        ledger.record_provider(
+            {"prompt_tokens": 200, "prompt_cache_hit_tokens": 150})
+        assert ledger.usage.prompt_tokens == 110 + 200
+        assert ledger.usage.saved_tokens == 150
+        assert ledger.usage.provider_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_process_reports_usage_per_turn(self):
+        from pds_ultimate.core.llm_engine import LLMEngine, _usage_sink
+
+        class FakeLLM(LLMEngine):
+            async def stream(self, payload):
+                raise ConnectionError("stream off")
+                yield ""
+
+            async def complete(self, payload):
+                _usage_sink.get()({"prompt_tokens": 900,
+                                   "prompt_cache_hit_tokens": 640})
+                return json.dumps(
+                    {"action": {"type": "final_answer", "answer": "ok"}})
+
+        reports = []
+        self.agent._llm = FakeLLM()
+        self.agent.add_usage_hook(lambda chat_id, u: reports.append((chat_id, u)))
+        response = await self.agent.process("баланс", chat_id=77)
+        assert response.answer == "ok"
+        usage = response.prompt_usage
+        assert usage.llm_calls == 1 and usage.provider_calls == 1
+        assert usage.prompt_tokens == 900 and usage.saved_tokens == 640
+        assert reports == [(77, usage)]
+        assert self.agent.get_usage_stats()["saved_tokens"] == 640
+
 
 class TestAgentRouting:
     """Тесты smart routing."""
@@ -791,6 +1068,38 @@ class TestBusinessTools:
         assert result.success
         assert "БРИФИНГ" in result.output
 
+    @pytest.mark.asyncio
+    async def test_db_read_cached_until_commit(self, db_session):
+        from pds_ultimate.core.business_tools import (
+            _install_db_invalidation,
+            tool_find_contact,
+        )
+
+        _install_db_invalidation()
+        db_session.add(
+            Contact(name="Ахмед", contact_type=ContactType.SUPPLIER))
+        db_session.commit()
+        first = await tool_find_contact("Ахмед", db_session=db_session)
+
+        # Без commit — тот же закэшированный результат
+        db_session.add(
+            Contact(name="Ахмед Второй", contact_type=ContactType.SUPPLIER))
+        db_session.flush()
+        assert await tool_find_contact(
+            "Ахмед", db_session=db_session) is first
+
+        # commit сбрасывает кэш чтений из БД
+        db_session.commit()
+        fresh = await tool_find_contact("Ахмед", db_session=db_session)
+        assert fresh.data["count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_db_read_without_session_not_shared(self, db_session):
+        from pds_ultimate.core.business_tools import tool_get_financial_summary
+
+        assert not (await tool_get_financial_summary()).success
+        assert (await tool_get_financial_summary(db_session=db_session)).success
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # ТЕСТЫ: CROSS-REFERENCES (новые файлы)
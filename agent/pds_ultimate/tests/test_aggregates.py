@@ -0,0 +1,287 @@
+"""
+Тесты для Aggregate Queries.
+===============================
+Покрывает: order_item_counts, transaction_totals, order_status_counts,
+число SQL-запросов в инструментах (без N+1), леджер балансов.
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from pds_ultimate.core import database
+from pds_ultimate.core.aggregates import (
+    ledger_totals,
+    order_item_counts,
+    order_status_counts,
+    split_active_closed,
+    transaction_totals,
+    verify_ledger,
+)
+from pds_ultimate.core.database import (
+    ItemStatus,
+    LedgerBalance,
+    Order,
+    OrderItem,
+    OrderStatus,
+    Transaction,
+    TransactionType,
+)
+
+
+def _seed_orders(session, n: int = 3) -> list[Order]:
+    orders = []
+    for i in range(n):
+        order = Order(order_number=f"ORD-{i}", status=OrderStatus.TRACKING)
+        session.add(order)
+        session.flush()
+        for j in range(i + 1):
+            session.add(OrderItem(
+                order_id=order.id, name=f"Товар {j}", quantity=1,
+                status=ItemStatus.ARRIVED if j == 0 else ItemStatus.PENDING,
+            ))
+        orders.append(order)
+    session.add(Order(order_number="ORD-DONE", status=OrderStatus.COMPLETED))
+    session.commit()
+    return orders
+
+
+def _seed_transactions(session) -> None:
+    rows = [
+        (TransactionType.INCOME, 1000, date(2026, 1, 10)),
+        (TransactionType.INCOME, 500, date(2026, 2, 5)),
+        (TransactionType.EXPENSE_GOODS, 400, date(2026, 1, 11)),
+        (TransactionType.EXPENSE_DELIVERY, 100, date(2026, 1, 12)),
+        (TransactionType.PROFIT_EXPENSES, 250, date(2026, 1, 13)),
+        (TransactionType.EXPENSE_PERSONAL, 50, date(2026, 1, 14)),
+    ]
+    for tx_type, amount, day in rows:
+        session.add(Transaction(
+            transaction_type=tx_type, amount=amount, currency="USD",
+            amount_usd=amount, transaction_date=day,
+        ))
+    session.commit()
+
+
+class _QueryCounter:
+    """Считает SELECT-запросы на engine сессии."""
+
+    def __init__(self, session):
+        self.engine = session.get_bind()
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# AGGREGATES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TestOrderItemCounts:
+    def test_counts_per_order_and_status(self, db_session):
+        orders = _seed_orders(db_session)
+        counts = order_item_counts(db_session, [o.id for o in orders])
+        assert counts[orders[0].id].total == 1
+        assert counts[orders[0].id].pending == 0
+        assert counts[orders[2].id].total == 3
+        assert counts[orders[2].id].pending == 2
+        assert counts[orders[2].id].arrived == 1
+
+    def test_order_without_items(self, db_session):
+        _seed_orders(db_session)
+        done = db_session.query(Order).filter_by(order_number="ORD-DONE").one()
+        counts = order_item_counts(db_session, [done.id])
+        assert counts[done.id].total == 0
+
+    def test_empty_ids(self, db_session):
+        assert order_item_counts(db_session, []) == {}
+
+    def test_all_orders(self, db_session):
+        _seed_orders(db_session)
+        assert len(order_item_counts(db_session)) == 3
+
+
+class TestTransactionTotals:
+    def test_totals_by_type(self, db_session):
+        _seed_transactions(db_session)
+        totals = transaction_totals(db_session)
+        assert totals.income == pytest.approx(1500)
+        assert totals.net_profit == pytest.approx(1000)
+        assert totals.available == pytest.approx(200)
+        assert totals.to_savings == 0.0
+
+    def test_date_range(self, db_session):
+        _seed_transactions(db_session)
+        totals = transaction_totals(
+            db_session, date_from=date(2026, 1, 1), date_to=date(2026, 1, 31))
+        assert totals.income == pytest.approx(1000)
+
+    def test_single_query(self, db_session):
+        _seed_transactions(db_session)
+        with _QueryCounter(db_session) as counter:
+            transaction_totals(db_session)
+        assert counter.count == 1
+
+    def test_order_status_counts(self, db_session):
+        _seed_orders(db_session)
+        active, closed = split_active_closed(order_status_counts(db_session))
+        assert (active, closed) == (3, 1)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TOOLS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TestToolsWithoutNPlusOne:
+    @pytest.mark.asyncio
+    async def test_orders_status_constant_queries(self, db_session):
+        from pds_ultimate.core.business_tools import tool_get_orders_status
+
+        _seed_orders(db_session, n=20)
+        with _QueryCounter(db_session) as counter:
+            result = await tool_get_orders_status(db_session=db_session)
+        assert result.success
+        assert result.data["active_count"] == 20
+        assert "ORD-19 | tracking | Позиций: 20 (ждём: 19)" in result.output
+        assert counter.count == 2
+
+    @pytest.mark.asyncio
+    async def test_financial_summary(self, db_session):
+        from pds_ultimate.core.business_tools import tool_get_financial_summary
+
+        _seed_orders(db_session)
+        _seed_transactions(db_session)
+        with _QueryCounter(db_session) as counter:
+            result = await tool_get_financial_summary(db_session=db_session)
+        assert result.data["net_profit"] == pytest.approx(1000)
+        assert result.data["active_orders"] == 3
+        assert counter.count == 2
+
+    @pytest.mark.asyncio
+    async def test_morning_brief_section(self, db_session):
+        from pds_ultimate.modules.executive.morning_brief import MorningBrief
+
+        _seed_transactions(db_session)
+        brief = MorningBrief(lambda: _NoClose(db_session))
+        text = await brief._finance_section()
+        assert "Баланс: $200" in text
+        assert "Прибыль: $1,000" in text
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LEDGER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TestLedger:
+    def test_maintained_on_insert(self, db_session):
+        _seed_transactions(db_session)
+        totals = ledger_totals(db_session)
+        assert totals.by_type == pytest.approx(
+            transaction_totals(db_session).by_type)
+        january = ledger_totals(db_session, 2026, 1)
+        assert january.income == pytest.approx(1000)
+        assert ledger_totals(db_session, 2026, 2).net_profit == pytest.approx(500)
+
+    def test_maintained_on_update_and_delete(self, db_session):
+        _seed_transactions(db_session)
+        tx = db_session.query(Transaction).filter_by(
+            transaction_type=TransactionType.INCOME, amount=500).one()
+        tx.amount_usd = 700
+        tx.transaction_date = date(2026, 1, 20)
+        db_session.commit()
+        assert ledger_totals(db_session).income == pytest.approx(1700)
+        assert ledger_totals(db_session, 2026, 1).income == pytest.approx(1700)
+        assert ledger_totals(db_session, 2026, 2).income == 0.0
+
+        db_session.delete(tx)
+        db_session.commit()
+        assert ledger_totals(db_session).income == pytest.approx(1000)
+        assert verify_ledger(db_session) == []
+
+    def test_verify_detects_and_repairs_drift(self, db_session):
+        _seed_transactions(db_session)
+        row = db_session.query(LedgerBalance).filter_by(
+            transaction_type=TransactionType.INCOME, period_year=0).one()
+        row.total_usd = 1
+        db_session.commit()
+
+        drift = verify_ledger(db_session, repair=False)
+        assert [d.to_dict()["period"] for d in drift] == ["0-00"]
+        assert ledger_totals(db_session).income == 1
+
+        assert verify_ledger(db_session)
+        assert ledger_totals(db_session).income == pytest.approx(1500)
+        assert verify_ledger(db_session) == []
+
+    def test_upsert_construct_by_dialect(self):
+        from sqlalchemy.dialects import postgresql, sqlite
+
+        assert database._ledger_insert_construct("sqlite") is sqlite.insert
+        assert database._ledger_insert_construct(
+            "postgresql") is postgresql.insert
+        assert database._ledger_insert_construct("mssql") is None
+
+    def test_maintained_without_on_conflict(self, db_session, monkeypatch):
+        # Диалект без ON CONFLICT: UPDATE, при отсутствии строки — INSERT
+        monkeypatch.setattr(
+            database, "_ledger_insert_construct", lambda name: None)
+        _seed_transactions(db_session)
+        db_session.add(Transaction(
+            transaction_type=TransactionType.INCOME, amount=20,
+            currency="USD", amount_usd=20, transaction_date=date(2026, 1, 1),
+        ))
+        db_session.commit()
+        assert ledger_totals(db_session).income == pytest.approx(1520)
+        assert ledger_totals(db_session, 2026, 1).income == pytest.approx(1020)
+        assert verify_ledger(db_session) == []
+
+    def test_balance_read_is_constant(self, db_session):
+        _seed_transactions(db_session)
+        with _QueryCounter(db_session) as counter:
+            ledger_totals(db_session)
+        assert counter.count == 1
+
+    @pytest.mark.asyncio
+    async def test_security_emergency_resets_ledger(self, db_session, tmp_path,
+                                                    monkeypatch):
+        from pds_ultimate.core import business_tools
+
+        monkeypatch.setattr(
+            "pds_ultimate.config.MASTER_FINANCE_PATH", tmp_path / "mf.xlsx")
+        monkeypatch.setattr(
+            "pds_ultimate.config.ALL_ORDERS_ARCHIVE_PATH", tmp_path / "a.xlsx")
+        monkeypatch.setattr(
+            "pds_ultimate.config.ALL_ORDERS_ARCHIVE_LOG_PATH",
+            tmp_path / "a.jsonl")
+        _seed_transactions(db_session)
+        result = await business_tools.tool_security_emergency(
+            db_session=db_session)
+        assert result.success
+        assert ledger_totals(db_session).by_type == {}
+        assert verify_ledger(db_session) == []
+
+
+class _NoClose:
+    """Контекст-менеджер над общей тестовой сессией."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def __enter__(self):
+        return self.session
+
+    def __exit__(self, *exc):
+        return False
@@ -0,0 +1,106 @@
+"""
+Тесты для Archive Sink.
+=========================
+Покрывает: append-only журнал архива, ленивый экспорт XLSX,
+импорт старого XLSX и Sync Logic (файл = эталон).
+"""
+
+import json
+
+import pytest
+
+from pds_ultimate.modules.logistics.archive_sink import (
+    ARCHIVE_HEADERS,
+    ArchiveSink,
+)
+
+
+def _row(order: str, item: str, qty: float = 1.0) -> list:
+    row = [""] * len(ARCHIVE_HEADERS)
+    row[0] = order
+    row[6] = item
+    row[7] = qty
+    return row
+
+
+@pytest.fixture
+def sink(tmp_path):
+    return ArchiveSink(tmp_path / "archive.jsonl", tmp_path / "archive.xlsx")
+
+
+class TestArchiveLog:
+    def test_append_writes_json_lines(self, sink):
+        sink.append([_row("ORD-1", "Шкаф"), _row("ORD-1", "Стол", 2)])
+        lines = sink.log_path.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[1])[6] == "Стол"
+        assert sink.get_stats()["rows_appended"] == 2
+
+    def test_append_is_incremental(self, sink):
+        sink.append([_row("ORD-1", "A")])
+        size = sink.log_path.stat().st_size
+        sink.append([_row("ORD-2", "B")])
+        text = sink.log_path.read_text(encoding="utf-8")
+        assert len(text.encode("utf-8")) > size
+        assert [r[0] for r in sink.iter_rows()] == ["ORD-1", "ORD-2"]
+
+    def test_empty_append_noop(self, sink):
+        sink.append([])
+        assert not sink.log_path.exists()
+        assert not sink.is_dirty
+
+    def test_corrupt_line_skipped(self, sink):
+        sink.append([_row("ORD-1", "A")])
+        with open(sink.log_path, "a", encoding="utf-8") as f:
+            f.write("{broken\n")
+        sink.append([_row("ORD-2", "B")])
+        assert [r[0] for r in sink.iter_rows()] == ["ORD-1", "ORD-2"]
+
+    def test_dirty_until_exported(self, sink):
+        sink.append([_row("ORD-1", "A")])
+        assert sink.is_dirty
+
+
+class TestArchiveExport:
+    def test_export_and_ensure(self, sink):
+        openpyxl = pytest.importorskip("openpyxl")
+        sink.append([_row("ORD-1", "A"), _row("ORD-2", "B", 3)])
+        path = sink.ensure_xlsx()
+        assert not sink.is_dirty
+
+        wb = openpyxl.load_workbook(path, read_only=True)
+        rows = list(wb.active.iter_rows(values_only=True))
+        wb.close()
+        assert list(rows[0]) == ARCHIVE_HEADERS
+        assert rows[2][0] == "ORD-2"
+        assert rows[2][7] == 3
+
+        sink.append([_row("ORD-3", "C")])
+        assert sink.is_dirty
+        sink.ensure_xlsx()
+        assert sink.get_stats()["exports"] == 2
+
+    def test_legacy_xlsx_imported_once(self, tmp_path):
+        openpyxl = pytest.importorskip("openpyxl")
+        xlsx = tmp_path / "archive.xlsx"
+        wb = openpyxl.Workbook()
+        wb.active.append(ARCHIVE_HEADERS)
+        wb.active.append(_row("OLD-1", "Старое"))
+        wb.save(xlsx)
+
+        sink = ArchiveSink(tmp_path / "archive.jsonl", xlsx)
+        sink.append([_row("NEW-1", "Новое")])
+        assert [r[0] for r in sink.iter_rows()] == ["OLD-1", "NEW-1"]
+
+    def test_replace_from_xlsx(self, sink, tmp_path):
+        openpyxl = pytest.importorskip("openpyxl")
+        sink.append([_row("ORD-1", "A"), _row("ORD-2", "B")])
+        edited = tmp_path / "edited.xlsx"
+        wb = openpyxl.Workbook()
+        wb.active.append(ARCHIVE_HEADERS)
+        wb.active.append(_row("ORD-2", "B"))
+        wb.save(edited)
+
+        assert sink.replace_from_xlsx(edited) == 1
+        assert [r[0] for r in sink.iter_rows()] == ["ORD-2"]
+        assert sink.is_dirty
@@ -885,6 +885,38 @@ class TestBrowserEngineMocked:
 
         assert await mock_engine.query_selector("div.missing") is False
 
+    @pytest.mark.asyncio
+    async def test_extract_data_isolated_uses_pool(self, mock_engine):
+        """isolated=True — загрузка во вкладке из пула, текущая не трогается."""
+        pool_page = AsyncMock()
+        pool_page.url = "https://pooled.com"
+        pool_page.title = AsyncMock(return_value="Pooled")
+        pool_page.evaluate = AsyncMock(return_value="")
+        pool_page.goto = AsyncMock(return_value=MagicMock(
+            status=200, headers={"etag": '"v1"'}))
+        pool_page.set_default_timeout = MagicMock()
+        pool_page.set_default_navigation_timeout = MagicMock()
+        mock_engine._context.new_page = AsyncMock(return_value=pool_page)
+
+        data = await mock_engine.extract_data(
+            "https://pooled.com", isolated=True)
+        assert data.title == "Pooled"
+        assert data.etag == '"v1"'
+        mock_engine._page.goto.assert_not_called()
+
+        # Вкладка вернулась в пул и переиспользуется
+        await mock_engine.extract_data("https://pooled.com", isolated=True)
+        mock_engine._context.new_page.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_pooled_page_closed_on_error(self, mock_engine):
+        """Вкладка с ошибкой закрывается, а не возвращается в пул."""
+        with pytest.raises(RuntimeError):
+            async with mock_engine.pooled_page():
+                raise RuntimeError("boom")
+        mock_engine._page.close.assert_called_once()
+        assert mock_engine._pool_idle == []
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 13. EDGE CASES
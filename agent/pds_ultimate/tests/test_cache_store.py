@@ -0,0 +1,285 @@
+"""
+Тесты для Persistent Cache (L2).
+==================================
+Покрывает: PersistentCache (JSON-кодек), read-through L2 в
+PerformanceEngine.cached_call и memoize(persist=True), кэш ответов LLM.
+"""
+
+import asyncio
+import importlib
+import pickle
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from pds_ultimate.core.cache_store import PersistentCache
+from pds_ultimate.core.llm_engine import LLMEngine
+from pds_ultimate.core.performance_engine import MemoEntry, PerformanceEngine
+from pds_ultimate.core.tools import ToolResult
+
+llm_module = importlib.import_module("pds_ultimate.core.llm_engine")
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PERSISTENT CACHE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TestPersistentCache:
+    def setup_method(self):
+        self.l2 = None
+
+    def teardown_method(self):
+        if self.l2 is not None:
+            self.l2.close()
+
+    def _open(self, tmp_path, **kwargs) -> PersistentCache:
+        self.l2 = PersistentCache(tmp_path / "cache.sqlite", **kwargs)
+        return self.l2
+
+    def test_put_get(self, tmp_path):
+        l2 = self._open(tmp_path)
+        assert l2.put("llm:a", {"answer": "42", "n": [1, 2]}, ttl=60, category="llm")
+        entry = l2.get("llm:a")
+        assert entry.value == {"answer": "42", "n": [1, 2]}
+        assert entry.category == "llm"
+        assert 0 < entry.ttl_left <= 60
+
+    def test_miss_and_expired(self, tmp_path):
+        l2 = self._open(tmp_path)
+        assert l2.get("nope") is None
+        l2.put("old", "v", ttl=-1)
+        assert l2.get("old") is None
+        assert l2.get_stats()["misses"] == 2
+
+    def test_large_value_compressed(self, tmp_path):
+        l2 = self._open(tmp_path)
+        value = "строка " * 5000
+        l2.put("big", value, ttl=60)
+        assert l2.get_stats()["bytes"] < len(value.encode())
+        assert l2.get("big").value == value
+
+    def test_unserializable_skipped(self, tmp_path):
+        l2 = self._open(tmp_path)
+        assert l2.put("lambda", lambda: 1, ttl=60) is False
+        assert l2.get("lambda") is None
+
+    def test_registered_dataclass_roundtrip(self, tmp_path):
+        l2 = self._open(tmp_path)
+        memo = MemoEntry(ToolResult("web_search", True, "ok", data=[1]), 5.0)
+        assert l2.put("search:a", memo, ttl=60, category="search")
+        assert l2.get("search:a").value == memo
+
+    def test_unregistered_dataclass_skipped(self, tmp_path):
+        @dataclass
+        class Foreign:
+            x: int
+
+        l2 = self._open(tmp_path)
+        assert l2.put("foreign", Foreign(1), ttl=60) is False
+
+    def test_pickle_blob_not_loaded(self, tmp_path):
+        l2 = self._open(tmp_path)
+        l2.put("k", "v", ttl=60)
+        # Чужая запись в общем файле не должна исполняться при чтении
+        l2._connect().execute(
+            "UPDATE cache SET value = ? WHERE key = 'k'",
+            (pickle.dumps(ToolResult("x", True, "")),),
+        )
+        l2._connect().commit()
+        assert l2.get("k") is None
+        assert l2.get_stats()["errors"] == 1
+
+    def test_shared_between_instances(self, tmp_path):
+        l2 = self._open(tmp_path)
+        l2.put("tool:rates", {"USD": 1.0}, ttl=60, category="tool")
+        other = PersistentCache(tmp_path / "cache.sqlite")
+        try:
+            assert other.get("tool:rates").value == {"USD": 1.0}
+        finally:
+            other.close()
+
+    def test_invalidate(self, tmp_path):
+        l2 = self._open(tmp_path)
+        l2.put("tool:w:1", 1, ttl=60, category="tool")
+        l2.put("tool:w_2", 2, ttl=60, category="tool")
+        l2.put("tool:x", 3, ttl=60, category="tool")
+        l2.put("llm:1", 4, ttl=60, category="llm")
+        assert l2.invalidate_pattern("tool:w:") == 1
+        assert l2.invalidate_category("tool") == 2
+        assert l2.invalidate("llm:1") is True
+        assert l2.get_stats()["entries"] == 0
+
+    def test_evict_expired_and_budget(self, tmp_path):
+        l2 = self._open(tmp_path, max_bytes=3000)
+        l2.put("dead", "x", ttl=-1)
+        for i in range(5):
+            l2.put(f"k{i}", "x" * 1000, ttl=100 + i)
+        removed = l2.evict()
+        stats = l2.get_stats()
+        assert removed >= 3
+        assert stats["bytes"] <= 3000
+        assert l2.get("k4") is not None
+        assert l2.get("k0") is None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PERFORMANCE ENGINE + L2
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TestEngineL2:
+    @pytest.mark.asyncio
+    async def test_survives_restart(self, tmp_path):
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return "ответ DeepSeek"
+
+        first = PerformanceEngine(l2=PersistentCache(tmp_path / "c.sqlite"))
+        assert await first.cached_call("llm:q", fetch, category="llm") == \
+            "ответ DeepSeek"
+        await first.stop()
+
+        second = PerformanceEngine(l2=PersistentCache(tmp_path / "c.sqlite"))
+        assert await second.cached_call("llm:q", fetch, category="llm") == \
+            "ответ DeepSeek"
+        assert calls == 1
+        # Read-through: запись поднята в L1
+        assert second.cache.get("llm:q") == "ответ DeepSeek"
+        await second.stop()
+
+    @pytest.mark.asyncio
+    async def test_category_ttl_honored(self, tmp_path):
+        engine = PerformanceEngine(l2=PersistentCache(tmp_path / "c.sqlite"))
+
+        async def fetch():
+            return "data"
+
+        await engine.cached_call("parse:x", fetch, category="parse")
+        entry = engine.l2.get("parse:x")
+        ttl = entry.expires_at - entry.created_at
+        assert ttl == pytest.approx(engine.cache.CATEGORY_TTL["parse"])
+        await engine.stop()
+
+    @pytest.mark.asyncio
+    async def test_invalidate_both_tiers(self, tmp_path):
+        engine = PerformanceEngine(l2=PersistentCache(tmp_path / "c.sqlite"))
+
+        async def fetch():
+            return time.time()
+
+        await engine.cached_call("tool:a", fetch, category="tool")
+        assert engine.invalidate_category("tool") == 1
+        assert engine.cache.get("tool:a") is None
+        assert engine.l2.get("tool:a") is None
+        await engine.stop()
+
+    @pytest.mark.asyncio
+    async def test_start_stop_background_eviction(self, tmp_path):
+        engine = PerformanceEngine(
+            l2=PersistentCache(tmp_path / "c.sqlite"), l2_evict_interval=0.01,
+        )
+        engine.l2.put("dead", "x", ttl=-1)
+        await engine.start()
+        await asyncio.sleep(0.05)
+        await engine.stop()
+        assert engine.get_stats()["l2"]["evictions"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_memoize_persist_survives_restart(self, tmp_path):
+        calls = []
+
+        def make(engine):
+            @engine.memoize(category="search", persist=True,
+                            key_prefix="search.web")
+            async def search(query):
+                calls.append(query)
+                return None if query == "пусто" else f"результаты: {query}"
+            return search
+
+        first = PerformanceEngine(l2=PersistentCache(tmp_path / "c.sqlite"))
+        assert await make(first)("чай") == "результаты: чай"
+        assert await make(first)("пусто") is None
+        await first.stop()
+
+        second = PerformanceEngine(l2=PersistentCache(tmp_path / "c.sqlite"))
+        search = make(second)
+        assert await search("чай") == "результаты: чай"
+        assert await search("пусто") is None
+        # Негативный результат в L2 не пишется
+        assert calls == ["чай", "пусто", "пусто"]
+
+        assert search.invalidate() >= 1
+        assert await search("чай") == "результаты: чай"
+        assert calls[-1] == "чай"
+        await second.stop()
+
+    @pytest.mark.asyncio
+    async def test_memoize_without_persist_skips_l2(self, tmp_path):
+        engine = PerformanceEngine(l2=PersistentCache(tmp_path / "c.sqlite"))
+
+        @engine.memoize(category="db")
+        async def read(x):
+            return x
+
+        await read(1)
+        assert engine.get_stats()["l2"]["entries"] == 0
+        await engine.stop()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LLM COMPLETION CACHE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class _FakeTransport:
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, payload):
+        self.calls += 1
+        return {
+            "choices": [{"message": {"content": f"ответ {self.calls}"}}],
+            "usage": {"total_tokens": 5},
+        }
+
+
+class TestLLMCompletionCache:
+    def _llm(self, monkeypatch, tmp_path) -> tuple[LLMEngine, _FakeTransport]:
+        engine = PerformanceEngine(l2=PersistentCache(tmp_path / "c.sqlite"))
+        monkeypatch.setattr(llm_module, "performance_engine", engine)
+        llm = LLMEngine()
+        llm._transport = _FakeTransport()
+        return llm, llm._transport
+
+    @staticmethod
+    def _payload(temperature: float) -> dict:
+        return {
+            "model": "deepseek-chat",
+            "messages": [{"role": "user", "content": "переведи: чай"}],
+            "temperature": temperature,
+            "max_tokens": 100,
+        }
+
+    @pytest.mark.asyncio
+    async def test_deterministic_request_cached_across_restart(
+            self, monkeypatch, tmp_path):
+        llm, transport = self._llm(monkeypatch, tmp_path)
+        assert await llm.complete(self._payload(0.1)) == "ответ 1"
+        assert await llm.complete(self._payload(0.1)) == "ответ 1"
+        assert transport.calls == 1
+
+        # Новый процесс: пустой L1, тот же файл L2
+        llm, transport = self._llm(monkeypatch, tmp_path)
+        assert await llm.complete(self._payload(0.1)) == "ответ 1"
+        assert transport.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_creative_request_not_cached(self, monkeypatch, tmp_path):
+        llm, transport = self._llm(monkeypatch, tmp_path)
+        await llm.complete(self._payload(0.7))
+        await llm.complete(self._payload(0.7))
+        assert transport.calls == 2
@@ -324,3 +324,151 @@ class TestFileConverter:
         from pds_ultimate.modules.files.converter import file_converter
 
         assert file_converter is not None
+
+
+class TestConversionPipeline:
+    """Тесты конвейера: пул, кэш по хэшу, потоковый CSV/XLSX, тайминги."""
+
+    @staticmethod
+    def _json_files(tmp_path, count):
+        import json
+
+        paths = []
+        for i in range(count):
+            p = tmp_path / f"src_{i}.json"
+            p.write_text(json.dumps([{"val": i}]))
+            paths.append(str(p))
+        return paths
+
+    @pytest.mark.asyncio
+    async def test_batch_keeps_order_and_bounds_queue(self, tmp_path):
+        """convert_batch: порядок сохраняется, очередь ограничена."""
+        from pds_ultimate.modules.files.converter import FileConverter
+
+        converter = FileConverter(workers=0, max_queue=2)
+        paths = self._json_files(tmp_path, 5) + ["/nonexistent/x.json"]
+        results = await converter.convert_batch(
+            paths, "csv", output_dir=str(tmp_path / "out"),
+        )
+
+        assert [r.source_path for r in results] == paths
+        assert [r.success for r in results] == [True] * 5 + [False]
+        assert all(r.duration_ms > 0 for r in results[:5])
+        assert "duration_ms" in results[0].to_dict()
+        assert converter.get_stats()["peak_pending"] <= 2
+
+    @pytest.mark.asyncio
+    async def test_same_stem_from_different_dirs(self, tmp_path):
+        """Одноимённые файлы из разных папок не перезаписывают друг друга."""
+        import json
+
+        from pds_ultimate.modules.files.converter import FileConverter
+
+        paths = []
+        for i, folder in enumerate(("a", "b", "c")):
+            (tmp_path / folder).mkdir()
+            p = tmp_path / folder / ("Report.json" if i else "report.json")
+            p.write_text(json.dumps([{"val": folder}]))
+            paths.append(str(p))
+        paths.append(paths[0])
+
+        converter = FileConverter(workers=0)
+        results = await converter.convert_batch(
+            paths, "csv", output_dir=str(tmp_path / "out"),
+        )
+
+        targets = [os.path.basename(r.target_path) for r in results]
+        assert targets == ["report.csv", "Report_2.csv", "Report_3.csv",
+                           "report.csv"]
+        for result, folder in zip(results, "abc"):
+            with open(result.target_path, encoding="utf-8-sig") as f:
+                assert folder in f.read()
+        assert converter.get_stats()["total_conversions"] == 3
+
+    @pytest.mark.asyncio
+    async def test_unchanged_input_served_from_cache(self, tmp_path):
+        """Неизменённый файл повторно не конвертируется."""
+        import json
+
+        from pds_ultimate.modules.files.converter import FileConverter
+
+        cache = tmp_path / "cache.json"
+        out = str(tmp_path / "out")
+        paths = self._json_files(tmp_path, 2)
+
+        converter = FileConverter(workers=0, cache_path=cache)
+        first = await converter.convert_batch(paths, "csv", output_dir=out)
+        assert not any(r.cached for r in first)
+
+        # Новый экземпляр читает манифест с диска
+        again = FileConverter(workers=0, cache_path=cache)
+        second = await again.convert_batch(paths, "csv", output_dir=out)
+        assert all(r.cached for r in second)
+        assert again.get_stats()["cache_hits"] == 2
+
+        # Изменённое содержимое — конвертируется заново
+        with open(paths[0], "w") as f:
+            json.dump([{"val": 42}], f)
+        result = await again.convert(paths[0], "csv", output_dir=out)
+        assert result.cached is False
+        with open(result.target_path, encoding="utf-8-sig") as f:
+            assert "42" in f.read()
+
+    @pytest.mark.asyncio
+    async def test_edited_target_invalidates_cache(self, tmp_path):
+        """Результат изменён после конвертации — кэш не используется."""
+        from pds_ultimate.modules.files.converter import FileConverter
+
+        converter = FileConverter(workers=0, cache_path=tmp_path / "c.json")
+        (path,) = self._json_files(tmp_path, 1)
+        result = await converter.convert(path, "csv", str(tmp_path))
+
+        with open(result.target_path, "a") as f:
+            f.write("edited\n")
+        again = await converter.convert(path, "csv", str(tmp_path))
+        assert again.cached is False
+        assert again.success is True
+
+    @pytest.mark.asyncio
+    async def test_csv_xlsx_roundtrip_streaming(self, tmp_path):
+        """csv → xlsx → csv: числа остаются числами, строки — строками."""
+        openpyxl = pytest.importorskip("openpyxl")
+        pytest.importorskip("xlsxwriter")
+        from pds_ultimate.modules.files.converter import FileConverter
+
+        src = tmp_path / "items.csv"
+        lines = ["name,qty"] + [f"Товар {i},{i}" for i in range(500)]
+        src.write_text("\n".join(lines), encoding="utf-8")
+
+        converter = FileConverter(workers=0)
+        xlsx = await converter.convert(str(src), "xlsx", str(tmp_path / "x"))
+        assert xlsx.success is True, xlsx.error
+
+        wb = openpyxl.load_workbook(xlsx.target_path, read_only=True)
+        rows = list(wb.active.iter_rows(values_only=True))
+        wb.close()
+        assert rows[0] == ("name", "qty")
+        assert rows[500] == ("Товар 499", 499)
+
+        back = await converter.convert(xlsx.target_path, "csv",
+                                       str(tmp_path / "c"))
+        assert back.success is True, back.error
+        assert len(open(back.target_path, encoding="utf-8-sig")
+                   .read().splitlines()) == 501
+
+    @pytest.mark.asyncio
+    async def test_process_pool(self, tmp_path):
+        """Конвертация в воркере пула процессов."""
+        from pds_ultimate.modules.files.converter import FileConverter
+
+        converter = FileConverter(workers=2)
+        try:
+            results = await converter.convert_batch(
+                self._json_files(tmp_path, 3), "csv", str(tmp_path / "out"),
+            )
+        finally:
+            converter.shutdown()
+        assert all(r.success for r in results)
+        stats = converter.get_stats()
+        assert stats["total_conversions"] == 3
+        assert stats["convert"]["inline"] == 0
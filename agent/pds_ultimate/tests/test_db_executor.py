@@ -0,0 +1,170 @@
+"""
+Тесты для DB Executor.
+=========================
+Покрывает: выполнение в потоке БД, inline для in-memory SQLite,
+ограничение очереди, метрики латентности, ToolRegistry и модули.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from pds_ultimate.core.database import Base, Contact, ContactType
+from pds_ultimate.core.db_executor import DBExecutor, is_thread_bound
+
+
+@pytest.fixture
+def file_factory(tmp_path):
+    """Фабрика сессий на файловой SQLite (можно уводить в другой поток)."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, expire_on_commit=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def memory_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# EXECUTOR
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TestDBExecutor:
+    def setup_method(self):
+        self.executor = DBExecutor(workers=2, max_queue=4, slow_query_ms=10_000)
+
+    def teardown_method(self):
+        self.executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_runs_off_event_loop(self, file_factory):
+        def work(session):
+            session.add(Contact(name="Ли", contact_type=ContactType.SUPPLIER))
+            session.commit()
+            return threading.current_thread().name
+
+        thread = await self.executor.run_session(file_factory, work, name="add")
+        assert thread.startswith("pds-db")
+        count = await self.executor.run_session(
+            file_factory, lambda s: s.query(Contact).count(), name="count")
+        assert count == 1
+
+        stats = self.executor.get_stats()["queries"]
+        assert stats["add"]["count"] == 1 and stats["add"]["inline"] == 0
+        assert stats["count"]["p95_ms"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_memory_sqlite_runs_inline(self, memory_session):
+        assert is_thread_bound(memory_session)
+        thread = await self.executor.run(
+            lambda: threading.current_thread().name,
+            name="inline", bind=memory_session,
+        )
+        assert thread == threading.current_thread().name
+        assert self.executor.get_query_stats("inline")["inline"] == 1
+
+    def test_file_engine_not_thread_bound(self, file_factory):
+        assert not is_thread_bound(file_factory)
+        assert not is_thread_bound(None)
+
+    @pytest.mark.asyncio
+    async def test_queue_is_bounded(self):
+        release = threading.Event()
+
+        def block():
+            release.wait(2)
+
+        tasks = [
+            asyncio.create_task(self.executor.run(block, name="block"))
+            for _ in range(10)
+        ]
+        await asyncio.sleep(0.05)
+        assert self.executor.get_stats()["pending"] == 4
+        release.set()
+        await asyncio.gather(*tasks)
+        stats = self.executor.get_stats()
+        assert stats["peak_pending"] == 4
+        assert stats["pending"] == 0
+        assert stats["queries"]["block"]["count"] == 10
+
+    @pytest.mark.asyncio
+    async def test_errors_counted_and_raised(self):
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await self.executor.run(fail, name="fail")
+        assert self.executor.get_query_stats("fail")["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_reset_stats(self):
+        await self.executor.run(lambda: 1, name="one")
+        self.executor.reset_stats()
+        assert self.executor.get_stats()["queries"] == {}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# INTEGRATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TestDBExecutorIntegration:
+    @pytest.mark.asyncio
+    async def test_registry_runs_sync_handler_in_db_thread(self):
+        from pds_ultimate.core.db_executor import db_executor
+        from pds_ultimate.core.tools import Tool, ToolRegistry
+
+        def handler(name: str = ""):
+            return f"{name}@{threading.current_thread().name}"
+
+        registry = ToolRegistry()
+        registry.register(Tool(name="sync_tool", description="", handler=handler))
+        result = await registry.execute("sync_tool", {"name": "x"})
+        assert result.success
+        assert result.output.startswith("x@pds-db")
+        assert db_executor.get_query_stats("tool:sync_tool")["count"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_business_tool_offloaded(self, file_factory):
+        from pds_ultimate.core.business_tools import (
+            tool_find_contact,
+            tool_save_contact_note,
+        )
+        from pds_ultimate.core.db_executor import db_executor
+
+        before = db_executor.get_query_stats("tool:find_contact") or {
+            "count": 0, "inline": 0}
+        with file_factory() as session:
+            result = await tool_save_contact_note(
+                name="Ван", note="Надёжный", db_session=session)
+            assert result.success
+            found = await tool_find_contact(query="Ван", db_session=session)
+            assert "Ван" in found.output
+        after = db_executor.get_query_stats("tool:find_contact")
+        assert after["count"] == before["count"] + 1
+        assert after["inline"] == before["inline"]
+
+    @pytest.mark.asyncio
+    async def test_master_finance_via_executor(self, file_factory):
+        from pds_ultimate.core.db_executor import db_executor
+        from pds_ultimate.modules.finance.master_finance import MasterFinance
+
+        finance = MasterFinance(file_factory)
+        tx = await finance.record_transaction("income", 195, currency="TMT")
+        assert tx["amount_usd"] == pytest.approx(10.0)
+        balance = await finance.get_balance()
+        assert balance["total_income"] == pytest.approx(10.0)
+        summary = await finance.get_monthly_summary()
+        assert summary["total_income"] == pytest.approx(10.0)
+        assert db_executor.get_query_stats("finance.get_balance")["count"] >= 1
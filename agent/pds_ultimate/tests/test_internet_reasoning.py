@@ -10,6 +10,7 @@ PDS-Ultimate Internet Reasoning Tests
 
 from __future__ import annotations
 
+import random
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -25,12 +26,14 @@ from pds_ultimate.core.internet_reasoning import (
     FactExtractor,
     FactSynthesizer,
     InternetReasoningEngine,
+    KeywordIndex,
     QueryExpander,
     ResearchStats,
     SourceInfo,
     SourceReliability,
     SynthesizedAnswer,
     TrustScorer,
+    candidate_pairs,
     reasoning_engine,
 )
 
@@ -699,6 +702,124 @@ class TestContradictionDetector:
         assert result[0].severity == ContradictionSeverity.MAJOR
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# KEYWORD INDEX (кандидатные пары)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_VOCAB = ["price", "product", "growth", "market", "python", "release",
+          "version", "costs", "stores", "users", "free", "paid"]
+
+
+def _random_facts(rng: random.Random, n: int) -> list[ExtractedFact]:
+    sources = [
+        SourceInfo(url=f"https://s{k}.com/", domain=f"s{k}.com")
+        for k in range(4)
+    ]
+    facts = []
+    for _ in range(n):
+        words = rng.sample(_VOCAB, rng.randint(0, 5))
+        extra = rng.choice(["increase", "decrease", "not", "", "more", "less"])
+        facts.append(ExtractedFact(
+            text=f"The {' '.join(words)} {extra} ${rng.choice([10, 50, 200])}",
+            source=rng.choice(sources),
+            confidence=rng.random(),
+            category=rng.choice(["price", "statistic", "general"]),
+            keywords=words,
+        ))
+    return facts
+
+
+def _brute_detect(det, facts, threshold=0.3):
+    """Эталон: полный перебор пар, как было до индекса."""
+    out = []
+    for i in range(len(facts)):
+        for j in range(i + 1, len(facts)):
+            fa, fb = facts[i], facts[j]
+            if fa.source.url == fb.source.url:
+                continue
+            if det._topic_similarity(fa, fb) < threshold:
+                continue
+            c = det._check_numeric(fa, fb) or det._check_textual(fa, fb)
+            if c:
+                out.append(c)
+    return out
+
+
+def _brute_dedup(syn, facts, threshold=0.7):
+    unique = []
+    for fact in facts:
+        for existing in unique:
+            if syn._text_similarity(fact.text, existing.text) > threshold:
+                if fact.confidence > existing.confidence:
+                    unique.remove(existing)
+                    unique.append(fact)
+                break
+        else:
+            unique.append(fact)
+    return unique
+
+
+class TestKeywordIndex:
+    def test_overlaps(self):
+        index = KeywordIndex()
+        index.add(0, frozenset({"a", "b"}))
+        index.add(1, frozenset({"b", "c"}))
+        index.add(2, frozenset({"x"}))
+        assert dict(index.overlaps(frozenset({"b", "c"}))) == {0: 1, 1: 2}
+
+    def test_remove(self):
+        index = KeywordIndex()
+        index.add(0, frozenset({"a"}))
+        index.remove(0)
+        assert len(index) == 0
+        assert index.overlaps(frozenset({"a"})) == {}
+
+    def test_candidate_pairs_threshold(self):
+        sets = [frozenset({"a", "b"}), frozenset({"a", "b", "c"}),
+                frozenset({"z"})]
+        assert candidate_pairs(sets, 0.5) == [(0, 1, 2)]
+        # Порог 0 — любая пара, даже без общих слов
+        assert len(candidate_pairs(sets, 0.0)) == 3
+
+    def test_detect_matches_bruteforce(self, contradiction_detector):
+        rng = random.Random(7)
+        for _ in range(20):
+            facts = _random_facts(rng, 40)
+            expected = _brute_detect(contradiction_detector, facts)
+            got = contradiction_detector.detect(facts)
+            assert [(c.fact_a, c.fact_b, c.description) for c in got] == [
+                (c.fact_a, c.fact_b, c.description) for c in expected]
+
+    def test_dedup_matches_bruteforce(self, fact_synthesizer):
+        rng = random.Random(11)
+        for _ in range(20):
+            facts = _random_facts(rng, 40)
+            assert fact_synthesizer._deduplicate(facts) == _brute_dedup(
+                fact_synthesizer, facts)
+
+    def test_unrelated_pairs_skipped(self, contradiction_detector):
+        """Факты без общих keywords не доходят до проверок."""
+        facts = [
+            ExtractedFact(
+                text=f"Fact {i} costs ${i + 1}",
+                source=SourceInfo(url=f"https://s{i}.com/", domain="s.com"),
+                category="price",
+                keywords=[f"topic{i}"],
+            )
+            for i in range(200)
+        ]
+        calls = {"n": 0}
+        original = contradiction_detector._check_numeric
+
+        def counting(fa, fb):
+            calls["n"] += 1
+            return original(fa, fb)
+
+        contradiction_detector._check_numeric = counting
+        assert contradiction_detector.detect(facts) == []
+        assert calls["n"] == 0
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # FACT SYNTHESIZER
 # ═══════════════════════════════════════════════════════════════════════════════
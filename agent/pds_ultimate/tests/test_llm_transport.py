@@ -0,0 +1,282 @@
+"""
+Тесты для LLM Transport.
+==========================
+Покрывает: TokenBucket, Retry-After/x-ratelimit заголовки, retry,
+streaming, JsonObjectCollector, streaming-first вызов агента.
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from pds_ultimate.core.llm_transport import (
+    JsonObjectCollector,
+    LLMTransport,
+    TokenBucket,
+    parse_reset,
+    parse_retry_after,
+)
+
+
+def _completion(content: str) -> dict:
+    return {
+        "choices": [{"message": {"content": content}}],
+        "usage": {"total_tokens": 5},
+    }
+
+
+def _sse(*deltas: str) -> bytes:
+    lines = [
+        "data: " + json.dumps({"choices": [{"delta": {"content": d}}]})
+        for d in deltas
+    ]
+    return ("\n\n".join(lines + ["data: [DONE]"]) + "\n\n").encode()
+
+
+def _transport(handler, **kwargs) -> LLMTransport:
+    kwargs.setdefault("retry_base", 0.001)
+    return LLMTransport(
+        base_url="https://llm.test", api_key="k",
+        transport=httpx.MockTransport(handler), **kwargs,
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HEADERS / BUCKET
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TestRateLimitHeaders:
+    def test_retry_after_seconds(self):
+        assert parse_retry_after("3") == 3.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("garbage") is None
+
+    def test_retry_after_http_date(self):
+        value = parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT")
+        assert value == 0.0  # дата в прошлом
+
+    def test_reset_durations(self):
+        assert parse_reset("1s") == 1.0
+        assert parse_reset("6m0s") == 360.0
+        assert parse_reset("250ms") == pytest.approx(0.25)
+        assert parse_reset("2.5") == 2.5
+
+
+class TestTokenBucket:
+    @pytest.mark.asyncio
+    async def test_unlimited(self):
+        bucket = TokenBucket(rate=0)
+        for _ in range(100):
+            assert await bucket.acquire() < 0.01
+
+    @pytest.mark.asyncio
+    async def test_rate_limits(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        assert time.monotonic() - start >= 0.025
+
+    @pytest.mark.asyncio
+    async def test_pause(self):
+        bucket = TokenBucket(rate=0)
+        bucket.pause(0.05)
+        assert await bucket.acquire() >= 0.04
+
+    @pytest.mark.asyncio
+    async def test_exhausted_headers_pause(self):
+        bucket = TokenBucket(rate=0)
+        bucket.update_from_headers(httpx.Headers({
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "50ms",
+        }))
+        assert await bucket.acquire() >= 0.04
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TRANSPORT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TestLLMTransport:
+    @pytest.mark.asyncio
+    async def test_complete(self):
+        def handler(request):
+            assert request.headers["authorization"] == "Bearer k"
+            return httpx.Response(200, json=_completion("ok"))
+
+        transport = _transport(handler)
+        data = await transport.complete({"model": "m", "messages": []})
+        assert data["choices"][0]["message"]["content"] == "ok"
+        await transport.close()
+
+    @pytest.mark.asyncio
+    async def test_retry_after_honored_for_model(self):
+        calls = []
+
+        def handler(request):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"retry-after": "0.05"})
+            return httpx.Response(200, json=_completion("ok"))
+
+        transport = _transport(handler)
+        await transport.complete({"model": "m", "messages": []})
+        assert calls[1] - calls[0] >= 0.045
+        stats = transport.get_stats()
+        assert stats["rate_limited"] == 1
+        assert stats["retries"] == 1
+        await transport.close()
+
+    @pytest.mark.asyncio
+    async def test_server_error_retried_then_gives_up(self):
+        transport = _transport(
+            lambda r: httpx.Response(503), max_retries=3)
+        with pytest.raises(ConnectionError):
+            await transport.complete({"model": "m", "messages": []})
+        assert transport.get_stats()["requests"] == 3
+        await transport.close()
+
+    @pytest.mark.asyncio
+    async def test_client_error_not_retried(self):
+        transport = _transport(lambda r: httpx.Response(400, text="bad"))
+        with pytest.raises(httpx.HTTPStatusError):
+            await transport.complete({"model": "m", "messages": []})
+        assert transport.get_stats()["requests"] == 1
+        await transport.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrency_budget(self):
+        active = 0
+        peak = 0
+
+        async def handler(request):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return httpx.Response(200, json=_completion("ok"))
+
+        transport = _transport(handler, max_concurrency=2)
+        await asyncio.gather(*(
+            transport.complete({"model": "m", "messages": []})
+            for _ in range(6)
+        ))
+        assert peak == 2
+        await transport.close()
+
+    @pytest.mark.asyncio
+    async def test_stream(self):
+        def handler(request):
+            assert json.loads(request.content)["stream"] is True
+            return httpx.Response(200, content=_sse("При", "вет"))
+
+        transport = _transport(handler)
+        chunks = [c async for c in transport.stream({"model": "m"})]
+        assert chunks == ["При", "вет"]
+        await transport.close()
+
+    @pytest.mark.asyncio
+    async def test_stream_retried_before_first_token(self):
+        calls = 0
+
+        def handler(request):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                return httpx.Response(502)
+            return httpx.Response(200, content=_sse("ok"))
+
+        transport = _transport(handler)
+        assert [c async for c in transport.stream({"model": "m"})] == ["ok"]
+        assert calls == 2
+        await transport.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STREAMING JSON
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TestJsonObjectCollector:
+    def test_object_split_across_chunks(self):
+        collector = JsonObjectCollector()
+        text = '{"thought": "a", "action": {"type": "tool_call"}}'
+        result = None
+        for i in range(0, len(text), 3):
+            result = collector.feed(text[i:i + 3]) or result
+        assert json.loads(result)["action"]["type"] == "tool_call"
+
+    def test_braces_inside_strings(self):
+        collector = JsonObjectCollector()
+        assert collector.feed('{"a": "}{ \\" }"') is None
+        assert collector.feed(', "b": 1}') == '{"a": "}{ \\" }", "b": 1}'
+
+    def test_leading_and_trailing_text(self):
+        collector = JsonObjectCollector()
+        assert collector.feed('```json\n{"x": 1}\n``` и ещё текст') == '{"x": 1}'
+        assert collector.complete
+
+
+class TestAgentStreaming:
+    @pytest.mark.asyncio
+    async def test_agent_acts_on_first_json_object(self):
+        from pds_ultimate.core.agent import Agent
+        from pds_ultimate.core.llm_engine import LLMEngine
+
+        consumed = []
+
+        class StreamingLLM(LLMEngine):
+            async def stream(self, payload):
+                for chunk in ['{"thought": "t", ', '"action": {"type": ',
+                              '"final_answer", "answer": "ok"}}',
+                              "\n\nхвост", " генерации"]:
+                    consumed.append(chunk)
+                    yield chunk
+
+        agent = Agent()
+        agent._llm = StreamingLLM()
+        raw = await agent._call_llm([{"role": "user", "content": "hi"}])
+        assert json.loads(raw)["action"]["answer"] == "ok"
+        assert len(consumed) == 3  # хвост не дочитывался
+
+    @pytest.mark.asyncio
+    async def test_agent_falls_back_to_complete(self):
+        from pds_ultimate.core.agent import Agent
+        from pds_ultimate.core.llm_engine import LLMEngine
+
+        class NoStreamLLM(LLMEngine):
+            async def stream(self, payload):
+                raise ConnectionError("stream off")
+                yield ""
+
+            async def complete(self, payload):
+                return '{"action": {"type": "final_answer", "answer": "x"}}'
+
+        agent = Agent()
+        agent._llm = NoStreamLLM()
+        raw = await agent._call_llm([])
+        assert "final_answer" in raw
+
+    @pytest.mark.asyncio
+    async def test_agent_empty_stream_falls_back_to_complete(self):
+        from pds_ultimate.core.agent import Agent
+        from pds_ultimate.core.llm_engine import LLMEngine
+
+        class EmptyStreamLLM(LLMEngine):
+            async def stream(self, payload):
+                for chunk in ["", "  \n"]:
+                    yield chunk
+
+            async def complete(self, payload):
+                return '{"action": {"type": "final_answer", "answer": "y"}}'
+
+        agent = Agent()
+        agent._llm = EmptyStreamLLM()
+        raw = await agent._call_llm([])
+        assert json.loads(raw)["action"]["answer"] == "y"
@@ -0,0 +1,178 @@
+"""
+Тесты OCR Service — modules/files/ocr_service.py
+"""
+
+import asyncio
+import importlib
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from pds_ultimate.modules.files.ocr_engine import (
+    EASYOCR_UNAVAILABLE,
+    OCRBlock,
+    OCREngine,
+    OCRResult,
+    recognize_image,
+)
+from pds_ultimate.modules.files.ocr_service import OCRService
+
+# modules/files/__init__ реэкспортирует экземпляры ocr_service/ocr_engine
+# под именами подмодулей — сами модули берём из sys.modules
+ocr_service_mod = importlib.import_module(
+    "pds_ultimate.modules.files.ocr_service")
+ocr_engine_mod = importlib.import_module(
+    "pds_ultimate.modules.files.ocr_engine")
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    """recognize_image → текст из источника, без EasyOCR/Tesseract."""
+    calls = []
+
+    def fake(source, languages, engine, reader=None):
+        calls.append(source)
+        text = source.decode() if isinstance(source, bytes) else source
+        return OCRResult(
+            blocks=[OCRBlock(text, 0.9)], full_text=text, engine_used=engine,
+        )
+
+    monkeypatch.setattr(ocr_service_mod, "recognize_image", fake)
+    return calls
+
+
+class TestOCRServiceThreadMode:
+    @pytest.mark.asyncio
+    async def test_bytes_passed_without_temp_file(self, fake_backend):
+        service = OCRService(workers=0)
+        result = await service.recognize(b"ITOGO 100 USD", engine="tesseract")
+        assert result.full_text == "ITOGO 100 USD"
+        assert fake_backend == [b"ITOGO 100 USD"]
+        assert service.get_stats()["recognize"]["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_keeps_order(self, fake_backend):
+        service = OCRService(workers=0, max_queue=2)
+        pages = [f"page {i}".encode() for i in range(5)]
+        results = await service.recognize_batch(pages)
+        assert [r.full_text for r in results] == [f"page {i}" for i in range(5)]
+        assert service.get_stats()["peak_pending"] <= 2
+
+    @pytest.mark.asyncio
+    async def test_queue_bounded(self, monkeypatch):
+        running = 0
+        peak = 0
+
+        def slow(source, languages, engine, reader=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            import time
+            time.sleep(0.02)
+            running -= 1
+            return OCRResult(blocks=[OCRBlock("x", 1.0)], full_text="x")
+
+        monkeypatch.setattr(ocr_service_mod, "recognize_image", slow)
+        service = OCRService(workers=0, max_queue=3)
+        await asyncio.gather(*(service.recognize(b"x") for _ in range(9)))
+        assert peak <= 3
+
+
+class TestOCRServiceProcessPool:
+    @pytest.mark.asyncio
+    async def test_worker_returns_result(self):
+        service = OCRService(workers=1)
+        try:
+            result = await service.recognize(b"not an image", engine="tesseract")
+        finally:
+            service.shutdown()
+        assert isinstance(result, OCRResult)
+        assert result.engine_used == "tesseract"
+        assert result.success is False
+        assert service.get_stats()["recognize"]["count"] == 1
+
+
+class _BrokenPool(Executor):
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker killed"))
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        pass
+
+
+class TestEasyOCRUnavailable:
+    def test_failed_load_cached(self, monkeypatch):
+        loads = []
+
+        def broken(languages):
+            loads.append(languages)
+            raise RuntimeError("model download failed")
+
+        monkeypatch.setattr(ocr_service_mod, "_readers", {})
+        monkeypatch.setattr(ocr_service_mod, "create_easyocr_reader", broken)
+        assert ocr_service_mod._get_reader(("ru",)) is EASYOCR_UNAVAILABLE
+        assert ocr_service_mod._get_reader(("ru",)) is EASYOCR_UNAVAILABLE
+        assert len(loads) == 1
+
+    def test_unavailable_reader_goes_to_tesseract(self, monkeypatch):
+        def no_easyocr(*args):
+            raise AssertionError("EasyOCR не должен вызываться")
+
+        monkeypatch.setattr(ocr_engine_mod, "recognize_easyocr", no_easyocr)
+        monkeypatch.setattr(
+            ocr_engine_mod, "recognize_tesseract",
+            lambda source, languages: OCRResult(
+                full_text="ok", engine_used="tesseract"),
+        )
+        result = recognize_image(b"x", ["ru"], "easyocr", EASYOCR_UNAVAILABLE)
+        assert result.engine_used == "tesseract"
+
+    @pytest.mark.asyncio
+    async def test_pool_rewarmed_after_crash(self, monkeypatch):
+        service = OCRService(workers=1)
+        warmed = []
+
+        async def start():
+            warmed.append(True)
+
+        def get_pool(engine, languages):
+            service._pool = _BrokenPool()
+            return service._pool
+
+        monkeypatch.setattr(service, "_get_pool", get_pool)
+        monkeypatch.setattr(service, "start", start)
+        result = await service.recognize(b"x", engine="tesseract")
+        assert "crashed" in result.error
+        await asyncio.sleep(0)
+        assert warmed == [True]
+
+
+class TestOCREngineBatch:
+    @pytest.mark.asyncio
+    async def test_missing_files_keep_positions(self, fake_backend, monkeypatch,
+                                                tmp_path):
+        monkeypatch.setattr(ocr_service_mod, "ocr_service",
+                            OCRService(workers=0))
+        page = tmp_path / "p1.jpg"
+        page.write_bytes(b"")
+        results = await OCREngine().recognize_batch(
+            ["/nonexistent/a.jpg", str(page), b"raw"]
+        )
+        assert results[0].success is False
+        assert results[1].full_text == str(page)
+        assert results[2].full_text == "raw"
+
+    @pytest.mark.asyncio
+    async def test_scan_receipt_pages_merged(self, fake_backend, monkeypatch):
+        from pds_ultimate.modules.executive.receipt_scanner import ReceiptScanner
+
+        monkeypatch.setattr(ocr_service_mod, "ocr_service",
+                            OCRService(workers=0))
+        receipt = await ReceiptScanner().scan_receipt_pages(
+            [b"Magazin Romashka", b"Total: 250 USD"]
+        )
+        assert receipt.amount == 250
+        assert "Romashka" in receipt.raw_text
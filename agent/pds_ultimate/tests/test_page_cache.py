@@ -0,0 +1,228 @@
+"""
+Тесты для Page Cache.
+=======================
+Покрывает: нормализацию URL, хранение по хэшу содержимого, сроки
+свежести по TimeRelevanceEngine, перепроверку ETag/Last-Modified
+через ResearchFetcher, кэш результатов поиска.
+"""
+
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from pds_ultimate.config import config
+from pds_ultimate.core.browser_engine import ExtractedData, SearchResult
+from pds_ultimate.core.page_cache import (
+    FRESHNESS_TTL,
+    PageCache,
+    normalize_url,
+)
+from pds_ultimate.core.research_fetcher import ResearchFetcher
+from pds_ultimate.core.time_relevance import FreshnessGrade
+
+_TEXT = "Python is a high-level programming language used for scripting."
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = PageCache(tmp_path / "pages.sqlite")
+    yield c
+    c.close()
+
+
+def _page(url="https://example.com/a", text=_TEXT, **kwargs) -> ExtractedData:
+    return ExtractedData(
+        url=url, title="Example", text=text,
+        links=[{"url": "https://example.com/b", "text": "B"}],
+        meta={"description": "demo"}, **kwargs,
+    )
+
+
+def _expire(cache: PageCache, url: str) -> None:
+    cache._execute(
+        "UPDATE pages SET fresh_until = ? WHERE url_key = ?",
+        (time.time() - 1, normalize_url(url)),
+    )
+
+
+class TestNormalizeUrl:
+    def test_case_port_fragment(self):
+        assert (normalize_url("HTTPS://Example.COM:443/Path#section")
+                == "https://example.com/Path")
+
+    def test_tracking_params_and_order(self):
+        assert (normalize_url("https://x.com/p?b=2&utm_source=tg&a=1&fbclid=z")
+                == "https://x.com/p?a=1&b=2")
+
+    def test_empty_path(self):
+        assert normalize_url("https://x.com") == "https://x.com/"
+
+    def test_custom_port_kept(self):
+        assert normalize_url("http://x.com:8080/") == "http://x.com:8080/"
+
+
+class TestPageCache:
+    def test_roundtrip(self, cache):
+        cache.put(_page(etag='"v1"'))
+        entry = cache.get("https://EXAMPLE.com/a#top")
+        assert entry is not None
+        assert entry.is_fresh
+        assert entry.data.text == _TEXT
+        assert entry.data.links[0]["text"] == "B"
+        assert entry.data.meta == {"description": "demo"}
+        assert entry.etag == '"v1"'
+        assert entry.can_revalidate
+
+    def test_miss(self, cache):
+        assert cache.get("https://nothing.com/") is None
+        assert cache.get_stats()["misses"] == 1
+
+    def test_content_addressed(self, cache):
+        cache.put(_page("https://mirror1.com/doc"))
+        cache.put(_page("https://mirror2.com/doc"))
+        stats = cache.get_stats()
+        assert stats["pages"] == 2
+        assert stats["blobs"] == 1
+        assert stats["dedup_writes"] == 1
+        # URL берётся из записи страницы, а не из общего блоба
+        assert cache.get("https://mirror2.com/doc").data.url == (
+            "https://mirror2.com/doc")
+
+    def test_ttl_from_freshness_grade(self, cache):
+        today = datetime.now().strftime("%Y-%m-%d")
+        old = (datetime.now() - timedelta(days=800)).strftime("%Y-%m-%d")
+        news = cache.put(_page("https://news.com/", f"Published {today}. {_TEXT}"))
+        archive = cache.put(_page("https://old.com/", f"Published {old}. {_TEXT}"))
+        assert news.grade == FreshnessGrade.FRESH
+        assert archive.grade == FreshnessGrade.OUTDATED
+        assert (archive.fresh_until - archive.fetched_at
+                == FRESHNESS_TTL[FreshnessGrade.OUTDATED])
+        assert news.fresh_until < archive.fresh_until
+
+    def test_stale_entry_returned(self, cache):
+        cache.put(_page(etag='"v1"'))
+        _expire(cache, "https://example.com/a")
+        entry = cache.get("https://example.com/a")
+        assert entry is not None and not entry.is_fresh
+        assert cache.get_stats()["stale_hits"] == 1
+
+    def test_touch_extends(self, cache):
+        cache.put(_page(etag='"v1"'))
+        _expire(cache, "https://example.com/a")
+        entry = cache.get("https://example.com/a")
+        cache.touch(entry, etag='"v2"')
+        fresh = cache.get("https://example.com/a")
+        assert fresh.is_fresh
+        assert fresh.etag == '"v2"'
+
+    def test_max_age(self, tmp_path):
+        c = PageCache(tmp_path / "p.sqlite", max_age_days=0)
+        c.put(_page())
+        assert c.get("https://example.com/a") is None
+        assert c.evict() == 1
+        assert c.get_stats()["blobs"] == 0
+        c.close()
+
+    def test_evict_to_max_bytes(self, tmp_path):
+        c = PageCache(tmp_path / "p.sqlite", max_bytes=1)
+        c.put(_page("https://a.com/", "first " * 200))
+        c.put(_page("https://b.com/", "second " * 200))
+        assert c.evict() >= 1
+        assert c.get("https://a.com/") is None
+        c.close()
+
+    def test_search_cache(self, cache):
+        results = [SearchResult(title="T", url="https://t.com/", position=1)]
+        cache.put_search("Python  Tips", 5, results, ttl=60)
+        assert cache.get_search("python tips", 5) == results
+        assert cache.get_search("python tips", 10) is None
+        cache.put_search("old", 5, results, ttl=-1)
+        assert cache.get_search("old", 5) is None
+
+
+class TestFetcherWithCache:
+    def _fetcher(self, cache, **overrides):
+        overrides.setdefault("domain_delay_ms", 0)
+        return ResearchFetcher(replace(config.research, **overrides),
+                               cache=cache)
+
+    def _browser(self, **data_kwargs):
+        eng = MagicMock()
+        eng.extract_data = AsyncMock(
+            side_effect=lambda url, isolated=False: _page(url, **data_kwargs))
+        return eng
+
+    @pytest.mark.asyncio
+    async def test_second_fetch_from_cache(self, cache):
+        eng = self._browser()
+        fetcher = self._fetcher(cache)
+        with patch("pds_ultimate.core.browser_engine.browser_engine", eng):
+            first = await fetcher.fetch("https://example.com/a")
+            second = await fetcher.fetch("https://example.com/a?utm_source=x")
+
+        assert first.via == "browser"
+        assert second.via == "cache" and second.from_cache
+        assert second.data.text == _TEXT
+        eng.extract_data.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_revalidated_on_304(self, cache):
+        seen = {}
+
+        def handler(request):
+            seen.update(request.headers)
+            return httpx.Response(304)
+
+        cache.put(_page(etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT"))
+        _expire(cache, "https://example.com/a")
+        eng = self._browser()
+        fetcher = self._fetcher(cache)
+        fetcher._ensure_limits()
+        fetcher._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler))
+
+        with patch("pds_ultimate.core.browser_engine.browser_engine", eng):
+            page = await fetcher.fetch("https://example.com/a")
+        await fetcher._client.aclose()
+
+        assert page.via == "revalidated"
+        assert seen["if-none-match"] == '"v1"'
+        assert "if-modified-since" in seen
+        eng.extract_data.assert_not_called()
+        assert cache.get("https://example.com/a").is_fresh
+
+    @pytest.mark.asyncio
+    async def test_changed_page_refetched(self, cache):
+        cache.put(_page(etag='"v1"'))
+        _expire(cache, "https://example.com/a")
+        eng = self._browser(text="Updated content " * 5, etag='"v2"')
+        fetcher = self._fetcher(cache)
+        fetcher._ensure_limits()
+        fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, html="<p>changed</p>")))
+
+        with patch("pds_ultimate.core.browser_engine.browser_engine", eng):
+            page = await fetcher.fetch("https://example.com/a")
+        await fetcher._client.aclose()
+
+        assert page.via == "browser"
+        assert cache.get("https://example.com/a").etag == '"v2"'
+
+    @pytest.mark.asyncio
+    async def test_search_cached(self, cache):
+        eng = MagicMock()
+        eng.web_search = AsyncMock(return_value=[
+            SearchResult(title="T", url="https://t.com/", position=1)])
+        fetcher = self._fetcher(cache)
+
+        with patch("pds_ultimate.core.browser_engine.browser_engine", eng):
+            first = await fetcher.search("python", max_results=5)
+            second = await fetcher.search("python", max_results=5)
+
+        assert first == second
+        eng.web_search.assert_called_once()
+        assert fetcher.get_stats()["search_cache_hits"] == 1
@@ -429,6 +429,39 @@ class TestParallelEngine:
         assert results["fail"].success is False
         assert "boom" in results["fail"].error
 
+    @pytest.mark.asyncio
+    async def test_run_parallel_timeout(self):
+        engine = ParallelEngine()
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        results = await engine.run_parallel(
+            {"ok": lambda: _async_value("v"), "hang": hang}, timeout=0.05,
+        )
+        assert results["ok"].result == "v"
+        assert results["hang"].success is False
+        assert "Таймаут" in results["hang"].error
+        assert engine.concurrency.active_count == 0
+
+    @pytest.mark.asyncio
+    async def test_run_parallel_task_categories(self):
+        engine = ParallelEngine(max_browser_concurrent=1)
+        active = peak = 0
+
+        async def browse():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        await engine.run_parallel(
+            {f"b{i}": browse for i in range(3)},
+            categories={f"b{i}": "browser" for i in range(3)},
+        )
+        assert peak == 1
+
     @pytest.mark.asyncio
     async def test_start_stop(self):
         engine = ParallelEngine()
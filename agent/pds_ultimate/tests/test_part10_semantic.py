@@ -183,6 +183,48 @@ class TestContextualSearch:
         results = cs.search(q)
         assert isinstance(results, list)
 
+    def test_incremental_sync(self):
+        from pds_ultimate.core.semantic_engine import SemanticSearchEngine
+        kb = KnowledgeBase()
+        a = kb.add("Python язык программирования",
+                   category=KnowledgeCategory.FACT)
+        b = kb.add("Рецепт борща", category=KnowledgeCategory.GENERAL)
+        cs = ContextualSearch(kb)
+        cs._engine = SemanticSearchEngine(incremental=True)
+        assert cs.sync_from_kb() == 2
+        vec_before = cs._engine.index._vectors[b.id]
+
+        kb.remove(a.id)
+        c = kb.add("Java язык программирования",
+                   category=KnowledgeCategory.FACT)
+        assert cs.sync_from_kb() == 2
+        assert a.id not in cs._engine.index._contents
+        assert c.id in cs._engine.index._contents
+        assert cs._engine.model._total_docs == 2
+        # Неизменённые знания не пере-embed'ятся
+        assert cs._engine.index._vectors[b.id] is vec_before
+
+    def test_incremental_sync_reindexes_edited(self):
+        from pds_ultimate.core.semantic_engine import SemanticSearchEngine
+        kb = KnowledgeBase()
+        a = kb.add("Python язык программирования",
+                   category=KnowledgeCategory.FACT)
+        b = kb.add("Рецепт борща", category=KnowledgeCategory.GENERAL)
+        cs = ContextualSearch(kb)
+        cs._engine = SemanticSearchEngine(incremental=True)
+        cs.sync_from_kb()
+        vec_b = cs._engine.index._vectors[b.id]
+
+        kb._items[a.id].content = "Поставщик из Гуанчжоу отгрузил ткань"
+        assert cs.sync_from_kb() == 2
+
+        assert cs._engine.index._contents[a.id] == \
+            "Поставщик из Гуанчжоу отгрузил ткань"
+        assert cs._engine.index._vectors[b.id] is vec_b
+        assert cs._engine.model._total_docs == 2
+        results = cs.search(SearchQuery(text="ткань поставщик"))
+        assert results and results[0].item.id == a.id
+
 
 class TestEmbeddingPruner:
     """Тесты EmbeddingPruner."""
@@ -5,7 +5,10 @@
 BatchAPIProcessor, PerformanceMonitor, PerformanceEngine.
 """
 
+import asyncio
+import inspect
 import time
+from datetime import date
 
 import pytest
 
@@ -13,11 +16,15 @@ from pds_ultimate.core.performance_engine import (
     BatchAPIProcessor,
     CacheEntry,
     CacheStats,
+    CacheStrategy,
     PerformanceEngine,
     PerformanceMetrics,
     PerformanceMonitor,
     RequestDeduplicator,
     ResultCache,
+    UnkeyableArgument,
+    canonical_key,
+    canonicalize,
     performance_engine,
 )
 
@@ -221,6 +228,254 @@ class TestResultCache:
         assert "tool" in stats["categories"]
 
 
+class TestShardedResultCache:
+    """Шарды, бюджет памяти, индексы категорий, TinyLFU-admission."""
+
+    def test_sharded_put_get(self):
+        cache = ResultCache(max_size=100, shards=4)
+        for i in range(50):
+            cache.put(f"tool:k{i}", i, category="tool")
+        assert cache.size == 50
+        assert all(cache.get(f"tool:k{i}") == i for i in range(50))
+        assert cache.get_stats()["shards"] == 4
+
+    def test_sharded_respects_max_size(self):
+        cache = ResultCache(max_size=40, shards=4)
+        for i in range(200):
+            cache.put(f"k{i}", i)
+        assert cache.size <= 40
+        assert cache.stats.evictions >= 160
+
+    def test_byte_budget_evicts(self):
+        cache = ResultCache(max_size=1000, max_bytes=20_000)
+        for i in range(20):
+            cache.put(f"k{i}", "x" * 2000)
+        assert cache.bytes_used <= 20_000
+        assert cache.size < 20
+        assert cache.get("k19") is not None
+        assert cache.get("k0") is None
+
+    def test_oversized_value_not_cached(self):
+        cache = ResultCache(max_size=10, max_bytes=1000)
+        cache.put("big", "x" * 5000)
+        assert cache.get("big") is None
+        assert cache.get_stats()["rejected"] == 1
+
+    def test_bytes_released_on_invalidate(self):
+        cache = ResultCache(max_size=10, max_bytes=100_000)
+        cache.put("a", {"rows": list(range(100))})
+        assert cache.bytes_used > 0
+        cache.invalidate("a")
+        assert cache.bytes_used == 0
+
+    def test_category_index_and_counters(self):
+        cache = ResultCache(max_size=100, shards=4)
+        for i in range(10):
+            cache.put(f"tool:{i}", i, category="tool")
+            cache.put(f"llm:{i}", i, category="llm")
+        cache.put("tool:0", "re", category="llm")  # смена категории
+        assert cache.get_stats()["categories"] == {"tool": 9, "llm": 11}
+        assert cache.invalidate_category("tool") == 9
+        assert cache.get_stats()["categories"] == {"llm": 11}
+        assert cache.get("tool:0") == "re"
+
+    def test_invalidate_pattern_sharded(self):
+        cache = ResultCache(max_size=100, shards=4)
+        for i in range(5):
+            cache.put(f"tool:weather:{i}", i)
+            cache.put(f"tool:rates:{i}", i)
+        cache.put("toolbox", 1)
+        assert cache.invalidate_pattern("tool:weather:") == 5
+        assert cache.invalidate_pattern("tool") == 6
+        assert cache.size == 0
+
+    def test_tinylfu_protects_hot_keys(self):
+        cache = ResultCache(max_size=10, admission=True)
+        for i in range(10):
+            cache.put(f"tool:{i}", i, category="tool")
+            for _ in range(3):
+                cache.get(f"tool:{i}")
+        for i in range(50):
+            cache.put(f"llm:once:{i}", i, category="llm")
+        assert cache.get_stats()["categories"] == {"tool": 10}
+        assert cache.get_stats()["rejected"] == 50
+
+    def test_tinylfu_admits_frequent_newcomer(self):
+        cache = ResultCache(max_size=2, admission=True)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        for _ in range(5):
+            cache.get("c")
+        cache.put("c", 3)
+        assert cache.get("c") == 3
+        assert cache.size == 2
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MEMOIZE (single-flight + cache)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class _Opaque:
+    """Объект с default repr (адрес в памяти)."""
+
+
+class TestCanonicalKey:
+    def test_dict_order_irrelevant(self):
+        assert canonical_key("p", {"a": 1, "b": [1, 2]}) == \
+            canonical_key("p", {"b": [1, 2], "a": 1})
+
+    def test_types_distinguished(self):
+        assert canonical_key("p", [1]) != canonical_key("p", ["1"])
+
+    def test_dates_enums_sets(self):
+        assert canonicalize(date(2026, 1, 2)) == "2026-01-02"
+        assert canonicalize(CacheStrategy.LRU) == ["CacheStrategy", "lru"]
+        assert canonicalize({3, 1, 2}) == canonicalize({2, 3, 1})
+
+    def test_dataclass(self):
+        a = CacheStats(hits=1)
+        assert canonical_key("p", a) == canonical_key("p", CacheStats(hits=1))
+        assert canonical_key("p", a) != canonical_key("p", CacheStats(hits=2))
+
+    def test_default_repr_rejected(self):
+        with pytest.raises(UnkeyableArgument):
+            canonicalize(_Opaque())
+
+    @pytest.mark.asyncio
+    async def test_cached_skips_unkeyable(self):
+        cache = ResultCache()
+        calls = 0
+
+        @cache.cached()
+        async def func(obj):
+            nonlocal calls
+            calls += 1
+            return "v"
+
+        await func(_Opaque())
+        await func(_Opaque())
+        assert calls == 2
+        assert cache.size == 0
+
+
+class TestMemoize:
+    def setup_method(self):
+        self.engine = PerformanceEngine()
+        self.calls = 0
+
+    @pytest.mark.asyncio
+    async def test_positional_and_keyword_share_key(self):
+        @self.engine.memoize(ttl=60)
+        async def func(x, y=2):
+            self.calls += 1
+            return x + y
+
+        assert await func(1) == 3
+        assert await func(x=1) == 3
+        assert await func(1, y=2) == 3
+        assert self.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_ignored_argument(self):
+        @self.engine.memoize(ttl=60, ignore=("session",))
+        async def func(q, session=None):
+            self.calls += 1
+            return q
+
+        await func("a", session=_Opaque())
+        await func("a", session=_Opaque())
+        await func("a")
+        assert self.calls == 2  # с сессией и без — разные ключи
+
+    @pytest.mark.asyncio
+    async def test_custom_key(self):
+        @self.engine.memoize(ttl=60, key=lambda user, **kw: user["id"])
+        async def func(user, verbose=False):
+            self.calls += 1
+            return user["id"]
+
+        await func({"id": 1, "name": "a"})
+        await func({"id": 1, "name": "b"}, verbose=True)
+        assert self.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_single_flight(self):
+        @self.engine.memoize(ttl=60)
+        async def func(x):
+            self.calls += 1
+            await asyncio.sleep(0.02)
+            return x
+
+        results = await asyncio.gather(*(func(7) for _ in range(5)))
+        assert results == [7] * 5
+        assert self.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_negative_caching(self):
+        @self.engine.memoize(ttl=60, negative_ttl=0.05)
+        async def lookup(x):
+            self.calls += 1
+            return None
+
+        assert await lookup(1) is None
+        assert await lookup(1) is None
+        assert self.calls == 1
+        await asyncio.sleep(0.06)
+        await lookup(1)
+        assert self.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_negative_predicate_disabled(self):
+        @self.engine.memoize(
+            ttl=60, negative_ttl=None, is_negative=lambda r: r == "err")
+        async def func():
+            self.calls += 1
+            return "err"
+
+        await func()
+        await func()
+        assert self.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self):
+        @self.engine.memoize(ttl=0.02, stale_ttl=10)
+        async def func():
+            self.calls += 1
+            return self.calls
+
+        assert await func() == 1
+        await asyncio.sleep(0.03)
+        assert await func() == 1  # stale — отдаём сразу
+        await asyncio.sleep(0.01)  # фоновое обновление
+        assert self.calls == 2
+        assert await func() == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate(self):
+        @self.engine.memoize(ttl=60, category="db")
+        async def func():
+            self.calls += 1
+            return "v"
+
+        await func()
+        func.invalidate()
+        await func()
+        self.engine.cache.invalidate_category("db")
+        await func()
+        assert self.calls == 3
+
+    def test_wraps_signature(self):
+        @self.engine.memoize()
+        async def tool_handler(query: str, db_session=None):
+            """Док."""
+
+        assert tool_handler.__name__ == "tool_handler"
+        assert tool_handler.__doc__ == "Док."
+        assert list(inspect.signature(tool_handler).parameters) == \
+            ["query", "db_session"]
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # REQUEST DEDUPLICATOR
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1,10 +1,15 @@
 """
 Тесты Plugin System (Part 8)
 =================================
-Plugin Manager, API Detector, Rate Limiter, PluginConfig.
-~50 тестов покрывающих основные компоненты.
+Plugin Manager, API Detector, Rate Limiter, PluginConfig,
+HTTP-пул клиентов и кэш GET-ответов.
+~60 тестов покрывающих основные компоненты.
 """
 
+import time
+
+import httpx
+import pytest
 
 from pds_ultimate.core.plugin_system import (
     APIDetector,
@@ -12,6 +17,7 @@ from pds_ultimate.core.plugin_system import (
     PluginConfig,
     PluginEndpoint,
     PluginHealth,
+    PluginHTTPPool,
     PluginManager,
     PluginStatus,
     PluginType,
@@ -331,6 +337,31 @@ class TestRateLimiter:
         assert rl.check("p1", limit=5) is False
         assert rl.check("p2", limit=5) is True
 
+    @pytest.mark.asyncio
+    async def test_acquire_waits_for_token(self):
+        rl = RateLimiter()
+        for _ in range(600):
+            rl.check("p1", limit=600)        # 10 токенов/сек
+        start = time.monotonic()
+        waited = await rl.acquire("p1", limit=600, max_wait=1.0)
+        assert waited is not None and waited > 0
+        assert time.monotonic() - start >= 0.05
+        assert rl.get_stats()["waits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_acquire_gives_up_after_max_wait(self):
+        rl = RateLimiter()
+        rl.check("p1", limit=1)              # следующий токен через минуту
+        assert await rl.acquire("p1", limit=1, max_wait=0.02) is None
+        assert rl.get_stats()["rejected"] == 1
+
+    def test_limit_change_rebuilds_bucket(self):
+        rl = RateLimiter()
+        for _ in range(5):
+            rl.check("p1", limit=5)
+        assert rl.check("p1", limit=10) is True
+        assert rl.remaining("p1", limit=10) == 9
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # PluginManager
@@ -483,6 +514,151 @@ class TestPluginManager:
         assert headers.get("Authorization", "").startswith("Basic ")
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# HTTP pool + GET cache
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class _Recorder:
+    """MockTransport, который запоминает запросы."""
+
+    def __init__(self, status: int = 200):
+        self.requests: list[httpx.Request] = []
+        self.status = status
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return httpx.Response(
+            self.status, json={"n": len(self.requests)})
+
+
+def _active_plugin(pm: PluginManager, rate_limit: int = 60, **ep_kwargs):
+    endpoints = [
+        PluginEndpoint(method="GET", path="/items", **ep_kwargs),
+        PluginEndpoint(method="POST", path="/items"),
+    ]
+    plugin = pm.register_plugin(PluginConfig(
+        name="Shop", base_url="https://api.shop.com/v1", api_key="k",
+        rate_limit=rate_limit, endpoints=endpoints,
+    ))
+    plugin.status = PluginStatus.ACTIVE
+    return plugin
+
+
+class TestPluginHTTP:
+    """PluginHTTPPool, очередь rate limit и кэш GET в execute."""
+
+    def _manager(self, recorder: _Recorder) -> PluginManager:
+        pm = PluginManager(transport=httpx.MockTransport(recorder))
+        pm._plugins.clear()
+        return pm
+
+    def test_origin(self):
+        assert (PluginHTTPPool.origin("https://API.Shop.com:8443/v1/x?q=1")
+                == "https://api.shop.com:8443")
+
+    @pytest.mark.asyncio
+    async def test_client_reused_across_calls(self):
+        rec = _Recorder()
+        pm = self._manager(rec)
+        plugin = _active_plugin(pm)
+
+        for _ in range(3):
+            result = await pm.execute(plugin.id, 0)
+            assert result["success"]
+        await pm.close()
+
+        assert len(rec.requests) == 3
+        assert rec.requests[0].headers["authorization"] == "Bearer k"
+        stats = pm.get_stats()["http"]
+        assert stats["created"] == 1
+        assert stats["reused"] == 2
+
+    @pytest.mark.asyncio
+    async def test_get_cached_with_endpoint_ttl(self):
+        rec = _Recorder()
+        pm = self._manager(rec)
+        plugin = _active_plugin(pm, cache_ttl=60)
+
+        first = await pm.execute(plugin.id, 0, params={"a": 1, "b": 2})
+        second = await pm.execute(plugin.id, 0, params={"b": 2, "a": 1})
+        other = await pm.execute(plugin.id, 0, params={"a": 2})
+        await pm.close()
+
+        assert first["data"] == {"n": 1}
+        assert second["cached"] is True and second["data"] == {"n": 1}
+        assert other["data"] == {"n": 2}
+        assert len(rec.requests) == 2
+        assert plugin.usage_count == 3
+
+    @pytest.mark.asyncio
+    async def test_get_not_cached_by_default(self):
+        rec = _Recorder()
+        pm = self._manager(rec)
+        plugin = _active_plugin(pm)
+
+        await pm.execute(plugin.id, 0)
+        await pm.execute(plugin.id, 0)
+        await pm.close()
+        assert len(rec.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_cache(self):
+        rec = _Recorder()
+        pm = self._manager(rec)
+        plugin = _active_plugin(pm, cache_ttl=60)
+
+        await pm.execute(plugin.id, 0)
+        await pm.execute(plugin.id, 1, body={"name": "new"})
+        after = await pm.execute(plugin.id, 0)
+        await pm.close()
+
+        assert "cached" not in after
+        assert len(rec.requests) == 3
+        assert rec.requests[1].method == "POST"
+
+    @pytest.mark.asyncio
+    async def test_errors_not_cached(self):
+        rec = _Recorder(status=503)
+        pm = self._manager(rec)
+        plugin = _active_plugin(pm, cache_ttl=60)
+
+        await pm.execute(plugin.id, 0)
+        await pm.execute(plugin.id, 0)
+        await pm.close()
+        assert len(rec.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_queues_then_rejects(self):
+        rec = _Recorder()
+        pm = self._manager(rec)
+        pm._rate_max_wait = 0.02
+        plugin = _active_plugin(pm, rate_limit=1)
+
+        assert (await pm.execute(plugin.id, 0))["success"]
+        result = await pm.execute(plugin.id, 0)
+        await pm.close()
+
+        assert result["success"] is False
+        assert "Rate limit" in result["error"]
+        assert len(rec.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_validate_uses_pool(self):
+        rec = _Recorder()
+        pm = self._manager(rec)
+        plugin = pm.register_plugin(PluginConfig(
+            name="Health", base_url="https://api.health.com"))
+
+        health = await pm.validate_plugin(plugin.id)
+        await pm.execute(plugin.id)
+        await pm.close()
+
+        assert health.healthy
+        assert plugin.status == PluginStatus.ACTIVE
+        assert pm.get_stats()["http"]["created"] == 1
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # Global instance
 # ═══════════════════════════════════════════════════════════════════════════════
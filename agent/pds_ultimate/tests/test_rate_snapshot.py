@@ -0,0 +1,120 @@
+"""
+Тесты снапшота курсов — modules/finance/rate_snapshot.py
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from pds_ultimate.modules.finance.rate_snapshot import (
+    RateBook,
+    RateSnapshot,
+    save_snapshot,
+)
+
+
+class TestRateSnapshot:
+    def test_to_usd_many_keeps_order(self):
+        snap = RateSnapshot(rates={"USD": 1.0, "TMT": 19.5, "CNY": 7.1})
+        result = snap.to_usd_many([(195, "TMT"), (71, "cny"), (10, "USD")])
+        assert result == pytest.approx([10.0, 10.0, 10.0])
+
+    def test_rate_looked_up_once_per_currency(self, monkeypatch):
+        snap = RateSnapshot(rates={"USD": 1.0, "TMT": 19.5})
+        calls = []
+        original = RateSnapshot.rate
+
+        def counting(self, currency):
+            calls.append(currency)
+            return original(self, currency)
+
+        monkeypatch.setattr(RateSnapshot, "rate", counting)
+        snap.to_usd_many([(19.5, "TMT")] * 50 + [(1, "USD")] * 50)
+        assert sorted(calls) == ["TMT", "USD"]
+
+    def test_unknown_currency_passthrough(self):
+        snap = RateSnapshot(rates={"USD": 1.0})
+        assert snap.to_usd(100, "XYZ") == 100
+        assert snap.missing(["USD", "xyz"]) == {"XYZ"}
+
+    def test_convert_many(self):
+        snap = RateSnapshot(rates={"USD": 1.0, "TMT": 19.5, "CNY": 7.1})
+        assert snap.convert_many([(195, "TMT")], "CNY") == pytest.approx([71.0])
+        with pytest.raises(ValueError):
+            snap.convert_many([(1, "USD")], "XYZ")
+
+    def test_freshness(self):
+        old = RateSnapshot(
+            rates={"USD": 1.0}, taken_at=datetime.now() - timedelta(hours=1),
+        )
+        assert old.is_fresh(7200)
+        assert not old.is_fresh(60)
+
+
+class TestRateBook:
+    def test_publish_keeps_fixed_rates(self):
+        book = RateBook()
+        snap = book.publish({"TMT": 30.0, "EUR": 0.9}, source="api")
+        assert snap.rate("TMT") == 19.5
+        assert snap.rate("EUR") == 0.9
+        assert book.current is snap
+
+    def test_versions_monotonic_and_history(self):
+        book = RateBook(history=3)
+        taken_at = datetime.now()
+        first = book.publish({"EUR": 0.9}, "api", taken_at)
+        second = book.publish({"EUR": 0.95}, "api", taken_at)
+        assert second.version > first.version
+        assert book.at(first.version).rate("EUR") == 0.9
+        assert book.current.rate("EUR") == 0.95
+
+    def test_publish_merges_previous_dynamic(self):
+        book = RateBook()
+        book.publish({"EUR": 0.9}, "api")
+        snap = book.publish({"RUB": 90.0}, "api")
+        assert snap.rate("EUR") == 0.9
+        assert snap.rate("RUB") == 90.0
+
+
+class TestRateBookDatabase:
+    def test_load_latest_rates(self, db_session):
+        from pds_ultimate.core.database import CurrencyRate
+
+        today = date.today()
+        db_session.add_all([
+            CurrencyRate(target_currency="EUR", rate=0.8,
+                         rate_date=today - timedelta(days=3)),
+            CurrencyRate(target_currency="EUR", rate=0.92, rate_date=today),
+            CurrencyRate(target_currency="RUB", rate=91.0, rate_date=today),
+        ])
+        db_session.commit()
+
+        book = RateBook()
+        snap = book.snapshot(db_session)
+        assert snap.source == "db"
+        assert snap.rate("EUR") == 0.92
+        assert snap.rate("RUB") == 91.0
+        # Загрузка из БД — один раз
+        assert book.snapshot(db_session) is snap
+
+    def test_empty_db_keeps_fixed(self, db_session):
+        book = RateBook()
+        snap = book.snapshot(db_session)
+        assert snap.version == 0
+        assert snap.rate("TMT") == 19.5
+
+    def test_save_snapshot_upserts(self, db_session):
+        from pds_ultimate.core.database import CurrencyRate
+
+        book = RateBook()
+        assert save_snapshot(db_session, book.publish({"EUR": 0.9}, "api")) == 1
+        assert save_snapshot(db_session, book.publish({"EUR": 0.95}, "api")) == 1
+
+        rows = db_session.query(CurrencyRate).filter(
+            CurrencyRate.target_currency == "EUR",
+        ).all()
+        assert [r.rate for r in rows] == [0.95]
+        # Фиксированные курсы в БД не пишутся
+        assert db_session.query(CurrencyRate).filter(
+            CurrencyRate.target_currency == "TMT",
+        ).count() == 0
@@ -0,0 +1,275 @@
+"""
+Тесты для Research Fetcher.
+=============================
+Покрывает: разбор статического HTML, лимиты по домену и общий,
+потоковую выдачу страниц, быстрый HTTP-путь с откатом на браузер,
+параллельный research в InternetReasoningEngine.
+"""
+
+import asyncio
+import time
+from dataclasses import replace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from pds_ultimate.config import config
+from pds_ultimate.core.browser_engine import ExtractedData, SearchResult
+from pds_ultimate.core.internet_reasoning import InternetReasoningEngine
+from pds_ultimate.core.research_fetcher import (
+    DomainLimiter,
+    ResearchFetcher,
+    domain_of,
+    parse_html,
+)
+
+_HTML = """
+<html><head><title> Python  Guide </title>
+<meta name="description" content="All about Python">
+<script>var hidden = "script text";</script></head>
+<body>
+<nav><a href="/menu">Menu</a></nav>
+<h1>Python basics</h1>
+<p>Python is a high-level programming language.</p>
+<p>See the <a href="/docs/tutorial">official tutorial</a> for details.</p>
+<footer>Footer text</footer>
+</body></html>
+"""
+
+
+def _fetcher(**overrides) -> ResearchFetcher:
+    overrides.setdefault("domain_delay_ms", 0)
+    return ResearchFetcher(replace(config.research, **overrides))
+
+
+def _slow_browser(delay: float = 0.05):
+    """Мок browser_engine: extract_data ждёт delay и считает параллельность."""
+    state = {"active": 0, "peak": 0}
+
+    async def extract(url, isolated=False):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            state["active"] -= 1
+        return ExtractedData(
+            url=url, title=url,
+            text=(
+                "Python is a high-level programming language. "
+                "Python was created by Guido van Rossum in 1991. "
+                "It is widely used in web development and data science."
+            ),
+        )
+
+    eng = MagicMock()
+    eng.extract_data = AsyncMock(side_effect=extract)
+    return eng, state
+
+
+class TestParseHtml:
+    def test_text_without_boilerplate(self):
+        data = parse_html("https://example.com/page", _HTML)
+        assert data.title == "Python Guide"
+        assert "high-level programming language" in data.text
+        assert "script text" not in data.text
+        assert "Menu" not in data.text
+        assert "Footer text" not in data.text
+
+    def test_links_absolute(self):
+        data = parse_html("https://example.com/page", _HTML)
+        assert data.links == [{
+            "url": "https://example.com/docs/tutorial",
+            "text": "official tutorial",
+        }]
+
+    def test_headings_and_meta(self):
+        data = parse_html("https://example.com/page", _HTML)
+        assert data.headings == [{"level": "h1", "text": "Python basics"}]
+        assert data.meta["description"] == "All about Python"
+
+    def test_broken_html(self):
+        data = parse_html("https://x.com", "<p>unclosed <b>bold")
+        assert "unclosed bold" in data.text
+
+
+class TestDomainLimiter:
+    def test_domain_of(self):
+        assert domain_of("https://www.Example.com/a") == "example.com"
+        assert domain_of("http://docs.python.org/3/") == "docs.python.org"
+
+    @pytest.mark.asyncio
+    async def test_per_domain_limit(self):
+        limiter = DomainLimiter(per_domain=1, delay=0)
+        active = {"n": 0, "peak": 0}
+
+        async def job():
+            async with limiter.slot("a.com"):
+                active["n"] += 1
+                active["peak"] = max(active["peak"], active["n"])
+                await asyncio.sleep(0.01)
+                active["n"] -= 1
+
+        await asyncio.gather(*(job() for _ in range(4)))
+        assert active["peak"] == 1
+
+    @pytest.mark.asyncio
+    async def test_delay_between_starts(self):
+        limiter = DomainLimiter(per_domain=5, delay=0.05)
+        starts: list[float] = []
+
+        async def job():
+            async with limiter.slot("a.com"):
+                starts.append(time.monotonic())
+
+        await asyncio.gather(*(job() for _ in range(3)))
+        assert starts[-1] - starts[0] >= 0.09
+
+    @pytest.mark.asyncio
+    async def test_domains_independent(self):
+        limiter = DomainLimiter(per_domain=1, delay=1.0)
+        start = time.monotonic()
+        async with limiter.slot("a.com"):
+            pass
+        async with limiter.slot("b.com"):
+            pass
+        assert time.monotonic() - start < 0.5
+
+
+class TestResearchFetcher:
+    @pytest.mark.asyncio
+    async def test_fetches_in_parallel(self):
+        eng, state = _slow_browser()
+        fetcher = _fetcher(max_concurrency=4)
+        urls = [f"https://site{i}.com/" for i in range(4)]
+
+        with patch("pds_ultimate.core.browser_engine.browser_engine", eng):
+            pages = await fetcher.fetch_all(urls)
+
+        assert [p.url for p in pages] == urls
+        assert all(p.ok and p.via == "browser" for p in pages)
+        assert state["peak"] == 4
+        eng.extract_data.assert_any_call(urls[0], isolated=True)
+
+    @pytest.mark.asyncio
+    async def test_global_limit(self):
+        eng, state = _slow_browser(0.01)
+        fetcher = _fetcher(max_concurrency=2)
+        urls = [f"https://site{i}.com/" for i in range(6)]
+
+        with patch("pds_ultimate.core.browser_engine.browser_engine", eng):
+            await fetcher.fetch_all(urls)
+
+        assert state["peak"] == 2
+        assert fetcher.get_stats()["max_in_flight"] == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_as_ready(self):
+        delays = {"https://slow.com/": 0.1, "https://fast.com/": 0.0}
+
+        async def extract(url, isolated=False):
+            await asyncio.sleep(delays[url])
+            return ExtractedData(url=url)
+
+        eng = MagicMock()
+        eng.extract_data = AsyncMock(side_effect=extract)
+        fetcher = _fetcher()
+
+        with patch("pds_ultimate.core.browser_engine.browser_engine", eng):
+            order = [p async for p in fetcher.stream(list(delays))]
+
+        assert [p.url for p in order] == ["https://fast.com/",
+                                          "https://slow.com/"]
+        assert [p.index for p in order] == [1, 0]
+
+    @pytest.mark.asyncio
+    async def test_error_reported_not_raised(self):
+        eng = MagicMock()
+        eng.extract_data = AsyncMock(side_effect=RuntimeError("boom"))
+        fetcher = _fetcher()
+
+        with patch("pds_ultimate.core.browser_engine.browser_engine", eng):
+            page = await fetcher.fetch("https://x.com/")
+
+        assert not page.ok
+        assert page.error == "boom"
+        assert fetcher.stats.failures == 1
+
+    @pytest.mark.asyncio
+    async def test_http_fast_path(self):
+        def handler(request):
+            return httpx.Response(
+                200, html=_HTML, headers={"content-type": "text/html"})
+
+        eng = MagicMock()
+        eng.extract_data = AsyncMock()
+        fetcher = _fetcher(http_fast_path=True, http_min_text=10)
+        fetcher._ensure_limits()
+        fetcher._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler))
+
+        with patch("pds_ultimate.core.browser_engine.browser_engine", eng):
+            page = await fetcher.fetch("https://example.com/page")
+        await fetcher.close()
+
+        assert page.via == "http"
+        assert page.data.title == "Python Guide"
+        eng.extract_data.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_http_fast_path_falls_back(self):
+        def handler(request):
+            # JS-приложение: почти пустой HTML
+            return httpx.Response(
+                200, html="<div id='app'></div>",
+                headers={"content-type": "text/html"})
+
+        eng, _ = _slow_browser(0)
+        fetcher = _fetcher(http_fast_path=True, http_min_text=100)
+        fetcher._ensure_limits()
+        fetcher._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler))
+
+        with patch("pds_ultimate.core.browser_engine.browser_engine", eng):
+            page = await fetcher.fetch("https://spa.com/")
+        await fetcher.close()
+
+        assert page.via == "browser"
+        assert fetcher.stats.http_fallbacks == 1
+
+
+class TestParallelResearch:
+    @pytest.mark.asyncio
+    async def test_research_fetches_concurrently(self):
+        eng, state = _slow_browser()
+        eng.web_search = AsyncMock(return_value=[
+            SearchResult(title=f"R{i}", url=f"https://site{i}.com/",
+                         position=i + 1)
+            for i in range(4)
+        ])
+        engine = InternetReasoningEngine(fetcher=_fetcher(max_concurrency=4))
+
+        with patch("pds_ultimate.core.browser_engine.browser_engine", eng):
+            answer = await engine.research(
+                "Python", max_sources=4, expand_queries=False)
+
+        assert state["peak"] == 4
+        # Источники — в порядке выдачи, независимо от порядка загрузки
+        assert [s.url for s in answer.sources] == [
+            f"https://site{i}.com/" for i in range(4)
+        ]
+        assert engine.get_stats()["pages"] == 4
+
+    @pytest.mark.asyncio
+    async def test_searches_run_isolated(self):
+        eng, _ = _slow_browser(0)
+        eng.web_search = AsyncMock(return_value=[])
+        engine = InternetReasoningEngine(fetcher=_fetcher())
+
+        with patch("pds_ultimate.core.browser_engine.browser_engine", eng):
+            await engine.research("Python programming", expand_queries=True)
+
+        assert eng.web_search.call_count >= 1
+        for call in eng.web_search.call_args_list:
+            assert call.kwargs["isolated"] is True
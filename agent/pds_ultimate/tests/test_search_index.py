@@ -0,0 +1,146 @@
+"""
+Тесты для полнотекстового поиска (FTS5).
+==========================================
+Покрывает: search / search_ids, синхронизацию триггерами,
+LIKE-fallback для коротких запросов, заполнение индекса по истории.
+"""
+
+from datetime import date
+
+import pytest
+
+from pds_ultimate.core.database import (
+    ArchivedOrderItem,
+    Contact,
+    ContactType,
+    Order,
+    OrderItem,
+)
+from pds_ultimate.core.search_index import (
+    install_search_index,
+    match_expression,
+    search,
+    search_ids,
+)
+
+
+def _contact(session, name, **kw) -> Contact:
+    c = Contact(name=name, contact_type=ContactType.SUPPLIER, **kw)
+    session.add(c)
+    session.commit()
+    return c
+
+
+def _archived(session, order_number, item_name, **kw) -> ArchivedOrderItem:
+    it = ArchivedOrderItem(
+        original_order_id=1, order_number=order_number,
+        item_name=item_name, quantity=1, archived_date=date.today(), **kw,
+    )
+    session.add(it)
+    session.commit()
+    return it
+
+
+class TestMatchExpression:
+    def test_terms_quoted_and_joined(self):
+        assert match_expression("шкаф Shanghai") == '"шкаф" AND "Shanghai"'
+
+    def test_short_terms_dropped(self):
+        assert match_expression("ab шкаф") == '"шкаф"'
+        assert match_expression("ab") is None
+
+    def test_quotes_stripped(self):
+        assert match_expression('"ром"ашка') == '"ром" AND "ашка"'
+
+
+class TestContactsSearch:
+    def test_substring_case_insensitive(self, db_session):
+        c = _contact(db_session, "Ахмед Курбанов")
+        assert search_ids(db_session, "contacts", "курбан") == [c.id]
+
+    def test_name_ranked_above_notes(self, db_session):
+        by_note = _contact(db_session, "Иван", notes="работает с Ромашкой")
+        by_name = _contact(db_session, "Ромашка ООО")
+        ids = search_ids(db_session, "contacts", "ромашк")
+        assert ids == [by_name.id, by_note.id]
+
+    def test_update_and_delete_synced(self, db_session):
+        c = _contact(db_session, "Старое Имя")
+        c.name = "Новое Имя"
+        db_session.commit()
+        assert search_ids(db_session, "contacts", "Старое") == []
+        assert search_ids(db_session, "contacts", "Новое") == [c.id]
+
+        db_session.delete(c)
+        db_session.commit()
+        assert search_ids(db_session, "contacts", "Новое") == []
+
+    def test_short_query_falls_back_to_like(self, db_session):
+        c = _contact(db_session, "Li Wei")
+        assert search_ids(db_session, "contacts", "Li") == [c.id]
+
+    def test_like_fallback_matches_all_columns(self, db_session):
+        by_company = _contact(db_session, "Ахмед", company="QY Trade")
+        by_phone = _contact(db_session, "Мурат", phone="+90 555")
+        by_notes = _contact(db_session, "Олег", notes="склад QY")
+        assert sorted(search_ids(db_session, "contacts", "QY")) == [
+            by_company.id, by_notes.id]
+        assert search_ids(db_session, "contacts", "90") == [by_phone.id]
+
+
+class TestOrdersSearch:
+    def test_order_found_by_item_name(self, db_session):
+        order = Order(order_number="ORD-100")
+        db_session.add(order)
+        db_session.flush()
+        db_session.add(OrderItem(order_id=order.id, name="Шкаф дубовый",
+                                 quantity=1))
+        db_session.commit()
+        assert search_ids(db_session, "orders", "дубов") == [order.id]
+
+    def test_item_rename_reindexes_order(self, db_session):
+        order = Order(order_number="ORD-101")
+        db_session.add(order)
+        db_session.flush()
+        item = OrderItem(order_id=order.id, name="Стол", quantity=1)
+        db_session.add(item)
+        db_session.commit()
+
+        item.name = "Диван угловой"
+        db_session.commit()
+        assert search_ids(db_session, "orders", "Стол") == []
+        assert search_ids(db_session, "orders", "угловой") == [order.id]
+
+
+class TestArchiveSearch:
+    def test_bulk_delete_synced(self, db_session):
+        _archived(db_session, "ORD-1", "Кресло", supplier_name="Guangzhou Trade")
+        assert len(search_ids(db_session, "archive", "guangzhou")) == 1
+
+        db_session.query(ArchivedOrderItem).delete()
+        db_session.commit()
+        assert search_ids(db_session, "archive", "guangzhou") == []
+
+
+class TestUnifiedSearch:
+    def test_hits_across_kinds(self, db_session):
+        _contact(db_session, "Ташкент Мебель")
+        _archived(db_session, "ORD-7", "Стулья", client_name="Ташкент Мебель")
+        hits = search(db_session, "ташкент")
+        assert {h.kind for h in hits} == {"contacts", "archive"}
+        assert all(h.score >= hits[-1].score for h in hits)
+        assert "[" in hits[0].snippet
+        assert hits[0].to_dict()["kind"] in ("contacts", "archive")
+
+    def test_unknown_kind_rejected(self, db_session):
+        with pytest.raises(ValueError):
+            search(db_session, "что-то", kinds=("invoices",))
+
+    def test_install_backfills_existing_rows(self, db_session):
+        c = _contact(db_session, "Бухара Текстиль")
+        conn = db_session.connection()
+        conn.exec_driver_sql("DELETE FROM contacts_fts")
+        assert search_ids(db_session, "contacts", "текстиль") == []
+
+        assert install_search_index(conn) is True
+        assert search_ids(db_session, "contacts", "текстиль") == [c.id]
@@ -1,17 +1,20 @@
 """
 Тесты для Semantic Embeddings Engine.
 ========================================
-Покрывает: EmbeddingModel, VectorIndex, SemanticSearchEngine.
+Покрывает: EmbeddingModel, VectorIndex, SparseVectorIndex, SemanticSearchEngine.
 """
 
+import pytest
 
 from pds_ultimate.core.semantic_engine import (
     EmbeddingModel,
     EmbeddingVector,
     SearchResult,
     SemanticSearchEngine,
+    SparseVectorIndex,
     VectorIndex,
     semantic_engine,
+    sparse_backend_available,
 )
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -208,6 +211,217 @@ class TestVectorIndex:
             assert results[0].metadata.get("type") == "note"
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# INCREMENTAL IDF
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+CORPUS = {
+    "py": "Python программирование разработка бэкенд",
+    "java": "программирование Java бэкенд сервер",
+    "borsch": "Рецепт борща свекла морковь",
+    "ship": "Доставка заказа из Китая контейнер",
+    "pay": "Оплата поставщику за контейнер",
+}
+
+
+class TestIncrementalIDF:
+    def test_doc_freq_add_remove(self):
+        model = EmbeddingModel(incremental=True)
+        model.add_document_freq("python код")
+        model.add_document_freq("python тест")
+        assert model._total_docs == 2
+        assert model._doc_freq["python"] == 2
+        model.remove_document_freq("python тест")
+        assert model._total_docs == 1
+        assert model._doc_freq["python"] == 1
+        assert "тест" not in model._doc_freq
+
+    def test_embed_raw_tf(self):
+        model = EmbeddingModel(incremental=True)
+        model.add_document_freq("python код")
+        model.add_document_freq("java код")
+        emb = model.embed("python")
+        assert emb.vector["w:python"] == 1.0
+        weighted = model.apply_idf(emb)
+        assert weighted.vector["w:python"] == model.idf("python") > 1.0
+
+    def test_index_maintains_doc_freq(self):
+        engine = SemanticSearchEngine(incremental=True)
+        engine.add_document(doc_id="a", text="python код")
+        engine.add_document(doc_id="b", text="python тест")
+        assert engine.model._doc_freq["python"] == 2
+        engine.remove_document("b")
+        assert engine.model._doc_freq["python"] == 1
+        assert engine.model._total_docs == 1
+
+    def test_readd_does_not_double_count(self):
+        engine = SemanticSearchEngine(incremental=True)
+        engine.add_document(doc_id="a", text="python код")
+        engine.add_document(doc_id="a", text="python код")
+        assert engine.model._doc_freq["python"] == 1
+        assert engine.model._total_docs == 1
+
+    def test_matches_full_rebuild(self):
+        full = SemanticSearchEngine(backend="dict", incremental=False)
+        inc = SemanticSearchEngine(backend="dict", incremental=True)
+        for doc_id, text in CORPUS.items():
+            full.add_document(doc_id=doc_id, text=text)
+            inc.add_document(doc_id=doc_id, text=text)
+        full.rebuild_index()
+
+        for query in ("программирование бэкенд", "контейнер", "Python"):
+            a = full.search(query)
+            b = inc.search(query)
+            assert [r.doc_id for r in a] == [r.doc_id for r in b]
+            for ra, rb in zip(a, b):
+                assert abs(ra.score - rb.score) < 1e-9
+
+    def test_rebuild_index_is_noop(self):
+        engine = SemanticSearchEngine(incremental=True)
+        engine.add_document(doc_id="d1", text="Python code")
+        vec_before = engine.index._vectors["d1"]
+        engine.rebuild_index()
+        assert engine.index._vectors["d1"] is vec_before
+        assert engine.get_stats()["incremental"] is True
+
+    @pytest.mark.skipif(
+        not sparse_backend_available(), reason="numpy/scipy не установлены",
+    )
+    def test_sparse_matches_dict(self):
+        dict_engine = SemanticSearchEngine(backend="dict", incremental=True)
+        sparse_engine = SemanticSearchEngine(backend="sparse", incremental=True)
+        for engine in (dict_engine, sparse_engine):
+            for doc_id, text in CORPUS.items():
+                engine.add_document(doc_id=doc_id, text=text)
+            engine.search("контейнер")  # вливаем буфер sparse-индекса
+            engine.remove_document("pay")
+            engine.add_document(doc_id="pay2", text="Оплата за контейнер")
+
+        for query in ("программирование бэкенд", "контейнер оплата"):
+            a = dict_engine.search(query)
+            b = sparse_engine.search(query)
+            assert [r.doc_id for r in a] == [r.doc_id for r in b]
+            for ra, rb in zip(a, b):
+                assert abs(ra.score - rb.score) < 1e-4
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SPARSE VECTOR INDEX
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+@pytest.mark.skipif(
+    not sparse_backend_available(), reason="numpy/scipy не установлены",
+)
+class TestSparseVectorIndex:
+    def setup_method(self):
+        self.model = EmbeddingModel()
+        self.index = SparseVectorIndex(self.model)
+
+    def test_add_and_size(self):
+        emb = self.index.add("d1", "Hello world")
+        assert isinstance(emb, EmbeddingVector)
+        assert self.index.size == 1
+        assert self.index.vocab_size > 0
+
+    def test_search_basic(self):
+        self.index.add("d1", "Python программирование")
+        self.index.add("d2", "Рецепт борща")
+        results = self.index.search("Python код")
+        assert results
+        assert isinstance(results[0], SearchResult)
+        assert results[0].doc_id == "d1"
+        assert results[0].content == "Python программирование"
+
+    def test_scores_match_dict_index(self):
+        dict_index = VectorIndex(self.model)
+        texts = {
+            "a": "Python программирование разработка",
+            "b": "программирование Java backend",
+            "c": "Рецепт борща свекла морковь",
+        }
+        for doc_id, text in texts.items():
+            self.index.add(doc_id, text, metadata={"k": doc_id})
+            dict_index.add(doc_id, text, metadata={"k": doc_id})
+
+        sparse = self.index.search("Python программирование")
+        dense = dict_index.search("Python программирование")
+        assert [r.doc_id for r in sparse] == [r.doc_id for r in dense]
+        for s, d in zip(sparse, dense):
+            assert abs(s.score - d.score) < 1e-4
+            assert s.metadata == d.metadata
+
+    def test_top_k(self):
+        for i in range(30):
+            self.index.add(f"d{i}", f"Document number {i} text")
+        results = self.index.search("document text", top_k=5)
+        assert len(results) == 5
+        scores = [r.score for r in results]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_remove_is_tombstoned(self):
+        for i in range(10):
+            self.index.add(f"d{i}", f"shipment order {i}")
+        self.index.search("shipment")  # вливаем буфер в матрицу
+        assert self.index.remove("d3") is True
+        assert self.index.tombstones == 1
+        found = [r.doc_id for r in self.index.search("shipment", top_k=20)]
+        assert "d3" not in found
+        assert self.index.size == 9
+
+    def test_remove_missing(self):
+        assert self.index.remove("nonexistent") is False
+
+    def test_remove_pending_row(self):
+        self.index.add("d1", "shipment order")
+        self.index.remove("d1")
+        self.index.add("d2", "shipment order")
+        found = [r.doc_id for r in self.index.search("shipment")]
+        assert found == ["d2"]
+
+    def test_compaction(self):
+        for i in range(8):
+            self.index.add(f"d{i}", f"invoice supplier {i}")
+        self.index.search("invoice")
+        self.index.remove("d0")
+        self.index.remove("d1")
+        assert self.index.tombstones == 2
+        # 3 из 8 мёртвых > 25% → компакция
+        self.index.remove("d2")
+        assert self.index.tombstones == 0
+        found = {r.doc_id for r in self.index.search("invoice", top_k=10)}
+        assert found == {"d3", "d4", "d5", "d6", "d7"}
+
+    def test_readd_replaces(self):
+        self.index.add("d1", "old text about cats")
+        self.index.add("d1", "new text about dogs")
+        assert self.index.size == 1
+        results = self.index.search("dogs")
+        assert results[0].doc_id == "d1"
+        assert results[0].content == "new text about dogs"
+
+    def test_search_unknown_terms(self):
+        self.index.add("d1", "Python")
+        assert self.index.search("zzzz qqqq") == []
+
+    def test_clear(self):
+        self.index.add("d1", "text")
+        self.index.clear()
+        assert self.index.size == 0
+        assert self.index.vocab_size == 0
+        assert self.index.search("text") == []
+
+    def test_engine_sparse_backend(self):
+        engine = SemanticSearchEngine(backend="sparse")
+        assert engine.backend == "sparse"
+        engine.add_document(doc_id="py", text="Python программирование")
+        engine.add_document(doc_id="cook", text="Рецепт борща")
+        engine.rebuild_index()
+        assert engine.search("Python")[0].doc_id == "py"
+        assert engine.get_stats()["backend"] == "sparse"
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # SEMANTIC SEARCH ENGINE
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -305,6 +519,10 @@ class TestSemanticSearchEngine:
         results = self.engine.search("document topic")
         assert len(results) > 0
 
+    def test_unknown_backend_falls_back(self):
+        engine = SemanticSearchEngine(backend="faiss")
+        assert engine.backend == "dict"
+
     def test_min_score_filtering(self):
         self.engine.add_document(doc_id="d1", text="Python code")
         results = self.engine.search("completely unrelated xyz", min_score=0.9)
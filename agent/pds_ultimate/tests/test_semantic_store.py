@@ -0,0 +1,165 @@
+"""
+Тесты для Semantic Index Store.
+==================================
+Покрывает: SnapshotStore, save/load SemanticSearchEngine,
+DocumentStore, SemanticCache, WAL.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pds_ultimate.core.semantic_engine import (  # noqa: E402
+    SemanticSearchEngine,
+    sparse_backend_available,
+)
+from pds_ultimate.core.semantic_search_v2 import (  # noqa: E402
+    DocumentStore,
+    SemanticCache,
+)
+from pds_ultimate.core.semantic_store import SnapshotStore  # noqa: E402
+
+DOCS = {
+    "py": "Python программирование разработка",
+    "java": "программирование Java backend",
+    "borsch": "Рецепт борща свекла морковь",
+    "ship": "Доставка контейнера из Китая",
+}
+
+BACKENDS = ["dict"] + (["sparse"] if sparse_backend_available() else [])
+
+
+def _engine(backend: str, incremental: bool = False) -> SemanticSearchEngine:
+    engine = SemanticSearchEngine(backend=backend, incremental=incremental)
+    for doc_id, text in DOCS.items():
+        engine.add_document(doc_id=doc_id, text=text, metadata={"k": doc_id})
+    if not incremental:
+        engine.rebuild_index()
+    return engine
+
+
+def _ranking(engine: SemanticSearchEngine, query: str) -> list[tuple[str, float]]:
+    return [(r.doc_id, round(r.score, 4)) for r in engine.search(query)]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ENGINE SNAPSHOT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TestEngineSnapshot:
+    @pytest.mark.parametrize("backend", BACKENDS)
+    @pytest.mark.parametrize("incremental", [False, True])
+    def test_roundtrip(self, tmp_path, backend, incremental):
+        engine = _engine(backend, incremental)
+        assert engine.save(tmp_path / "idx") is True
+
+        restored = SemanticSearchEngine(backend=backend, incremental=incremental)
+        assert restored.load(tmp_path / "idx") is True
+        assert restored.index.size == len(DOCS)
+        for query in ("программирование", "контейнер Китай"):
+            assert _ranking(restored, query) == _ranking(engine, query)
+        top = restored.search("Python")[0]
+        assert top.content == DOCS["py"]
+        assert top.metadata == {"k": "py"}
+
+    @pytest.mark.skipif(
+        not sparse_backend_available(), reason="numpy/scipy не установлены",
+    )
+    def test_cross_backend(self, tmp_path):
+        engine = _engine("dict")
+        engine.save(tmp_path / "idx")
+        restored = SemanticSearchEngine(backend="sparse", incremental=False)
+        assert restored.load(tmp_path / "idx")
+        assert _ranking(restored, "программирование") == \
+            _ranking(engine, "программирование")
+
+    @pytest.mark.skipif(
+        not sparse_backend_available(), reason="numpy/scipy не установлены",
+    )
+    def test_sparse_load_is_memory_mapped(self, tmp_path):
+        _engine("sparse", incremental=True).save(tmp_path / "idx")
+        restored = SemanticSearchEngine(backend="sparse", incremental=True)
+        restored.load(tmp_path / "idx")
+        data = restored.index._matrix.data
+        while data is not None and not isinstance(data, np.memmap):
+            data = data.base
+        assert isinstance(data, np.memmap)
+        assert restored.search("Python")[0].doc_id == "py"
+
+    def test_wal_replay(self, tmp_path):
+        engine = _engine("dict", incremental=True)
+        engine.save(tmp_path / "idx")
+        engine.add_document(doc_id="pay", text="Оплата поставщику")
+        engine.add_document(text="Автоматический id")
+        engine.remove_document("borsch")
+
+        restored = SemanticSearchEngine(backend="dict", incremental=True)
+        assert restored.load(tmp_path / "idx")
+        assert set(restored.index._contents) == set(engine.index._contents)
+        assert restored.add_document(text="next") == engine.add_document(text="next")
+
+    def test_save_truncates_wal(self, tmp_path):
+        engine = _engine("dict")
+        engine.save(tmp_path / "idx")
+        engine.add_document(doc_id="pay", text="Оплата поставщику")
+        store = SnapshotStore(tmp_path / "idx")
+        assert len(store.read_log()) == 1
+        engine.save(tmp_path / "idx")
+        assert store.read_log() == []
+
+    def test_torn_wal_line_skipped(self, tmp_path):
+        engine = _engine("dict", incremental=True)
+        engine.save(tmp_path / "idx")
+        engine.add_document(doc_id="pay", text="Оплата поставщику")
+        with open(tmp_path / "idx" / "wal.jsonl", "a", encoding="utf-8") as fh:
+            fh.write('{"op": "add", "doc_')
+        restored = SemanticSearchEngine(backend="dict", incremental=True)
+        assert restored.load(tmp_path / "idx")
+        assert "pay" in restored.index._contents
+
+    def test_load_missing(self, tmp_path):
+        engine = SemanticSearchEngine(backend="dict")
+        assert engine.load(tmp_path / "nope") is False
+
+    def test_load_other_idf_mode_refused(self, tmp_path):
+        _engine("dict", incremental=True).save(tmp_path / "idx")
+        engine = SemanticSearchEngine(backend="dict", incremental=False)
+        assert engine.load(tmp_path / "idx") is False
+        assert engine.index.size == 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DOCUMENT STORE / SEMANTIC CACHE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class TestOwnersSnapshot:
+    def test_document_store_roundtrip(self, tmp_path):
+        ds = DocumentStore(chunk_size=100, chunk_overlap=10)
+        ds.add_document("inv", "Инвойс поставщика. " * 20, title="Инвойс")
+        ds.save(tmp_path / "docs")
+        ds.add_document("cnt", "Контракт на поставку", title="Контракт")
+
+        restored = DocumentStore(chunk_size=100, chunk_overlap=10)
+        assert restored.load(tmp_path / "docs")
+        assert restored.document_count == 2
+        assert restored.chunk_count == ds.chunk_count
+        hits = restored.search("контракт поставка")
+        assert hits[0]["doc_id"] == "cnt"
+        assert hits[0]["title"] == "Контракт"
+
+    def test_semantic_cache_roundtrip(self, tmp_path):
+        cache = SemanticCache(similarity_threshold=0.5)
+        cache.put("курс доллара сегодня", "1 USD = 3.5 TMT")
+        cache.save(tmp_path / "cache")
+        doc_id = cache.put("баланс счёта", "1000 USD")
+        cache.invalidate(doc_id)
+        cache.put("статус заказа", "в пути")
+
+        restored = SemanticCache(similarity_threshold=0.5)
+        assert restored.load(tmp_path / "cache")
+        assert restored.get_stats()["entries"] == 2
+        hit = restored.get("курс доллара сегодня")
+        assert hit["response"] == "1 USD = 3.5 TMT"
+        assert restored.get("статус заказа")["response"] == "в пути"
@@ -2,10 +2,14 @@
 Тесты Smart Triggers (Part 9)
 ===================================
 TriggerCondition, Trigger, TriggerEvaluator, AlertHistory,
-NotificationRouter, TriggerChain, TriggerTemplates, TriggerManager.
-~60 тестов.
+NotificationRouter, TriggerChain, TriggerTemplates, TriggerManager,
+TriggerEngine.
+~75 тестов.
 """
 
+import asyncio
+
+import pytest
 
 from pds_ultimate.core.smart_triggers import (
     Alert,
@@ -634,3 +638,236 @@ class TestTriggerManager:
     def test_global_instance(self):
         assert trigger_manager is not None
         assert isinstance(trigger_manager, TriggerManager)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TRIGGER ENGINE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def _rate_trigger(mgr, field="rate_usd_eur", op=ComparisonOp.GT, value=1.0):
+    return mgr.create_trigger(
+        name=f"{field} {op.value} {value}", trigger_type="threshold",
+        condition=TriggerCondition(field=field, operator=op, value=value),
+    )
+
+
+class TestTriggerEngine:
+    """TriggerEngine — индекс по полям и очередь изменений."""
+
+    def test_index_on_create_delete(self):
+        mgr = TriggerManager()
+        t = _rate_trigger(mgr)
+        mgr.create_trigger(name="NoCond", trigger_type="threshold")
+        assert mgr.engine.watchers("rate_usd_eur") == [t.id]
+        assert mgr.engine.watched_fields == ["rate_usd_eur"]
+        mgr.delete_trigger(t.id)
+        assert mgr.engine.watchers("rate_usd_eur") == []
+
+    def test_reindex_on_watch(self):
+        mgr = TriggerManager()
+        t = _rate_trigger(mgr)
+        t.condition = TriggerCondition(
+            field="balance", operator=ComparisonOp.LT, value=10)
+        mgr.engine.watch(t)
+        assert mgr.engine.watchers("rate_usd_eur") == []
+        assert mgr.engine.watchers("balance") == [t.id]
+
+    def test_only_affected_evaluated(self):
+        mgr = TriggerManager()
+        hot = _rate_trigger(mgr, "rate_usd_eur", value=0.5)
+        for i in range(50):
+            _rate_trigger(mgr, f"price_item_{i}", value=100)
+
+        mgr.engine.notify("rate_usd_eur", 0.9)
+        alerts = mgr.engine.process()
+
+        assert [a.trigger_id for a in alerts] == [hot.id]
+        assert mgr.engine.get_stats()["evaluated"] == 1
+
+    def test_unwatched_field_ignored(self):
+        mgr = TriggerManager()
+        assert mgr.engine.notify("nobody_cares", 1) is False
+        assert mgr.engine.pending == []
+        assert mgr.engine.process() == []
+
+    def test_burst_coalesced(self):
+        mgr = TriggerManager()
+        t = _rate_trigger(mgr, value=1.0)
+        for v in (0.5, 0.7, 1.5, 0.8):
+            mgr.engine.notify("rate_usd_eur", v)
+
+        assert mgr.engine.process() == []   # последнее значение 0.8
+        stats = mgr.engine.get_stats()
+        assert stats["events"] == 4
+        assert stats["coalesced"] == 3
+        assert stats["cycles"] == 1
+        assert t.fire_count == 0
+
+    def test_provider_called_once_per_cycle(self):
+        mgr = TriggerManager()
+        calls = []
+        mgr.evaluator.register_provider(
+            "balance", lambda: calls.append(1) or 50)
+        for threshold in (100, 200, 300):
+            mgr.create_from_template("balance", threshold=threshold)
+
+        mgr.engine.notify("balance")
+        alerts = mgr.engine.process()
+
+        assert len(alerts) == 3
+        assert len(calls) == 1
+
+    def test_check_all_provider_once(self):
+        mgr = TriggerManager()
+        calls = []
+        mgr.evaluator.register_provider(
+            "balance", lambda: calls.append(1) or 5000)
+        for threshold in (100, 200, 300):
+            mgr.create_from_template("balance", threshold=threshold)
+        assert mgr.check_all() == []
+        assert len(calls) == 1
+
+    def test_chain_target_evaluated_once(self):
+        mgr = TriggerManager()
+        src = _rate_trigger(mgr, "x", value=1)
+        dst = _rate_trigger(mgr, "y", value=1)
+        mgr.chains.add_chain(src.id, dst.id)
+        mgr.evaluator.register_provider("y", lambda: 5)
+
+        mgr.engine.notify("x", 2)
+        alerts = mgr.engine.process()
+
+        assert [a.trigger_id for a in alerts] == [src.id, dst.id]
+        assert mgr.engine.get_stats()["evaluated"] == 2
+
+    def test_event_value_overrides_context(self):
+        mgr = TriggerManager()
+        _rate_trigger(mgr, "x", value=10)
+        mgr.engine.notify("x", 20)
+        assert len(mgr.engine.process({"x": 1})) == 1
+
+    def test_rate_fields(self):
+        from pds_ultimate.core.smart_triggers import rate_fields
+
+        fields = rate_fields({"EUR": 0.8, "USD": 1.0})
+        assert fields["rate_usd_eur"] == 0.8
+        assert fields["rate_eur_usd"] == 1.25
+        assert "rate_usd_usd" not in fields
+
+    def test_rate_book_publish_notifies_changed(self):
+        from pds_ultimate.modules.finance.rate_snapshot import RateBook
+
+        mgr = TriggerManager()
+        eur = _rate_trigger(mgr, "rate_usd_eur", value=0.85)
+        _rate_trigger(mgr, "rate_usd_gbp", value=0.1)
+        book = RateBook()
+        book.publish({"GBP": 0.7}, source="api")
+        book.subscribe(mgr.engine._on_rates)
+
+        book.publish({"EUR": 0.9, "GBP": 0.7}, source="api")
+
+        # GBP не изменился, rate_eur_usd никто не смотрит
+        assert mgr.engine.pending == ["rate_usd_eur"]
+        alerts = mgr.engine.process()
+        assert [a.trigger_id for a in alerts] == [eur.id]
+
+    @pytest.fixture
+    def attached(self, session_factory):
+        """Менеджер, подписанный на вставки транзакций и леджер."""
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        from pds_ultimate.core.database import Transaction
+        from pds_ultimate.modules.finance.rate_snapshot import rate_book
+
+        mgr = TriggerManager()
+        mgr.engine.attach_sources(session_factory)
+        yield mgr
+        engine = mgr.engine
+        rate_book.unsubscribe(engine._on_rates)
+        event.remove(Transaction, "after_insert", engine._on_transaction)
+        event.remove(Session, "after_commit", engine._on_commit)
+        event.remove(Session, "after_rollback", engine._on_rollback)
+
+    @staticmethod
+    def _add_tx(session, amount, tx_type="income"):
+        from pds_ultimate.core.database import Transaction, TransactionType
+
+        session.add(Transaction(
+            transaction_type=TransactionType(tx_type), amount=amount,
+            currency="USD", amount_usd=amount,
+        ))
+        session.flush()
+
+    def test_transaction_event_after_commit(self, attached, session_factory):
+        big = _rate_trigger(attached, "transaction_amount_usd", value=1000)
+        with session_factory() as session:
+            self._add_tx(session, 5000.0)
+            assert attached.engine.pending == []   # ещё не закоммичено
+            session.commit()
+        assert attached.engine.pending == ["transaction_amount_usd"]
+        alerts = attached.engine.process()
+        assert [a.trigger_id for a in alerts] == [big.id]
+
+    def test_rolled_back_transaction_ignored(self, attached, session_factory):
+        _rate_trigger(attached, "transaction_amount_usd", value=1000)
+        with session_factory() as session:
+            self._add_tx(session, 5000.0)
+            session.rollback()
+            session.commit()
+        assert attached.engine.pending == []
+        assert attached.history.total == 0
+
+    @pytest.mark.asyncio
+    async def test_ledger_loaded_in_flush(self, attached, session_factory):
+        low = attached.create_from_template("balance", threshold=1000)
+        with session_factory() as session:
+            self._add_tx(session, 300.0, "profit_expenses")
+            session.commit()
+
+        alerts = await attached.engine.flush()
+
+        assert [a.trigger_id for a in alerts] == [low.id]
+        assert alerts[0].current_value == 300.0
+        # Синхронный провайдер на event loop не вызывался
+        assert attached.evaluator.provider_calls == 0
+
+    @pytest.mark.asyncio
+    async def test_background_loop_routes_alerts(self):
+        mgr = TriggerManager()
+        mgr.engine._delay = 0.01
+        routed = []
+        mgr.router.register_handler(AlertChannel.TELEGRAM, routed.append)
+        _rate_trigger(mgr, "x", value=1)
+
+        await mgr.engine.start()
+        try:
+            mgr.engine.notify("x", 2)
+            mgr.engine.notify("x", 3)
+            for _ in range(50):
+                if routed:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await mgr.engine.stop()
+
+        assert len(routed) == 1
+        assert routed[0].current_value == 3
+        assert mgr.engine.get_stats()["cycles"] == 1
+
+    @pytest.mark.asyncio
+    async def test_notify_from_thread(self):
+        mgr = TriggerManager()
+        mgr.engine._delay = 0
+        _rate_trigger(mgr, "x", value=1)
+        await mgr.engine.start()
+        try:
+            await asyncio.to_thread(mgr.engine.notify, "x", 2)
+            for _ in range(50):
+                if mgr.engine.get_stats()["cycles"]:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await mgr.engine.stop()
+        assert mgr.history.total == 1
@@ -0,0 +1,102 @@
+"""
+Тесты Translation Memory — modules/executive/translation_memory.py
+"""
+
+import pytest
+
+from pds_ultimate.modules.executive.translation_memory import (
+    TranslationMemory,
+    normalize_text,
+    substitute_numbers,
+    text_template,
+)
+
+
+@pytest.fixture
+def tm(tmp_path):
+    memory = TranslationMemory(tmp_path / "tm.sqlite")
+    memory.put(
+        "Отгрузили 120 коробок, трек 8812", "ru", "en",
+        "Shipped 120 boxes, tracking 8812",
+    )
+    yield memory
+    memory.close()
+
+
+class TestNormalization:
+    def test_normalize_case_and_spaces(self):
+        assert normalize_text("  Привет,\n  МИР ") == "привет, мир"
+
+    def test_template_masks_numbers(self):
+        assert text_template("цена 12.50 за 3 шт") == "цена # за # шт"
+
+    def test_substitute_numbers_in_order(self):
+        assert substitute_numbers("5 of 5", ["5", "5"], ["3", "4"]) == "3 of 4"
+
+    def test_substitute_requires_numbers_in_translation(self):
+        assert substitute_numbers("one hundred", ["100"], ["200"]) is None
+
+
+class TestLookup:
+    def test_exact_normalized(self, tm):
+        match = tm.lookup("отгрузили  120 КОРОБОК, трек 8812", "ru", "en")
+        assert match.kind == "exact"
+        assert match.translated == "Shipped 120 boxes, tracking 8812"
+
+    def test_template_substitutes_numbers(self, tm):
+        match = tm.lookup("Отгрузили 95 коробок, трек 9001", "ru", "en")
+        assert match.kind == "template"
+        assert match.translated == "Shipped 95 boxes, tracking 9001"
+
+    def test_fuzzy_near_duplicate(self, tm):
+        match = tm.lookup("Отгрузили 95 коробок, трек 9001!", "ru", "en")
+        assert match.kind == "fuzzy"
+        assert match.score >= 0.92
+        assert not match.reusable
+        # Перевод другого сообщения — как есть, без подстановки чисел
+        assert match.translated == "Shipped 120 boxes, tracking 8812"
+        assert match.original == "Отгрузили 120 коробок, трек 8812"
+
+    def test_exact_and_template_reusable(self, tm):
+        assert tm.lookup("Отгрузили 120 коробок, трек 8812",
+                         "ru", "en").reusable
+        assert tm.lookup("Отгрузили 9 коробок, трек 1", "ru", "en").reusable
+
+    def test_negation_is_not_reused(self, tmp_path):
+        memory = TranslationMemory(tmp_path / "n.sqlite")
+        memory.put("Мы отгрузили 95 коробок сегодня утром", "ru", "en",
+                   "We shipped 95 boxes this morning")
+        match = memory.lookup(
+            "Мы не отгрузили 95 коробок сегодня утром", "ru", "en")
+        assert match is None or not match.reusable
+        memory.close()
+
+    def test_different_message_misses(self, tm):
+        assert tm.lookup("Отгрузили 95 коробок", "ru", "en") is None
+        assert tm.lookup("Оплата получена, спасибо", "ru", "en") is None
+
+    def test_language_pair_is_part_of_key(self, tm):
+        assert tm.lookup("Отгрузили 120 коробок, трек 8812", "ru", "zh") is None
+
+    def test_fuzzy_disabled_by_threshold(self, tmp_path):
+        memory = TranslationMemory(tmp_path / "t.sqlite", fuzzy_threshold=1.0)
+        memory.put("Груз прибыл 3 мая", "ru", "en", "Cargo arrived May 3")
+        assert memory.lookup("Груз прибыл 3 мая!", "ru", "en") is None
+        memory.close()
+
+
+class TestPersistence:
+    def test_survives_reopen(self, tm, tmp_path):
+        tm.close()
+        reopened = TranslationMemory(tmp_path / "tm.sqlite")
+        match = reopened.lookup("Отгрузили 120 коробок, трек 8812", "ru", "en")
+        assert match is not None
+        reopened.close()
+
+    def test_put_many_and_stats(self, tm):
+        written = tm.put_many([("Да", "ru", "Yes"), ("", "ru", "x")], "en")
+        assert written == 1
+        tm.lookup("да", "ru", "en")
+        stats = tm.get_stats()
+        assert stats["entries"] == 2
+        assert stats["hits"]["exact"] == 1
@@ -290,3 +290,131 @@ class TestTranslatorService:
             )
             result = await service.translate("Hello", "ru")
             assert result.translated == "Привет"
+
+
+class TestBatchPipeline:
+    """Тесты пакетного перевода: чанки, параллельность, память переводов."""
+
+    @staticmethod
+    def _service(monkeypatch, **kwargs):
+        import asyncio
+
+        from pds_ultimate.modules.executive.translator import TranslatorService
+
+        service = TranslatorService(**kwargs)
+        calls = {"single": [], "batch": [], "running": 0, "peak": 0}
+
+        async def fake_single(text, src, tgt, hint=None):
+            service._llm_calls += 1
+            calls["single"].append(text)
+            calls.setdefault("hints", []).extend([hint] if hint else [])
+            return f"EN:{text}"
+
+        async def fake_batch(items, tgt, hints=None):
+            service._llm_calls += 1
+            calls["batch"].append(len(items))
+            calls.setdefault("hints", []).extend((hints or {}).values())
+            calls["running"] += 1
+            calls["peak"] = max(calls["peak"], calls["running"])
+            await asyncio.sleep(0.01)
+            calls["running"] -= 1
+            # Последнее сообщение «потеряно» в ответе LLM
+            return [f"EN:{t}" for t, _ in items[:-1]] + [""]
+
+        monkeypatch.setattr(service, "_translate_llm", fake_single)
+        monkeypatch.setattr(service, "_translate_batch_llm", fake_batch)
+        return service, calls
+
+    @pytest.mark.asyncio
+    async def test_chunks_concurrent_and_ordered(self, monkeypatch):
+        """Большой пакет режется на чанки, порядок результатов сохраняется."""
+        service, calls = self._service(
+            monkeypatch, max_items=3, concurrency=2,
+        )
+        texts = [f"Сообщение номер {i} от поставщика" for i in range(9)]
+        batch = await service.translate_batch(texts, target_lang="en")
+
+        assert [r.translated for r in batch.results] == [
+            f"EN:{t}" for t in texts
+        ]
+        assert calls["batch"] == [3, 3, 3]
+        assert calls["peak"] <= 2
+        # Потерянные в ответе сообщения переведены по одному
+        assert len(calls["single"]) == 3
+        assert batch.llm_calls == 6
+
+    @pytest.mark.asyncio
+    async def test_token_budget_splits_chunks(self, monkeypatch):
+        """Длинные сообщения не складываются в один запрос сверх бюджета."""
+        service, calls = self._service(monkeypatch, token_budget=100)
+        texts = ["Очень длинное сообщение поставщика " * 5 + str(i)
+                 for i in range(4)]
+        await service.translate_batch(texts, target_lang="en")
+        assert calls["batch"] == []
+        assert len(calls["single"]) == 4
+
+    @pytest.mark.asyncio
+    async def test_duplicates_translated_once(self, monkeypatch):
+        """Повторы в пакете — один перевод."""
+        service, calls = self._service(monkeypatch)
+        batch = await service.translate_batch(
+            ["Привет", "привет ", "Привет"], target_lang="en",
+        )
+        assert calls["single"] == ["Привет"]
+        assert {r.translated for r in batch.results} == {"EN:Привет"}
+
+    @pytest.mark.asyncio
+    async def test_memory_reused_across_instances(self, monkeypatch, tmp_path):
+        """Память переводов переживает перезапуск и ловит почти-дубли."""
+        from pds_ultimate.modules.executive.translation_memory import (
+            TranslationMemory,
+        )
+
+        memory = TranslationMemory(tmp_path / "tm.sqlite")
+        service, _ = self._service(monkeypatch, memory=memory)
+        await service.translate_batch(
+            ["Отгрузили 120 коробок"], target_lang="en",
+        )
+
+        fresh, calls = self._service(monkeypatch, memory=memory)
+        batch = await fresh.translate_batch(
+            ["Отгрузили 95 коробок"], target_lang="en",
+        )
+        assert batch.from_memory == 1
+        assert batch.results[0].translated == "EN:Отгрузили 95 коробок"
+        assert batch.results[0].cached is True
+        assert calls["single"] == [] and calls["batch"] == []
+        memory.close()
+
+    @pytest.mark.asyncio
+    async def test_fuzzy_match_is_only_a_hint(self, monkeypatch, tmp_path):
+        """Почти-дубль с другим смыслом не получает чужой перевод."""
+        from pds_ultimate.modules.executive.translation_memory import (
+            TranslationMemory,
+        )
+
+        memory = TranslationMemory(tmp_path / "tm.sqlite")
+        memory.put("Оплата получена, отгружаем 50 шт", "ru", "en",
+                   "Payment received, shipping 50 pcs")
+        service, calls = self._service(monkeypatch, memory=memory)
+
+        text = "Оплата не получена, отгружаем 50 шт"
+        other = "Оплата пока не получена, отгружаем 50 шт"
+        single = await service.translate(text, "en", "ru")
+        batch = await service.translate_batch([other, "Да"], "en", "ru")
+
+        assert single.translated == f"EN:{text}"
+        assert batch.from_memory == 0
+        assert batch.results[0].translated == f"EN:{other}"
+        assert len(calls["hints"]) == 2
+        assert calls["hints"][0].original.startswith("Оплата получена")
+        assert all(h.kind == "fuzzy" for h in calls["hints"])
+        memory.close()
+
+    def test_parse_numbered_multiline(self):
+        """Многострочные переводы и пропуски в нумерованном ответе."""
+        from pds_ultimate.modules.executive.translator import _parse_numbered
+
+        assert _parse_numbered("1. Hello\n2) line a\nline b", 3) == [
+            "Hello", "line a\nline b", "",
+        ]
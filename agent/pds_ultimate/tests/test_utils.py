@@ -845,3 +845,12 @@ class TestUtilsInit:
             generate_id,
         )
         assert callable(generate_id)
+
+    def test_tokens_exported(self):
+        """Оценка токенов экспортируется."""
+        from pds_ultimate.utils import (
+            estimate_tokens,
+        )
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("абв") == 1
+        assert estimate_tokens("абвг") == 2
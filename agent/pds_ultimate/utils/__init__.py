@@ -1,5 +1,5 @@
 """
-Utilities: Parsers, Formatters, Validators, Helpers
+Utilities: Parsers, Formatters, Validators, Helpers, Token estimates
 """
 
 from pds_ultimate.utils.formatters import (
@@ -47,6 +47,7 @@ from pds_ultimate.utils.helpers import (
     safe_json_dumps,
     safe_json_loads,
 )
+from pds_ultimate.utils.tokens import estimate_tokens
 from pds_ultimate.utils.validators import (
     ValidationResult,
     detect_carrier,
@@ -101,4 +102,6 @@ __all__ = [
     "clamp", "first_non_none", "now_iso",
     "safe_int", "safe_float",
     "flatten", "deduplicate",
+    # Tokens
+    "estimate_tokens",
 ]
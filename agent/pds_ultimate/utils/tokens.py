@@ -0,0 +1,16 @@
+"""
+PDS-Ultimate Token Estimates
+==============================
+Оценка числа токенов без токенизатора провайдера.
+
+Используется там, где нужен бюджет до вызова LLM: учёт префикса
+промпта агента (core/agent.py), нарезка батчей перевода
+(modules/executive/translator.py).
+"""
+
+from __future__ import annotations
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка токенов (~3 символа на токен для смеси ru/en/JSON)."""
+    return (len(text) + 2) // 3
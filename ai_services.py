@@ -8,7 +8,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import json
-import sqlite3
+from db_pool import get_connection
 import random
 from typing import Dict, List, Optional, Tuple, Any
 import schedule
@@ -32,9 +32,7 @@ class AIAnalyticsService:
         self.openai_available = bool(openai.api_key)
     
     def get_db_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_connection(self.db_path)
     
     def generate_sales_forecast(self, user_id: int, company_id: int, days: int = 30) -> Dict:
         """Генерация прогноза продаж"""
@@ -249,35 +247,29 @@ class AIAnalyticsService:
     
     def save_prediction(self, user_id: int, company_id: int, prediction_type: str, data: Dict):
         """Сохранение прогноза в БД"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO ai_predictions (user_id, company_id, prediction_type, prediction_data, confidence_score)
-            VALUES (?, ?, ?, ?, ?)
-        """, (user_id, company_id, prediction_type, json.dumps(data), data.get('confidence', 0.5)))
-        
-        conn.commit()
-        conn.close()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO ai_predictions (user_id, company_id, prediction_type, prediction_data, confidence_score)
+                VALUES (?, ?, ?, ?, ?)
+            """, (user_id, company_id, prediction_type, json.dumps(data), data.get('confidence', 0.5)))
     
     def save_recommendation(self, user_id: int, company_id: int, rec_type: str, data: Dict):
         """Сохранение рекомендации в БД"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO ai_recommendations (user_id, company_id, recommendation_type, title, description, action_data, priority)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            user_id, company_id, rec_type, 
-            data.get('title', ''), 
-            data.get('description', ''),
-            json.dumps(data),
-            1 if data.get('priority') == 'high' else 2 if data.get('priority') == 'medium' else 3
-        ))
-        
-        conn.commit()
-        conn.close()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO ai_recommendations (user_id, company_id, recommendation_type, title, description, action_data, priority)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                user_id, company_id, rec_type, 
+                data.get('title', ''), 
+                data.get('description', ''),
+                json.dumps(data),
+                1 if data.get('priority') == 'high' else 2 if data.get('priority') == 'medium' else 3
+            ))
 
 class AIAssistantService:
     """AI-ассистент для генерации документов и ответов на вопросы"""
@@ -419,15 +411,10 @@ class AutomationService:
         self.running = False
     
     def get_db_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_connection(self.db_path)
     
     def create_automation_task(self, user_id: int, company_id: int, task_type: str, config: Dict, schedule_pattern: str = None):
         """Создание автоматизированной задачи"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
         next_run = None
         if schedule_pattern:
             # Простая логика для определения следующего запуска
@@ -438,27 +425,24 @@ class AutomationService:
             elif schedule_pattern == 'monthly':
                 next_run = (datetime.now() + timedelta(days=30)).isoformat()
         
-        cursor.execute("""
-            INSERT INTO automation_tasks (user_id, company_id, task_type, task_config, schedule_pattern, next_run)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (user_id, company_id, task_type, json.dumps(config), schedule_pattern, next_run))
-        
-        conn.commit()
-        task_id = cursor.lastrowid
-        conn.close()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO automation_tasks (user_id, company_id, task_type, task_config, schedule_pattern, next_run)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (user_id, company_id, task_type, json.dumps(config), schedule_pattern, next_run))
+            task_id = cursor.lastrowid
         
         return task_id
     
     def execute_automation_task(self, task_id: int):
         """Выполнение автоматизированной задачи"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM automation_tasks WHERE id = ? AND is_active = 1", (task_id,))
-        task = cursor.fetchone()
+        with self.get_db_connection() as conn:
+            task = conn.execute(
+                "SELECT * FROM automation_tasks WHERE id = ? AND is_active = 1", (task_id,)
+            ).fetchone()
         
         if not task:
-            conn.close()
             return False
         
         config = json.loads(task['task_config'])
@@ -474,19 +458,16 @@ class AutomationService:
                 self._create_backup(task['user_id'], config)
             
             # Обновляем время последнего выполнения
-            cursor.execute("""
-                UPDATE automation_tasks 
-                SET last_run = CURRENT_TIMESTAMP, next_run = ?
-                WHERE id = ?
-            """, (self._calculate_next_run(task['schedule_pattern']), task_id))
-            
-            conn.commit()
-            conn.close()
+            with self.get_db_connection() as conn:
+                conn.execute("""
+                    UPDATE automation_tasks 
+                    SET last_run = CURRENT_TIMESTAMP, next_run = ?
+                    WHERE id = ?
+                """, (self._calculate_next_run(task['schedule_pattern']), task_id))
             return True
             
         except Exception as e:
             print(f"Ошибка выполнения задачи {task_id}: {str(e)}")
-            conn.close()
             return False
     
     def _generate_auto_report(self, user_id: int, company_id: int, config: Dict):
@@ -418,6 +418,8 @@ import yaml
 import streamlit as st
 import streamlit_authenticator as stauth
 
+from db_pool import get_connection
+
 # Пример хранения пользователей и ролей (можно вынести в отдельный YAML-файл)
 users_config = {
     'credentials': {
@@ -602,7 +604,7 @@ def show_modern_navigation():
    
     # Отображение текущей компании (мультибизнес)
     if 'active_company_id' in st.session_state:
-        conn = sqlite3.connect('business_manager.db')
+        conn = get_connection(row_factory=None)
         cursor = conn.cursor()
         cursor.execute('SELECT name FROM companies WHERE id = ?', (st.session_state.active_company_id,))
         cname = cursor.fetchone()
@@ -724,7 +726,7 @@ def init_db():
         cursor.execute("ALTER TABLE inventory ADD COLUMN warehouse_id INTEGER")
     except Exception:
         pass
-    conn = sqlite3.connect('business_manager.db')
+    conn = get_connection(row_factory=None)
     cursor = conn.cursor()
    
     # Таблица пользователей с расширенными полями
@@ -1064,9 +1066,7 @@ def init_db():
 
 # Функции для работы с базой данных
 def get_db_connection():
-    conn = sqlite3.connect('business_manager.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    return get_connection()
 
 def add_user(email, password, full_name=None, phone=None, business_name=None, is_admin=False, premium_status=False):
     conn = get_db_connection()
@@ -4,6 +4,7 @@ Chat and Notification Service - Модуль корпоративного чат
 """
 
 import sqlite3
+from db_pool import get_connection
 import json
 import smtplib
 import ssl
@@ -24,79 +25,61 @@ class ChatService:
         self.db_path = db_path
     
     def get_db_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_connection(self.db_path)
     
     def create_channel(self, company_id: int, name: str, description: str = None, 
                       is_private: bool = False, created_by: int = None) -> int:
         """Создание нового канала"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO chat_channels (company_id, name, description, is_private, created_by)
-            VALUES (?, ?, ?, ?, ?)
-        """, (company_id, name, description, is_private, created_by))
-        
-        conn.commit()
-        channel_id = cursor.lastrowid
-        
-        # Добавляем создателя как администратора канала
-        if created_by:
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            
             cursor.execute("""
-                INSERT INTO channel_members (channel_id, user_id, role)
-                VALUES (?, ?, 'admin')
-            """, (channel_id, created_by))
-            conn.commit()
+                INSERT INTO chat_channels (company_id, name, description, is_private, created_by)
+                VALUES (?, ?, ?, ?, ?)
+            """, (company_id, name, description, is_private, created_by))
+            channel_id = cursor.lastrowid
+            
+            # Добавляем создателя как администратора канала
+            if created_by:
+                cursor.execute("""
+                    INSERT INTO channel_members (channel_id, user_id, role)
+                    VALUES (?, ?, 'admin')
+                """, (channel_id, created_by))
         
-        conn.close()
         return channel_id
     
     def add_user_to_channel(self, channel_id: int, user_id: int, role: str = 'member') -> bool:
         """Добавление пользователя в канал"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute("""
-                INSERT INTO channel_members (channel_id, user_id, role)
-                VALUES (?, ?, ?)
-            """, (channel_id, user_id, role))
-            conn.commit()
-            conn.close()
+            with self.get_db_connection() as conn:
+                conn.execute("""
+                    INSERT INTO channel_members (channel_id, user_id, role)
+                    VALUES (?, ?, ?)
+                """, (channel_id, user_id, role))
             return True
         except sqlite3.IntegrityError:
-            conn.close()
             return False
     
     def remove_user_from_channel(self, channel_id: int, user_id: int) -> bool:
         """Удаление пользователя из канала"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM channel_members WHERE channel_id = ? AND user_id = ?",
-                      (channel_id, user_id))
-        conn.commit()
-        conn.close()
+        with self.get_db_connection() as conn:
+            conn.execute("DELETE FROM channel_members WHERE channel_id = ? AND user_id = ?",
+                         (channel_id, user_id))
         return True
     
     def send_message(self, sender_id: int, message: str, channel_id: int = None, 
                     receiver_id: int = None, company_id: int = None, 
                     message_type: str = 'text', file_url: str = None) -> int:
         """Отправка сообщения"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO chat_messages (sender_id, channel_id, receiver_id, company_id, 
-                                     message, message_type, file_url)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (sender_id, channel_id, receiver_id, company_id, message, message_type, file_url))
-        
-        conn.commit()
-        message_id = cursor.lastrowid
-        conn.close()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO chat_messages (sender_id, channel_id, receiver_id, company_id, 
+                                         message, message_type, file_url)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (sender_id, channel_id, receiver_id, company_id, message, message_type, file_url))
+            message_id = cursor.lastrowid
         
         # Отправляем уведомления получателям
         if channel_id:
@@ -169,59 +152,51 @@ class ChatService:
     
     def edit_message(self, message_id: int, new_content: str, editor_id: int) -> bool:
         """Редактирование сообщения"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        # Проверяем, может ли пользователь редактировать сообщение
-        cursor.execute("SELECT sender_id FROM chat_messages WHERE id = ?", (message_id,))
-        message = cursor.fetchone()
-        
-        if not message or message['sender_id'] != editor_id:
-            conn.close()
-            return False
-        
-        cursor.execute("""
-            UPDATE chat_messages 
-            SET message = ?, is_edited = 1, edited_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (new_content, message_id))
-        
-        conn.commit()
-        conn.close()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Проверяем, может ли пользователь редактировать сообщение
+            cursor.execute("SELECT sender_id FROM chat_messages WHERE id = ?", (message_id,))
+            message = cursor.fetchone()
+            
+            if not message or message['sender_id'] != editor_id:
+                return False
+            
+            cursor.execute("""
+                UPDATE chat_messages 
+                SET message = ?, is_edited = 1, edited_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (new_content, message_id))
         return True
     
     def delete_message(self, message_id: int, deleter_id: int) -> bool:
         """Удаление сообщения"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        # Проверяем права на удаление
-        cursor.execute("""
-            SELECT cm.sender_id, cc.created_by, cm_member.role
-            FROM chat_messages cm
-            LEFT JOIN chat_channels cc ON cm.channel_id = cc.id
-            LEFT JOIN channel_members cm_member ON cc.id = cm_member.channel_id AND cm_member.user_id = ?
-            WHERE cm.id = ?
-        """, (deleter_id, message_id))
-        
-        result = cursor.fetchone()
-        
-        if not result:
-            conn.close()
-            return False
-        
-        # Может удалять: автор сообщения, создатель канала или админ канала
-        can_delete = (result['sender_id'] == deleter_id or 
-                     result['created_by'] == deleter_id or 
-                     result['role'] == 'admin')
-        
-        if not can_delete:
-            conn.close()
-            return False
-        
-        cursor.execute("DELETE FROM chat_messages WHERE id = ?", (message_id,))
-        conn.commit()
-        conn.close()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Проверяем права на удаление
+            cursor.execute("""
+                SELECT cm.sender_id, cc.created_by, cm_member.role
+                FROM chat_messages cm
+                LEFT JOIN chat_channels cc ON cm.channel_id = cc.id
+                LEFT JOIN channel_members cm_member ON cc.id = cm_member.channel_id AND cm_member.user_id = ?
+                WHERE cm.id = ?
+            """, (deleter_id, message_id))
+            
+            result = cursor.fetchone()
+            
+            if not result:
+                return False
+            
+            # Может удалять: автор сообщения, создатель канала или админ канала
+            can_delete = (result['sender_id'] == deleter_id or 
+                         result['created_by'] == deleter_id or 
+                         result['role'] == 'admin')
+            
+            if not can_delete:
+                return False
+            
+            cursor.execute("DELETE FROM chat_messages WHERE id = ?", (message_id,))
         return True
     
     def _notify_channel_members(self, channel_id: int, sender_id: int, message: str):
@@ -286,40 +261,30 @@ class NotificationService:
         self.email_password = "app_password"
     
     def get_db_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_connection(self.db_path)
     
     def create_notification_template(self, company_id: int, template_type: str, 
                                    subject_template: str, body_template: str) -> int:
         """Создание шаблона уведомления"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO notification_templates (company_id, template_type, subject_template, body_template)
-            VALUES (?, ?, ?, ?)
-        """, (company_id, template_type, subject_template, body_template))
-        
-        conn.commit()
-        template_id = cursor.lastrowid
-        conn.close()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO notification_templates (company_id, template_type, subject_template, body_template)
+                VALUES (?, ?, ?, ?)
+            """, (company_id, template_type, subject_template, body_template))
+            template_id = cursor.lastrowid
         return template_id
     
     def update_notification_settings(self, user_id: int, notification_type: str, 
                                    delivery_method: str, is_enabled: bool):
         """Обновление настроек уведомлений пользователя"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO notification_settings 
-            (user_id, notification_type, delivery_method, is_enabled)
-            VALUES (?, ?, ?, ?)
-        """, (user_id, notification_type, delivery_method, is_enabled))
-        
-        conn.commit()
-        conn.close()
+        with self.get_db_connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO notification_settings 
+                (user_id, notification_type, delivery_method, is_enabled)
+                VALUES (?, ?, ?, ?)
+            """, (user_id, notification_type, delivery_method, is_enabled))
     
     def get_user_notification_settings(self, user_id: int) -> Dict[str, Dict]:
         """Получение настроек уведомлений пользователя"""
@@ -484,24 +449,19 @@ class CustomerCommunicationService:
         self.notification_service = NotificationService(db_path)
     
     def get_db_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_connection(self.db_path)
     
     def create_customer_segment(self, company_id: int, name: str, description: str, 
                               criteria: Dict) -> int:
         """Создание сегмента клиентов"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO customer_segments (company_id, name, description, criteria)
-            VALUES (?, ?, ?, ?)
-        """, (company_id, name, description, json.dumps(criteria)))
-        
-        conn.commit()
-        segment_id = cursor.lastrowid
-        conn.close()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO customer_segments (company_id, name, description, criteria)
+                VALUES (?, ?, ?, ?)
+            """, (company_id, name, description, json.dumps(criteria)))
+            segment_id = cursor.lastrowid
         return segment_id
     
     def get_customers_by_segment(self, segment_id: int) -> List[Dict]:
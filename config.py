@@ -15,6 +15,12 @@ class Config:
     
     # База данных
     DATABASE_PATH = os.path.join(os.path.dirname(__file__), 'business_manager.db')
+    # Пул соединений SQLite (db_pool.py)
+    DB_POOL_MAX_IDLE = int(os.environ.get('DB_POOL_MAX_IDLE') or 8)
+    DB_MMAP_SIZE = int(os.environ.get('DB_MMAP_SIZE') or 256 * 1024 * 1024)  # 256MB
+    DB_CACHE_SIZE_KB = int(os.environ.get('DB_CACHE_SIZE_KB') or 64 * 1024)  # 64MB
+    DB_BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS') or 5000)
+    DB_SLOW_QUERY_MS = float(os.environ.get('DB_SLOW_QUERY_MS') or 200)
     
     # Настройки безопасности
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-change-in-production'
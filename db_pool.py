@@ -0,0 +1,307 @@
+"""
+DB Pool - Общий пул соединений SQLite для Streamlit-приложений
+Shared SQLite connection pool for app.py, enhanced_app.py and services
+
+Раньше каждая функция открывала sqlite3.connect('business_manager.db'):
+новое соединение, пустой page cache и rollback-журнал на каждый запрос.
+Здесь:
+- PRAGMA journal_mode=WAL — один раз на файл БД (читатели не ждут писателя)
+- mmap_size, cache_size, busy_timeout, synchronous=NORMAL — один раз
+  на соединение; соединения переиспользуются между запросами и rerun-ами
+- Каждый поток получает своё соединение (checkout из пула свободных),
+  conn.close() возвращает его в пул, незакоммиченное откатывается;
+  `with get_connection() as conn:` — commit/rollback и возврат в пул
+- Запись сериализует сам SQLite: писатели ждут друг друга до
+  busy_timeout, pool.write() берёт блокировку сразу (BEGIN IMMEDIATE).
+  Своих блокировок уровня процесса нет — потерянное соединение
+  не может навсегда занять запись
+- Время запросов: счётчики по тексту запроса, медленные — в лог
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = 'business_manager.db'
+
+class QueryTimings:
+    """Статистика времени запросов (по первой строке SQL)"""
+
+    def __init__(self, slow_ms: float):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._by_query: Dict[str, Dict] = {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.slow = 0
+
+    def record(self, sql: str, elapsed_ms: float):
+        key = ' '.join(sql.split())[:120]
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            entry = self._by_query.setdefault(
+                key, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+            )
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            if elapsed_ms >= self.slow_ms:
+                self.slow += 1
+                logger.warning(f"Медленный запрос {elapsed_ms:.1f} мс: {key}")
+
+    def top(self, limit: int = 10) -> List[Dict]:
+        """Самые затратные запросы по суммарному времени"""
+        with self._lock:
+            items = sorted(
+                self._by_query.items(),
+                key=lambda kv: kv[1]['total_ms'],
+                reverse=True,
+            )[:limit]
+        return [
+            {
+                'query': query,
+                'count': entry['count'],
+                'total_ms': round(entry['total_ms'], 2),
+                'avg_ms': round(entry['total_ms'] / entry['count'], 2),
+                'max_ms': round(entry['max_ms'], 2),
+            }
+            for query, entry in items
+        ]
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Курсор с замером времени запросов"""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection._after(sql, start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection._after(sql, start)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self.connection._after(sql_script, start)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Соединение из пула. Совместимо с sqlite3.Connection:
+    close() не закрывает файл, а возвращает соединение в пул.
+    `with conn:` — commit (или rollback при ошибке) и close().
+    """
+
+    _pool: 'SQLitePool' = None
+    _checked_out = False
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            return super().__exit__(exc_type, exc, tb)
+        finally:
+            self.close()
+
+    def close(self):
+        if self._pool is None:
+            super().close()
+            return
+        self._pool._checkin(self)
+
+    # --- Внутреннее ---
+
+    def _after(self, sql: str, start: float):
+        if self._pool is not None:
+            self._pool.timings.record(sql, (time.perf_counter() - start) * 1000)
+
+
+class SQLitePool:
+    """Пул соединений к одному файлу SQLite"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB_PATH,
+        max_idle: int = Config.DB_POOL_MAX_IDLE,
+        mmap_size: int = Config.DB_MMAP_SIZE,
+        cache_size_kb: int = Config.DB_CACHE_SIZE_KB,
+        busy_timeout_ms: int = Config.DB_BUSY_TIMEOUT_MS,
+        slow_query_ms: float = Config.DB_SLOW_QUERY_MS,
+    ):
+        self.path = path
+        self.max_idle = max_idle
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.busy_timeout_ms = busy_timeout_ms
+        self.timings = QueryTimings(slow_query_ms)
+
+        self._idle: List[PooledConnection] = []
+        self._lock = threading.Lock()
+        self._wal_ready = False
+        self._created = 0
+        self._reused = 0
+        self._in_use = 0
+
+    # --- Публичный API ---
+
+    def connect(self, row_factory=sqlite3.Row) -> PooledConnection:
+        """Соединение для текущего потока (close() вернёт его в пул)"""
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            self._in_use += 1
+            if conn is not None:
+                self._reused += 1
+        if conn is None:
+            conn = self._open()
+        conn._checked_out = True
+        conn.row_factory = row_factory
+        return conn
+
+    @contextmanager
+    def read(self):
+        """Соединение только для чтения запросов"""
+        conn = self.connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def write(self):
+        """Транзакция записи: блокировка сразу (BEGIN IMMEDIATE), commit или rollback"""
+        conn = self.connect()
+        try:
+            # Ждать другого писателя здесь (до busy_timeout), а не на
+            # первой изменяющей команде посреди транзакции
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            idle = len(self._idle)
+        timings = self.timings
+        return {
+            'path': self.path,
+            'created': self._created,
+            'reused': self._reused,
+            'idle': idle,
+            'in_use': self._in_use,
+            'queries': timings.count,
+            'total_ms': round(timings.total_ms, 2),
+            'avg_ms': round(timings.total_ms / timings.count, 2) if timings.count else 0,
+            'slow_queries': timings.slow,
+            'top_queries': timings.top(),
+        }
+
+    def close_all(self):
+        """Закрыть свободные соединения (при остановке приложения)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn._pool = None
+            conn.close()
+
+    # --- Внутреннее ---
+
+    def _open(self) -> PooledConnection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            factory=PooledConnection,
+        )
+        conn._pool = self
+        # Прагмы соединения задаются один раз, дальше оно переиспользуется
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if not self._wal_ready:
+            # journal_mode=WAL сохраняется в файле БД — достаточно одного раза
+            mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            self._wal_ready = True
+            if str(mode).lower() != 'wal':
+                logger.warning(f"SQLite {self.path}: WAL недоступен, режим {mode}")
+        with self._lock:
+            self._created += 1
+        return conn
+
+    def _checkin(self, conn: PooledConnection):
+        # Повторный close() — соединение уже в пуле
+        if not conn._checked_out:
+            return
+        conn._checked_out = False
+        try:
+            if conn.in_transaction:
+                # Как при закрытии обычного соединения — незакоммиченное теряется
+                sqlite3.Connection.rollback(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"Откат при возврате соединения: {e}")
+
+        with self._lock:
+            self._in_use = max(0, self._in_use - 1)
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn._pool = None
+        conn.close()
+
+
+# --- Глобальные пулы (по пути к файлу БД) ---
+
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: Optional[str] = None) -> SQLitePool:
+    """Пул для файла БД (один на процесс)"""
+    path = path or DEFAULT_DB_PATH
+    key = os.path.abspath(path) if path != ':memory:' else path
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = SQLitePool(path)
+        return pool
+
+
+def get_connection(path: Optional[str] = None, row_factory=sqlite3.Row) -> PooledConnection:
+    """Замена sqlite3.connect(...); row_factory=None — строки-кортежи"""
+    return get_pool(path).connect(row_factory)
+
+
+def get_db_stats(path: Optional[str] = None) -> Dict:
+    return get_pool(path).get_stats()
@@ -27,6 +27,7 @@ import openai
 from ai_services import ai_analytics, ai_assistant, automation_service
 from chat_notification_service import chat_service, notification_service, customer_communication
 from integration_service import integration_service, export_service
+from db_pool import get_connection
 from ui_components import *
 from mobile_pwa import initialize_mobile_pwa
 
@@ -176,7 +177,7 @@ except:
 
 # Расширенная инициализация базы данных
 def init_enhanced_db():
-    conn = sqlite3.connect('business_manager.db')
+    conn = get_connection(row_factory=None)
     cursor = conn.cursor()
     
     # Базовые таблицы (из оригинального кода)
@@ -428,9 +429,7 @@ def init_enhanced_db():
 
 # Функции для работы с базой данных
 def get_db_connection():
-    conn = sqlite3.connect('business_manager.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    return get_connection()
 
 def authenticate_user(email, password):
     """Аутентификация пользователя"""
@@ -489,67 +488,56 @@ def get_user_companies(user_id):
 
 def create_company(owner_id, name, description=None):
     """Создание новой компании"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO companies (owner_id, name, description) VALUES (?, ?, ?)", 
-                  (owner_id, name, description))
-    conn.commit()
-    company_id = cursor.lastrowid
-    
-    # Добавляем владельца в user_companies
-    cursor.execute("INSERT INTO user_companies (user_id, company_id, role) VALUES (?, ?, ?)", 
-                  (owner_id, company_id, 'owner'))
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO companies (owner_id, name, description) VALUES (?, ?, ?)", 
+                      (owner_id, name, description))
+        company_id = cursor.lastrowid
+        
+        # Добавляем владельца в user_companies
+        cursor.execute("INSERT INTO user_companies (user_id, company_id, role) VALUES (?, ?, ?)", 
+                      (owner_id, company_id, 'owner'))
     return company_id
 
 def invite_user_to_company(company_id, email, role, invited_by):
     """Приглашение пользователя в команду"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     # Генерируем токен приглашения
     invitation_token = str(uuid.uuid4())
     expires_at = datetime.now() + timedelta(days=7)  # Приглашение действует 7 дней
     
-    cursor.execute("""
-        INSERT INTO team_invitations (company_id, email, role, invited_by, invitation_token, expires_at)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (company_id, email, role, invited_by, invitation_token, expires_at))
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        conn.execute("""
+            INSERT INTO team_invitations (company_id, email, role, invited_by, invitation_token, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (company_id, email, role, invited_by, invitation_token, expires_at))
     
     return invitation_token
 
 def accept_invitation(invitation_token, user_id):
     """Принятие приглашения в команду"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Проверяем приглашение
-    cursor.execute("""
-        SELECT * FROM team_invitations 
-        WHERE invitation_token = ? AND expires_at > CURRENT_TIMESTAMP AND accepted_at IS NULL
-    """, (invitation_token,))
-    invitation = cursor.fetchone()
-    
-    if not invitation:
-        conn.close()
-        return False
-    
-    # Добавляем пользователя в компанию
     try:
-        cursor.execute("INSERT INTO user_companies (user_id, company_id, role) VALUES (?, ?, ?)",
-                      (user_id, invitation['company_id'], invitation['role']))
-        
-        # Отмечаем приглашение как принятое
-        cursor.execute("UPDATE team_invitations SET accepted_at = CURRENT_TIMESTAMP WHERE id = ?",
-                      (invitation['id'],))
-        conn.commit()
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Проверяем приглашение
+            cursor.execute("""
+                SELECT * FROM team_invitations 
+                WHERE invitation_token = ? AND expires_at > CURRENT_TIMESTAMP AND accepted_at IS NULL
+            """, (invitation_token,))
+            invitation = cursor.fetchone()
+            
+            if not invitation:
+                return False
+            
+            # Добавляем пользователя в компанию
+            cursor.execute("INSERT INTO user_companies (user_id, company_id, role) VALUES (?, ?, ?)",
+                          (user_id, invitation['company_id'], invitation['role']))
+            
+            # Отмечаем приглашение как принятое
+            cursor.execute("UPDATE team_invitations SET accepted_at = CURRENT_TIMESTAMP WHERE id = ?",
+                          (invitation['id'],))
         return True
     except sqlite3.IntegrityError:
-        conn.close()
         return False
 
 def get_company_team_members(company_id):
@@ -569,21 +557,15 @@ def get_company_team_members(company_id):
 
 def update_user_role_in_company(user_id, company_id, new_role):
     """Обновление роли пользователя в компании"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE user_companies SET role = ? WHERE user_id = ? AND company_id = ?",
-                  (new_role, user_id, company_id))
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        conn.execute("UPDATE user_companies SET role = ? WHERE user_id = ? AND company_id = ?",
+                     (new_role, user_id, company_id))
 
 def remove_user_from_company(user_id, company_id):
     """Удаление пользователя из компании"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM user_companies WHERE user_id = ? AND company_id = ?",
-                  (user_id, company_id))
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM user_companies WHERE user_id = ? AND company_id = ?",
+                     (user_id, company_id))
 
 def switch_user_context(user_id, target_user_id, company_id):
     """Переключение контекста пользователя (имперсонация)"""
@@ -632,12 +614,9 @@ def generate_ai_business_idea(prompt, user_id):
             generated_idea = response.choices[0].message.content
         
         # Сохраняем идею в базу
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO ai_ideas (user_id, idea_text) VALUES (?, ?)",
-                      (user_id, generated_idea))
-        conn.commit()
-        conn.close()
+        with get_db_connection() as conn:
+            conn.execute("INSERT INTO ai_ideas (user_id, idea_text) VALUES (?, ?)",
+                         (user_id, generated_idea))
         
         return generated_idea
     except Exception as e:
@@ -1132,11 +1111,8 @@ def show_ai_features():
                     st.write(rec['description'])
                     if not rec['is_read']:
                         if st.button("Отметить как прочитанное", key=f"read_{rec['id']}"):
-                            conn = get_db_connection()
-                            cursor = conn.cursor()
-                            cursor.execute("UPDATE ai_recommendations SET is_read = 1 WHERE id = ?", (rec['id'],))
-                            conn.commit()
-                            conn.close()
+                            with get_db_connection() as conn:
+                                conn.execute("UPDATE ai_recommendations SET is_read = 1 WHERE id = ?", (rec['id'],))
                             st.rerun()
         else:
             st.warning("Выберите активную компанию для получения рекомендаций")
@@ -1893,14 +1869,11 @@ def show_integrations():
                     st.success("Резервная копия создана и готова к скачиванию!")
                     
                     # Сохраняем информацию о резервной копии в БД
-                    conn = get_db_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        INSERT INTO backup_jobs (user_id, backup_type, file_size, status, completed_at)
-                        VALUES (?, ?, ?, 'completed', CURRENT_TIMESTAMP)
-                    """, (user_id, backup_scope, len(backup_data)))
-                    conn.commit()
-                    conn.close()
+                    with get_db_connection() as conn:
+                        conn.execute("""
+                            INSERT INTO backup_jobs (user_id, backup_type, file_size, status, completed_at)
+                            VALUES (?, ?, ?, 'completed', CURRENT_TIMESTAMP)
+                        """, (user_id, backup_scope, len(backup_data)))
                     
                 except Exception as e:
                     st.error(f"Ошибка создания резервной копии: {str(e)}")
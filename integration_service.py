@@ -3,7 +3,7 @@ Integration Service - Модуль интеграций и экспорта да
 Включает в себя интеграции с 1С, CRM, мессенджерами и экспорт в различные форматы
 """
 
-import sqlite3
+from db_pool import get_connection
 import json
 import pandas as pd
 import requests
@@ -25,24 +25,20 @@ class IntegrationService:
         self.db_path = db_path
     
     def get_db_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_connection(self.db_path)
     
     def create_integration(self, user_id: int, company_id: int, integration_type: str, 
                           config: Dict) -> int:
         """Создание новой интеграции"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            INSERT INTO integrations (user_id, company_id, integration_type, config_data)
-            VALUES (?, ?, ?, ?)
-        """, (user_id, company_id, integration_type, json.dumps(config)))
+            cursor.execute("""
+                INSERT INTO integrations (user_id, company_id, integration_type, config_data)
+                VALUES (?, ?, ?, ?)
+            """, (user_id, company_id, integration_type, json.dumps(config)))
         
-        conn.commit()
-        integration_id = cursor.lastrowid
-        conn.close()
+            integration_id = cursor.lastrowid
         return integration_id
     
     def get_user_integrations(self, user_id: int, company_id: int = None) -> List[Dict]:
@@ -70,17 +66,14 @@ class IntegrationService:
     
     def update_integration_config(self, integration_id: int, config: Dict) -> bool:
         """Обновление конфигурации интеграции"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            UPDATE integrations 
-            SET config_data = ?, last_sync = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (json.dumps(config), integration_id))
-        
-        conn.commit()
-        conn.close()
+            cursor.execute("""
+                UPDATE integrations 
+                SET config_data = ?, last_sync = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (json.dumps(config), integration_id))
         return True
     
     def test_integration_connection(self, integration_type: str, config: Dict) -> Dict:
@@ -139,40 +132,37 @@ class IntegrationService:
     
     def sync_data_from_1c(self, integration_id: int) -> Dict:
         """Синхронизация данных из 1С"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM integrations WHERE id = ?", (integration_id,))
-        integration = cursor.fetchone()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
         
-        if not integration:
-            return {'success': False, 'message': 'Интеграция не найдена'}
+            cursor.execute("SELECT * FROM integrations WHERE id = ?", (integration_id,))
+            integration = cursor.fetchone()
         
-        config = json.loads(integration['config_data'])
+            if not integration:
+                return {'success': False, 'message': 'Интеграция не найдена'}
         
-        # В демо-режиме генерируем тестовые данные
-        demo_products = [
-            {'name': 'Товар 1С-1', 'price': 1500, 'quantity': 100},
-            {'name': 'Товар 1С-2', 'price': 2500, 'quantity': 50},
-            {'name': 'Товар 1С-3', 'price': 3500, 'quantity': 25}
-        ]
+            config = json.loads(integration['config_data'])
         
-        # Добавляем товары в инвентарь
-        for product in demo_products:
-            cursor.execute("""
-                INSERT OR REPLACE INTO inventory (user_id, company_id, name, price, quantity, min_stock)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (integration['user_id'], integration['company_id'], 
-                  product['name'], product['price'], product['quantity'], 10))
+            # В демо-режиме генерируем тестовые данные
+            demo_products = [
+                {'name': 'Товар 1С-1', 'price': 1500, 'quantity': 100},
+                {'name': 'Товар 1С-2', 'price': 2500, 'quantity': 50},
+                {'name': 'Товар 1С-3', 'price': 3500, 'quantity': 25}
+            ]
         
-        # Логируем синхронизацию
-        cursor.execute("""
-            INSERT INTO sync_log (integration_id, sync_type, status, records_processed, completed_at)
-            VALUES (?, 'import', 'success', ?, CURRENT_TIMESTAMP)
-        """, (integration_id, len(demo_products)))
+            # Добавляем товары в инвентарь
+            for product in demo_products:
+                cursor.execute("""
+                    INSERT OR REPLACE INTO inventory (user_id, company_id, name, price, quantity, min_stock)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (integration['user_id'], integration['company_id'], 
+                      product['name'], product['price'], product['quantity'], 10))
         
-        conn.commit()
-        conn.close()
+            # Логируем синхронизацию
+            cursor.execute("""
+                INSERT INTO sync_log (integration_id, sync_type, status, records_processed, completed_at)
+                VALUES (?, 'import', 'success', ?, CURRENT_TIMESTAMP)
+            """, (integration_id, len(demo_products)))
         
         return {
             'success': True,
@@ -182,32 +172,29 @@ class IntegrationService:
     
     def export_data_to_1c(self, integration_id: int) -> Dict:
         """Экспорт данных в 1С"""
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM integrations WHERE id = ?", (integration_id,))
-        integration = cursor.fetchone()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
         
-        if not integration:
-            return {'success': False, 'message': 'Интеграция не найдена'}
+            cursor.execute("SELECT * FROM integrations WHERE id = ?", (integration_id,))
+            integration = cursor.fetchone()
         
-        # Получаем заказы для экспорта
-        cursor.execute("""
-            SELECT * FROM orders 
-            WHERE user_id = ? AND company_id = ?
-            ORDER BY created_at DESC LIMIT 100
-        """, (integration['user_id'], integration['company_id']))
+            if not integration:
+                return {'success': False, 'message': 'Интеграция не найдена'}
         
-        orders = cursor.fetchall()
+            # Получаем заказы для экспорта
+            cursor.execute("""
+                SELECT * FROM orders 
+                WHERE user_id = ? AND company_id = ?
+                ORDER BY created_at DESC LIMIT 100
+            """, (integration['user_id'], integration['company_id']))
         
-        # В демо-режиме просто логируем
-        cursor.execute("""
-            INSERT INTO sync_log (integration_id, sync_type, status, records_processed, completed_at)
-            VALUES (?, 'export', 'success', ?, CURRENT_TIMESTAMP)
-        """, (integration_id, len(orders)))
+            orders = cursor.fetchall()
         
-        conn.commit()
-        conn.close()
+            # В демо-режиме просто логируем
+            cursor.execute("""
+                INSERT INTO sync_log (integration_id, sync_type, status, records_processed, completed_at)
+                VALUES (?, 'export', 'success', ?, CURRENT_TIMESTAMP)
+            """, (integration_id, len(orders)))
         
         return {
             'success': True,
@@ -244,9 +231,7 @@ class ExportService:
         self.db_path = db_path
     
     def get_db_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_connection(self.db_path)
     
     def export_to_excel(self, user_id: int, company_id: int, data_type: str, 
                        date_from: str = None, date_to: str = None) -> bytes: